@@ -0,0 +1,185 @@
+"""Micro-benchmark of upstream body reading and JSON decoding.
+
+Compares the previous read path (16 KiB chunks joined, decoded to ``str``
+and passed to ``json.loads``) with :func:`_read_json_body`, using the
+standard library and, when installed, ``orjson``.  Payloads are synthetic
+but use the field layout of live BSN and Horizon responses, at typical and
+large sizes.
+
+Run from the repository root::
+
+    PYTHONPATH=src python benchmarks/json_decoding.py [--rounds N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from stellar_sdk import Keypair
+
+from mtla_bot import json_codec
+from mtla_bot.recommendation_gateway import (
+    DEFAULT_BSN_BODY_LIMIT,
+    DEFAULT_HORIZON_BODY_LIMIT,
+    ExternalService,
+    _JSON_MEDIA_TYPES,
+    _header,
+    _read_json_body,
+)
+
+
+ISSUER = "GCNVDZIHGX473FEI7IXCUAEXUJ4BGCKEMHF36VYP5EMS7PX2QBLAMTLA"
+
+
+def horizon_account(trustlines: int) -> bytes:
+    account = Keypair.random().public_key
+    balances = [
+        {
+            "balance": f"{index}.1234567",
+            "limit": "922337203685.4775807",
+            "buying_liabilities": "0.0000000",
+            "selling_liabilities": "0.0000000",
+            "last_modified_ledger": 51_000_000 + index,
+            "is_authorized": True,
+            "is_authorized_to_maintain_liabilities": True,
+            "asset_type": "credit_alphanum12",
+            "asset_code": f"TOKEN{index}",
+            "asset_issuer": ISSUER,
+        }
+        for index in range(trustlines)
+    ]
+    balances.append({"balance": "104.5000000", "asset_type": "native"})
+    return json.dumps({
+        "_links": {"self": {"href": f"https://horizon.stellar.org/accounts/{account}"}},
+        "id": account,
+        "account_id": account,
+        "sequence": "203000000000000042",
+        "subentry_count": trustlines,
+        "thresholds": {"low_threshold": 0, "med_threshold": 0, "high_threshold": 0},
+        "flags": {"auth_required": False, "auth_revocable": False},
+        "balances": balances,
+        "signers": [{"weight": 1, "key": account, "type": "ed25519_public_key"}],
+        "data": {},
+        "paging_token": account,
+    }).encode()
+
+
+def bsn_page(links: int) -> bytes:
+    account = Keypair.random().public_key
+    recommenders = [Keypair.random().public_key for _ in range(links)]
+    return json.dumps({
+        "account": {"id": account, "display_name": "Example"},
+        "links": {
+            "outcome": {},
+            "income": {
+                "RecommendToMTLA": {
+                    "name": "RecommendToMTLA",
+                    "is_unknown": False,
+                    "pair": None,
+                    "pair_strong": False,
+                    "links": {
+                        item: {"id": item, "short_id": item[:4], "display_name": "x"}
+                        for item in recommenders
+                    },
+                },
+            },
+        },
+        "links_count": {"outcome": 0, "income": links},
+    }).encode()
+
+
+class _Body:
+    def __init__(self, raw: bytes) -> None:
+        self._raw = raw
+        self._offset = 0
+
+    async def read(self, size: int) -> bytes:
+        chunk = self._raw[self._offset : self._offset + size]
+        self._offset += len(chunk)
+        return chunk
+
+
+class _Response:
+    def __init__(self, raw: bytes) -> None:
+        self.headers = {"Content-Type": "application/json"}
+        self.content_length = len(raw)
+        self.content = _Body(raw)
+
+
+async def legacy_read(response: _Response, limit: int) -> object:
+    """The previous ``_read_json_body``, including its header checks."""
+
+    media_type = _header(response.headers, "Content-Type").split(";", 1)[0]
+    media_type = media_type.strip().lower()
+    if media_type not in _JSON_MEDIA_TYPES and not media_type.endswith("+json"):
+        raise ValueError("not JSON")
+    if response.content_length is not None and response.content_length > limit:
+        raise ValueError("too large")
+    chunks = []
+    received = 0
+    while True:
+        chunk = await response.content.read(min(16 * 1024, limit + 1 - received))
+        if not chunk:
+            break
+        received += len(chunk)
+        if received > limit:
+            raise ValueError("too large")
+        chunks.append(chunk)
+    return json.loads(b"".join(chunks).decode("utf-8"))
+
+
+async def current_read(response: _Response, limit: int) -> object:
+    return await _read_json_body(response, ExternalService.HORIZON, limit)
+
+
+def measure(name: str, reader, raw: bytes, limit: int, rounds: int) -> None:
+    async def once() -> float:
+        response = _Response(raw)
+        started = time.perf_counter()
+        await reader(response, limit)
+        return time.perf_counter() - started
+
+    loop = asyncio.new_event_loop()
+    try:
+        durations = [loop.run_until_complete(once()) for _ in range(rounds)]
+        tracemalloc.start()
+        loop.run_until_complete(once())
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        loop.close()
+    print(
+        f"  {name:<16} median={statistics.median(durations) * 1e6:9.1f} us "
+        f"peak_alloc={peak / 1024:8.1f} KiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = [
+        ("horizon 5 trustlines", horizon_account(5), DEFAULT_HORIZON_BODY_LIMIT),
+        ("horizon 1000 trustlines", horizon_account(1000), DEFAULT_HORIZON_BODY_LIMIT),
+        ("bsn 10 links", bsn_page(10), DEFAULT_BSN_BODY_LIMIT),
+        ("bsn 100 links", bsn_page(100), DEFAULT_BSN_BODY_LIMIT),
+    ]
+    fast_loads = json_codec.loads
+    for title, raw, limit in payloads:
+        print(f"{title} ({len(raw) / 1024:.1f} KiB)")
+        measure("legacy", legacy_read, raw, limit, args.rounds)
+        json_codec.loads = json_codec._stdlib_loads
+        measure("buffer+json", current_read, raw, limit, args.rounds)
+        json_codec.loads = fast_loads
+        if json_codec.JSON_BACKEND != "json":
+            measure(f"buffer+{json_codec.JSON_BACKEND}", current_read, raw, limit, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
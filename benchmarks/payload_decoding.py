@@ -0,0 +1,147 @@
+"""Micro-benchmark of Horizon and BSN payload decoding.
+
+Compares the previous candidate path (the account validated by the
+gateway, then its balances walked again by ``StellarClient`` and the
+balance string parsed a second time) with :func:`decode_horizon_account`,
+and the previous BSN parser with its abstract ``Mapping`` checks against
+:func:`decode_bsn_recommendations`.  Bodies are decoded once up front, so
+only the schema work is measured.
+
+Run from the repository root::
+
+    PYTHONPATH=src python benchmarks/payload_decoding.py [--rounds N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable, Mapping, Sequence
+from decimal import Decimal, InvalidOperation
+
+from json_decoding import ISSUER, bsn_page, horizon_account
+from stellar_sdk import Keypair
+
+from mtla_bot import recommendation_gateway as gateway
+from mtla_bot.recommendation_gateway import (
+    ExternalService,
+    decode_bsn_recommendations,
+    decode_horizon_account,
+)
+
+
+ASSET_CODE = "TOKEN3"
+
+
+def _field(balance: object, name: str) -> object:
+    if isinstance(balance, Mapping):
+        return balance.get(name)
+    return getattr(balance, name, None)
+
+
+def legacy_candidate(payload: object, account_id: str) -> tuple[bool, Decimal]:
+    """The previous gateway validation plus ``StellarClient._extract_mtlap``."""
+
+    if not isinstance(payload, Mapping):
+        raise ValueError("not an object")
+    if payload.get("account_id") != account_id:
+        raise ValueError("account_id")
+    if not isinstance(payload.get("balances"), list):
+        raise ValueError("balances")
+
+    balances = payload.get("balances")
+    if not isinstance(balances, Sequence) or isinstance(balances, (str, bytes)):
+        raise ValueError("invalid_horizon_balances")
+    matches: list[str] = []
+    for balance in balances:
+        if (
+            _field(balance, "asset_code") != ASSET_CODE
+            or _field(balance, "asset_issuer") != ISSUER
+        ):
+            continue
+        if _field(balance, "asset_type") != "credit_alphanum12":
+            raise ValueError("invalid_mtlap_asset_type")
+        raw_balance = _field(balance, "balance")
+        if not isinstance(raw_balance, str):
+            raise ValueError("invalid_mtlap_balance")
+        try:
+            parsed_balance = Decimal(raw_balance)
+        except InvalidOperation as exc:
+            raise ValueError("invalid_mtlap_balance") from exc
+        if not parsed_balance.is_finite() or parsed_balance < 0:
+            raise ValueError("invalid_mtlap_balance")
+        matches.append(raw_balance)
+    if len(matches) > 1:
+        raise ValueError("duplicate_mtlap_balance")
+    raw = matches[0] if matches else "0"
+    return bool(matches), Decimal(raw)
+
+
+def current_candidate(payload: object, account_id: str) -> tuple[bool, Decimal]:
+    account = decode_horizon_account(
+        payload,
+        account_id,
+        asset_code=ASSET_CODE,
+        asset_issuer=ISSUER,
+    )
+    return account.has_trustline, account.mtlap_balance
+
+
+def legacy_require_mapping(value: object, service: ExternalService, name: str):
+    if not isinstance(value, Mapping):
+        raise gateway._invalid_response(service, f"{name} must be an object")
+    return value
+
+
+def measure(name: str, decode: Callable[[], object], rounds: int) -> None:
+    durations = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        decode()
+        durations.append(time.perf_counter() - started)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = decode()
+    after = tracemalloc.take_snapshot()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    print(
+        f"  {name:<8} median={statistics.median(durations) * 1e6:9.1f} us "
+        f"peak_alloc={peak / 1024:7.1f} KiB retained_blocks={blocks}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    for trustlines in (5, 1000):
+        payload = json.loads(horizon_account(trustlines))
+        account_id = payload["account_id"]
+        print(f"horizon candidate, {trustlines} trustlines")
+        measure("legacy", lambda: legacy_candidate(payload, account_id), args.rounds)
+        measure("typed", lambda: current_candidate(payload, account_id), args.rounds)
+
+    exact_require_mapping = gateway._require_mapping
+    for links in (10, 100):
+        payload = json.loads(bsn_page(links))
+        candidate = payload["account"]["id"]
+        print(f"bsn, {links} links")
+        gateway._require_mapping = legacy_require_mapping
+        measure("legacy", lambda: decode_bsn_recommendations(payload, candidate), args.rounds)
+        gateway._require_mapping = exact_require_mapping
+        measure("typed", lambda: decode_bsn_recommendations(payload, candidate), args.rounds)
+
+    # The recommender key check dominates BSN parsing; print it for scale.
+    key = Keypair.random().public_key
+    measure("strkey", lambda: gateway._is_public_key(key), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
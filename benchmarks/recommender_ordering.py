@@ -0,0 +1,171 @@
+"""Horizon calls per candidate with and without recommender ordering hints.
+
+Builds a synthetic recommender population in which a minority of popular,
+active members hold enough MTLAP and appear in many candidates' BSN lists,
+then runs every candidate through :class:`RecommendationGateway` against an
+in-process fake BSN/Horizon with small random latencies.  The same candidate
+stream is checked in BSN order and with :class:`RecommenderHints`.
+
+Run from the repository root::
+
+    PYTHONPATH=src python benchmarks/recommender_ordering.py [--candidates N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+
+from stellar_sdk import Keypair
+
+from mtla_bot.account_cache import AccountCache
+from mtla_bot.recommendation_gateway import RecommendationGateway
+from mtla_bot.recommender_hints import RecommenderHints
+
+
+ASSET_CODE = "MTLAP"
+ASSET_ISSUER = "GCNVDZIHGX473FEI7IXCUAEXUJ4BGCKEMHF36VYP5EMS7PX2QBLAMTLA"
+
+
+class _Body:
+    def __init__(self, body: bytes) -> None:
+        self._body = body
+
+    async def read(self, _size: int) -> bytes:
+        body, self._body = self._body, b""
+        return body
+
+
+class _Response:
+    def __init__(self, payload: object, latency: float) -> None:
+        self.status = 200
+        self.headers = {"Content-Type": "application/json"}
+        raw = json.dumps(payload).encode()
+        self.content_length = len(raw)
+        self.content = _Body(raw)
+        self._latency = latency
+
+    async def __aenter__(self) -> "_Response":
+        await asyncio.sleep(self._latency)
+        return self
+
+    async def __aexit__(self, *_exc_info) -> None:
+        return None
+
+
+class SyntheticUpstreams:
+    """Fake aiohttp session serving BSN lists and Horizon balances."""
+
+    closed = False
+
+    def __init__(self, lists, balances, rng: random.Random, latency: float) -> None:
+        self._lists = lists
+        self._balances = balances
+        self._rng = rng
+        self._latency = latency
+        self.horizon_calls = 0
+
+    def get(self, url, **_kwargs) -> _Response:
+        path = url.path
+        account = path.rsplit("/", 1)[-1]
+        latency = self._latency * self._rng.uniform(0.5, 2.0)
+        if "horizon" in url.host:
+            self.horizon_calls += 1
+            return _Response(
+                {
+                    "account_id": account,
+                    "balances": [{
+                        "asset_type": "credit_alphanum12",
+                        "asset_code": ASSET_CODE,
+                        "asset_issuer": ASSET_ISSUER,
+                        "balance": self._balances[account],
+                    }],
+                },
+                latency,
+            )
+        recommenders = self._lists[account]
+        return _Response(
+            {
+                "account": {"id": account},
+                "links": {"outcome": [], "income": {"RecommendToMTLA": {
+                    "name": "RecommendToMTLA",
+                    "links": {item: {"id": item} for item in recommenders},
+                }}},
+                "links_count": {"outcome": 0, "income": len(recommenders)},
+            },
+            latency,
+        )
+
+
+def build_population(args, rng: random.Random):
+    recommenders = [Keypair.random().public_key for _ in range(args.recommenders)]
+    # Zipf-like popularity; popular recommenders are more often qualified.
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(recommenders))]
+    balances = {}
+    for rank, recommender in enumerate(recommenders):
+        qualified_probability = 0.6 if rank < len(recommenders) // 20 else 0.1
+        balances[recommender] = (
+            "5.0000000" if rng.random() < qualified_probability else "0.0000000"
+        )
+    lists = {}
+    for _ in range(args.candidates):
+        size = 1 + min(29, int(rng.expovariate(1 / 4)))
+        chosen = set()
+        while len(chosen) < min(size, len(recommenders)):
+            chosen.add(rng.choices(recommenders, weights)[0])
+        order = list(chosen)
+        rng.shuffle(order)
+        lists[Keypair.random().public_key] = order
+    return lists, balances
+
+
+async def run(lists, balances, args, *, hints: RecommenderHints | None) -> Counter:
+    session = SyntheticUpstreams(lists, balances, random.Random(7), args.latency)
+    gateway = RecommendationGateway(
+        session,  # type: ignore[arg-type]
+        asset_code=ASSET_CODE,
+        asset_issuer=ASSET_ISSUER,
+        account_cache=AccountCache() if args.cache else None,
+        recommender_hints=hints,
+    )
+    per_candidate = []
+    outcomes = Counter()
+    started = time.perf_counter()
+    for candidate in lists:
+        before = session.horizon_calls
+        result = await gateway.check(candidate)
+        per_candidate.append(session.horizon_calls - before)
+        outcomes[result.status.value] += 1
+    elapsed = time.perf_counter() - started
+    name = "hinted" if hints is not None else "bsn-order"
+    print(
+        f"{name:<10} horizon_calls={session.horizon_calls:>7,} "
+        f"per_candidate mean={statistics.mean(per_candidate):5.2f} "
+        f"p90={sorted(per_candidate)[int(len(per_candidate) * 0.9)]:>3} "
+        f"time={elapsed:6.2f}s outcomes={dict(outcomes)}"
+    )
+    return outcomes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=2_000)
+    parser.add_argument("--recommenders", type=int, default=1_500)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--cache", action="store_true", help="add an AccountCache")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    lists, balances = build_population(args, random.Random(args.seed))
+    plain = asyncio.run(run(lists, balances, args, hints=None))
+    hinted = asyncio.run(run(lists, balances, args, hints=RecommenderHints()))
+    assert plain == hinted, "ordering must never change a verdict"
+
+
+if __name__ == "__main__":
+    main()
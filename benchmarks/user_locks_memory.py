@@ -0,0 +1,84 @@
+"""Memory benchmark for per-user lock bookkeeping.
+
+Simulates one million distinct Telegram users passing through the bot with
+bounded concurrency and compares the retained memory of the previous
+``dict[int, asyncio.Lock]`` approach with :class:`UserLockRegistry`.
+
+Run from the repository root::
+
+    PYTHONPATH=src python benchmarks/user_locks_memory.py [--users N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from mtla_bot.user_locks import UserLockRegistry
+
+
+async def legacy_locks(users: int, concurrency: int) -> tuple[int, int]:
+    locks: dict[int, asyncio.Lock] = {}
+    active: dict[int, asyncio.Task] = {}
+
+    async def handle(user_id: int) -> None:
+        lock = locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            active[user_id] = asyncio.current_task()
+            await asyncio.sleep(0)
+            active.pop(user_id, None)
+
+    await run_users(handle, users, concurrency)
+    return len(locks), tracemalloc.get_traced_memory()[0]
+
+
+async def registry_locks(users: int, concurrency: int) -> tuple[int, int]:
+    registry = UserLockRegistry()
+
+    async def handle(user_id: int) -> None:
+        async with registry.hold(user_id, asyncio.current_task()):
+            await asyncio.sleep(0)
+
+    await run_users(handle, users, concurrency)
+    return len(registry), tracemalloc.get_traced_memory()[0]
+
+
+async def run_users(handle, users: int, concurrency: int) -> None:
+    for start in range(0, users, concurrency):
+        await asyncio.gather(
+            *(handle(user_id) for user_id in range(start, min(start + concurrency, users)))
+        )
+
+
+def measure(name, scenario, users: int, concurrency: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    retained_entries, retained = asyncio.run(scenario(users, concurrency))
+    elapsed = time.perf_counter() - started
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<10} entries={retained_entries:>9,} "
+        f"retained={(retained - baseline) / 2**20:8.1f} MiB "
+        f"peak={(peak - baseline) / 2**20:8.1f} MiB "
+        f"time={elapsed:6.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    measure("legacy", legacy_locks, args.users, args.concurrency)
+    measure("registry", registry_locks, args.users, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark for the ``/stats`` queries on a synthetic collection.
+
+Fills a scratch collection with synthetic user documents (500,000 by
+default) and compares the previous three ``count_documents`` calls plus a
+``$group`` aggregation with the single ``$facet`` aggregation and with a
+cached snapshot served by :class:`AdminTools`.
+
+Needs a reachable MongoDB; the scratch database is dropped afterwards
+unless ``--keep`` is given.  Run from the repository root::
+
+    PYTHONPATH=src python benchmarks/user_statistics.py \\
+        --uri mongodb://localhost:27017 [--documents N] [--rounds N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+from mtla_bot.admin_tools import AdminTools
+from mtla_bot.database import INDEXES, user_statistics_from_facets, user_statistics_pipeline
+
+
+STATES = (
+    "checking_username",
+    "agreement",
+    "entering_address",
+    "checking_address",
+    "finalizing",
+    "completed",
+)
+
+
+def populate(collection, documents: int, batch: int = 10_000) -> None:
+    if collection.estimated_document_count() == documents:
+        return
+    collection.drop()
+    for keys, options in INDEXES:
+        collection.create_index(keys, **options)
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    for start in range(0, documents, batch):
+        collection.insert_many([
+            {
+                "user_id": user_id,
+                "username": f"user{user_id}",
+                "language": "ru",
+                "state": rng.choice(STATES),
+                "progress": {"username_check": True, "agreement": True},
+                "created_at": now - timedelta(days=rng.randint(0, 720)),
+                "last_activity": now - timedelta(minutes=rng.randint(0, 720 * 1440)),
+            }
+            for user_id in range(start, min(start + batch, documents))
+        ], ordered=False)
+
+
+def legacy_statistics(collection) -> dict:
+    active_since = datetime.utcnow() - timedelta(days=1)
+    total_users = collection.count_documents({})
+    completed_users = collection.count_documents({"state": "completed"})
+    active_users = collection.count_documents({"last_activity": {"$gte": active_since}})
+    state_stats = {
+        doc["_id"]: doc["count"]
+        for doc in collection.aggregate(
+            [{"$group": {"_id": "$state", "count": {"$sum": 1}}}]
+        )
+    }
+    return {
+        "total_users": total_users,
+        "completed_users": completed_users,
+        "active_users": active_users,
+        "state_distribution": state_stats,
+    }
+
+
+def facet_statistics(collection) -> dict:
+    return user_statistics_from_facets(
+        list(collection.aggregate(user_statistics_pipeline()))
+    )
+
+
+def measure(name: str, call, rounds: int) -> None:
+    durations = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - started)
+    print(
+        f"{name:<8} median={statistics.median(durations) * 1000:9.2f} ms "
+        f"max={max(durations) * 1000:9.2f} ms rounds={rounds}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="mtla_join_bot_benchmark")
+    parser.add_argument("--documents", type=int, default=500_000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    collection = client[args.database]["users"]
+    try:
+        started = time.perf_counter()
+        populate(collection, args.documents)
+        print(
+            f"collection ready: {collection.estimated_document_count():,} documents "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+        legacy = legacy_statistics(collection)
+        facet = facet_statistics(collection)
+        assert legacy["total_users"] == facet["total_users"]
+        assert legacy["state_distribution"] == facet["state_distribution"]
+
+        admin = AdminTools.__new__(AdminTools)
+        admin.state_manager = type(
+            "BenchmarkState",
+            (),
+            {"get_user_statistics": lambda _self: facet_statistics(collection)},
+        )()
+
+        measure("legacy", lambda: legacy_statistics(collection), args.rounds)
+        measure("facet", lambda: facet_statistics(collection), args.rounds)
+        measure("cached", admin.get_user_statistics, args.rounds)
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Bounded in-process cache for Horizon account lookups.
+
+Popular recommenders appear in the BSN links of many candidates, so the same
+account is otherwise fetched again and again during an onboarding wave.  The
+cache stores decoded accounts and, separately, confirmed 404 answers.
+Transport failures are never cached.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .eligibility import AccountSnapshot
+
+
+DEFAULT_ACCOUNT_CACHE_SIZE = 4096
+DEFAULT_ACCOUNT_CACHE_TTL = 60.0
+DEFAULT_MISSING_ACCOUNT_TTL = 15.0
+
+
+@dataclass(frozen=True)
+class _Entry:
+    account: AccountSnapshot | None
+    expires_at: float
+
+
+class AccountCache:
+    """LRU cache of Horizon accounts with separate TTLs for hits and 404s."""
+
+    def __init__(
+        self,
+        *,
+        max_size: int = DEFAULT_ACCOUNT_CACHE_SIZE,
+        ttl: float = DEFAULT_ACCOUNT_CACHE_TTL,
+        missing_ttl: float = DEFAULT_MISSING_ACCOUNT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if missing_ttl < 0:
+            raise ValueError("missing_ttl must not be negative")
+        self._max_size = max_size
+        self._ttl = ttl
+        self._missing_ttl = missing_ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, account_id: str) -> tuple[bool, AccountSnapshot | None]:
+        """Return ``(found, account)``; ``account`` is ``None`` for a cached 404."""
+
+        entry = self._entries.get(account_id)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        if entry.expires_at <= self._clock():
+            del self._entries[account_id]
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(account_id)
+        self.hits += 1
+        return True, entry.account
+
+    def store(self, account_id: str, account: AccountSnapshot | None) -> None:
+        """Remember a validated account, or ``None`` for a confirmed 404."""
+
+        ttl = self._ttl if account is not None else self._missing_ttl
+        if ttl <= 0:
+            self._entries.pop(account_id, None)
+            return
+        self._entries[account_id] = _Entry(account, self._clock() + ttl)
+        self._entries.move_to_end(account_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, account_id: str) -> None:
+        self._entries.pop(account_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_load(
+        self,
+        account_id: str,
+        load: Callable[[], Awaitable[AccountSnapshot | None]],
+        *,
+        use_cache: bool = True,
+    ) -> tuple[AccountSnapshot | None, bool]:
+        """Serve a fresh entry or await ``load`` and remember its answer.
+
+        Returns ``(account, cached)``, where ``cached`` tells whether the
+        entry answered.  ``use_cache=False`` skips the read but still
+        refreshes the entry, so a forced fresh lookup also benefits later
+        cached readers.
+        """
+
+        if use_cache:
+            found, account = self.lookup(account_id)
+            if found:
+                return account, True
+        account = await load()
+        self.store(account_id, account)
+        return account, False
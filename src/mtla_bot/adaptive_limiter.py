@@ -0,0 +1,111 @@
+"""Adaptive concurrency limit for Horizon requests.
+
+Public Horizon rate-limits with ``429`` while a private instance can take far
+more parallel reads, so a fixed number of slots is wrong for one of them.
+The limiter follows AIMD: each fast answer widens the window by one slot per
+window's worth of successes, and an overload signal (``429``, ``503``, a
+timeout or an answer slower than the latency target) halves it.  A
+``Retry-After`` also holds back new requests until it has passed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+
+DEFAULT_LIMIT_FLOOR = 1
+DEFAULT_LIMIT_CEILING = 16
+DEFAULT_LATENCY_TARGET = 1.0
+DEFAULT_DECREASE_FACTOR = 0.5
+DEFAULT_MAX_PAUSE = 10.0
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency window between ``floor`` and ``ceiling`` slots.
+
+    Use as ``async with limiter:`` around a request and report each attempt
+    with :meth:`record_success` or :meth:`record_overload`.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int = 4,
+        floor: int = DEFAULT_LIMIT_FLOOR,
+        ceiling: int = DEFAULT_LIMIT_CEILING,
+        latency_target: float = DEFAULT_LATENCY_TARGET,
+        decrease_factor: float = DEFAULT_DECREASE_FACTOR,
+        max_pause: float = DEFAULT_MAX_PAUSE,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[object]] = asyncio.sleep,
+    ) -> None:
+        if not 1 <= floor <= ceiling:
+            raise ValueError("floor must be between 1 and ceiling")
+        if not floor <= initial <= ceiling:
+            raise ValueError("initial must be between floor and ceiling")
+        if latency_target <= 0:
+            raise ValueError("latency_target must be positive")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        if max_pause < 0:
+            raise ValueError("max_pause must not be negative")
+        self.floor = floor
+        self.ceiling = ceiling
+        self._limit = float(initial)
+        self._latency_target = latency_target
+        self._decrease_factor = decrease_factor
+        self._max_pause = max_pause
+        self._clock = clock
+        self._sleep = sleep
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._condition = asyncio.Condition()
+
+    @property
+    def window(self) -> int:
+        """Requests currently allowed at once."""
+
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def __aenter__(self) -> None:
+        while (delay := self._paused_until - self._clock()) > 0:
+            await self._sleep(delay)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.window)
+            self._in_flight += 1
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def record_success(self, latency: float) -> None:
+        """Widen the window after a fast answer; a slow one counts as overload."""
+
+        if latency > self._latency_target:
+            self.record_overload()
+            return
+        self._limit = min(float(self.ceiling), self._limit + 1 / self._limit)
+
+    def record_overload(self, retry_after: float | None = None) -> None:
+        """Halve the window, at most once per latency target interval."""
+
+        now = self._clock()
+        if retry_after is not None and retry_after > 0:
+            self._paused_until = max(
+                self._paused_until,
+                now + min(retry_after, self._max_pause),
+            )
+        # Every request in flight during one overload reports it; counting
+        # them all would collapse the window to the floor at once.
+        if now - self._last_decrease < self._latency_target:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.floor), self._limit * self._decrease_factor)
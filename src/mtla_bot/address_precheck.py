@@ -0,0 +1,169 @@
+"""Speculative address checks for returning candidates.
+
+The BSN and Horizon check only starts once a candidate submits an address,
+and can take half a minute.  A candidate who restarts usually submits the
+same address again, so the address from the previous attempt is checked in
+the background while the agreement is being read.  When the same address
+arrives for the same attempt, the stored snapshot is used if it is recent
+enough; anything else falls back to a normal check.  A snapshot that
+finished within the confirmation age counts as fresh.  An older one is
+marked ``cached`` like any other cached answer, so it can reject at once but
+an acceptance is still decided on a fresh read.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRECHECK_MAX_AGE = 300.0
+DEFAULT_PRECHECK_CONFIRM_AGE = 30.0
+DEFAULT_MAX_PRECHECKS = 500
+
+
+@dataclass
+class _Precheck:
+    attempt_id: str
+    address: str
+    task: asyncio.Task[dict[str, Any]]
+    finished_at: float | None = None
+
+
+class AddressPrechecks:
+    """Background candidate snapshots keyed by user and attempt.
+
+    ``load`` should return a live (uncached) snapshot: a pre-check that is
+    used counts as the check of the submitted address.  At most
+    ``max_entries`` pre-checks are kept; the oldest is cancelled first.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str], Awaitable[dict[str, Any]]],
+        *,
+        max_age: float = DEFAULT_PRECHECK_MAX_AGE,
+        confirm_age: float = DEFAULT_PRECHECK_CONFIRM_AGE,
+        max_entries: int = DEFAULT_MAX_PRECHECKS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_age <= 0:
+            raise ValueError("max_age must be positive")
+        if not 0 <= confirm_age <= max_age:
+            raise ValueError("confirm_age must be between zero and max_age")
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self._load = load
+        self._max_age = max_age
+        self._confirm_age = confirm_age
+        self._max_entries = max_entries
+        self._clock = clock
+        self._previous_addresses: OrderedDict[int, str] = OrderedDict()
+        self._prechecks: OrderedDict[int, _Precheck] = OrderedDict()
+
+    def remember(self, user_id: int, address: str | None) -> None:
+        """Keep the address of the attempt that is about to be reset."""
+
+        self.discard(user_id)
+        if not address:
+            return
+        self._previous_addresses[user_id] = address
+        if len(self._previous_addresses) > self._max_entries:
+            self._previous_addresses.popitem(last=False)
+
+    def start(self, user_id: int, attempt_id: str) -> bool:
+        """Start checking the remembered address for ``attempt_id``."""
+
+        address = self._previous_addresses.pop(user_id, None)
+        if address is None:
+            return False
+        self._cancel(user_id)
+        task = asyncio.create_task(
+            self._load(address),
+            name=f"mtla-address-precheck-{user_id}",
+        )
+        precheck = _Precheck(attempt_id, address, task)
+        task.add_done_callback(lambda done: self._finished(precheck, done))
+        self._prechecks[user_id] = precheck
+        if len(self._prechecks) > self._max_entries:
+            _oldest_user, oldest = self._prechecks.popitem(last=False)
+            oldest.task.cancel()
+        return True
+
+    async def take(
+        self,
+        user_id: int,
+        attempt_id: str | None,
+        address: str,
+    ) -> dict[str, Any] | None:
+        """Return the pre-checked snapshot of ``address``, or ``None``.
+
+        A check still running is awaited.  A different address or attempt, a
+        failed check or a snapshot older than ``max_age`` returns ``None``.
+        A snapshot older than ``confirm_age`` is returned as ``cached``.
+        """
+
+        precheck = self._prechecks.pop(user_id, None)
+        if precheck is None:
+            return None
+        if precheck.attempt_id != attempt_id or precheck.address != address:
+            precheck.task.cancel()
+            return None
+        try:
+            account_info = await asyncio.shield(precheck.task)
+        except asyncio.CancelledError:
+            if precheck.task.cancelled():
+                return None
+            precheck.task.cancel()
+            raise
+        except Exception:
+            # Already logged when the task finished.
+            return None
+        assert precheck.finished_at is not None
+        age = self._clock() - precheck.finished_at
+        if age > self._max_age:
+            return None
+        if age > self._confirm_age:
+            return {**account_info, "cached": True}
+        return account_info
+
+    def discard(self, user_id: int) -> None:
+        self._previous_addresses.pop(user_id, None)
+        self._cancel(user_id)
+
+    async def close(self) -> None:
+        """Cancel every pre-check still running."""
+
+        prechecks = list(self._prechecks.values())
+        self._prechecks.clear()
+        self._previous_addresses.clear()
+        for precheck in prechecks:
+            precheck.task.cancel()
+        await asyncio.gather(
+            *(precheck.task for precheck in prechecks),
+            return_exceptions=True,
+        )
+
+    def _cancel(self, user_id: int) -> None:
+        precheck = self._prechecks.pop(user_id, None)
+        if precheck is not None:
+            precheck.task.cancel()
+
+    def _finished(
+        self,
+        precheck: _Precheck,
+        task: asyncio.Task[dict[str, Any]],
+    ) -> None:
+        precheck.finished_at = self._clock()
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                "Address pre-check failed",
+                exc_info=task.exception(),
+            )
@@ -1,134 +1,265 @@
 import logging
-from typing import List, Dict
-from .user_states import UserStateManager
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from .admin_config import STATS_SETTINGS
+from .database import PageCursor
+from .user_states import AsyncUserStateManager, UserStateManager
 from . import messages
 
 logger = logging.getLogger(__name__)
 
+INCOMPLETE_PAGE_SIZE = 20
+REMINDER_PAGE_SIZE = 15
+_EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass(frozen=True)
+class ReportPage:
+    """One page of an administrative list and the key of the next page."""
+
+    text: str
+    next_cursor: Optional[PageCursor] = None
+
+
+def encode_page_cursor(cursor: PageCursor) -> str:
+    """Serialize a page key compactly enough for Telegram callback data."""
+
+    last_activity, object_id = cursor
+    milliseconds = (last_activity - _EPOCH) // timedelta(milliseconds=1)
+    return f"{milliseconds}:{object_id}"
+
+
+def decode_page_cursor(token: str) -> Optional[PageCursor]:
+    milliseconds, _, object_id = token.partition(":")
+    try:
+        return (
+            _EPOCH + timedelta(milliseconds=int(milliseconds)),
+            ObjectId(object_id),
+        )
+    except (InvalidId, TypeError, ValueError, OverflowError):
+        return None
+
+
+@dataclass(frozen=True)
+class StatisticsSnapshot:
+    """Statistics figures with the moment they were read."""
+
+    stats: Dict
+    taken_at: datetime
+    monotonic_at: float
+
+    @classmethod
+    def take(cls, stats: Dict) -> "StatisticsSnapshot":
+        return cls(stats, datetime.utcnow(), time.monotonic())
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.monotonic_at
+
+
+def _split_page(users: List[Dict], size: int) -> tuple[List[Dict], Optional[PageCursor]]:
+    if len(users) <= size:
+        return users, None
+    page = users[:size]
+    return page, (page[-1]["last_activity"], page[-1]["_id"])
+
 class AdminTools:
     """Инструменты для администраторов бота"""
+
+    # /stats is served from this snapshot until it is older than
+    # STATS_SETTINGS['cache_seconds'].
+    _statistics_snapshot: Optional[StatisticsSnapshot] = None
     
     def __init__(self, state_manager: UserStateManager | None = None):
         self.state_manager = state_manager or UserStateManager()
         self._owns_state_manager = state_manager is None
+
+    def _cached_statistics(self) -> Optional[StatisticsSnapshot]:
+        snapshot = self._statistics_snapshot
+        max_age = STATS_SETTINGS.get('cache_seconds', 60)
+        if snapshot is not None and snapshot.age <= max_age:
+            return snapshot
+        return None
+
+    def _statistics_unavailable(self) -> str:
+        # A stale snapshot with its age beats no figures during an outage.
+        if self._statistics_snapshot is not None:
+            return self._format_statistics(self._statistics_snapshot)
+        return "Статистика временно недоступна из-за ошибки базы данных"
     
     def get_user_statistics(self) -> str:
         """Получает статистику по пользователям в читаемом виде"""
-        try:
-            stats = self.state_manager.get_user_statistics()
-            
-            if not stats:
-                return "Не удалось получить статистику"
-            
-            result = "📊 Статистика пользователей:\n\n"
-            result += f"👥 Всего пользователей: {stats.get('total_users', 0)}\n"
-            result += f"✅ Завершили процесс: {stats.get('completed_users', 0)}\n"
-            result += f"🔄 Активных за 24 часа: {stats.get('active_users', 0)}\n\n"
-            
-            result += "📈 Распределение по состояниям:\n"
-            state_dist = stats.get('state_distribution', {})
-            for state, count in state_dist.items():
-                state_name = self._get_state_name(state)
-                result += f"  {state_name}: {count}\n"
-            
-            return result
-        except Exception:
-            logger.exception("Error getting statistics")
-            return "Статистика временно недоступна из-за ошибки базы данных"
+        snapshot = self._cached_statistics()
+        if snapshot is None:
+            try:
+                stats = self.state_manager.get_user_statistics()
+            except Exception:
+                logger.exception("Error getting statistics")
+                return self._statistics_unavailable()
+            snapshot = self._statistics_snapshot = StatisticsSnapshot.take(stats)
+        return self._format_statistics(snapshot)
+
+    def _format_statistics(self, snapshot: StatisticsSnapshot) -> str:
+        stats = snapshot.stats
+        if not stats:
+            return "Не удалось получить статистику"
+        
+        result = "📊 Статистика пользователей:\n\n"
+        result += f"👥 Всего пользователей: {stats.get('total_users', 0)}\n"
+        result += f"✅ Завершили процесс: {stats.get('completed_users', 0)}\n"
+        result += f"🔄 Активных за 24 часа: {stats.get('active_users', 0)}\n\n"
+        
+        result += "📈 Распределение по состояниям:\n"
+        state_dist = stats.get('state_distribution', {})
+        for state, count in state_dist.items():
+            state_name = self._get_state_name(state)
+            result += f"  {state_name}: {count}\n"
+
+        date_format = STATS_SETTINGS.get('date_format', '%Y-%m-%d %H:%M:%S')
+        result += (
+            f"\n🕒 Данные на {snapshot.taken_at.strftime(date_format)} UTC "
+            f"({int(snapshot.age)} с назад)\n"
+        )
+        
+        return result
     
-    def get_incomplete_users_report(self) -> str:
-        """Получает отчет о незавершенных пользователях"""
+    def get_incomplete_users_report(
+        self,
+        after: Optional[PageCursor] = None,
+    ) -> ReportPage:
+        """Получает страницу отчета о незавершенных пользователях"""
         try:
-            incomplete_users = self.state_manager.get_incomplete_users()
-            
-            if not incomplete_users:
-                return "Все пользователи завершили процесс! 🎉"
-            
-            result = f"📋 Незавершенные пользователи ({len(incomplete_users)}):\n\n"
-            
-            for user in incomplete_users[:20]:  # Показываем только первые 20
-                username = user.get('username')
-                identity = f"@{username}" if username else f"Telegram ID {user.get('user_id', 'Unknown')}"
-                state = user.get('state', 'Unknown')
-                state_name = self._get_state_name(state)
-                created = user.get('created_at', 'Unknown')
-                
-                result += f"👤 {identity}\n"
-                result += f"   📍 Состояние: {state_name}\n"
-                result += f"   📅 Создан: {created}\n\n"
-            
-            if len(incomplete_users) > 20:
-                result += f"... и еще {len(incomplete_users) - 20} пользователей"
-            
-            return result
+            return self._format_incomplete_users(
+                self.state_manager.get_incomplete_users(
+                    INCOMPLETE_PAGE_SIZE + 1,
+                    after,
+                ),
+                self.state_manager.count_incomplete_users(),
+            )
         except Exception:
             logger.exception("Error getting incomplete users")
-            return "Отчёт временно недоступен из-за ошибки базы данных"
+            return ReportPage("Отчёт временно недоступен из-за ошибки базы данных")
+
+    def _format_incomplete_users(
+        self,
+        incomplete_users: List[Dict],
+        total: int,
+    ) -> ReportPage:
+        if not total:
+            return ReportPage("Все пользователи завершили процесс! 🎉")
+        if not incomplete_users:
+            return ReportPage("Больше незавершенных пользователей нет")
+
+        page, next_cursor = _split_page(incomplete_users, INCOMPLETE_PAGE_SIZE)
+        result = f"📋 Незавершенные пользователи ({total}):\n\n"
+        
+        for user in page:
+            username = user.get('username')
+            identity = f"@{username}" if username else f"Telegram ID {user.get('user_id', 'Unknown')}"
+            state = user.get('state', 'Unknown')
+            state_name = self._get_state_name(state)
+            created = user.get('created_at', 'Unknown')
+            
+            result += f"👤 {identity}\n"
+            result += f"   📍 Состояние: {state_name}\n"
+            result += f"   📅 Создан: {created}\n\n"
+        
+        return ReportPage(result, next_cursor)
     
-    def get_reminder_candidates(self, days_inactive: int = 7) -> str:
-        """Получает список пользователей для напоминания"""
+    def get_reminder_candidates(
+        self,
+        days_inactive: int = 7,
+        after: Optional[PageCursor] = None,
+    ) -> ReportPage:
+        """Получает страницу пользователей для напоминания"""
         try:
-            reminder_users = self.state_manager.get_users_for_reminder(days_inactive)
-            
-            if not reminder_users:
-                return f"Нет пользователей для напоминания (неактивны более {days_inactive} дней)"
-            
-            result = f"🔔 Пользователи для напоминания ({len(reminder_users)}):\n\n"
-            
-            for user in reminder_users[:15]:  # Показываем только первые 15
-                username = user.get('username')
-                identity = f"@{username}" if username else f"Telegram ID {user.get('user_id', 'Unknown')}"
-                state = user.get('state', 'Unknown')
-                state_name = self._get_state_name(state)
-                last_activity = user.get('last_activity', 'Unknown')
-                
-                result += f"👤 {identity}\n"
-                result += f"   📍 Состояние: {state_name}\n"
-                result += f"   ⏰ Последняя активность: {last_activity}\n\n"
-            
-            if len(reminder_users) > 15:
-                result += f"... и еще {len(reminder_users) - 15} пользователей"
-            
-            return result
+            return self._format_reminder_candidates(
+                self.state_manager.get_users_for_reminder(
+                    days_inactive,
+                    REMINDER_PAGE_SIZE + 1,
+                    after,
+                ),
+                self.state_manager.count_users_for_reminder(days_inactive),
+                days_inactive,
+            )
         except Exception:
             logger.exception("Error getting reminder candidates")
-            return "Список временно недоступен из-за ошибки базы данных"
+            return ReportPage("Список временно недоступен из-за ошибки базы данных")
+
+    def _format_reminder_candidates(
+        self,
+        reminder_users: List[Dict],
+        total: int,
+        days_inactive: int,
+    ) -> ReportPage:
+        if not total:
+            return ReportPage(
+                f"Нет пользователей для напоминания (неактивны более {days_inactive} дней)"
+            )
+        if not reminder_users:
+            return ReportPage("Больше пользователей для напоминания нет")
+
+        page, next_cursor = _split_page(reminder_users, REMINDER_PAGE_SIZE)
+        result = f"🔔 Пользователи для напоминания ({total}):\n\n"
+        
+        for user in page:
+            username = user.get('username')
+            identity = f"@{username}" if username else f"Telegram ID {user.get('user_id', 'Unknown')}"
+            state = user.get('state', 'Unknown')
+            state_name = self._get_state_name(state)
+            last_activity = user.get('last_activity', 'Unknown')
+            
+            result += f"👤 {identity}\n"
+            result += f"   📍 Состояние: {state_name}\n"
+            result += f"   ⏰ Последняя активность: {last_activity}\n\n"
+        
+        return ReportPage(result, next_cursor)
     
     def get_user_details(self, user_id: int) -> str:
         """Получает детальную информацию о пользователе"""
         try:
-            user = self.state_manager.get_user(user_id)
-            
-            if not user:
-                return f"Пользователь с ID {user_id} не найден"
-            
-            identity = f"@{user.username}" if user.username else f"Telegram ID {user.user_id}"
-            result = f"👤 Детали пользователя {identity}:\n\n"
-            result += f"🆔 ID: {user.user_id}\n"
-            result += f"🌐 Язык: {user.language}\n"
-            result += f"📍 Состояние: {self._get_state_name(user.state)}\n"
-            result += f"📅 Создан: {user.created_at}\n"
-            result += f"⏰ Последняя активность: {user.last_activity}\n\n"
-            
-            result += "📊 Прогресс:\n"
-            if user.progress:
-                progress = user.progress
-                result += f"  ✅ Юзернейм: {'Да' if progress.get('username_check') else 'Нет'}\n"
-                result += f"  ✅ Согласие с условиями: {'Да' if progress.get('agreement') else 'Нет'}\n"
-                result += f"  ✅ Адрес введен: {'Да' if progress.get('address_entered') else 'Нет'}\n"
-                result += f"  ✅ Линия доверия: {'Да' if progress.get('trustline_check') else 'Нет'}\n"
-                result += f"  ✅ Рекомендация: {'Да' if progress.get('recommendation') else 'Нет'}\n"
-            
-            if user.stellar_address:
-                result += f"\n💎 Стеллар адрес: {user.stellar_address}"
-            
-            if user.recommender_username:
-                result += f"\n👥 Рекомендатель: @{user.recommender_username}"
-            
-            return result
+            return self._format_user_details(
+                user_id,
+                self.state_manager.get_user(user_id),
+            )
         except Exception:
             logger.exception("Error getting user details")
             return "Детали временно недоступны из-за ошибки базы данных"
+
+    def _format_user_details(self, user_id: int, user) -> str:
+        if not user:
+            return f"Пользователь с ID {user_id} не найден"
+        
+        identity = f"@{user.username}" if user.username else f"Telegram ID {user.user_id}"
+        result = f"👤 Детали пользователя {identity}:\n\n"
+        result += f"🆔 ID: {user.user_id}\n"
+        result += f"🌐 Язык: {user.language}\n"
+        result += f"📍 Состояние: {self._get_state_name(user.state)}\n"
+        result += f"📅 Создан: {user.created_at}\n"
+        result += f"⏰ Последняя активность: {user.last_activity}\n\n"
+        
+        result += "📊 Прогресс:\n"
+        if user.progress:
+            progress = user.progress
+            result += f"  ✅ Юзернейм: {'Да' if progress.get('username_check') else 'Нет'}\n"
+            result += f"  ✅ Согласие с условиями: {'Да' if progress.get('agreement') else 'Нет'}\n"
+            result += f"  ✅ Адрес введен: {'Да' if progress.get('address_entered') else 'Нет'}\n"
+            result += f"  ✅ Линия доверия: {'Да' if progress.get('trustline_check') else 'Нет'}\n"
+            result += f"  ✅ Рекомендация: {'Да' if progress.get('recommendation') else 'Нет'}\n"
+        
+        if user.stellar_address:
+            result += f"\n💎 Стеллар адрес: {user.stellar_address}"
+        
+        if user.recommender_username:
+            result += f"\n👥 Рекомендатель: @{user.recommender_username}"
+        
+        return result
     
     def _get_state_name(self, state: str) -> str:
         """Преобразует состояние в читаемое название"""
@@ -147,6 +278,73 @@ class AdminTools:
         if self._owns_state_manager:
             self.state_manager.close_connection()
 
+
+class AsyncAdminTools(AdminTools):
+    """Administrative reports over :class:`AsyncUserStateManager`."""
+
+    def __init__(self, state_manager: AsyncUserStateManager):
+        self.state_manager = state_manager
+        self._owns_state_manager = False
+
+    async def get_user_statistics(self) -> str:
+        snapshot = self._cached_statistics()
+        if snapshot is None:
+            try:
+                stats = await self.state_manager.get_user_statistics()
+            except Exception:
+                logger.exception("Error getting statistics")
+                return self._statistics_unavailable()
+            snapshot = self._statistics_snapshot = StatisticsSnapshot.take(stats)
+        return self._format_statistics(snapshot)
+
+    async def get_incomplete_users_report(
+        self,
+        after: Optional[PageCursor] = None,
+    ) -> ReportPage:
+        try:
+            return self._format_incomplete_users(
+                await self.state_manager.get_incomplete_users(
+                    INCOMPLETE_PAGE_SIZE + 1,
+                    after,
+                ),
+                await self.state_manager.count_incomplete_users(),
+            )
+        except Exception:
+            logger.exception("Error getting incomplete users")
+            return ReportPage("Отчёт временно недоступен из-за ошибки базы данных")
+
+    async def get_reminder_candidates(
+        self,
+        days_inactive: int = 7,
+        after: Optional[PageCursor] = None,
+    ) -> ReportPage:
+        try:
+            return self._format_reminder_candidates(
+                await self.state_manager.get_users_for_reminder(
+                    days_inactive,
+                    REMINDER_PAGE_SIZE + 1,
+                    after,
+                ),
+                await self.state_manager.count_users_for_reminder(days_inactive),
+                days_inactive,
+            )
+        except Exception:
+            logger.exception("Error getting reminder candidates")
+            return ReportPage("Список временно недоступен из-за ошибки базы данных")
+
+    async def get_user_details(self, user_id: int) -> str:
+        try:
+            return self._format_user_details(
+                user_id,
+                await self.state_manager.get_user(user_id),
+            )
+        except Exception:
+            logger.exception("Error getting user details")
+            return "Детали временно недоступны из-за ошибки базы данных"
+
+    def close_connection(self):
+        """The shared async state manager is closed by its owner."""
+
 # Пример использования
 if __name__ == "__main__":
     admin = AdminTools()
@@ -155,9 +353,9 @@ if __name__ == "__main__":
     print(admin.get_user_statistics())
     
     print("\n=== Незавершенные пользователи ===")
-    print(admin.get_incomplete_users_report())
+    print(admin.get_incomplete_users_report().text)
     
     print("\n=== Кандидаты для напоминания ===")
-    print(admin.get_reminder_candidates())
+    print(admin.get_reminder_candidates().text)
     
     admin.close_connection()
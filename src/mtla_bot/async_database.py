@@ -0,0 +1,544 @@
+"""Native asyncio MongoDB storage built on PyMongo's ``AsyncMongoClient``.
+
+The threaded :class:`~mtla_bot.database.DatabaseManager` parks every handler
+on a ``to_thread`` worker for the whole MongoDB round trip.  This manager runs
+the same conditional queries on the event loop instead; both backends build
+their filters and updates from the helpers in :mod:`mtla_bot.database`, so
+the attempt, phase and lease checks stay identical.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo import AsyncMongoClient, UpdateOne
+from pymongo.errors import ConnectionFailure
+
+from . import config
+from .database import (
+    FINALIZATION_CHANGE_PIPELINE,
+    INDEXES,
+    USER_PAGE_PROJECTION,
+    USER_PAGE_SORT,
+    DatabaseOperationError,
+    PageCursor,
+    active_attempt_query,
+    claimed_deliveries_query,
+    completion_query,
+    completion_update,
+    eligibility_snapshot_update,
+    final_delivery_batch_claim,
+    final_delivery_claim,
+    final_delivery_deferral,
+    final_delivery_outcomes,
+    finalizing_users_query,
+    holder_index_document,
+    holder_index_query,
+    incomplete_users_query,
+    new_attempt_update,
+    new_user_document,
+    reminder_users_query,
+    user_page_query,
+    user_statistics_from_facets,
+    user_statistics_pipeline,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseManager:
+    """MongoDB manager whose operations are coroutines on the running loop."""
+
+    def __init__(self):
+        self.client = None
+        self.db = None
+        self.collection = None
+        self.holder_index_collection = None
+
+    async def connect(self):
+        """Open the client, verify the server and ensure indexes exist."""
+
+        try:
+            self.client = AsyncMongoClient(
+                config.MONGODB_URI,
+                appname="MTLAJoinBot",
+                serverSelectionTimeoutMS=5_000,
+                connectTimeoutMS=3_000,
+                socketTimeoutMS=5_000,
+            )
+            await self.client.admin.command('ping')
+            self.db = self.client[config.MONGODB_DB]
+            self.collection = self.db[config.MONGODB_COLLECTION]
+            self.holder_index_collection = self.db[
+                config.MONGODB_HOLDER_INDEX_COLLECTION
+            ]
+
+            for keys, options in INDEXES:
+                await self.collection.create_index(keys, **options)
+
+            logger.info("Successfully connected to MongoDB")
+        except ConnectionFailure as e:
+            logger.error(f"Failed to connect to MongoDB: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error connecting to MongoDB: {e}")
+            raise
+
+    async def close(self):
+        if self.client:
+            await self.client.close()
+
+    async def get_user(self, user_id: int) -> Optional[Dict]:
+        try:
+            return await self.collection.find_one({"user_id": user_id})
+        except Exception as exc:
+            logger.exception("Error getting user %s", user_id)
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    async def create_user(
+        self,
+        user_id: int,
+        username: Optional[str],
+        language: str = 'ru',
+        attempt_id: Optional[str] = None,
+    ) -> bool:
+        try:
+            result = await self.collection.insert_one(
+                new_user_document(user_id, username, language, attempt_id)
+            )
+            logger.info(f"Created user {user_id}: {result.inserted_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error creating user {user_id}: {e}")
+            return False
+
+    async def update_user(self, user_id: int, update_data: Dict) -> bool:
+        try:
+            update_data["last_activity"] = datetime.utcnow()
+            result = await self.collection.update_one(
+                {"user_id": user_id},
+                {"$set": update_data},
+            )
+            return result.matched_count == 1
+        except Exception as e:
+            logger.error(f"Error updating user {user_id}: {e}")
+            return False
+
+    async def update_user_state(self, user_id: int, state: str) -> bool:
+        return await self.update_user(user_id, {"state": state})
+
+    async def begin_new_attempt(
+        self,
+        user_id: int,
+        username: Optional[str],
+        language: str,
+        attempt_id: str,
+    ) -> bool:
+        """Atomically replace the current candidate flow with a fresh attempt."""
+
+        try:
+            result = await self.collection.update_one(
+                {"user_id": user_id},
+                new_attempt_update(username, language, attempt_id),
+            )
+            return result.matched_count == 1
+        except Exception:
+            logger.exception("Error starting a new attempt for user %s", user_id)
+            return False
+
+    async def record_eligibility_snapshot(
+        self,
+        user_id: int,
+        attempt_id: str,
+        expected_state: str,
+        address: str,
+        has_trustline: bool,
+        candidate_mtlap_balance: str,
+        has_recommendation: bool,
+        next_state: str,
+    ) -> bool:
+        """Persist one verified snapshot only for the expected active attempt."""
+
+        try:
+            result = await self.collection.update_one(
+                active_attempt_query(user_id, attempt_id, expected_state),
+                eligibility_snapshot_update(
+                    address,
+                    has_trustline,
+                    candidate_mtlap_balance,
+                    has_recommendation,
+                    next_state,
+                ),
+            )
+            return result.matched_count == 1
+        except Exception:
+            logger.exception(
+                "Error recording eligibility snapshot for user %s",
+                user_id,
+            )
+            return False
+
+    async def update_attempt_fields(
+        self,
+        user_id: int,
+        attempt_id: str,
+        expected_state: str,
+        update_data: Dict,
+    ) -> bool:
+        """Conditionally update facts without changing the active phase."""
+
+        try:
+            persisted = dict(update_data)
+            persisted["last_activity"] = datetime.utcnow()
+            result = await self.collection.update_one(
+                active_attempt_query(user_id, attempt_id, expected_state),
+                {"$set": persisted},
+            )
+            return result.matched_count == 1
+        except Exception:
+            logger.exception("Error updating active attempt for user %s", user_id)
+            return False
+
+    async def transition_attempt(
+        self,
+        user_id: int,
+        attempt_id: str,
+        expected_state: str,
+        next_state: str,
+        update_data: Optional[Dict] = None,
+    ) -> bool:
+        """Atomically move only the expected active attempt to its next phase."""
+
+        persisted = dict(update_data or {})
+        persisted["state"] = next_state
+        return await self.update_attempt_fields(
+            user_id,
+            attempt_id,
+            expected_state,
+            persisted,
+        )
+
+    async def complete_attempt(
+        self,
+        user_id: int,
+        attempt_id: str,
+        delivery_lease_id: str,
+        delivery_message_id: Optional[int] = None,
+    ) -> bool:
+        """Mark only the verified active attempt as completed."""
+
+        try:
+            result = await self.collection.update_one(
+                completion_query(user_id, attempt_id, delivery_lease_id),
+                completion_update(delivery_message_id),
+            )
+            return result.matched_count == 1
+        except Exception:
+            logger.exception("Error completing attempt for user %s", user_id)
+            return False
+
+    async def claim_final_delivery(
+        self,
+        user_id: int,
+        attempt_id: str,
+        delivery_lease_id: str,
+        *,
+        lease_seconds: int,
+        automatic: bool,
+        max_attempts: int,
+    ) -> bool:
+        """Atomically reserve one final delivery, bounding autonomous sends."""
+
+        query, update = final_delivery_claim(
+            user_id,
+            attempt_id,
+            delivery_lease_id,
+            lease_seconds=lease_seconds,
+            automatic=automatic,
+            max_attempts=max_attempts,
+        )
+        try:
+            result = await self.collection.update_one(query, update)
+            return result.matched_count == 1
+        except Exception:
+            logger.exception("Error claiming final delivery for user %s", user_id)
+            return False
+
+    async def defer_final_delivery(
+        self,
+        user_id: int,
+        attempt_id: str,
+        delivery_lease_id: str,
+        *,
+        retry_seconds: int,
+        error_code: str,
+    ) -> bool:
+        """Release a failed delivery claim with a bounded retry delay."""
+
+        query, update = final_delivery_deferral(
+            user_id,
+            attempt_id,
+            delivery_lease_id,
+            retry_seconds=retry_seconds,
+            error_code=error_code,
+        )
+        try:
+            result = await self.collection.update_one(query, update)
+            return result.matched_count == 1
+        except Exception:
+            logger.exception("Error deferring final delivery for user %s", user_id)
+            return False
+
+    async def claim_final_deliveries(
+        self,
+        candidates: List[tuple[int, str]],
+        delivery_lease_id: str,
+        *,
+        lease_seconds: int,
+        max_attempts: int,
+    ) -> List[Dict]:
+        """Claim a redelivery batch with one update and return claimed users."""
+
+        if not candidates:
+            return []
+        query, update = final_delivery_batch_claim(
+            candidates,
+            delivery_lease_id,
+            lease_seconds=lease_seconds,
+            max_attempts=max_attempts,
+        )
+        try:
+            await self.collection.update_many(query, update)
+            return await self.collection.find(
+                claimed_deliveries_query(candidates, delivery_lease_id)
+            ).to_list(None)
+        except Exception as exc:
+            logger.exception("Error claiming final deliveries")
+            raise DatabaseOperationError("database_write_failed") from exc
+
+    async def record_final_delivery_outcomes(
+        self,
+        delivery_lease_id: str,
+        delivered: List[tuple[int, str, Optional[int]]],
+        failed: List[tuple[int, str, str]],
+        *,
+        retry_seconds: int,
+    ) -> int:
+        """Complete or defer a claimed batch in one bulk write."""
+
+        operations = [
+            UpdateOne(query, update)
+            for query, update in final_delivery_outcomes(
+                delivery_lease_id,
+                delivered,
+                failed,
+                retry_seconds=retry_seconds,
+            )
+        ]
+        if not operations:
+            return 0
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            return result.matched_count
+        except Exception:
+            logger.exception("Error recording final delivery outcomes")
+            return 0
+
+    async def update_user_progress(
+        self,
+        user_id: int,
+        progress_key: str,
+        value: bool,
+    ) -> bool:
+        return await self.update_user(user_id, {
+            f"progress.{progress_key}": value
+        })
+
+    async def set_stellar_address(self, user_id: int, address: str) -> bool:
+        return await self.update_user(user_id, {
+            "stellar_address": address,
+            "progress.address_entered": True
+        })
+
+    async def set_username_status(self, user_id: int, has_username: bool) -> bool:
+        return await self.update_user(user_id, {
+            "has_username": has_username,
+            "progress.username_check": has_username
+        })
+
+    async def set_agreement_status(self, user_id: int, agreed: bool) -> bool:
+        return await self.update_user(user_id, {
+            "agreed_to_terms": agreed,
+            "progress.agreement": agreed
+        })
+
+    async def set_trustline_status(self, user_id: int, has_trustline: bool) -> bool:
+        return await self.update_user(user_id, {
+            "has_trustline": has_trustline,
+            "progress.trustline_check": has_trustline
+        })
+
+    async def set_recommendation(
+        self,
+        user_id: int,
+        recommender_username: str,
+    ) -> bool:
+        return await self.update_user(user_id, {
+            "has_recommendation": True,
+            "recommender_username": recommender_username,
+            "progress.recommendation": True
+        })
+
+    async def reset_user(self, user_id: int) -> bool:
+        try:
+            result = await self.collection.delete_one({"user_id": user_id})
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.error(f"Error resetting user {user_id}: {e}")
+            return False
+
+    async def get_users_by_state(self, state: str) -> List[Dict]:
+        try:
+            return await self.collection.find({"state": state}).to_list(None)
+        except Exception as exc:
+            logger.exception("Error getting users by state %s", state)
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    async def get_finalizing_users(
+        self,
+        limit: int = 20,
+        max_attempts: int = 3,
+    ) -> List[Dict]:
+        """Return the oldest pending final deliveries in a bounded batch."""
+
+        query = finalizing_users_query(limit, max_attempts)
+        try:
+            cursor = (
+                self.collection.find(query)
+                .sort("last_activity", 1)
+                .limit(limit)
+            )
+            return await cursor.to_list(None)
+        except Exception as exc:
+            logger.exception("Error getting finalizing users")
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    async def watch_finalizations(self):
+        """Open a change stream of documents that may need final delivery.
+
+        Raises ``OperationFailure`` when the server does not support change
+        streams, e.g. a standalone ``mongod`` outside a replica set.
+        """
+
+        return await self.collection.watch(
+            list(FINALIZATION_CHANGE_PIPELINE),
+            full_document="updateLookup",
+        )
+
+    async def _get_user_page(
+        self,
+        query: Dict,
+        limit: int,
+        after: Optional[PageCursor],
+    ) -> List[Dict]:
+        return await (
+            self.collection.find(
+                user_page_query(query, after, limit),
+                USER_PAGE_PROJECTION,
+            )
+            .sort(USER_PAGE_SORT)
+            .limit(limit)
+            .to_list(None)
+        )
+
+    async def get_incomplete_users(
+        self,
+        limit: int = 20,
+        after: Optional[PageCursor] = None,
+    ) -> List[Dict]:
+        try:
+            return await self._get_user_page(
+                incomplete_users_query(),
+                limit,
+                after,
+            )
+        except Exception as exc:
+            logger.exception("Error getting incomplete users")
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    async def count_incomplete_users(self) -> int:
+        try:
+            return await self.collection.count_documents(incomplete_users_query())
+        except Exception as exc:
+            logger.exception("Error counting incomplete users")
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    async def get_users_for_reminder(
+        self,
+        days_inactive: int = 7,
+        limit: int = 15,
+        after: Optional[PageCursor] = None,
+    ) -> List[Dict]:
+        try:
+            return await self._get_user_page(
+                reminder_users_query(days_inactive),
+                limit,
+                after,
+            )
+        except Exception as exc:
+            logger.exception("Error getting users for reminder")
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    async def count_users_for_reminder(self, days_inactive: int = 7) -> int:
+        try:
+            return await self.collection.count_documents(
+                reminder_users_query(days_inactive)
+            )
+        except Exception as exc:
+            logger.exception("Error counting users for reminder")
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    async def get_user_statistics(self) -> Dict:
+        try:
+            cursor = await self.collection.aggregate(user_statistics_pipeline())
+            return user_statistics_from_facets(await cursor.to_list(None))
+        except Exception as exc:
+            logger.exception("Error getting user statistics")
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    async def get_holder_index(
+        self,
+        asset: str,
+        minimum_balance: str,
+    ) -> Optional[Dict]:
+        try:
+            return await self.holder_index_collection.find_one(
+                holder_index_query(asset, minimum_balance)
+            )
+        except Exception as exc:
+            logger.exception("Error getting holder index")
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    async def save_holder_index(
+        self,
+        asset: str,
+        minimum_balance: str,
+        keys: bytes,
+        count: int,
+        cursor: Optional[str] = None,
+    ) -> None:
+        try:
+            await self.holder_index_collection.replace_one(
+                {"_id": asset},
+                holder_index_document(
+                    asset,
+                    minimum_balance,
+                    keys,
+                    count,
+                    cursor,
+                ),
+                upsert=True,
+            )
+        except Exception as exc:
+            logger.exception("Error saving holder index")
+            raise DatabaseOperationError("database_write_failed") from exc
@@ -1,8 +1,8 @@
 import asyncio
 import logging
 import re
+import signal
 import uuid
-from decimal import Decimal
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
 from telegram.constants import ParseMode
@@ -10,27 +10,61 @@ from telegram.constants import ParseMode
 from . import config
 from . import messages
 from .stellar_client import StellarClient
-from .user_states import UserStateManager, UserState
-from .admin_tools import AdminTools
+from .user_states import AsyncUserStateManager, UserStateManager, UserState
+from .admin_tools import (
+    AdminTools,
+    AsyncAdminTools,
+    ReportPage,
+    decode_page_cursor,
+    encode_page_cursor,
+)
 from .admin_config import ADMIN_IDS
+from .address_precheck import AddressPrechecks
+from .check_progress import CheckProgress, CheckStage, ProgressCallback
 from .eligibility import (
     EligibilityBlocker,
     EligibilityStatus,
     evaluate_eligibility,
     is_valid_stellar_address,
 )
+from .finalization import (
+    FinalizationChangeFeed,
+    FinalizationRedelivery,
+    FinalizationWakeups,
+    RedeliveryReport,
+)
 from .logging_config import configure_logging
+from .status_message import ThrottledStatusMessage
+from .update_processor import FairUpdateProcessor
+from .user_locks import UserLockRegistry
+from .webhook import WebhookServer
 
 # Настройка логирования
-configure_logging((config.TELEGRAM_TOKEN, config.MONGODB_URI))
+configure_logging((
+    config.TELEGRAM_TOKEN,
+    config.MONGODB_URI,
+    config.WEBHOOK_SECRET_TOKEN,
+))
 logger = logging.getLogger(__name__)
 
 FLOW_CALLBACK_PREFIX = "flow"
+ADMIN_PAGE_CALLBACK_PREFIX = "admin"
 FINALIZATION_POLL_SECONDS = 60
+# With a change stream every due delivery wakes the loop; the sweep only
+# catches leases that expired while this process was not watching.
+FINALIZATION_SWEEP_SECONDS = 900
 FINALIZATION_RETRY_SECONDS = 300
-FINALIZATION_BATCH_SIZE = 20
+FINALIZATION_BATCH_SIZE = 100
+FINALIZATION_PARALLELISM = 8
 FINALIZATION_MAX_ATTEMPTS = 3
 FINALIZATION_LEASE_SECONDS = 300
+# A returning candidate's previous address is checked while the agreement is
+# read; the snapshot is used for the same address if it is at most this old.
+ADDRESS_PRECHECK_MAX_AGE = 300
+# A snapshot at most this old is accepted as fresh; an older one is confirmed.
+ADDRESS_PRECHECK_CONFIRM_AGE = 30
+# Telegram throttles edits of one message; progress is shown at most this often.
+CHECK_STATUS_EDIT_INTERVAL = 1.5
 
 
 def encode_flow_callback(action: str, attempt_id: str) -> str:
@@ -47,6 +81,34 @@ def decode_flow_callback(data: str) -> tuple[str, str] | None:
     return action, attempt_id
 
 
+def encode_admin_page_callback(report: str, cursor, days: int | None = None) -> str:
+    fields = [ADMIN_PAGE_CALLBACK_PREFIX, report]
+    if days is not None:
+        fields.append(str(days))
+    fields.append(encode_page_cursor(cursor))
+    return ":".join(fields)
+
+
+def decode_admin_page_callback(data: str) -> tuple[str, int | None, tuple] | None:
+    """Return ``(report, days, cursor)`` for an admin "next page" button."""
+
+    parts = data.split(":")
+    if parts[:2] == [ADMIN_PAGE_CALLBACK_PREFIX, "inc"] and len(parts) == 4:
+        report, days, token = "inc", None, ":".join(parts[2:])
+    elif parts[:2] == [ADMIN_PAGE_CALLBACK_PREFIX, "rem"] and len(parts) == 5:
+        try:
+            days = int(parts[2])
+        except ValueError:
+            return None
+        report, token = "rem", ":".join(parts[3:])
+    else:
+        return None
+    cursor = decode_page_cursor(token)
+    if cursor is None:
+        return None
+    return report, days, cursor
+
+
 def telegram_language(update: Update) -> str:
     """Choose a response language before a stored user is available."""
 
@@ -56,57 +118,105 @@ def telegram_language(update: Update) -> str:
         else "en"
     )
 
+
+def check_progress_listener(
+    language: str,
+    status: ThrottledStatusMessage,
+) -> ProgressCallback:
+    """Render check progress below the 'checking_address' text."""
+
+    header = get_message(language, 'checking_address')
+    lines: dict[CheckStage, str] = {}
+
+    def listener(event: CheckProgress) -> None:
+        lines[event.stage] = get_message(
+            language,
+            f"progress_{event.stage.value}",
+        ).format(done=event.done, total=event.total)
+        status.update("\n".join([header, *lines.values()]))
+
+    return listener
+
+
 class MTLAJoinBot:
     def __init__(self):
         config.validate_config()
-        self.state_manager = UserStateManager()
+        if config.MONGODB_DRIVER == "async":
+            self.state_manager = AsyncUserStateManager()
+            self.admin_tools = AsyncAdminTools(self.state_manager)
+        else:
+            self.state_manager = UserStateManager()
+            self.admin_tools = AdminTools(self.state_manager)
         self.stellar_client = StellarClient()
-        self.admin_tools = AdminTools(self.state_manager)
         self.application = None
-        self._user_locks: dict[int, asyncio.Lock] = {}
-        self._active_user_tasks: dict[int, asyncio.Task] = {}
+        self._user_locks = UserLockRegistry()
+        self._finalization = FinalizationRedelivery(
+            self._state_call,
+            self._user_locks,
+            batch_size=FINALIZATION_BATCH_SIZE,
+            max_attempts=FINALIZATION_MAX_ATTEMPTS,
+            lease_seconds=FINALIZATION_LEASE_SECONDS,
+            retry_seconds=FINALIZATION_RETRY_SECONDS,
+            parallelism=FINALIZATION_PARALLELISM,
+        )
+        self._address_prechecks = AddressPrechecks(
+            lambda address: self.stellar_client.get_account_info(
+                address,
+                use_cache=False,
+            ),
+            max_age=ADDRESS_PRECHECK_MAX_AGE,
+            confirm_age=ADDRESS_PRECHECK_CONFIRM_AGE,
+        )
         self._finalization_task: asyncio.Task | None = None
+        self._holder_index_task: asyncio.Task | None = None
 
     @staticmethod
-    async def _thread_call(method, *args, **kwargs):
-        """Run sync work off-loop without abandoning its thread on cancel."""
+    async def _settle_on_cancel(awaitable):
+        """Await storage work that must finish even if the caller is canceled."""
 
-        worker = asyncio.create_task(asyncio.to_thread(method, *args, **kwargs))
+        worker = asyncio.ensure_future(awaitable)
         try:
             return await asyncio.shield(worker)
         except asyncio.CancelledError:
-            # asyncio.to_thread cannot stop the underlying function. Waiting
-            # here keeps resets ordered and prevents a canceled Mongo write
-            # from committing after the replacement attempt.
+            # A Mongo write cannot be recalled once sent. Waiting here keeps
+            # resets ordered and prevents a canceled write from committing
+            # after the replacement attempt.
             try:
                 await worker
             except Exception:
                 pass
             raise
 
+    @classmethod
+    async def _thread_call(cls, method, *args, **kwargs):
+        """Run sync work off-loop without abandoning its thread on cancel."""
+
+        return await cls._settle_on_cancel(
+            asyncio.to_thread(method, *args, **kwargs)
+        )
+
     async def _state_call(self, method_name: str, *args, **kwargs):
-        """Run synchronous PyMongo-backed state operations off the event loop."""
+        """Run state operations without blocking the event loop."""
 
         method = getattr(self.state_manager, method_name)
+        if isinstance(self.state_manager, AsyncUserStateManager):
+            return await self._settle_on_cancel(method(*args, **kwargs))
         return await self._thread_call(method, *args, **kwargs)
 
     async def _admin_call(self, method_name: str, *args, **kwargs):
-        """Run synchronous administrative MongoDB reports off the event loop."""
+        """Run administrative MongoDB reports without blocking the event loop."""
 
         method = getattr(self.admin_tools, method_name)
+        if isinstance(self.admin_tools, AsyncAdminTools):
+            return await method(*args, **kwargs)
         return await self._thread_call(method, *args, **kwargs)
 
-    async def _run_for_user(self, handler, update, context, lock):
-        task = asyncio.current_task()
-        user_id = update.effective_user.id
-        async with lock:
-            if task is not None:
-                self._active_user_tasks[user_id] = task
-            try:
-                return await handler(update, context)
-            finally:
-                if self._active_user_tasks.get(user_id) is task:
-                    self._active_user_tasks.pop(user_id, None)
+    async def _run_for_user(self, handler, update, context):
+        async with self._user_locks.hold(
+            update.effective_user.id,
+            asyncio.current_task(),
+        ):
+            return await handler(update, context)
 
     async def _reject_busy_update(self, update: Update) -> None:
         """Reject queued duplicate work before it occupies a PTB worker slot."""
@@ -130,14 +240,10 @@ class MTLAJoinBot:
             effective_user = update.effective_user
             if effective_user is None:
                 return await handler(update, context)
-            lock = self._user_locks.setdefault(
-                effective_user.id,
-                asyncio.Lock(),
-            )
-            if lock.locked():
+            if self._user_locks.is_busy(effective_user.id):
                 await self._reject_busy_update(update)
                 return None
-            return await self._run_for_user(handler, update, context, lock)
+            return await self._run_for_user(handler, update, context)
 
         return wrapped
 
@@ -149,34 +255,50 @@ class MTLAJoinBot:
             if effective_user is None:
                 return await handler(update, context)
             user_id = effective_user.id
-            active = self._active_user_tasks.get(user_id)
+            active = self._user_locks.active_task(user_id)
             current = asyncio.current_task()
             if active is not None and active is not current and not active.done():
                 active.cancel()
                 await asyncio.gather(active, return_exceptions=True)
-            lock = self._user_locks.setdefault(user_id, asyncio.Lock())
-            return await self._run_for_user(handler, update, context, lock)
+            return await self._run_for_user(handler, update, context)
 
         return wrapped
 
     async def _post_init(self, application: Application) -> None:
         """Open reusable external-service resources in the running loop."""
 
+        if isinstance(self.state_manager, AsyncUserStateManager):
+            await self.state_manager.start()
         await self.stellar_client.start()
+        await self.stellar_client.warm_up()
         self._finalization_task = asyncio.create_task(
             self._finalization_loop(application),
             name="mtla-finalization-redelivery",
         )
+        holder_index_job = self.stellar_client.holder_index_job(self._state_call)
+        if holder_index_job is not None:
+            self._holder_index_task = asyncio.create_task(
+                holder_index_job.run(),
+                name="mtla-holder-index",
+            )
 
     async def _post_shutdown(self, _application: Application) -> None:
         """Close reusable external-service resources on every polling exit."""
 
-        finalization_task = self._finalization_task
+        tasks = [
+            task
+            for task in (self._finalization_task, self._holder_index_task)
+            if task is not None
+        ]
         self._finalization_task = None
-        if finalization_task is not None:
-            finalization_task.cancel()
-            await asyncio.gather(finalization_task, return_exceptions=True)
+        self._holder_index_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._address_prechecks.close()
         await self.stellar_client.close()
+        if isinstance(self.state_manager, AsyncUserStateManager):
+            await self.state_manager.close_connection()
 
     def _build_completion_text(self, user, address: str | None = None) -> str:
         application_address = address or user.stellar_address
@@ -201,108 +323,60 @@ class MTLAJoinBot:
             resize_keyboard=True,
         )
 
-    async def _redeliver_finalizations_once(self, application: Application) -> None:
-        users = await self._state_call(
-            "get_finalizing_users",
-            FINALIZATION_BATCH_SIZE,
-            FINALIZATION_MAX_ATTEMPTS,
-        )
-        for pending in users:
-            delivery = asyncio.create_task(
-                self._redeliver_one_finalization(application, pending)
-            )
-            try:
-                await delivery
-            except asyncio.CancelledError:
-                if asyncio.current_task().cancelling():
-                    raise
-                # /start canceled this user's delivery, not the worker loop.
-                continue
-
-    async def _redeliver_one_finalization(
+    async def _redeliver_finalizations_once(
         self,
         application: Application,
-        pending,
-    ) -> None:
-        if not pending.attempt_id or not pending.stellar_address:
-            return
-        lock = self._user_locks.setdefault(pending.user_id, asyncio.Lock())
-        if lock.locked():
-            return
-        task = asyncio.current_task()
-        async with lock:
-            if task is not None:
-                self._active_user_tasks[pending.user_id] = task
-            try:
-                current = await self._state_call("get_user", pending.user_id)
-                if (
-                    current is None
-                    or current.attempt_id != pending.attempt_id
-                    or current.state != UserState.FINALIZING.value
-                ):
-                    return
-                lease_id = uuid.uuid4().hex
-                claimed = await self._state_call(
-                    "claim_final_delivery",
-                    current.user_id,
-                    current.attempt_id,
-                    lease_id,
-                    lease_seconds=FINALIZATION_LEASE_SECONDS,
-                    automatic=True,
-                    max_attempts=FINALIZATION_MAX_ATTEMPTS,
-                )
-                if not claimed:
-                    return
+    ) -> RedeliveryReport:
+        async def send(user) -> int | None:
+            delivered = await application.bot.send_message(
+                chat_id=user.user_id,
+                text=self._build_completion_text(user),
+                parse_mode=ParseMode.MARKDOWN,
+                disable_web_page_preview=True,
+            )
+            message_id = getattr(delivered, "message_id", None)
+            return message_id if isinstance(message_id, int) else None
+
+        return await self._finalization.run_once(send)
+
+    async def _finalization_loop(self, application: Application) -> None:
+        wakeups = FinalizationWakeups()
+        feed = None
+        feed_task = None
+        if isinstance(self.state_manager, AsyncUserStateManager):
+            feed = FinalizationChangeFeed(
+                self.state_manager.watch_finalizations,
+                wakeups,
+            )
+            feed_task = asyncio.create_task(
+                feed.run(),
+                name="mtla-finalization-changes",
+            )
+        try:
+            while True:
+                backlog = False
                 try:
-                    delivered = await application.bot.send_message(
-                        chat_id=current.user_id,
-                        text=self._build_completion_text(current),
-                        parse_mode=ParseMode.MARKDOWN,
-                        disable_web_page_preview=True,
-                    )
+                    report = await self._redeliver_finalizations_once(application)
+                    backlog = report.backlog
                 except asyncio.CancelledError:
                     raise
                 except Exception:
-                    logger.exception(
-                        "Background final response delivery failed for user %s",
-                        current.user_id,
-                    )
-                    await self._state_call(
-                        "defer_final_delivery",
-                        current.user_id,
-                        current.attempt_id,
-                        lease_id,
-                        retry_seconds=FINALIZATION_RETRY_SECONDS,
-                        error_code="telegram_send_failed",
-                    )
-                    return
-                message_id = getattr(delivered, "message_id", None)
-                if not isinstance(message_id, int):
-                    message_id = None
-                if not await self._state_call(
-                    "complete_attempt",
-                    current.user_id,
-                    current.attempt_id,
-                    lease_id,
-                    message_id,
-                ):
-                    logger.error(
-                        "Background final response was delivered but not persisted for user %s",
-                        current.user_id,
-                    )
-            finally:
-                if self._active_user_tasks.get(pending.user_id) is task:
-                    self._active_user_tasks.pop(pending.user_id, None)
-
-    async def _finalization_loop(self, application: Application) -> None:
-        while True:
-            try:
-                await self._redeliver_finalizations_once(application)
-            except asyncio.CancelledError:
-                raise
-            except Exception:
-                logger.exception("Finalization redelivery pass failed")
-            await asyncio.sleep(FINALIZATION_POLL_SECONDS)
+                    logger.exception("Finalization redelivery pass failed")
+                if backlog:
+                    # A full batch means an outage backlog; keep draining at
+                    # the send-rate limit instead of waiting for a wake-up.
+                    await asyncio.sleep(0)
+                    continue
+                streaming = feed is not None and feed.streaming
+                await wakeups.wait(
+                    FINALIZATION_SWEEP_SECONDS
+                    if streaming
+                    else FINALIZATION_POLL_SECONDS
+                )
+        finally:
+            if feed_task is not None:
+                feed_task.cancel()
+                await asyncio.gather(feed_task, return_exceptions=True)
         
     def is_admin(self, user_id: int) -> bool:
         """Проверяет, является ли пользователь администратором"""
@@ -359,6 +433,12 @@ class MTLAJoinBot:
                         get_message(language, 'temporary_error')
                     )
                     return
+                # begin_new_attempt cleared the stored address; keep it for a
+                # background check once the candidate reaches the agreement.
+                self._address_prechecks.remember(
+                    user_id,
+                    existing_user.stellar_address,
+                )
             
             # Отправляем приветственное сообщение
             await update.message.reply_text(get_message(language, 'welcome'))
@@ -452,16 +532,11 @@ class MTLAJoinBot:
             return
         
         try:
-            incomplete_text = await self._admin_call(
-                "get_incomplete_users_report"
-            )
-            # Разбиваем на части, если текст слишком длинный
-            if len(incomplete_text) > 4000:
-                parts = [incomplete_text[i:i+4000] for i in range(0, len(incomplete_text), 4000)]
-                for i, part in enumerate(parts):
-                    await update.message.reply_text(f"Часть {i+1}/{len(parts)}:\n\n{part}")
-            else:
-                await update.message.reply_text(incomplete_text)
+            page = await self._admin_call("get_incomplete_users_report")
+            await update.message.reply_text(
+                page.text,
+                reply_markup=self._admin_page_markup(page, "inc"),
+            )
         except Exception as e:
             logger.error(f"Error getting incomplete users: {e}")
             await update.message.reply_text(f"❌ Ошибка при получении отчета: {e}")
@@ -483,15 +558,57 @@ class MTLAJoinBot:
                 except ValueError:
                     days = 7
             
-            reminders_text = await self._admin_call(
-                "get_reminder_candidates",
-                days,
+            page = await self._admin_call("get_reminder_candidates", days)
+            await update.message.reply_text(
+                page.text,
+                reply_markup=self._admin_page_markup(page, "rem", days),
             )
-            await update.message.reply_text(reminders_text)
         except Exception as e:
             logger.error(f"Error getting reminders: {e}")
             await update.message.reply_text(f"❌ Ошибка при получении списка: {e}")
     
+    @staticmethod
+    def _admin_page_markup(
+        page: ReportPage,
+        report: str,
+        days: int | None = None,
+    ) -> InlineKeyboardMarkup | None:
+        if page.next_cursor is None:
+            return None
+        callback_data = encode_admin_page_callback(report, page.next_cursor, days)
+        if len(callback_data.encode()) > 64:
+            return None
+        return InlineKeyboardMarkup(
+            [[InlineKeyboardButton("Далее ▶️", callback_data=callback_data)]]
+        )
+
+    async def admin_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Кнопка "Далее" в отчетах /incomplete и /reminders"""
+        query = update.callback_query
+
+        if not self.is_admin(query.from_user.id):
+            await query.answer("❌ У вас нет доступа к этой команде", show_alert=True)
+            return
+
+        decoded = decode_admin_page_callback(query.data)
+        await query.answer()
+        if decoded is None:
+            return
+
+        report, days, cursor = decoded
+        try:
+            if report == "inc":
+                page = await self._admin_call("get_incomplete_users_report", cursor)
+            else:
+                page = await self._admin_call("get_reminder_candidates", days, cursor)
+            await query.edit_message_text(
+                page.text,
+                reply_markup=self._admin_page_markup(page, report, days),
+            )
+        except Exception as e:
+            logger.error(f"Error getting admin report page: {e}")
+            await query.message.reply_text(f"❌ Ошибка при получении отчета: {e}")
+
     async def user_info(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Команда /user_info <user_id> - показывает детали пользователя (только для админов)"""
         user_id = update.effective_user.id
@@ -517,6 +634,56 @@ class MTLAJoinBot:
             logger.error(f"Error getting user details: {e}")
             await update.message.reply_text(f"❌ Ошибка при получении деталей: {e}")
     
+    async def upstreams(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /upstreams - состояние BSN и Horizon (только для админов)"""
+        user_id = update.effective_user.id
+
+        if not self.is_admin(user_id):
+            await update.message.reply_text("❌ У вас нет доступа к этой команде")
+            return
+
+        report = self.stellar_client.upstream_status()
+        if not report:
+            await update.message.reply_text("ℹ️ Подключения к BSN и Horizon еще не созданы")
+            return
+
+        lines = ["🌐 Состояние внешних сервисов:"]
+        for name, status in report.items():
+            breaker = status["breaker"]
+            connections = status["connections"]
+            line = (
+                f"\n{name}: {breaker.state.value}, "
+                f"ошибок {breaker.failure_rate:.0%} из {breaker.calls} запросов"
+            )
+            if breaker.retry_in:
+                line += f", проба через {breaker.retry_in:.0f} с"
+            lines.append(line)
+            lines.append(
+                f"  запросов {connections.requests}, "
+                f"новых соединений {connections.created}, "
+                f"повторно использовано {connections.reused}"
+            )
+            if "window" in status:
+                lines.append(f"  окно параллельных запросов: {status['window']}")
+            if "hedging" in status:
+                hedging = status["hedging"]
+                lines.append(
+                    f"  хеджирование через {hedging.delay() * 1000:.0f} мс, "
+                    f"повторов {hedging.hedges} из {hedging.requests}"
+                )
+            for origin in status.get("origins", ()):
+                latency = (
+                    f"{origin.latency * 1000:.0f} мс"
+                    if origin.latency is not None
+                    else "нет замеров"
+                )
+                health = "доступен" if origin.available else "пропускается"
+                lines.append(
+                    f"  {origin.origin}: {health}, {latency}, "
+                    f"ошибок подряд {origin.failures}"
+                )
+        await update.message.reply_text("\n".join(lines))
+
     async def help_admin(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Команда /help_admin - показывает справку по админским командам"""
         user_id = update.effective_user.id
@@ -532,6 +699,7 @@ class MTLAJoinBot:
 📋 `/incomplete` - Незавершенные пользователи  
 🔔 `/reminders [дни]` - Кандидаты для напоминания (по умолчанию 7 дней)
 👤 `/user_info <user_id>` - Детали конкретного пользователя
+🌐 `/upstreams` - Состояние BSN и Horizon
 ❓ `/help_admin` - Эта справка
 
 **Примеры:**
@@ -663,6 +831,8 @@ class MTLAJoinBot:
             )
             return
         logger.info(f"User {user_id} state updated to AGREEMENT")
+        if self._address_prechecks.start(user_id, attempt_id):
+            logger.info("Started a background address check for user %s", user_id)
 
         await self._send_agreement_prompt(update, user.language)
 
@@ -785,6 +955,7 @@ class MTLAJoinBot:
         account_info: dict | None = None,
         attempt_id: str | None = None,
         expected_state: str | None = None,
+        status_message=None,
     ):
         """Четвёртый шаг - проверка Стеллар адреса"""
         user_id = update.effective_user.id
@@ -821,7 +992,7 @@ class MTLAJoinBot:
         # (если пользователь ввел адрес, сообщение уже отправлено в handle_address_input)
         if hasattr(update, 'callback_query') and update.callback_query:
             # Убираем клавиатурные кнопки при начале проверки
-            await update.effective_message.reply_text(get_message(user.language, 'checking_address'), reply_markup=ReplyKeyboardRemove())
+            status_message = await update.effective_message.reply_text(get_message(user.language, 'checking_address'), reply_markup=ReplyKeyboardRemove())
         
         # Проверяем адрес
         address = address or user.stellar_address
@@ -832,9 +1003,29 @@ class MTLAJoinBot:
             return
 
         logger.info("Checking candidate account for user %s", user_id)
+
+        async def read_account_info(**kwargs) -> dict:
+            nonlocal status_message
+            if status_message is None:
+                status_message = await update.effective_message.reply_text(
+                    get_message(user.language, 'checking_address'),
+                    reply_markup=ReplyKeyboardRemove(),
+                )
+            return await self._read_account_info(
+                status_message,
+                user.language,
+                address,
+                **kwargs,
+            )
         
         if account_info is None:
-            account_info = await self.stellar_client.get_account_info(address)
+            # Re-checks follow a candidate's own fix, so they never reuse
+            # cached Horizon answers.  A cached BSN list may still reject
+            # while it is revalidated; acceptance is confirmed below.
+            account_info = await read_account_info(
+                use_cache=False,
+                allow_stale_bsn=True,
+            )
 
         recommendation_data = account_info.get('recommendation')
         logged_recommendation = (
@@ -842,11 +1033,12 @@ class MTLAJoinBot:
             if isinstance(recommendation_data, dict)
             else False
         )
+        account = account_info.get('account')
         logger.info(
             "Account info for user %s: exists=%s, trustline=%s, recommendation=%s",
             user_id,
-            account_info.get('exists', False),
-            account_info.get('has_trustline', False),
+            account is not None,
+            getattr(account, 'has_trustline', False),
             logged_recommendation,
         )
 
@@ -855,6 +1047,18 @@ class MTLAJoinBot:
             stellar_address=address,
             account_info=account_info,
         )
+        if (
+            decision.status is EligibilityStatus.ELIGIBLE
+            and account_info.get('cached')
+        ):
+            # Cached answers may only reject; acceptance is always decided on
+            # a fresh Horizon read.
+            account_info = await read_account_info(use_cache=False)
+            decision = evaluate_eligibility(
+                agreed_to_terms=user.agreed_to_terms,
+                stellar_address=address,
+                account_info=account_info,
+            )
         logger.info(
             "Eligibility decision for user %s: %s",
             user_id,
@@ -883,14 +1087,14 @@ class MTLAJoinBot:
 
         # Одной условной записью сохраняем все факты snapshot только для той
         # попытки и фазы, на которых началась проверка.
-        has_trustline = bool(account_info.get('has_trustline', False))
+        account = account_info['account']
+        has_trustline = account.has_trustline
         has_recommendation = account_info.get('recommendation', {}).get(
             'has_recommendation',
             False,
         )
-        candidate_balance = Decimal(str(account_info.get('mtlap_balance', '0')))
-        canonical_balance = "0" if candidate_balance == 0 else format(
-            candidate_balance,
+        canonical_balance = "0" if account.mtlap_balance == 0 else format(
+            account.mtlap_balance,
             "f",
         )
         next_state = (
@@ -959,7 +1163,7 @@ class MTLAJoinBot:
             )
         
         # 2. Проблема с линией доверия
-        if not account_info['has_trustline']:
+        if not account_info['account'].has_trustline:
             # Формируем текст с ссылками внутри
             trustline_text = f"{get_message(user.language, 'no_trustline')}\n{get_message(user.language, 'trustline_help')}\n\n{get_message(user.language, 'open_trustline_label')}: {config.LINKS[user.language]['mtlap_trustline']}"
             
@@ -1241,10 +1445,21 @@ class MTLAJoinBot:
             return
         
         # Отправляем сообщение о начале проверки и убираем клавиатурные кнопки
-        await update.message.reply_text(get_message(user.language, 'checking_address'), reply_markup=ReplyKeyboardRemove())
+        checking_text = get_message(user.language, 'checking_address')
+        status_message = await update.message.reply_text(checking_text, reply_markup=ReplyKeyboardRemove())
 
         # Один ввод адреса формирует один snapshot внешних проверок.
-        account_info = await self.stellar_client.get_account_info(address)
+        account_info = await self._address_prechecks.take(
+            user_id,
+            user.attempt_id,
+            address,
+        )
+        if account_info is None:
+            account_info = await self._read_account_info(
+                status_message,
+                user.language,
+                address,
+            )
         await self.check_address_step(
             update,
             context,
@@ -1252,7 +1467,31 @@ class MTLAJoinBot:
             account_info=account_info,
             attempt_id=user.attempt_id,
             expected_state=user.state,
+            status_message=status_message,
         )
+
+    async def _read_account_info(
+        self,
+        status_message,
+        language: str,
+        address: str,
+        **kwargs,
+    ) -> dict:
+        """Read a candidate snapshot, showing its steps in ``status_message``."""
+
+        status = ThrottledStatusMessage(
+            status_message,
+            get_message(language, 'checking_address'),
+            min_interval=CHECK_STATUS_EDIT_INTERVAL,
+        )
+        try:
+            return await self.stellar_client.get_account_info(
+                address,
+                progress=check_progress_listener(language, status),
+                **kwargs,
+            )
+        finally:
+            await status.close()
     
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик callback кнопок"""
@@ -1314,12 +1553,20 @@ class MTLAJoinBot:
                 get_message(user.language, 'action_outdated')
             )
     
+    def _build_update_processor(self) -> FairUpdateProcessor:
+        slow_limit, fast_limit = config.get_update_concurrency()
+        return FairUpdateProcessor(
+            slow_limit=slow_limit,
+            fast_limit=fast_limit,
+            is_busy=self._user_locks.is_busy,
+        )
+
     def run(self):
         """Запуск бота"""
         self.application = (
             Application.builder()
             .token(config.TELEGRAM_TOKEN)
-            .concurrent_updates(8)
+            .concurrent_updates(self._build_update_processor())
             .post_init(self._post_init)
             .post_shutdown(self._post_shutdown)
             .build()
@@ -1335,6 +1582,7 @@ class MTLAJoinBot:
         self.application.add_handler(CommandHandler("incomplete", self._serialized(self.incomplete)))
         self.application.add_handler(CommandHandler("reminders", self._serialized(self.reminders)))
         self.application.add_handler(CommandHandler("user_info", self._serialized(self.user_info)))
+        self.application.add_handler(CommandHandler("upstreams", self._serialized(self.upstreams)))
         self.application.add_handler(CommandHandler("help_admin", self._serialized(self.help_admin)))
         
         # Обработчики сообщений
@@ -1346,10 +1594,18 @@ class MTLAJoinBot:
         # Обработчики сообщений уже настроены выше
         
         # Обработчики callback
+        self.application.add_handler(CallbackQueryHandler(
+            self._serialized(self.admin_page),
+            pattern=f"^{ADMIN_PAGE_CALLBACK_PREFIX}:",
+        ))
         self.application.add_handler(CallbackQueryHandler(
             self._serialized(self.handle_callback)
         ))
         self.application.add_error_handler(self.handle_error)
+
+        if config.TELEGRAM_MODE == "webhook":
+            asyncio.run(self._run_webhook(self.application))
+            return
         
         # Запуск бота с явным сбросом webhook и дополнительными параметрами
         self.application.run_polling(
@@ -1359,9 +1615,68 @@ class MTLAJoinBot:
             close_loop=False           # Не закрываем event loop
         )
     
+    async def _run_webhook(
+        self,
+        application: Application,
+        stop_signal: asyncio.Event | None = None,
+    ) -> None:
+        """Serve updates from the local webhook until SIGINT/SIGTERM.
+
+        Mirrors the lifecycle of ``run_polling``: the same post_init and
+        post_shutdown hooks run, and pending updates are drained before the
+        storage and HTTP resources close.
+        """
+
+        stop_signal = stop_signal or asyncio.Event()
+        loop = asyncio.get_running_loop()
+        installed_signals = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop_signal.set)
+            except (NotImplementedError, RuntimeError):
+                continue
+            installed_signals.append(signum)
+
+        server = WebhookServer(
+            application,
+            secret_token=config.WEBHOOK_SECRET_TOKEN,
+            path=config.WEBHOOK_PATH,
+            host=config.WEBHOOK_LISTEN,
+            port=config.get_webhook_port(),
+        )
+        await application.initialize()
+        try:
+            await self._post_init(application)
+            await application.start()
+            try:
+                await server.start()
+                # Updates that arrived during downtime stay queued at
+                # Telegram and are delivered once the endpoint is set.
+                await application.bot.set_webhook(
+                    url=config.WEBHOOK_URL,
+                    secret_token=config.WEBHOOK_SECRET_TOKEN,
+                    allowed_updates=None,
+                    drop_pending_updates=False,
+                )
+                await stop_signal.wait()
+            finally:
+                await server.stop()
+                await application.stop()
+        finally:
+            try:
+                await self._post_shutdown(application)
+            finally:
+                await application.shutdown()
+                for signum in installed_signals:
+                    loop.remove_signal_handler(signum)
+
     def cleanup(self):
         """Очистка ресурсов при завершении"""
         try:
+            if isinstance(self.state_manager, AsyncUserStateManager):
+                # The async client is closed by _post_shutdown in its loop.
+                logger.info("Cleanup completed successfully")
+                return
             if self.state_manager:
                 self.state_manager.close_connection()
             if self.admin_tools:
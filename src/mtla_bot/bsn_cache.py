@@ -0,0 +1,105 @@
+"""Bounded in-process cache of BSN recommender lists.
+
+A cold BSN account page can take tens of seconds, and candidates often
+repeat a check minutes later after fixing their trustline.  The cache keeps
+the parsed recommender tuple per candidate together with the response's
+``ETag`` and ``Last-Modified`` validators, so an expired entry is refreshed
+with a conditional request that BSN can answer with ``304 Not Modified``.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+
+
+DEFAULT_BSN_CACHE_SIZE = 1024
+DEFAULT_BSN_CACHE_TTL = 60.0
+DEFAULT_BSN_STALE_TTL = 300.0
+
+
+@dataclass(frozen=True)
+class BsnEntry:
+    recommenders: tuple[str, ...]
+    etag: str | None
+    last_modified: str | None
+    stored_at: float
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class BsnCache:
+    """LRU cache of recommender lists with a stale-while-revalidate window.
+
+    An entry is fresh for ``ttl`` seconds and may then be served for another
+    ``stale_ttl`` seconds while a revalidation runs in the background.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = DEFAULT_BSN_CACHE_SIZE,
+        ttl: float = DEFAULT_BSN_CACHE_TTL,
+        stale_ttl: float = DEFAULT_BSN_STALE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if stale_ttl < 0:
+            raise ValueError("stale_ttl must not be negative")
+        self._max_size = max_size
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, BsnEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, candidate: str) -> BsnEntry | None:
+        """Return a fresh or revalidatable entry; expired ones are dropped."""
+
+        entry = self._entries.get(candidate)
+        if entry is None:
+            return None
+        if self._clock() - entry.stored_at >= self._ttl + self._stale_ttl:
+            del self._entries[candidate]
+            return None
+        self._entries.move_to_end(candidate)
+        return entry
+
+    def is_fresh(self, entry: BsnEntry) -> bool:
+        return self._clock() - entry.stored_at < self._ttl
+
+    def store(
+        self,
+        candidate: str,
+        recommenders: tuple[str, ...],
+        *,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> BsnEntry:
+        entry = BsnEntry(recommenders, etag, last_modified, self._clock())
+        self._entries[candidate] = entry
+        self._entries.move_to_end(candidate)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    def touch(self, candidate: str, entry: BsnEntry) -> BsnEntry:
+        """Restart an entry's lifetime after a ``304 Not Modified``."""
+
+        refreshed = replace(entry, stored_at=self._clock())
+        self._entries[candidate] = refreshed
+        self._entries.move_to_end(candidate)
+        return refreshed
@@ -0,0 +1,54 @@
+"""Progress events of one candidate address check.
+
+A full check reads the candidate from Horizon, the recommendation list from
+BSN and then each recommender from Horizon, which can take half a minute.
+The steps report here as they finish so the bot can show the candidate how
+far the check got instead of one static message.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import Enum
+
+
+logger = logging.getLogger(__name__)
+
+
+class CheckStage(str, Enum):
+    ACCOUNT_LOADED = "account_loaded"
+    TRUSTLINE_FOUND = "trustline_found"
+    TRUSTLINE_MISSING = "trustline_missing"
+    BSN_FETCHED = "bsn_fetched"
+    RECOMMENDER_VERIFIED = "recommender_verified"
+
+
+@dataclass(frozen=True)
+class CheckProgress:
+    """One finished step; ``done`` and ``total`` count recommenders."""
+
+    stage: CheckStage
+    done: int = 0
+    total: int = 0
+
+
+ProgressCallback = Callable[[CheckProgress], None]
+
+
+def report_progress(
+    progress: ProgressCallback | None,
+    stage: CheckStage,
+    *,
+    done: int = 0,
+    total: int = 0,
+) -> None:
+    """Deliver one event; a failing listener never fails the check."""
+
+    if progress is None:
+        return
+    try:
+        progress(CheckProgress(stage, done, total))
+    except Exception:
+        logger.exception("Check progress listener failed")
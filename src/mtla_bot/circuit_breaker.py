@@ -0,0 +1,138 @@
+"""Per-upstream circuit breaker.
+
+While BSN is down every candidate would otherwise wait out the full request
+deadline before hearing "try again later", holding an update slot the whole
+time.  The breaker watches the outcome of recent requests to one upstream
+and, once too many of them failed, rejects new ones immediately.  After a
+cool-down it lets a single probe through (half-open): success closes the
+circuit, failure opens it again.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import Enum
+
+
+DEFAULT_BREAKER_WINDOW = 20
+DEFAULT_BREAKER_MIN_CALLS = 5
+DEFAULT_BREAKER_FAILURE_RATE = 0.5
+DEFAULT_BREAKER_OPEN_SECONDS = 30.0
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class BreakerSnapshot:
+    state: BreakerState
+    calls: int
+    failure_rate: float
+    retry_in: float
+
+
+class CircuitBreaker:
+    """Open after ``failure_rate`` of the last ``window`` requests failed.
+
+    At least ``min_calls`` outcomes are needed before the rate counts, so a
+    single early failure cannot open the circuit.  Each admitted request
+    must end with :meth:`record_success`, :meth:`record_failure` or
+    :meth:`record_abandoned`.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = DEFAULT_BREAKER_WINDOW,
+        min_calls: int = DEFAULT_BREAKER_MIN_CALLS,
+        failure_rate: float = DEFAULT_BREAKER_FAILURE_RATE,
+        open_seconds: float = DEFAULT_BREAKER_OPEN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 1 <= min_calls <= window:
+            raise ValueError("min_calls must be between 1 and window")
+        if not 0 < failure_rate <= 1:
+            raise ValueError("failure_rate must be in (0, 1]")
+        if open_seconds <= 0:
+            raise ValueError("open_seconds must be positive")
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._open_seconds = open_seconds
+        self._clock = clock
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> BreakerState:
+        return self._state
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now."""
+
+        if self._state is BreakerState.CLOSED:
+            return True
+        if self._state is BreakerState.OPEN:
+            if self._clock() - self._opened_at < self._open_seconds:
+                return False
+            self._state = BreakerState.HALF_OPEN
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        if self._state is BreakerState.HALF_OPEN:
+            self._close()
+            return
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self._state is BreakerState.HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(False)
+        if (
+            self._state is BreakerState.CLOSED
+            and len(self._outcomes) >= self._min_calls
+            and self._current_failure_rate() >= self._failure_rate
+        ):
+            self._open()
+
+    def record_abandoned(self) -> None:
+        """Forget an admitted request that ended without an outcome."""
+
+        self._probing = False
+
+    def snapshot(self) -> BreakerSnapshot:
+        retry_in = 0.0
+        if self._state is BreakerState.OPEN:
+            retry_in = max(0.0, self._opened_at + self._open_seconds - self._clock())
+        return BreakerSnapshot(
+            self._state,
+            len(self._outcomes),
+            self._current_failure_rate(),
+            retry_in,
+        )
+
+    def _current_failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _open(self) -> None:
+        self._state = BreakerState.OPEN
+        self._opened_at = self._clock()
+        self._probing = False
+
+    def _close(self) -> None:
+        self._state = BreakerState.CLOSED
+        self._outcomes.clear()
+        self._probing = False
@@ -1,7 +1,10 @@
 import os
+import re
 from dotenv import load_dotenv
 from stellar_sdk import Asset
 
+from .http_pool import PoolSettings
+
 # Загружаем .env файл если он существует
 load_dotenv()
 
@@ -36,10 +39,56 @@ def get_secret(key, default=None):
 # Telegram Bot Token
 TELEGRAM_TOKEN = get_secret('TELEGRAM_TOKEN')
 
+# Update delivery: long polling (default) or a local webhook endpoint.
+TELEGRAM_MODE = get_secret('TELEGRAM_MODE', 'polling')
+WEBHOOK_URL = get_secret('WEBHOOK_URL')
+WEBHOOK_LISTEN = get_secret('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = get_secret('WEBHOOK_PORT', '8443')
+WEBHOOK_PATH = get_secret('WEBHOOK_PATH', '/telegram')
+WEBHOOK_SECRET_TOKEN = get_secret('WEBHOOK_SECRET_TOKEN')
+
+# Concurrent updates: address checks wait on Horizon/BSN and get their own
+# pool so buttons, language and admin commands are never queued behind them.
+UPDATE_SLOW_CONCURRENCY = get_secret('UPDATE_SLOW_CONCURRENCY', '6')
+UPDATE_FAST_CONCURRENCY = get_secret('UPDATE_FAST_CONCURRENCY', '8')
+
+# HTTP connection pools, one per upstream: Horizon is called per recommender
+# and answers quickly, BSN once per check and slowly.
+HORIZON_POOL_SIZE = get_secret('HORIZON_POOL_SIZE', '8')
+BSN_POOL_SIZE = get_secret('BSN_POOL_SIZE', '4')
+HTTP_KEEPALIVE_SECONDS = get_secret('HTTP_KEEPALIVE_SECONDS', '60')
+HTTP_DNS_CACHE_SECONDS = get_secret('HTTP_DNS_CACHE_SECONDS', '300')
+# Bounds of the adaptive Horizon request window; raise the ceiling (and the
+# pool) for a private Horizon instance.
+HORIZON_CONCURRENCY_FLOOR = get_secret('HORIZON_CONCURRENCY_FLOOR', '1')
+HORIZON_CONCURRENCY_CEILING = get_secret('HORIZON_CONCURRENCY_CEILING', '8')
+# Hedged Horizon account reads: a second request is sent when the first has
+# not answered by the given latency percentile, at most for the given share of
+# requests ('0' disables hedging).
+HORIZON_HEDGE_PERCENTILE = get_secret('HORIZON_HEDGE_PERCENTILE', '0.95')
+HORIZON_HEDGE_BUDGET = get_secret('HORIZON_HEDGE_BUDGET', '0.05')
+# Comma-separated HTTPS origins of further Horizon instances (e.g. a
+# self-hosted one) on the same network; requests balance and fail over
+# between them and the public Horizon.
+HORIZON_EXTRA_URLS = get_secret('HORIZON_EXTRA_URLS', '')
+# Circuit breaker per upstream: open once this share of recent requests
+# failed and fail checks immediately for the given number of seconds.
+UPSTREAM_BREAKER_FAILURE_RATE = get_secret('UPSTREAM_BREAKER_FAILURE_RATE', '0.5')
+UPSTREAM_BREAKER_OPEN_SECONDS = get_secret('UPSTREAM_BREAKER_OPEN_SECONDS', '30')
+
 # MongoDB settings (используем значения по умолчанию)
 MONGODB_URI = get_secret('MONGODB_URI', 'mongodb://localhost:27017/')
 MONGODB_DB = get_secret('MONGODB_DB', 'mtla_join_bot')
 MONGODB_COLLECTION = get_secret('MONGODB_COLLECTION', 'users')
+# Stored snapshot of qualified MTLAP holders, reused after a restart.
+MONGODB_HOLDER_INDEX_COLLECTION = get_secret(
+    'MONGODB_HOLDER_INDEX_COLLECTION',
+    'mtlap_holders',
+)
+
+# Storage driver: synchronous PyMongo in worker threads, or the native asyncio
+# PyMongo client, which is still beta and must be opted into.
+MONGODB_DRIVER = get_secret('MONGODB_DRIVER', 'threaded')
 
 # Stellar Network (используем mainnet по умолчанию)
 STELLAR_NETWORK = get_secret('STELLAR_NETWORK', 'public')
@@ -71,6 +120,165 @@ def get_mtlap_asset() -> Asset:
         raise ConfigurationError("Invalid MTLAP_ASSET configuration") from exc
 
 
+def get_webhook_port() -> int:
+    """Return the validated local webhook listening port."""
+
+    try:
+        port = int(WEBHOOK_PORT)
+    except (TypeError, ValueError) as exc:
+        raise ConfigurationError("Invalid WEBHOOK_PORT configuration") from exc
+    if not 0 < port < 65536:
+        raise ConfigurationError("Invalid WEBHOOK_PORT configuration")
+    return port
+
+
+def get_update_concurrency() -> tuple[int, int]:
+    """Return validated ``(slow, fast)`` update pool sizes."""
+
+    limits = []
+    for key, value in (
+        ("UPDATE_SLOW_CONCURRENCY", UPDATE_SLOW_CONCURRENCY),
+        ("UPDATE_FAST_CONCURRENCY", UPDATE_FAST_CONCURRENCY),
+    ):
+        try:
+            limit = int(value)
+        except (TypeError, ValueError) as exc:
+            raise ConfigurationError(f"Invalid {key} configuration") from exc
+        if not 1 <= limit <= 64:
+            raise ConfigurationError(f"Invalid {key} configuration")
+        limits.append(limit)
+    return limits[0], limits[1]
+
+
+def get_upstream_pools() -> dict[str, PoolSettings]:
+    """Return validated connection pool settings keyed by upstream name."""
+
+    def number(key: str, value, parse, low, high):
+        try:
+            parsed = parse(value)
+        except (TypeError, ValueError) as exc:
+            raise ConfigurationError(f"Invalid {key} configuration") from exc
+        if not low <= parsed <= high:
+            raise ConfigurationError(f"Invalid {key} configuration")
+        return parsed
+
+    horizon_limit = number("HORIZON_POOL_SIZE", HORIZON_POOL_SIZE, int, 1, 256)
+    bsn_limit = number("BSN_POOL_SIZE", BSN_POOL_SIZE, int, 1, 64)
+    keepalive = number(
+        "HTTP_KEEPALIVE_SECONDS", HTTP_KEEPALIVE_SECONDS, float, 1, 3600
+    )
+    dns_ttl = number("HTTP_DNS_CACHE_SECONDS", HTTP_DNS_CACHE_SECONDS, int, 0, 86400)
+    return {
+        "horizon": PoolSettings(
+            horizon_limit,
+            keepalive_timeout=keepalive,
+            dns_ttl=dns_ttl,
+            warm_connections=min(2, horizon_limit),
+        ),
+        "bsn": PoolSettings(
+            bsn_limit,
+            keepalive_timeout=keepalive,
+            dns_ttl=dns_ttl,
+        ),
+    }
+
+
+def get_horizon_concurrency() -> tuple[int, int]:
+    """Return validated ``(floor, ceiling)`` of the Horizon request window."""
+
+    bounds = []
+    for key, value in (
+        ("HORIZON_CONCURRENCY_FLOOR", HORIZON_CONCURRENCY_FLOOR),
+        ("HORIZON_CONCURRENCY_CEILING", HORIZON_CONCURRENCY_CEILING),
+    ):
+        try:
+            bound = int(value)
+        except (TypeError, ValueError) as exc:
+            raise ConfigurationError(f"Invalid {key} configuration") from exc
+        if not 1 <= bound <= 256:
+            raise ConfigurationError(f"Invalid {key} configuration")
+        bounds.append(bound)
+    floor, ceiling = bounds
+    if floor > ceiling:
+        raise ConfigurationError("Invalid HORIZON_CONCURRENCY_FLOOR configuration")
+    if ceiling > get_upstream_pools()["horizon"].limit:
+        # More requests than pooled connections would only queue in aiohttp.
+        raise ConfigurationError("Invalid HORIZON_CONCURRENCY_CEILING configuration")
+    return floor, ceiling
+
+
+def get_horizon_hedging() -> tuple[float, float] | None:
+    """Return validated ``(percentile, budget)`` or ``None``.
+
+    ``None`` means hedging is disabled.
+    """
+
+    values = []
+    for key, value in (
+        ("HORIZON_HEDGE_PERCENTILE", HORIZON_HEDGE_PERCENTILE),
+        ("HORIZON_HEDGE_BUDGET", HORIZON_HEDGE_BUDGET),
+    ):
+        try:
+            parsed = float(value)
+        except (TypeError, ValueError) as exc:
+            raise ConfigurationError(f"Invalid {key} configuration") from exc
+        values.append(parsed)
+    percentile, budget = values
+    if not 0.5 <= percentile < 1:
+        raise ConfigurationError("Invalid HORIZON_HEDGE_PERCENTILE configuration")
+    if not 0 <= budget <= 0.5:
+        raise ConfigurationError("Invalid HORIZON_HEDGE_BUDGET configuration")
+    if budget == 0:
+        return None
+    return percentile, budget
+
+
+def get_extra_horizon_urls() -> tuple[str, ...]:
+    """Return the validated additional Horizon origins."""
+
+    if not isinstance(HORIZON_EXTRA_URLS, str):
+        raise ConfigurationError("Invalid HORIZON_EXTRA_URLS configuration")
+    urls = tuple(url.strip() for url in HORIZON_EXTRA_URLS.split(",") if url.strip())
+    if any(not url.startswith("https://") for url in urls) or len(set(urls)) != len(urls):
+        raise ConfigurationError("Invalid HORIZON_EXTRA_URLS configuration")
+    return urls
+
+
+def get_upstream_breaker() -> tuple[float, float]:
+    """Return validated ``(failure_rate, open_seconds)`` of upstream breakers."""
+
+    limits = []
+    for key, value, low, high in (
+        ("UPSTREAM_BREAKER_FAILURE_RATE", UPSTREAM_BREAKER_FAILURE_RATE, 0.05, 1.0),
+        ("UPSTREAM_BREAKER_OPEN_SECONDS", UPSTREAM_BREAKER_OPEN_SECONDS, 1.0, 600.0),
+    ):
+        try:
+            limit = float(value)
+        except (TypeError, ValueError) as exc:
+            raise ConfigurationError(f"Invalid {key} configuration") from exc
+        if not low <= limit <= high:
+            raise ConfigurationError(f"Invalid {key} configuration")
+        limits.append(limit)
+    return limits[0], limits[1]
+
+
+def _validate_webhook_config() -> None:
+    url = WEBHOOK_URL
+    if not isinstance(url, str) or not url.startswith("https://"):
+        raise ConfigurationError("Invalid WEBHOOK_URL configuration")
+    if not isinstance(WEBHOOK_PATH, str) or not WEBHOOK_PATH.startswith("/"):
+        raise ConfigurationError("Invalid WEBHOOK_PATH configuration")
+    secret = WEBHOOK_SECRET_TOKEN
+    # Telegram accepts 1-256 characters from A-Z, a-z, 0-9, _ and -.
+    if (
+        not isinstance(secret, str)
+        or not 1 <= len(secret) <= 256
+        or re.fullmatch(r"[A-Za-z0-9_-]+", secret) is None
+    ):
+        raise ConfigurationError("Invalid WEBHOOK_SECRET_TOKEN configuration")
+    get_webhook_port()
+
+
 def validate_config() -> None:
     """Fail fast on missing or structurally invalid required configuration."""
 
@@ -91,6 +299,21 @@ def validate_config() -> None:
     if STELLAR_NETWORK not in {"public", "testnet"}:
         raise ConfigurationError("Invalid STELLAR_NETWORK configuration")
 
+    if MONGODB_DRIVER not in {"async", "threaded"}:
+        raise ConfigurationError("Invalid MONGODB_DRIVER configuration")
+
+    get_update_concurrency()
+    get_upstream_pools()
+    get_horizon_concurrency()
+    get_upstream_breaker()
+    get_horizon_hedging()
+    get_extra_horizon_urls()
+
+    if TELEGRAM_MODE not in {"polling", "webhook"}:
+        raise ConfigurationError("Invalid TELEGRAM_MODE configuration")
+    if TELEGRAM_MODE == "webhook":
+        _validate_webhook_config()
+
     get_mtlap_asset()
 
 # Links
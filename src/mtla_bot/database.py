@@ -1,7 +1,8 @@
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import MongoClient, UpdateOne
 from pymongo.errors import ConnectionFailure, OperationFailure
 import logging
-from typing import Optional, Dict, List
+from typing import Iterable, Optional, Dict, List, Tuple
 from datetime import datetime, timedelta
 from . import config
 
@@ -11,6 +12,426 @@ logger = logging.getLogger(__name__)
 class DatabaseOperationError(RuntimeError):
     """Stable storage failure that is distinct from a missing record."""
 
+
+# Query and update documents are shared by the synchronous and the native
+# asyncio storage backends, so both enforce exactly the same conditions.
+
+INDEXES = (
+    ("user_id", {"unique": True}),
+    ("state", {}),
+    ("created_at", {}),
+    ("last_activity", {}),
+    ([("last_activity", 1), ("_id", 1)], {}),
+    ([
+        ("state", 1),
+        ("final_delivery_lease_until", 1),
+        ("last_activity", 1),
+    ], {}),
+)
+
+VERIFIED_FINALIZING_FACTS = {
+    "state": "finalizing",
+    "agreed_to_terms": True,
+    "has_trustline": True,
+    "candidate_mtlap_balance": "0",
+    "has_recommendation": True,
+    "stellar_address": {"$type": "string", "$ne": ""},
+}
+
+
+def _empty_progress() -> Dict:
+    return {
+        "username_check": False,
+        "agreement": False,
+        "address_entered": False,
+        "trustline_check": False,
+        "recommendation": False,
+    }
+
+
+def _fresh_attempt_fields(
+    username: Optional[str],
+    language: str,
+    attempt_id: Optional[str],
+) -> Dict:
+    return {
+        "username": username,
+        "language": language,
+        "attempt_id": attempt_id,
+        "state": "checking_username",
+        "has_username": False,
+        "username_warning_acknowledged": False,
+        "agreed_to_terms": False,
+        "stellar_address": None,
+        "has_trustline": False,
+        "candidate_mtlap_balance": None,
+        "has_recommendation": False,
+        "recommender_username": None,
+        "final_delivery_attempts": 0,
+        "final_delivery_lease_id": None,
+        "final_delivery_lease_until": None,
+        "final_delivery_last_error": None,
+        "final_delivery_last_attempt_at": None,
+        "final_delivery_message_id": None,
+        "final_delivered_at": None,
+        "last_activity": datetime.utcnow(),
+        "progress": _empty_progress(),
+    }
+
+
+def new_user_document(
+    user_id: int,
+    username: Optional[str],
+    language: str,
+    attempt_id: Optional[str],
+) -> Dict:
+    document = {"user_id": user_id}
+    document.update(_fresh_attempt_fields(username, language, attempt_id))
+    document["created_at"] = datetime.utcnow()
+    return document
+
+
+def new_attempt_update(
+    username: Optional[str],
+    language: str,
+    attempt_id: str,
+) -> Dict:
+    return {"$set": _fresh_attempt_fields(username, language, attempt_id)}
+
+
+def active_attempt_query(user_id: int, attempt_id: str, expected_state: str) -> Dict:
+    return {
+        "user_id": user_id,
+        "attempt_id": attempt_id,
+        "state": expected_state,
+    }
+
+
+def eligibility_snapshot_update(
+    address: str,
+    has_trustline: bool,
+    candidate_mtlap_balance: str,
+    has_recommendation: bool,
+    next_state: str,
+) -> Dict:
+    return {"$set": {
+        "stellar_address": address,
+        "has_trustline": has_trustline,
+        "candidate_mtlap_balance": candidate_mtlap_balance,
+        "has_recommendation": has_recommendation,
+        "state": next_state,
+        "last_activity": datetime.utcnow(),
+        "progress.address_entered": True,
+        "progress.trustline_check": has_trustline,
+        "progress.recommendation": has_recommendation,
+        "final_delivery_attempts": 0,
+        "final_delivery_lease_id": None,
+        "final_delivery_lease_until": None,
+        "final_delivery_last_error": None,
+        "final_delivery_last_attempt_at": None,
+        "final_delivery_message_id": None,
+        "final_delivered_at": None,
+    }}
+
+
+def completion_query(user_id: int, attempt_id: str, delivery_lease_id: str) -> Dict:
+    query = {
+        "user_id": user_id,
+        "attempt_id": attempt_id,
+        "final_delivery_lease_id": delivery_lease_id,
+    }
+    query.update(VERIFIED_FINALIZING_FACTS)
+    return query
+
+
+def completion_update(delivery_message_id: Optional[int]) -> Dict:
+    return {"$set": {
+        "state": "completed",
+        "final_delivery_message_id": delivery_message_id,
+        "final_delivered_at": datetime.utcnow(),
+        "final_delivery_lease_id": None,
+        "final_delivery_lease_until": None,
+        "final_delivery_last_error": None,
+        "last_activity": datetime.utcnow(),
+    }}
+
+
+def _lease_available(now: datetime) -> Dict:
+    return {"$or": [
+        {"final_delivery_lease_until": {"$exists": False}},
+        {"final_delivery_lease_until": None},
+        {"final_delivery_lease_until": {"$lte": now}},
+    ]}
+
+
+def _automatic_attempts_left(max_attempts: int) -> Dict:
+    return {"$or": [
+        {"final_delivery_attempts": {"$exists": False}},
+        {"final_delivery_attempts": {"$lt": max_attempts}},
+    ]}
+
+
+def final_delivery_claim(
+    user_id: int,
+    attempt_id: str,
+    delivery_lease_id: str,
+    *,
+    lease_seconds: int,
+    automatic: bool,
+    max_attempts: int,
+) -> tuple[Dict, Dict]:
+    """Return the conditional query and update of one delivery claim."""
+
+    if lease_seconds < 1 or max_attempts < 1:
+        raise ValueError("delivery limits must be positive")
+    if not isinstance(automatic, bool):
+        raise ValueError("automatic must be a boolean")
+    now = datetime.utcnow()
+    claim_conditions = [_lease_available(now)]
+    if automatic:
+        claim_conditions.insert(0, _automatic_attempts_left(max_attempts))
+    query = {"user_id": user_id, "attempt_id": attempt_id}
+    query.update(VERIFIED_FINALIZING_FACTS)
+    query["$and"] = claim_conditions
+    return query, _claim_update(delivery_lease_id, now, lease_seconds)
+
+
+def _claim_update(delivery_lease_id: str, now: datetime, lease_seconds: int) -> Dict:
+    return {
+        "$inc": {"final_delivery_attempts": 1},
+        "$set": {
+            "final_delivery_lease_id": delivery_lease_id,
+            "final_delivery_lease_until": now + timedelta(
+                seconds=lease_seconds
+            ),
+            "final_delivery_last_attempt_at": now,
+            "final_delivery_last_error": None,
+            "last_activity": now,
+        },
+    }
+
+
+def final_delivery_batch_claim(
+    candidates: Iterable[tuple[int, str]],
+    delivery_lease_id: str,
+    *,
+    lease_seconds: int,
+    max_attempts: int,
+) -> tuple[Dict, Dict]:
+    """Return one ``update_many`` claiming automatic deliveries in bulk.
+
+    Every candidate is matched by its ``(user_id, attempt_id)`` pair and the
+    same verified facts, attempt bound and lease check as a single automatic
+    claim, so each document is claimed atomically or not at all.
+    """
+
+    pairs = [
+        {"user_id": user_id, "attempt_id": attempt_id}
+        for user_id, attempt_id in candidates
+    ]
+    if not pairs:
+        raise ValueError("candidates must not be empty")
+    if lease_seconds < 1 or max_attempts < 1:
+        raise ValueError("delivery limits must be positive")
+    now = datetime.utcnow()
+    query = dict(VERIFIED_FINALIZING_FACTS)
+    query["$or"] = pairs
+    query["$and"] = [
+        _automatic_attempts_left(max_attempts),
+        _lease_available(now),
+    ]
+    return query, _claim_update(delivery_lease_id, now, lease_seconds)
+
+
+def claimed_deliveries_query(
+    candidates: Iterable[tuple[int, str]],
+    delivery_lease_id: str,
+) -> Dict:
+    return {
+        "user_id": {"$in": [user_id for user_id, _attempt_id in candidates]},
+        "final_delivery_lease_id": delivery_lease_id,
+    }
+
+
+def final_delivery_outcomes(
+    delivery_lease_id: str,
+    delivered: Iterable[tuple[int, str, Optional[int]]],
+    failed: Iterable[tuple[int, str, str]],
+    *,
+    retry_seconds: int,
+) -> List[tuple[Dict, Dict]]:
+    """Return the conditional completions and deferrals of one claimed batch."""
+
+    operations = [
+        (
+            completion_query(user_id, attempt_id, delivery_lease_id),
+            completion_update(message_id),
+        )
+        for user_id, attempt_id, message_id in delivered
+    ]
+    operations.extend(
+        final_delivery_deferral(
+            user_id,
+            attempt_id,
+            delivery_lease_id,
+            retry_seconds=retry_seconds,
+            error_code=error_code,
+        )
+        for user_id, attempt_id, error_code in failed
+    )
+    return operations
+
+
+def final_delivery_deferral(
+    user_id: int,
+    attempt_id: str,
+    delivery_lease_id: str,
+    *,
+    retry_seconds: int,
+    error_code: str,
+) -> tuple[Dict, Dict]:
+    """Return the conditional query and update releasing a failed claim."""
+
+    if retry_seconds < 1:
+        raise ValueError("retry_seconds must be positive")
+    now = datetime.utcnow()
+    query = {
+        "user_id": user_id,
+        "attempt_id": attempt_id,
+        "state": "finalizing",
+        "final_delivery_lease_id": delivery_lease_id,
+    }
+    update = {"$set": {
+        "final_delivery_lease_id": None,
+        "final_delivery_lease_until": now + timedelta(seconds=retry_seconds),
+        "final_delivery_last_error": error_code,
+        "last_activity": now,
+    }}
+    return query, update
+
+
+def finalizing_users_query(limit: int, max_attempts: int) -> Dict:
+    if not 1 <= limit <= 100 or max_attempts < 1:
+        raise ValueError("invalid finalization batch limits")
+    query = dict(VERIFIED_FINALIZING_FACTS)
+    query["attempt_id"] = {"$type": "string", "$ne": ""}
+    query["$and"] = [
+        _automatic_attempts_left(max_attempts),
+        _lease_available(datetime.utcnow()),
+    ]
+    return query
+
+
+def incomplete_users_query() -> Dict:
+    return {"state": {"$ne": "completed"}}
+
+
+def reminder_users_query(days_inactive: int) -> Dict:
+    cutoff_date = datetime.utcnow() - timedelta(days=days_inactive)
+    return {
+        "state": {"$ne": "completed"},
+        "last_activity": {"$lt": cutoff_date},
+    }
+
+
+def user_statistics_pipeline() -> List[Dict]:
+    """All ``/stats`` figures from a single collection scan.
+
+    Total and completed users are sums over the state distribution, so only
+    the 24-hour activity count needs a second facet.
+    """
+
+    active_since = datetime.utcnow() - timedelta(days=1)
+    return [
+        {"$project": {"_id": 0, "state": 1, "last_activity": 1}},
+        {"$facet": {
+            "states": [{"$group": {"_id": "$state", "count": {"$sum": 1}}}],
+            "active": [
+                {"$match": {"last_activity": {"$gte": active_since}}},
+                {"$count": "count"},
+            ],
+        }},
+    ]
+
+
+def user_statistics_from_facets(facets: List[Dict]) -> Dict:
+    result = facets[0] if facets else {}
+    state_stats = {doc["_id"]: doc["count"] for doc in result.get("states", [])}
+    active = result.get("active") or [{"count": 0}]
+    return {
+        "total_users": sum(state_stats.values()),
+        "completed_users": state_stats.get("completed", 0),
+        "active_users": active[0]["count"],
+        "state_distribution": state_stats,
+    }
+
+
+# Administrative lists are read in keyset pages ordered by
+# ``(last_activity, _id)``; every stored document gets ``last_activity`` on
+# creation, so the key is always present.
+PageCursor = Tuple[datetime, ObjectId]
+
+USER_PAGE_SORT = [("last_activity", 1), ("_id", 1)]
+USER_PAGE_PROJECTION = {
+    "user_id": 1,
+    "username": 1,
+    "state": 1,
+    "created_at": 1,
+    "last_activity": 1,
+}
+
+
+def user_page_query(query: Dict, after: Optional[PageCursor], limit: int) -> Dict:
+    """Restrict ``query`` to documents strictly after the ``after`` key."""
+
+    if not 1 <= limit <= 100:
+        raise ValueError("invalid page size")
+    if after is None:
+        return query
+    last_activity, object_id = after
+    return {"$and": [query, {"$or": [
+        {"last_activity": {"$gt": last_activity}},
+        {"last_activity": last_activity, "_id": {"$gt": object_id}},
+    ]}]}
+
+
+def holder_index_query(asset: str, minimum_balance: str) -> Dict:
+    """A stored holder snapshot only applies to the same asset and threshold."""
+
+    return {"_id": asset, "minimum_balance": minimum_balance}
+
+
+def holder_index_document(
+    asset: str,
+    minimum_balance: str,
+    keys: bytes,
+    count: int,
+    cursor: Optional[str] = None,
+) -> Dict:
+    return {
+        "_id": asset,
+        "minimum_balance": minimum_balance,
+        "keys": keys,
+        "count": count,
+        "cursor": cursor,
+        "refreshed_at": datetime.utcnow(),
+    }
+
+
+# Change events that can make a final delivery due: a document entering
+# ``finalizing`` or having its lease claimed or deferred while it stays there.
+FINALIZATION_CHANGE_PIPELINE = (
+    {"$match": {
+        "operationType": {"$in": ["insert", "update", "replace"]},
+        "fullDocument.state": "finalizing",
+    }},
+    {"$project": {
+        "fullDocument.user_id": 1,
+        "fullDocument.final_delivery_lease_until": 1,
+    }},
+)
+
+
 class DatabaseManager:
     """Менеджер базы данных MongoDB"""
     
@@ -18,6 +439,7 @@ class DatabaseManager:
         self.client = None
         self.db = None
         self.collection = None
+        self.holder_index_collection = None
         self.connect()
     
     def connect(self):
@@ -34,17 +456,13 @@ class DatabaseManager:
             self.client.admin.command('ping')
             self.db = self.client[config.MONGODB_DB]
             self.collection = self.db[config.MONGODB_COLLECTION]
+            self.holder_index_collection = self.db[
+                config.MONGODB_HOLDER_INDEX_COLLECTION
+            ]
             
             # Создаем индексы
-            self.collection.create_index("user_id", unique=True)
-            self.collection.create_index("state")
-            self.collection.create_index("created_at")
-            self.collection.create_index("last_activity")
-            self.collection.create_index([
-                ("state", 1),
-                ("final_delivery_lease_until", 1),
-                ("last_activity", 1),
-            ])
+            for keys, options in INDEXES:
+                self.collection.create_index(keys, **options)
             
             logger.info("Successfully connected to MongoDB")
         except ConnectionFailure as e:
@@ -76,37 +494,12 @@ class DatabaseManager:
     ) -> bool:
         """Создает нового пользователя"""
         try:
-            user_data = {
-                "user_id": user_id,
-                "username": username,
-                "attempt_id": attempt_id,
-                "language": language,
-                "state": "checking_username",
-                "has_username": False,
-                "username_warning_acknowledged": False,
-                "agreed_to_terms": False,
-                "stellar_address": None,
-                "has_trustline": False,
-                "candidate_mtlap_balance": None,
-                "has_recommendation": False,
-                "recommender_username": None,
-                "final_delivery_attempts": 0,
-                "final_delivery_lease_id": None,
-                "final_delivery_lease_until": None,
-                "final_delivery_last_error": None,
-                "final_delivery_last_attempt_at": None,
-                "final_delivery_message_id": None,
-                "final_delivered_at": None,
-                "created_at": datetime.utcnow(),
-                "last_activity": datetime.utcnow(),
-                "progress": {
-                    "username_check": False,
-                    "agreement": False,
-                    "address_entered": False,
-                    "trustline_check": False,
-                    "recommendation": False
-                }
-            }
+            user_data = new_user_document(
+                user_id,
+                username,
+                language,
+                attempt_id,
+            )
             
             result = self.collection.insert_one(user_data)
             logger.info(f"Created user {user_id}: {result.inserted_id}")
@@ -144,35 +537,7 @@ class DatabaseManager:
         try:
             result = self.collection.update_one(
                 {"user_id": user_id},
-                {"$set": {
-                    "username": username,
-                    "language": language,
-                    "attempt_id": attempt_id,
-                    "state": "checking_username",
-                    "has_username": False,
-                    "username_warning_acknowledged": False,
-                    "agreed_to_terms": False,
-                    "stellar_address": None,
-                    "has_trustline": False,
-                    "candidate_mtlap_balance": None,
-                    "has_recommendation": False,
-                    "recommender_username": None,
-                    "final_delivery_attempts": 0,
-                    "final_delivery_lease_id": None,
-                    "final_delivery_lease_until": None,
-                    "final_delivery_last_error": None,
-                    "final_delivery_last_attempt_at": None,
-                    "final_delivery_message_id": None,
-                    "final_delivered_at": None,
-                    "last_activity": datetime.utcnow(),
-                    "progress": {
-                        "username_check": False,
-                        "agreement": False,
-                        "address_entered": False,
-                        "trustline_check": False,
-                        "recommendation": False,
-                    },
-                }},
+                new_attempt_update(username, language, attempt_id),
             )
             return result.matched_count == 1
         except Exception:
@@ -194,29 +559,14 @@ class DatabaseManager:
 
         try:
             result = self.collection.update_one(
-                {
-                    "user_id": user_id,
-                    "attempt_id": attempt_id,
-                    "state": expected_state,
-                },
-                {"$set": {
-                    "stellar_address": address,
-                    "has_trustline": has_trustline,
-                    "candidate_mtlap_balance": candidate_mtlap_balance,
-                    "has_recommendation": has_recommendation,
-                    "state": next_state,
-                    "last_activity": datetime.utcnow(),
-                    "progress.address_entered": True,
-                    "progress.trustline_check": has_trustline,
-                    "progress.recommendation": has_recommendation,
-                    "final_delivery_attempts": 0,
-                    "final_delivery_lease_id": None,
-                    "final_delivery_lease_until": None,
-                    "final_delivery_last_error": None,
-                    "final_delivery_last_attempt_at": None,
-                    "final_delivery_message_id": None,
-                    "final_delivered_at": None,
-                }},
+                active_attempt_query(user_id, attempt_id, expected_state),
+                eligibility_snapshot_update(
+                    address,
+                    has_trustline,
+                    candidate_mtlap_balance,
+                    has_recommendation,
+                    next_state,
+                ),
             )
             return result.matched_count == 1
         except Exception:
@@ -239,11 +589,7 @@ class DatabaseManager:
             persisted = dict(update_data)
             persisted["last_activity"] = datetime.utcnow()
             result = self.collection.update_one(
-                {
-                    "user_id": user_id,
-                    "attempt_id": attempt_id,
-                    "state": expected_state,
-                },
+                active_attempt_query(user_id, attempt_id, expected_state),
                 {"$set": persisted},
             )
             return result.matched_count == 1
@@ -281,26 +627,8 @@ class DatabaseManager:
 
         try:
             result = self.collection.update_one(
-                {
-                    "user_id": user_id,
-                    "attempt_id": attempt_id,
-                    "state": "finalizing",
-                    "final_delivery_lease_id": delivery_lease_id,
-                    "agreed_to_terms": True,
-                    "has_trustline": True,
-                    "candidate_mtlap_balance": "0",
-                    "has_recommendation": True,
-                    "stellar_address": {"$type": "string", "$ne": ""},
-                },
-                {"$set": {
-                    "state": "completed",
-                    "final_delivery_message_id": delivery_message_id,
-                    "final_delivered_at": datetime.utcnow(),
-                    "final_delivery_lease_id": None,
-                    "final_delivery_lease_until": None,
-                    "final_delivery_last_error": None,
-                    "last_activity": datetime.utcnow(),
-                }},
+                completion_query(user_id, attempt_id, delivery_lease_id),
+                completion_update(delivery_message_id),
             )
             return result.matched_count == 1
         except Exception:
@@ -319,50 +647,16 @@ class DatabaseManager:
     ) -> bool:
         """Atomically reserve one final delivery, bounding autonomous sends."""
 
-        if lease_seconds < 1 or max_attempts < 1:
-            raise ValueError("delivery limits must be positive")
-        if not isinstance(automatic, bool):
-            raise ValueError("automatic must be a boolean")
-        now = datetime.utcnow()
-        claim_conditions = [
-            {"$or": [
-                {"final_delivery_lease_until": {"$exists": False}},
-                {"final_delivery_lease_until": None},
-                {"final_delivery_lease_until": {"$lte": now}},
-            ]},
-        ]
-        increments = {"final_delivery_attempts": 1}
-        if automatic:
-            claim_conditions.insert(0, {"$or": [
-                {"final_delivery_attempts": {"$exists": False}},
-                {"final_delivery_attempts": {"$lt": max_attempts}},
-            ]})
+        query, update = final_delivery_claim(
+            user_id,
+            attempt_id,
+            delivery_lease_id,
+            lease_seconds=lease_seconds,
+            automatic=automatic,
+            max_attempts=max_attempts,
+        )
         try:
-            result = self.collection.update_one(
-                {
-                    "user_id": user_id,
-                    "attempt_id": attempt_id,
-                    "state": "finalizing",
-                    "agreed_to_terms": True,
-                    "has_trustline": True,
-                    "candidate_mtlap_balance": "0",
-                    "has_recommendation": True,
-                    "stellar_address": {"$type": "string", "$ne": ""},
-                    "$and": claim_conditions,
-                },
-                {
-                    "$inc": increments,
-                    "$set": {
-                        "final_delivery_lease_id": delivery_lease_id,
-                        "final_delivery_lease_until": now + timedelta(
-                            seconds=lease_seconds
-                        ),
-                        "final_delivery_last_attempt_at": now,
-                        "final_delivery_last_error": None,
-                        "last_activity": now,
-                    },
-                },
-            )
+            result = self.collection.update_one(query, update)
             return result.matched_count == 1
         except Exception:
             logger.exception("Error claiming final delivery for user %s", user_id)
@@ -379,30 +673,74 @@ class DatabaseManager:
     ) -> bool:
         """Release a failed delivery claim with a bounded retry delay."""
 
-        if retry_seconds < 1:
-            raise ValueError("retry_seconds must be positive")
-        now = datetime.utcnow()
+        query, update = final_delivery_deferral(
+            user_id,
+            attempt_id,
+            delivery_lease_id,
+            retry_seconds=retry_seconds,
+            error_code=error_code,
+        )
         try:
-            result = self.collection.update_one(
-                {
-                    "user_id": user_id,
-                    "attempt_id": attempt_id,
-                    "state": "finalizing",
-                    "final_delivery_lease_id": delivery_lease_id,
-                },
-                {"$set": {
-                    "final_delivery_lease_id": None,
-                    "final_delivery_lease_until": now + timedelta(
-                        seconds=retry_seconds
-                    ),
-                    "final_delivery_last_error": error_code,
-                    "last_activity": now,
-                }},
-            )
+            result = self.collection.update_one(query, update)
             return result.matched_count == 1
         except Exception:
             logger.exception("Error deferring final delivery for user %s", user_id)
             return False
+
+    def claim_final_deliveries(
+        self,
+        candidates: List[tuple[int, str]],
+        delivery_lease_id: str,
+        *,
+        lease_seconds: int,
+        max_attempts: int,
+    ) -> List[Dict]:
+        """Claim a redelivery batch with one update and return claimed users."""
+
+        if not candidates:
+            return []
+        query, update = final_delivery_batch_claim(
+            candidates,
+            delivery_lease_id,
+            lease_seconds=lease_seconds,
+            max_attempts=max_attempts,
+        )
+        try:
+            self.collection.update_many(query, update)
+            return list(self.collection.find(
+                claimed_deliveries_query(candidates, delivery_lease_id)
+            ))
+        except Exception as exc:
+            logger.exception("Error claiming final deliveries")
+            raise DatabaseOperationError("database_write_failed") from exc
+
+    def record_final_delivery_outcomes(
+        self,
+        delivery_lease_id: str,
+        delivered: List[tuple[int, str, Optional[int]]],
+        failed: List[tuple[int, str, str]],
+        *,
+        retry_seconds: int,
+    ) -> int:
+        """Complete or defer a claimed batch in one bulk write."""
+
+        operations = [
+            UpdateOne(query, update)
+            for query, update in final_delivery_outcomes(
+                delivery_lease_id,
+                delivered,
+                failed,
+                retry_seconds=retry_seconds,
+            )
+        ]
+        if not operations:
+            return 0
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            return result.matched_count
+        except Exception:
+            logger.exception("Error recording final delivery outcomes")
+            return 0
     
     def update_user_progress(self, user_id: int, progress_key: str, value: bool) -> bool:
         """Обновляет прогресс пользователя"""
@@ -470,31 +808,10 @@ class DatabaseManager:
     ) -> List[Dict]:
         """Return the oldest pending final deliveries in a bounded batch."""
 
-        if not 1 <= limit <= 100 or max_attempts < 1:
-            raise ValueError("invalid finalization batch limits")
-        now = datetime.utcnow()
+        query = finalizing_users_query(limit, max_attempts)
         try:
             cursor = (
-                self.collection.find({
-                    "state": "finalizing",
-                    "agreed_to_terms": True,
-                    "has_trustline": True,
-                    "candidate_mtlap_balance": "0",
-                    "has_recommendation": True,
-                    "stellar_address": {"$type": "string", "$ne": ""},
-                    "attempt_id": {"$type": "string", "$ne": ""},
-                    "$and": [
-                        {"$or": [
-                            {"final_delivery_attempts": {"$exists": False}},
-                            {"final_delivery_attempts": {"$lt": max_attempts}},
-                        ]},
-                        {"$or": [
-                            {"final_delivery_lease_until": {"$exists": False}},
-                            {"final_delivery_lease_until": None},
-                            {"final_delivery_lease_until": {"$lte": now}},
-                        ]},
-                    ],
-                })
+                self.collection.find(query)
                 .sort("last_activity", 1)
                 .limit(limit)
             )
@@ -503,52 +820,105 @@ class DatabaseManager:
             logger.exception("Error getting finalizing users")
             raise DatabaseOperationError("database_read_failed") from exc
     
-    def get_incomplete_users(self) -> List[Dict]:
-        """Получает пользователей, которые не завершили процесс"""
+    def _get_user_page(
+        self,
+        query: Dict,
+        limit: int,
+        after: Optional[PageCursor],
+    ) -> List[Dict]:
+        return list(
+            self.collection.find(
+                user_page_query(query, after, limit),
+                USER_PAGE_PROJECTION,
+            )
+            .sort(USER_PAGE_SORT)
+            .limit(limit)
+        )
+
+    def get_incomplete_users(
+        self,
+        limit: int = 20,
+        after: Optional[PageCursor] = None,
+    ) -> List[Dict]:
+        """Получает страницу пользователей, которые не завершили процесс"""
         try:
-            return list(self.collection.find({
-                "state": {"$ne": "completed"}
-            }))
+            return self._get_user_page(incomplete_users_query(), limit, after)
         except Exception as exc:
             logger.exception("Error getting incomplete users")
             raise DatabaseOperationError("database_read_failed") from exc
+
+    def count_incomplete_users(self) -> int:
+        try:
+            return self.collection.count_documents(incomplete_users_query())
+        except Exception as exc:
+            logger.exception("Error counting incomplete users")
+            raise DatabaseOperationError("database_read_failed") from exc
     
-    def get_users_for_reminder(self, days_inactive: int = 7) -> List[Dict]:
-        """Получает пользователей для напоминания (неактивных N дней)"""
+    def get_users_for_reminder(
+        self,
+        days_inactive: int = 7,
+        limit: int = 15,
+        after: Optional[PageCursor] = None,
+    ) -> List[Dict]:
+        """Получает страницу пользователей для напоминания (неактивных N дней)"""
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days_inactive)
-            
-            return list(self.collection.find({
-                "state": {"$ne": "completed"},
-                "last_activity": {"$lt": cutoff_date}
-            }))
+            return self._get_user_page(
+                reminder_users_query(days_inactive),
+                limit,
+                after,
+            )
         except Exception as exc:
             logger.exception("Error getting users for reminder")
             raise DatabaseOperationError("database_read_failed") from exc
+
+    def count_users_for_reminder(self, days_inactive: int = 7) -> int:
+        try:
+            return self.collection.count_documents(
+                reminder_users_query(days_inactive)
+            )
+        except Exception as exc:
+            logger.exception("Error counting users for reminder")
+            raise DatabaseOperationError("database_read_failed") from exc
     
     def get_user_statistics(self) -> Dict:
         """Получает статистику по пользователям"""
         try:
-            total_users = self.collection.count_documents({})
-            completed_users = self.collection.count_documents({"state": "completed"})
-            active_users = self.collection.count_documents({
-                "last_activity": {"$gte": datetime.utcnow() - timedelta(days=1)}
-            })
-            
-            state_stats = {}
-            pipeline = [
-                {"$group": {"_id": "$state", "count": {"$sum": 1}}}
-            ]
-            
-            for doc in self.collection.aggregate(pipeline):
-                state_stats[doc["_id"]] = doc["count"]
-            
-            return {
-                "total_users": total_users,
-                "completed_users": completed_users,
-                "active_users": active_users,
-                "state_distribution": state_stats
-            }
+            return user_statistics_from_facets(
+                list(self.collection.aggregate(user_statistics_pipeline()))
+            )
         except Exception as exc:
             logger.exception("Error getting user statistics")
             raise DatabaseOperationError("database_read_failed") from exc
+
+    def get_holder_index(self, asset: str, minimum_balance: str) -> Optional[Dict]:
+        try:
+            return self.holder_index_collection.find_one(
+                holder_index_query(asset, minimum_balance)
+            )
+        except Exception as exc:
+            logger.exception("Error getting holder index")
+            raise DatabaseOperationError("database_read_failed") from exc
+
+    def save_holder_index(
+        self,
+        asset: str,
+        minimum_balance: str,
+        keys: bytes,
+        count: int,
+        cursor: Optional[str] = None,
+    ) -> None:
+        try:
+            self.holder_index_collection.replace_one(
+                {"_id": asset},
+                holder_index_document(
+                    asset,
+                    minimum_balance,
+                    keys,
+                    count,
+                    cursor,
+                ),
+                upsert=True,
+            )
+        except Exception as exc:
+            logger.exception("Error saving holder index")
+            raise DatabaseOperationError("database_write_failed") from exc
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 from enum import Enum
 from typing import Any, Mapping
 
@@ -25,6 +25,20 @@ class EligibilityBlocker(str, Enum):
     RECOMMENDATION_REQUIRED = "recommendation_required"
 
 
+@dataclass(frozen=True, slots=True)
+class AccountSnapshot:
+    """The facts about one Stellar account that the rules depend on.
+
+    Built once from the Horizon response; ``mtlap_balance`` is zero when the
+    account has no MTLAP trustline.
+    """
+
+    account_id: str
+    has_trustline: bool
+    mtlap_balance: Decimal
+    balance_count: int
+
+
 @dataclass(frozen=True)
 class EligibilityDecision:
     status: EligibilityStatus
@@ -44,17 +58,6 @@ def is_valid_stellar_address(value: object) -> bool:
     return True
 
 
-def _parse_balance(value: Any) -> Decimal:
-    try:
-        balance = Decimal(str(value))
-    except (InvalidOperation, TypeError, ValueError) as exc:
-        raise ValueError("invalid_mtlap_balance") from exc
-
-    if not balance.is_finite() or balance < Decimal("0"):
-        raise ValueError("invalid_mtlap_balance")
-    return balance
-
-
 def evaluate_eligibility(
     *,
     agreed_to_terms: bool,
@@ -63,6 +66,8 @@ def evaluate_eligibility(
 ) -> EligibilityDecision:
     """Evaluate one immutable account snapshot against the approved rules.
 
+    ``account_info["account"]`` is the candidate's :class:`AccountSnapshot`,
+    or ``None`` when Horizon confirmed that the account does not exist.
     Telegram username is deliberately absent: it is a strong recommendation,
     not an eligibility requirement.
     """
@@ -74,21 +79,19 @@ def evaluate_eligibility(
             technical_error=str(account_error),
         )
 
-    if not account_info.get("exists", False):
+    account = account_info.get("account")
+    if account is None:
         return EligibilityDecision(
             EligibilityStatus.INELIGIBLE,
             (EligibilityBlocker.ACCOUNT_NOT_FOUND,),
         )
-
-    try:
-        mtlap_balance = _parse_balance(account_info.get("mtlap_balance", "0"))
-    except ValueError as exc:
+    if not isinstance(account, AccountSnapshot):
         return EligibilityDecision(
             EligibilityStatus.TEMPORARILY_UNAVAILABLE,
-            technical_error=str(exc),
+            technical_error="invalid_account_data",
         )
 
-    if mtlap_balance > Decimal("0"):
+    if account.mtlap_balance > 0:
         return EligibilityDecision(EligibilityStatus.ALREADY_MEMBER)
 
     # Recommendation availability cannot mask the stronger fact that the
@@ -111,7 +114,7 @@ def evaluate_eligibility(
         blockers.append(EligibilityBlocker.AGREEMENT_REQUIRED)
     if not stellar_address:
         blockers.append(EligibilityBlocker.ADDRESS_REQUIRED)
-    if not account_info.get("has_trustline", False):
+    if not account.has_trustline:
         blockers.append(EligibilityBlocker.TRUSTLINE_REQUIRED)
     if not recommendation.get("has_recommendation", False):
         blockers.append(EligibilityBlocker.RECOMMENDATION_REQUIRED)
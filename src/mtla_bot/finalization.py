@@ -0,0 +1,393 @@
+"""Batched background redelivery of final responses.
+
+After a Telegram outage many attempts can sit in ``finalizing`` at once.
+Redelivering them one by one costs three MongoDB round trips and one send
+per user.  A pass here reads one batch, claims all idle candidates under a
+single batch lease with one ``update_many``, sends with bounded parallelism
+under a token bucket sized below Telegram's broadcast limit, and records
+completions and deferrals with ``bulk_write`` as sends finish.  Only one
+write runs at a time and outcomes that finish during it go into the next,
+so a crash mid-batch re-sends only the messages whose outcome was not
+written yet.
+
+Lease semantics are unchanged: every document is claimed and completed by
+the same conditional filters as the single-user path, so a ``/start`` that
+replaces the attempt mid-send makes its completion a no-op.  Each send runs
+inside the user's lock, so ``/start`` can still cancel it.
+
+Passes are woken by a MongoDB change stream when the server offers one: a
+document entering ``finalizing`` wakes the loop at once, and a claimed or
+deferred lease schedules a wake-up for when it expires.  Without change
+streams the loop falls back to fixed-interval polling.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .user_locks import UserLockRegistry
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REDELIVERY_BATCH_SIZE = 100
+DEFAULT_REDELIVERY_PARALLELISM = 8
+# Telegram allows about 30 messages per second per bot for bulk sends; stay
+# below it so interactive replies keep headroom.
+DEFAULT_SEND_RATE = 25.0
+DEFAULT_SEND_BURST = 25
+CHANGE_STREAM_RETRY_SECONDS = 30
+
+
+class TokenBucket:
+    """Async token bucket admitting ``rate`` acquisitions per second."""
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_SEND_RATE,
+        capacity: int = DEFAULT_SEND_BURST,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self._rate = rate
+        self._capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await self._sleep((1 - self._tokens) / self._rate)
+
+
+@dataclass(frozen=True)
+class RedeliveryReport:
+    found: int
+    claimed: int
+    delivered: int
+    failed: int
+    batch_size: int
+
+    @property
+    def backlog(self) -> bool:
+        """A full batch made progress, so more work is probably waiting."""
+
+        return self.found >= self.batch_size and self.claimed > 0
+
+
+class FinalizationRedelivery:
+    """Claim, send and settle one batch of pending final responses."""
+
+    def __init__(
+        self,
+        state_call: Callable[..., Awaitable],
+        user_locks: UserLockRegistry,
+        *,
+        batch_size: int = DEFAULT_REDELIVERY_BATCH_SIZE,
+        max_attempts: int = 3,
+        lease_seconds: int = 300,
+        retry_seconds: int = 300,
+        parallelism: int = DEFAULT_REDELIVERY_PARALLELISM,
+        rate_limiter: TokenBucket | None = None,
+    ) -> None:
+        if not 1 <= batch_size <= 100:
+            raise ValueError("batch_size must be between 1 and 100")
+        if parallelism < 1:
+            raise ValueError("parallelism must be positive")
+        self._state_call = state_call
+        self._user_locks = user_locks
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._lease_seconds = lease_seconds
+        self._retry_seconds = retry_seconds
+        self._parallelism = parallelism
+        self._rate_limiter = rate_limiter or TokenBucket()
+
+    async def run_once(
+        self,
+        send: Callable[[object], Awaitable[int | None]],
+    ) -> RedeliveryReport:
+        """Redeliver one batch; ``send`` returns the Telegram message id."""
+
+        pending = await self._state_call(
+            "get_finalizing_users",
+            self._batch_size,
+            self._max_attempts,
+        )
+        candidates = [
+            (user.user_id, user.attempt_id)
+            for user in pending
+            if user.attempt_id
+            and user.stellar_address
+            and not self._user_locks.is_busy(user.user_id)
+        ]
+        if not candidates:
+            return RedeliveryReport(len(pending), 0, 0, 0, self._batch_size)
+
+        lease_id = uuid.uuid4().hex
+        claimed = await self._state_call(
+            "claim_final_deliveries",
+            candidates,
+            lease_id,
+            lease_seconds=self._lease_seconds,
+            max_attempts=self._max_attempts,
+        )
+        outcomes = _OutcomeLog(
+            lambda delivered, failed: self._record(lease_id, delivered, failed)
+        )
+        slots = asyncio.Semaphore(self._parallelism)
+
+        async def deliver(user) -> None:
+            async with slots:
+                # Busy users were skipped before the claim; a handler that
+                # started since then is short, because a finalizing attempt
+                # only accepts repeat requests, so wait for it.
+                async with self._user_locks.hold(
+                    user.user_id,
+                    asyncio.current_task(),
+                ):
+                    await self._rate_limiter.acquire()
+                    try:
+                        message_id = await send(user)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception:
+                        logger.exception(
+                            "Background final response delivery failed for user %s",
+                            user.user_id,
+                        )
+                        outcomes.add_failed(
+                            (user.user_id, user.attempt_id, "telegram_send_failed")
+                        )
+                        return
+                    outcomes.add_delivered(
+                        (user.user_id, user.attempt_id, message_id)
+                    )
+
+        deliveries = [asyncio.create_task(deliver(user)) for user in claimed]
+        try:
+            # A /start cancels only that user's delivery task; its outcome is
+            # then left to the lease, exactly as for a single delivery.
+            await asyncio.gather(*deliveries, return_exceptions=True)
+        finally:
+            await outcomes.flush()
+        return RedeliveryReport(
+            len(pending),
+            len(claimed),
+            outcomes.delivered,
+            outcomes.failed,
+            self._batch_size,
+        )
+
+    async def _record(self, lease_id, delivered, failed) -> None:
+        matched = await self._state_call(
+            "record_final_delivery_outcomes",
+            lease_id,
+            delivered,
+            failed,
+            retry_seconds=self._retry_seconds,
+        )
+        expected = len(delivered) + len(failed)
+        if matched != expected:
+            logger.error(
+                "Final delivery outcomes persisted for %s of %s users",
+                matched,
+                expected,
+            )
+
+
+class _OutcomeLog:
+    """Write delivery outcomes as they arrive, one bulk write at a time."""
+
+    def __init__(
+        self,
+        write: Callable[[list, list], Awaitable[None]],
+    ) -> None:
+        self._write = write
+        self._delivered: list[tuple[int, str, int | None]] = []
+        self._failed: list[tuple[int, str, str]] = []
+        self._writer: asyncio.Task[None] | None = None
+        self._error: Exception | None = None
+        self.delivered = 0
+        self.failed = 0
+
+    def add_delivered(self, outcome: tuple[int, str, int | None]) -> None:
+        self._delivered.append(outcome)
+        self.delivered += 1
+        self._wake()
+
+    def add_failed(self, outcome: tuple[int, str, str]) -> None:
+        self._failed.append(outcome)
+        self.failed += 1
+        self._wake()
+
+    async def flush(self) -> None:
+        """Wait until every outcome added so far has been written.
+
+        Raises the first write error; outcomes that were not written are
+        left to their lease.
+        """
+
+        while self._writer is not None:
+            writer = self._writer
+            await writer
+            if self._writer is writer:
+                self._writer = None
+        if self._error is not None:
+            raise self._error
+
+    def _wake(self) -> None:
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(
+                self._drain(),
+                name="mtla-finalization-outcomes",
+            )
+
+    async def _drain(self) -> None:
+        while self._delivered or self._failed:
+            delivered, self._delivered = self._delivered, []
+            failed, self._failed = self._failed, []
+            try:
+                await self._write(delivered, failed)
+            except Exception as error:
+                if self._error is None:
+                    self._error = error
+
+
+class FinalizationWakeups:
+    """Wake the redelivery loop when a delivery becomes due.
+
+    Deadlines are kept at 100 ms granularity, so a batch claim that leases
+    a hundred documents at once schedules a single wake-up.
+    """
+
+    def __init__(
+        self,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        utcnow: Callable[[], datetime] = datetime.utcnow,
+    ) -> None:
+        self._clock = clock
+        self._utcnow = utcnow
+        self._ready = False
+        self._deadlines: list[int] = []
+        self._scheduled: set[int] = set()
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def notify(self, due_at: datetime | None = None) -> None:
+        """Request a pass now, or when ``due_at`` (naive UTC) is reached."""
+
+        delay = 0.0 if due_at is None else (due_at - self._utcnow()).total_seconds()
+        if delay <= 0:
+            self._ready = True
+        else:
+            tick = math.ceil((self._clock() + delay) * 10)
+            if tick not in self._scheduled:
+                self._scheduled.add(tick)
+                heapq.heappush(self._deadlines, tick)
+        self._changed.set()
+
+    def _pop_expired(self, now: float) -> bool:
+        expired = False
+        while self._deadlines and self._deadlines[0] <= now * 10:
+            self._scheduled.discard(heapq.heappop(self._deadlines))
+            expired = True
+        return expired
+
+    async def wait(self, timeout: float) -> None:
+        """Return when a delivery is due or ``timeout`` seconds have passed."""
+
+        limit = self._clock() + timeout
+        while True:
+            now = self._clock()
+            if self._pop_expired(now) or self._ready or now >= limit:
+                self._ready = False
+                return
+            wake_at = limit
+            if self._deadlines:
+                wake_at = min(limit, self._deadlines[0] / 10)
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), wake_at - now)
+            except asyncio.TimeoutError:
+                pass
+
+
+class FinalizationChangeFeed:
+    """Translate finalization change events into loop wake-ups."""
+
+    def __init__(
+        self,
+        open_stream: Callable[[], Awaitable],
+        wakeups: FinalizationWakeups,
+        *,
+        retry_seconds: float = CHANGE_STREAM_RETRY_SECONDS,
+    ) -> None:
+        self._open_stream = open_stream
+        self._wakeups = wakeups
+        self._retry_seconds = retry_seconds
+        self.streaming = False
+
+    async def run(self) -> None:
+        """Follow the stream; return if the server cannot provide one."""
+
+        while True:
+            try:
+                stream = await self._open_stream()
+            except OperationFailure as error:
+                logger.warning(
+                    "Change streams unavailable (%s); polling for final deliveries",
+                    error,
+                )
+                return
+            except PyMongoError:
+                logger.exception("Could not open the finalization change stream")
+                await asyncio.sleep(self._retry_seconds)
+                continue
+
+            self.streaming = True
+            # Changes made while no stream was open are only found by a pass.
+            self._wakeups.notify()
+            try:
+                async with stream:
+                    async for change in stream:
+                        document = change.get("fullDocument") or {}
+                        self._wakeups.notify(
+                            document.get("final_delivery_lease_until")
+                        )
+            except PyMongoError:
+                logger.exception("Finalization change stream failed")
+            finally:
+                self.streaming = False
+                # Hand over to polling until the stream is reopened.
+                self._wakeups.notify()
+            await asyncio.sleep(self._retry_seconds)
@@ -0,0 +1,131 @@
+"""Hedged Horizon account requests.
+
+Most Horizon account reads answer in tens of milliseconds, but a few stall
+behind a slow node and set the p99 of a whole check.  A hedge sends a second
+copy of a request that has not answered by the recent ``percentile``
+latency, optionally to another Horizon origin, and keeps whichever answers
+first.  A budget caps hedges to a fraction of requests so a slow Horizon is
+not asked for twice the work.
+"""
+
+from __future__ import annotations
+
+import bisect
+
+
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_BUDGET = 0.05
+DEFAULT_INITIAL_HEDGE_DELAY = 0.5
+DEFAULT_MIN_HEDGE_DELAY = 0.05
+DEFAULT_MAX_HEDGE_DELAY = 2.0
+
+# Bucket upper bounds from 5 ms to about 40 s, each 25% above the previous.
+_BUCKET_BOUNDS = tuple(0.005 * 1.25**index for index in range(41))
+
+
+class LatencyHistogram:
+    """Bucketed latencies that favour recent samples.
+
+    Once ``max_samples`` are held every bucket is halved, so the quantiles
+    follow a Horizon that got faster or slower instead of its whole history.
+    """
+
+    def __init__(self, *, max_samples: int = 1000) -> None:
+        if max_samples < 2:
+            raise ValueError("max_samples must be at least two")
+        self._counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self._total = 0
+        self._max_samples = max_samples
+
+    @property
+    def count(self) -> int:
+        return self._total
+
+    def record(self, seconds: float) -> None:
+        self._counts[bisect.bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+        self._total += 1
+        if self._total >= self._max_samples:
+            self._counts = [count // 2 for count in self._counts]
+            self._total = sum(self._counts)
+
+    def quantile(self, fraction: float) -> float | None:
+        """Return the upper bound of the bucket holding ``fraction``, if any."""
+
+        if not self._total:
+            return None
+        rank = fraction * self._total
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank and count:
+                return _BUCKET_BOUNDS[min(index, len(_BUCKET_BOUNDS) - 1)]
+        return _BUCKET_BOUNDS[-1]
+
+
+class HedgePolicy:
+    """Decide when to hedge an account request and whether one is affordable.
+
+    Each request earns ``budget`` of a hedge, up to ``burst`` saved hedges,
+    and each hedge spends one.  Until ``min_samples`` latencies are known the
+    delay is ``initial_delay``; afterwards it is the ``percentile`` latency,
+    kept between ``min_delay`` and ``max_delay``.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        budget: float = DEFAULT_HEDGE_BUDGET,
+        burst: float = 2.0,
+        initial_delay: float = DEFAULT_INITIAL_HEDGE_DELAY,
+        min_delay: float = DEFAULT_MIN_HEDGE_DELAY,
+        max_delay: float = DEFAULT_MAX_HEDGE_DELAY,
+        min_samples: int = 20,
+        histogram: LatencyHistogram | None = None,
+    ) -> None:
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        if not 0 < budget <= 1:
+            raise ValueError("budget must be in (0, 1]")
+        if burst < 1:
+            raise ValueError("burst must allow at least one hedge")
+        if not 0 < min_delay <= max_delay:
+            raise ValueError("min_delay must be positive and not above max_delay")
+        if not min_delay <= initial_delay <= max_delay:
+            raise ValueError("initial_delay must be between min_delay and max_delay")
+        self.percentile = percentile
+        self.histogram = histogram or LatencyHistogram()
+        self._budget = budget
+        self._burst = burst
+        self._tokens = burst
+        self._initial_delay = initial_delay
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._min_samples = min_samples
+        self.requests = 0
+        self.hedges = 0
+
+    def delay(self) -> float:
+        """Seconds to wait for the first answer before hedging."""
+
+        if self.histogram.count < self._min_samples:
+            return self._initial_delay
+        observed = self.histogram.quantile(self.percentile)
+        assert observed is not None
+        return min(self._max_delay, max(self._min_delay, observed))
+
+    def record(self, latency: float) -> None:
+        self.histogram.record(latency)
+
+    def start_request(self) -> None:
+        self.requests += 1
+        self._tokens = min(self._burst, self._tokens + self._budget)
+
+    def try_hedge(self) -> bool:
+        """Spend one hedge from the budget if it has one."""
+
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self.hedges += 1
+        return True
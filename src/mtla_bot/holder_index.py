@@ -0,0 +1,320 @@
+"""In-memory index of MTLAP holders that qualify as recommenders.
+
+Checking each recommender costs one Horizon ``/accounts/{id}`` call.  The
+qualified set is small and changes slowly, so the gateway can instead page
+through the asset's holders (``/accounts?asset=CODE:ISSUER``) and answer
+most recommender checks by set membership.  An account missing from the
+index, or any lookup while the index is stale, still goes to Horizon, so a
+holder who qualified after the last refresh is never rejected by the index.
+Checks never refresh the index themselves.
+
+Accounts are kept as raw 32-byte ed25519 keys.  :class:`HolderIndexJob`
+keeps the index current (from Horizon's effect stream when it is connected,
+by paging otherwise) and stores it in MongoDB as one sorted blob, so a
+restarted bot answers from the stored snapshot while it catches up.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from datetime import datetime
+from typing import Any
+
+from stellar_sdk import StrKey
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOLDER_INDEX_MAX_AGE = 300.0
+DEFAULT_HOLDER_REFRESH_SECONDS = 240.0
+DEFAULT_HOLDER_SNAPSHOT_MAX_AGE = 3600.0
+DEFAULT_HOLDER_FULL_REFRESH_SECONDS = 6 * 3600.0
+HOLDER_KEY_SIZE = 32
+
+
+def holder_key(account_id: str) -> bytes | None:
+    """Return the raw ed25519 key of a ``G...`` account, or ``None``."""
+
+    try:
+        return StrKey.decode_ed25519_public_key(account_id)
+    except Exception:
+        return None
+
+
+def encode_holder_keys(keys: Iterable[bytes]) -> bytes:
+    """Pack raw keys into one sorted blob for storage."""
+
+    return b"".join(sorted(keys))
+
+
+def decode_holder_keys(blob: bytes) -> frozenset[bytes]:
+    if len(blob) % HOLDER_KEY_SIZE:
+        raise ValueError("holder key blob is not a whole number of keys")
+    return frozenset(
+        blob[offset : offset + HOLDER_KEY_SIZE]
+        for offset in range(0, len(blob), HOLDER_KEY_SIZE)
+    )
+
+
+class HolderIndex:
+    """Set of qualified holders with a freshness bound."""
+
+    def __init__(
+        self,
+        *,
+        max_age: float = DEFAULT_HOLDER_INDEX_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_age <= 0:
+            raise ValueError("max_age must be positive")
+        self._max_age = max_age
+        self._clock = clock
+        self._qualified: frozenset[bytes] = frozenset()
+        self._refreshed_at: float | None = None
+        self._refresh_task: asyncio.Task[bool] | None = None
+        # Live updates seen while a full load is running; they are re-applied
+        # on top of the loaded set, which may have read those accounts earlier.
+        self._updates_during_refresh: dict[bytes, bool] | None = None
+
+    def __len__(self) -> int:
+        return len(self._qualified)
+
+    @property
+    def is_fresh(self) -> bool:
+        return (
+            self._refreshed_at is not None
+            and self._clock() - self._refreshed_at < self._max_age
+        )
+
+    def replace(self, qualified: Iterable[str]) -> None:
+        """Install a complete, freshly loaded set of qualified holders."""
+
+        keys = set()
+        for account_id in qualified:
+            key = holder_key(account_id)
+            if key is None:
+                raise ValueError("qualified holders must be account IDs")
+            keys.add(key)
+        self.replace_keys(keys)
+
+    def replace_keys(self, keys: Iterable[bytes], *, age: float = 0.0) -> None:
+        """Install raw keys loaded ``age`` seconds ago."""
+
+        qualified = set(keys)
+        for key, is_qualified in (self._updates_during_refresh or {}).items():
+            if is_qualified:
+                qualified.add(key)
+            else:
+                qualified.discard(key)
+        self._qualified = frozenset(qualified)
+        self._refreshed_at = self._clock() - age
+
+    def update(self, account_id: str, qualified: bool) -> None:
+        """Apply one account's live balance check."""
+
+        key = holder_key(account_id)
+        if key is None:
+            return
+        if self._updates_during_refresh is not None:
+            self._updates_during_refresh[key] = qualified
+        if qualified:
+            self._qualified = self._qualified | {key}
+        elif key in self._qualified:
+            self._qualified = self._qualified - {key}
+
+    def confirm(self) -> None:
+        """Mark the index fresh because a live feed kept it up to date."""
+
+        if self._refreshed_at is not None:
+            self._refreshed_at = self._clock()
+
+    def snapshot(self) -> bytes:
+        """Return the current keys as a sorted blob."""
+
+        return encode_holder_keys(self._qualified)
+
+    def lookup(self, account_id: str) -> bool:
+        """Return whether a fresh index lists ``account_id`` as qualified.
+
+        ``False`` is not a verdict: the caller must check the account itself.
+        """
+
+        if not self.is_fresh:
+            return False
+        key = holder_key(account_id)
+        return key is not None and key in self._qualified
+
+    async def refresh(self, load: Callable[[], Awaitable[Iterable[str]]]) -> bool:
+        """Refresh now, joining a refresh already in progress.
+
+        Returns whether the index was replaced.
+        """
+
+        return await asyncio.shield(self._start_refresh(load))
+
+    def _start_refresh(
+        self,
+        load: Callable[[], Awaitable[Iterable[str]]],
+    ) -> asyncio.Task[bool]:
+        task = self._refresh_task
+        if task is None or task.done():
+            task = self._refresh_task = asyncio.create_task(
+                self._refresh(load),
+                name="mtla-holder-index-refresh",
+            )
+        return task
+
+    async def _refresh(self, load: Callable[[], Awaitable[Iterable[str]]]) -> bool:
+        self._updates_during_refresh = {}
+        try:
+            self.replace(await load())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Checks keep working through per-account lookups.
+            logger.warning("MTLAP holder index refresh failed", exc_info=True)
+            return False
+        finally:
+            self._updates_during_refresh = None
+        logger.info("MTLAP holder index refreshed: %s qualified", len(self))
+        return True
+
+    async def close(self) -> None:
+        task, self._refresh_task = self._refresh_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+class HolderIndexJob:
+    """Keep a :class:`HolderIndex` fresh and persisted.
+
+    ``load_snapshot`` returns the stored document (``keys`` blob, stream
+    ``cursor`` and ``refreshed_at`` in naive UTC) or ``None``;
+    ``save_snapshot`` receives the blob, key count and stream cursor after
+    every successful pass.  A stored snapshot younger than
+    ``snapshot_max_age`` is installed at start-up with its real age, so it
+    answers lookups only while it is as fresh as a live index must be.  Its
+    stream cursor is resumed either way.
+
+    With a ``stream`` (:class:`~mtla_bot.holder_stream.HolderEffectStream`)
+    connected and gap-free, a pass only confirms the live index; Horizon is
+    paged again when the stream is down, after a gap, and every
+    ``full_refresh_seconds`` as a consistency check.
+    """
+
+    def __init__(
+        self,
+        index: HolderIndex,
+        load: Callable[[], Awaitable[Iterable[str]]],
+        *,
+        load_snapshot: Callable[[], Awaitable[Mapping[str, Any] | None]],
+        save_snapshot: Callable[[bytes, int, str | None], Awaitable[object]],
+        stream: Any = None,
+        refresh_seconds: float = DEFAULT_HOLDER_REFRESH_SECONDS,
+        full_refresh_seconds: float = DEFAULT_HOLDER_FULL_REFRESH_SECONDS,
+        snapshot_max_age: float = DEFAULT_HOLDER_SNAPSHOT_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+        utcnow: Callable[[], datetime] = datetime.utcnow,
+        sleep: Callable[[float], Awaitable[object]] = asyncio.sleep,
+    ) -> None:
+        if refresh_seconds <= 0:
+            raise ValueError("refresh_seconds must be positive")
+        self._index = index
+        self._load = load
+        self._load_snapshot = load_snapshot
+        self._save_snapshot = save_snapshot
+        self._stream = stream
+        self._refresh_seconds = refresh_seconds
+        self._full_refresh_seconds = full_refresh_seconds
+        self._snapshot_max_age = snapshot_max_age
+        self._clock = clock
+        self._utcnow = utcnow
+        self._sleep = sleep
+        self._loaded_at: float | None = None
+
+    async def restore(self) -> bool:
+        """Install the stored snapshot if it is recent enough."""
+
+        try:
+            document = await self._load_snapshot()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Stored MTLAP holder index is unavailable", exc_info=True)
+            return False
+        if not document:
+            return False
+        refreshed_at = document.get("refreshed_at")
+        if not isinstance(refreshed_at, datetime):
+            return False
+        age = (self._utcnow() - refreshed_at).total_seconds()
+        if not 0 <= age < self._snapshot_max_age:
+            return False
+        try:
+            keys = decode_holder_keys(bytes(document.get("keys", b"")))
+        except (TypeError, ValueError):
+            logger.warning("Stored MTLAP holder index is malformed")
+            return False
+        self._index.replace_keys(keys, age=age)
+        cursor = document.get("cursor")
+        if self._stream is not None and isinstance(cursor, str):
+            self._stream.resume_from(cursor)
+        logger.info("Restored MTLAP holder index: %s qualified", len(keys))
+        return True
+
+    def _stream_is_live(self) -> bool:
+        stream = self._stream
+        return (
+            stream is not None
+            and stream.streaming
+            and not stream.gap
+            and self._loaded_at is not None
+            and self._clock() - self._loaded_at < self._full_refresh_seconds
+        )
+
+    async def refresh_once(self) -> bool:
+        if self._stream_is_live():
+            self._index.confirm()
+        else:
+            if self._stream is not None:
+                # Changes from here on arrive through the stream; a new gap
+                # during the load is reported again and answered next pass.
+                self._stream.gap = False
+            if not await self._index.refresh(self._load):
+                if self._stream is not None:
+                    self._stream.gap = True
+                return False
+            self._loaded_at = self._clock()
+        cursor = self._stream.cursor if self._stream is not None else None
+        try:
+            await self._save_snapshot(
+                self._index.snapshot(),
+                len(self._index),
+                cursor,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Could not store MTLAP holder index", exc_info=True)
+        return True
+
+    async def run(self) -> None:
+        await self.restore()
+        stream_task = None
+        if self._stream is not None:
+            stream_task = asyncio.create_task(
+                self._stream.run(),
+                name="mtla-holder-effects",
+            )
+        try:
+            while True:
+                await self.refresh_once()
+                await self._sleep(self._refresh_seconds)
+        finally:
+            if stream_task is not None:
+                stream_task.cancel()
+                await asyncio.gather(stream_task, return_exceptions=True)
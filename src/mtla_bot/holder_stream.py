@@ -0,0 +1,186 @@
+"""Live updates of the MTLAP holder index from Horizon's effect stream.
+
+Horizon streams ``/effects`` as server-sent events but cannot filter them
+by asset, so every effect is read and only those naming the configured
+asset are acted on.  Effects carry deltas and can be replayed after a
+reconnect, so the stream does not add them up: it re-reads the touched
+account's current balance and updates the index with that verdict.  The
+cursor advances only after an event is handled, which lets a restart
+resume from the persisted cursor without losing changes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from typing import Any
+
+import aiohttp
+from yarl import URL
+
+from .holder_index import HolderIndex, holder_key
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STREAM_IDLE_SECONDS = 60.0
+DEFAULT_STREAM_RETRY_SECONDS = 5.0
+DEFAULT_SSE_LINE_LIMIT = 64 * 1024
+STREAM_START_CURSOR = "now"
+
+# Effect fields that name an asset, as (code, issuer) pairs.
+_ASSET_FIELDS = (
+    ("asset_code", "asset_issuer"),
+    ("bought_asset_code", "bought_asset_issuer"),
+    ("sold_asset_code", "sold_asset_issuer"),
+)
+
+
+class _CursorRejected(Exception):
+    """Horizon refused to resume from the stored cursor."""
+
+
+async def iter_sse_events(
+    content: Any,
+    *,
+    line_limit: int = DEFAULT_SSE_LINE_LIMIT,
+) -> AsyncIterator[dict[str, str]]:
+    """Yield ``{"id", "event", "data"}`` mappings from an SSE byte stream."""
+
+    event: dict[str, str] = {}
+    data: list[str] = []
+    while True:
+        raw = await content.readline()
+        if not raw:
+            return
+        if len(raw) > line_limit:
+            raise ValueError("server-sent event line is too long")
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                event["data"] = "\n".join(data)
+                yield event
+            event, data = {}, []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            data.append(value)
+        elif field in ("id", "event"):
+            event[field] = value
+
+
+def effect_mentions_asset(effect: Mapping[str, Any], code: str, issuer: str) -> bool:
+    if effect.get("asset") == f"{code}:{issuer}":
+        return True
+    return any(
+        effect.get(code_field) == code and effect.get(issuer_field) == issuer
+        for code_field, issuer_field in _ASSET_FIELDS
+    )
+
+
+class HolderEffectStream:
+    """Follow Horizon ``/effects`` and keep a :class:`HolderIndex` current.
+
+    ``recheck`` returns whether an account qualifies right now.  ``gap`` is
+    true whenever changes may have been missed (a fresh start or a cursor
+    Horizon no longer serves); the owner answers it with a full reload.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        horizon_url: str,
+        *,
+        asset_code: str,
+        asset_issuer: str,
+        index: HolderIndex,
+        recheck: Callable[[str], Awaitable[bool]],
+        idle_seconds: float = DEFAULT_STREAM_IDLE_SECONDS,
+        retry_seconds: float = DEFAULT_STREAM_RETRY_SECONDS,
+        sleep: Callable[[float], Awaitable[object]] = asyncio.sleep,
+    ) -> None:
+        self._session = session
+        self._url = URL(horizon_url).with_path("/effects")
+        self._asset_code = asset_code
+        self._asset_issuer = asset_issuer
+        self._index = index
+        self._recheck = recheck
+        self._idle_seconds = idle_seconds
+        self._retry_seconds = retry_seconds
+        self._sleep = sleep
+        self.cursor = STREAM_START_CURSOR
+        self.gap = True
+        self.streaming = False
+
+    def resume_from(self, cursor: str) -> None:
+        """Continue after a persisted cursor instead of from ``now``."""
+
+        if cursor and cursor != STREAM_START_CURSOR:
+            self.cursor = cursor
+            self.gap = False
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._follow()
+            except asyncio.CancelledError:
+                raise
+            except _CursorRejected:
+                logger.warning(
+                    "Horizon rejected effect cursor %s; restarting from now",
+                    self.cursor,
+                )
+                self.cursor = STREAM_START_CURSOR
+                self.gap = True
+            except Exception:
+                logger.warning("Horizon effect stream failed", exc_info=True)
+            finally:
+                self.streaming = False
+            await self._sleep(self._retry_seconds)
+
+    async def _follow(self) -> None:
+        async with self._session.get(
+            self._url.with_query({"cursor": self.cursor}),
+            headers={"Accept": "text/event-stream"},
+            timeout=aiohttp.ClientTimeout(total=None, sock_read=self._idle_seconds),
+        ) as response:
+            if 400 <= response.status < 500 and response.status != 429:
+                raise _CursorRejected()
+            if response.status != 200:
+                raise RuntimeError(f"Horizon effect stream returned HTTP {response.status}")
+            self.streaming = True
+            async for event in iter_sse_events(response.content):
+                await self._handle(event)
+
+    async def _handle(self, event: Mapping[str, str]) -> None:
+        try:
+            effect = json.loads(event["data"])
+        except json.JSONDecodeError:
+            return
+        if not isinstance(effect, dict):
+            # The stream opens with a bare "hello" string.
+            return
+        account = effect.get("account")
+        if (
+            isinstance(account, str)
+            and holder_key(account) is not None
+            and effect_mentions_asset(effect, self._asset_code, self._asset_issuer)
+        ):
+            try:
+                qualified = await self._recheck(account)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Unknown is safe: a missing entry only costs a live lookup.
+                logger.warning("Could not re-check MTLAP holder %s", account, exc_info=True)
+                qualified = False
+            self._index.update(account, qualified)
+        cursor = event.get("id") or effect.get("paging_token")
+        if isinstance(cursor, str) and cursor:
+            self.cursor = cursor
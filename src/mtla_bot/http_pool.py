@@ -0,0 +1,144 @@
+"""Per-upstream HTTP sessions with their own connection pools.
+
+BSN answers in seconds while Horizon answers in milliseconds, so one shared
+connector let slow BSN requests hold connections that Horizon checks were
+waiting for.  Each upstream gets its own session and connector with a
+bounded pool, keep-alive and DNS caching.  A trace hook counts new
+connections, each one a TCP and TLS handshake, against reused ones.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import aiohttp
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEPALIVE_SECONDS = 60.0
+DEFAULT_DNS_TTL_SECONDS = 300
+DEFAULT_WARM_UP_TIMEOUT = aiohttp.ClientTimeout(total=5.0, connect=3.0)
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Connector limits for one upstream.
+
+    ``warm_connections`` connections are opened at startup so the first
+    candidate does not pay for the handshakes.
+    """
+
+    limit: int
+    keepalive_timeout: float = DEFAULT_KEEPALIVE_SECONDS
+    dns_ttl: int = DEFAULT_DNS_TTL_SECONDS
+    warm_connections: int = 1
+
+    def __post_init__(self) -> None:
+        if self.limit < 1:
+            raise ValueError("limit must be positive")
+        if self.keepalive_timeout <= 0:
+            raise ValueError("keepalive_timeout must be positive")
+        if self.dns_ttl < 0:
+            raise ValueError("dns_ttl must not be negative")
+        if not 0 <= self.warm_connections <= self.limit:
+            raise ValueError("warm_connections must be between 0 and limit")
+
+
+@dataclass
+class ConnectionStats:
+    """Requests sent through one session and the connections they used."""
+
+    requests: int = 0
+    created: int = 0
+    reused: int = 0
+
+    @property
+    def handshakes_per_request(self) -> float:
+        return self.created / self.requests if self.requests else 0.0
+
+
+def connection_trace(stats: ConnectionStats) -> aiohttp.TraceConfig:
+    """Return a trace config that records into ``stats``."""
+
+    async def request_started(
+        _session: aiohttp.ClientSession,
+        _context: SimpleNamespace,
+        _params: aiohttp.TraceRequestStartParams,
+    ) -> None:
+        stats.requests += 1
+
+    async def connection_created(
+        _session: aiohttp.ClientSession,
+        _context: SimpleNamespace,
+        _params: aiohttp.TraceConnectionCreateEndParams,
+    ) -> None:
+        stats.created += 1
+
+    async def connection_reused(
+        _session: aiohttp.ClientSession,
+        _context: SimpleNamespace,
+        _params: aiohttp.TraceConnectionReuseconnParams,
+    ) -> None:
+        stats.reused += 1
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(request_started)
+    trace.on_connection_create_end.append(connection_created)
+    trace.on_connection_reuseconn.append(connection_reused)
+    return trace
+
+
+def create_session(
+    settings: PoolSettings,
+    stats: ConnectionStats,
+) -> aiohttp.ClientSession:
+    """Create a session with its own bounded, DNS-caching connector.
+
+    Call inside the running event loop.
+    """
+
+    connector = aiohttp.TCPConnector(
+        limit=settings.limit,
+        limit_per_host=settings.limit,
+        keepalive_timeout=settings.keepalive_timeout,
+        use_dns_cache=settings.dns_ttl > 0,
+        ttl_dns_cache=settings.dns_ttl or None,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        trace_configs=[connection_trace(stats)],
+    )
+
+
+async def warm_up(
+    session: aiohttp.ClientSession,
+    origin: str,
+    connections: int,
+    *,
+    timeout: aiohttp.ClientTimeout = DEFAULT_WARM_UP_TIMEOUT,
+) -> int:
+    """Open up to ``connections`` keep-alive connections to ``origin``.
+
+    Concurrent ``HEAD`` requests each take their own connection, which then
+    returns to the pool.  Any HTTP status counts; failures are logged and
+    never raised, because a cold pool only costs the first request latency.
+    """
+
+    async def open_one() -> bool:
+        try:
+            async with session.head(
+                origin,
+                timeout=timeout,
+                allow_redirects=False,
+            ):
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            logger.warning("Could not warm up a connection to %s: %r", origin, exc)
+            return False
+
+    opened = await asyncio.gather(*(open_one() for _ in range(connections)))
+    return sum(opened)
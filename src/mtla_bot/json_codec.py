@@ -0,0 +1,36 @@
+"""JSON decoding of upstream bodies with an optional fast backend.
+
+``orjson`` parses UTF-8 bytes directly and is used when it is installed;
+otherwise the standard library decodes the body once to ``str``.  Both
+backends reject invalid UTF-8; orjson additionally rejects the non-standard
+``NaN``/``Infinity`` tokens, which neither BSN nor Horizon emits.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from typing import Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment
+    orjson = None
+
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _stdlib_loads(body: Buffer) -> object:
+    return json.loads(str(body, "utf-8"))
+
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    loads: Callable[[Buffer], object] = orjson.loads
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError.
+    JSON_DECODE_ERRORS: tuple[type[Exception], ...] = (json.JSONDecodeError,)
+else:  # pragma: no cover - depends on the deployment
+    JSON_BACKEND = "json"
+    loads = _stdlib_loads
+    JSON_DECODE_ERRORS = (UnicodeDecodeError, json.JSONDecodeError)
@@ -37,6 +37,11 @@ MESSAGES = {
         'invalid_address': 'Invalid Stellar address. Check that you copied the complete G-address correctly.',
         'stellar_address_explanation': 'A Stellar address is your unique identifier in the Stellar blockchain. It\'s like a bank account number, but for cryptocurrencies.\n\nWe recommend reading the article "Easy entry into tokenomics", the result of which is an airdrop:',
         'checking_address': '👀 Checking Stellar, BSN, and the recommendation. This can take up to about half a minute — the bot is working.',
+        'progress_account_loaded': '✅ Stellar account found',
+        'progress_trustline_found': '✅ MTLAP trustline is open',
+        'progress_trustline_missing': '❌ No MTLAP trustline. You can open it while the recommendation is being checked.',
+        'progress_bsn_fetched': '🔎 Recommendations found in BSN: {total}',
+        'progress_recommender_verified': '🔎 Recommenders checked: {done} of {total}',
         
         # Trustline check
         'no_trustline': 'You don\'t have a trustline to MTLAP token. MTLAP is a membership token, and without your permission, it cannot be sent to you.',
@@ -90,6 +95,11 @@ MESSAGES = {
         'invalid_address': 'Некорректный Stellar-адрес. Проверьте, что полностью скопировали G-адрес.',
         'stellar_address_explanation': 'Stellar-адрес - это ваш уникальный идентификатор в блокчейне Stellar. Это как номер банковского счета, но для криптовалют.\n\nРекомендем прочитать статью «Лёгкий вход в токеномику», по итогам корой можно получить аирдроп:',
         'checking_address': '👀 Проверяю Stellar, BSN и рекомендацию. Это может занять до половины минуты — бот работает.',
+        'progress_account_loaded': '✅ Аккаунт Stellar найден',
+        'progress_trustline_found': '✅ Линия доверия к MTLAP открыта',
+        'progress_trustline_missing': '❌ Нет линии доверия к MTLAP. Её можно открыть, пока проверяется рекомендация.',
+        'progress_bsn_fetched': '🔎 Рекомендаций в BSN: {total}',
+        'progress_recommender_verified': '🔎 Проверено рекомендателей: {done} из {total}',
         
         # Проверка линии доверия
         'no_trustline': 'У вас нет линии доверия к токену MTLAP. Это наш токен участия, и без вашего разрешения его нельзя будет вам прислать.',
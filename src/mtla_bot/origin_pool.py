@@ -0,0 +1,132 @@
+"""Health-scored set of interchangeable Horizon origins.
+
+Public Horizon and a self-hosted instance serve the same ledger, so a
+request can go to either.  Each origin keeps a moving average of its answer
+time and the number of requests in flight; requests go to the origin with
+the lowest ``latency * (in_flight + 1)``, which prefers the fastest origin
+without sending it everything at once.  An origin that fails is skipped for
+a cool-down that doubles with each consecutive failure.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+from yarl import URL
+
+
+DEFAULT_FAILURE_COOLDOWN = 5.0
+DEFAULT_MAX_COOLDOWN = 60.0
+DEFAULT_LATENCY_WEIGHT = 0.3
+
+
+@dataclass
+class _Health:
+    latency: float | None = None
+    in_flight: int = 0
+    failures: int = 0
+    down_until: float = 0.0
+
+
+@dataclass(frozen=True)
+class OriginStatus:
+    origin: str
+    latency: float | None
+    in_flight: int
+    failures: int
+    available: bool
+
+
+class OriginPool:
+    """Rank origins by health; report each request with :meth:`started`,
+    :meth:`finished` and :meth:`record_success` or :meth:`record_failure`.
+    """
+
+    def __init__(
+        self,
+        origins: Sequence[URL],
+        *,
+        failure_cooldown: float = DEFAULT_FAILURE_COOLDOWN,
+        max_cooldown: float = DEFAULT_MAX_COOLDOWN,
+        latency_weight: float = DEFAULT_LATENCY_WEIGHT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not origins:
+            raise ValueError("at least one origin is required")
+        if len(set(origins)) != len(origins):
+            raise ValueError("origins must be unique")
+        if not 0 < failure_cooldown <= max_cooldown:
+            raise ValueError("failure_cooldown must be positive and not above max_cooldown")
+        if not 0 < latency_weight <= 1:
+            raise ValueError("latency_weight must be in (0, 1]")
+        self.origins = tuple(origins)
+        self._health = {origin: _Health() for origin in self.origins}
+        self._failure_cooldown = failure_cooldown
+        self._max_cooldown = max_cooldown
+        self._latency_weight = latency_weight
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self.origins)
+
+    def ranked(self) -> list[URL]:
+        """Return every origin, best first.
+
+        Origins cooling down after a failure come last, soonest available
+        first, so a request still has somewhere to go when all of them failed.
+        An origin without a measured latency ranks first and gets measured.
+        """
+
+        now = self._clock()
+        available = [
+            origin
+            for origin in self.origins
+            if self._health[origin].down_until <= now
+        ]
+        cooling = [origin for origin in self.origins if origin not in available]
+        available.sort(key=self._score)
+        cooling.sort(key=lambda origin: self._health[origin].down_until)
+        return available + cooling
+
+    def started(self, origin: URL) -> None:
+        self._health[origin].in_flight += 1
+
+    def finished(self, origin: URL) -> None:
+        self._health[origin].in_flight -= 1
+
+    def record_success(self, origin: URL, latency: float) -> None:
+        health = self._health[origin]
+        health.failures = 0
+        health.down_until = 0.0
+        if health.latency is None:
+            health.latency = latency
+        else:
+            health.latency += self._latency_weight * (latency - health.latency)
+
+    def record_failure(self, origin: URL) -> None:
+        health = self._health[origin]
+        health.failures += 1
+        cooldown = min(
+            self._max_cooldown,
+            self._failure_cooldown * 2 ** (health.failures - 1),
+        )
+        health.down_until = self._clock() + cooldown
+
+    def snapshot(self) -> list[OriginStatus]:
+        now = self._clock()
+        return [
+            OriginStatus(
+                str(origin),
+                health.latency,
+                health.in_flight,
+                health.failures,
+                health.down_until <= now,
+            )
+            for origin, health in self._health.items()
+        ]
+
+    def _score(self, origin: URL) -> float:
+        health = self._health[origin]
+        return (health.latency or 0.0) * (health.in_flight + 1)
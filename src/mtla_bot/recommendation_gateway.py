@@ -8,19 +8,34 @@ temporary technical failure and must not turn it into "no recommendation".
 from __future__ import annotations
 
 import asyncio
-import json
+import logging
 import ssl
-from collections.abc import Awaitable, Callable, Mapping
-from dataclasses import dataclass
+import time
+from collections.abc import Awaitable, Callable, Hashable, Mapping, Sequence
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
 from enum import Enum
-from typing import Any
+from typing import Any, Generic, TypeVar
 
 import aiohttp
 from stellar_sdk import Asset, Keypair
 from yarl import URL
 
+from . import json_codec
+from .account_cache import AccountCache
+from .adaptive_limiter import AdaptiveLimiter
+from .bsn_cache import BsnCache, BsnEntry
+from .check_progress import CheckStage, ProgressCallback, report_progress
+from .circuit_breaker import CircuitBreaker
+from .eligibility import AccountSnapshot
+from .hedging import HedgePolicy
+from .holder_index import HolderIndex
+from .origin_pool import OriginPool
+from .recommender_hints import RecommenderHints
+
+
+logger = logging.getLogger(__name__)
 
 RECOMMENDATION_TAG = "RecommendToMTLA"
 DEFAULT_BSN_URL = "https://bsn.expert"
@@ -30,6 +45,9 @@ DEFAULT_MAX_RECOMMENDERS = 100
 DEFAULT_HORIZON_CONCURRENCY = 4
 DEFAULT_BSN_BODY_LIMIT = 256 * 1024
 DEFAULT_HORIZON_BODY_LIMIT = 1024 * 1024
+DEFAULT_HOLDER_PAGE_SIZE = 200
+DEFAULT_MAX_HOLDER_PAGES = 500
+DEFAULT_HOLDER_PAGE_BODY_LIMIT = 8 * 1024 * 1024
 DEFAULT_BSN_REQUEST_TIMEOUT = aiohttp.ClientTimeout(
     total=25.0,
     connect=2.5,
@@ -43,9 +61,14 @@ DEFAULT_HORIZON_REQUEST_TIMEOUT = aiohttp.ClientTimeout(
     sock_read=3.0,
 )
 
+_T = TypeVar("_T")
+
 _REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
 _RETRYABLE_STATUSES = frozenset({408, 425, 429})
+# Statuses that mean "send less", as opposed to a one-off failure.
+_OVERLOAD_STATUSES = frozenset({429, 503})
 _JSON_MEDIA_TYPES = frozenset({"application/json", "application/hal+json"})
+_READ_CHUNK_SIZE = 64 * 1024
 
 
 class ExternalService(str, Enum):
@@ -62,9 +85,21 @@ class GatewayErrorCode(str, Enum):
     BSN_UNAVAILABLE = "bsn_unavailable"
     BSN_INVALID_RESPONSE = "bsn_invalid_response"
     BSN_REDIRECT_REJECTED = "bsn_redirect_rejected"
+    BSN_CIRCUIT_OPEN = "bsn_circuit_open"
     HORIZON_TIMEOUT = "horizon_timeout"
     HORIZON_UNAVAILABLE = "horizon_unavailable"
     HORIZON_INVALID_RESPONSE = "horizon_invalid_response"
+    HORIZON_CIRCUIT_OPEN = "horizon_circuit_open"
+
+
+# Failures that mean the upstream is unreachable or failing, as opposed to
+# answering with something unexpected.
+_OUTAGE_CODES = frozenset({
+    GatewayErrorCode.BSN_TIMEOUT,
+    GatewayErrorCode.BSN_UNAVAILABLE,
+    GatewayErrorCode.HORIZON_TIMEOUT,
+    GatewayErrorCode.HORIZON_UNAVAILABLE,
+})
 
 
 class RecommendationGatewayError(Exception):
@@ -90,12 +125,30 @@ class RecommendationStatus(str, Enum):
     QUALIFIED = "qualified"
 
 
+@dataclass(frozen=True, slots=True)
+class BsnRecommendations:
+    """The recommenders BSN lists for one candidate, in BSN's order."""
+
+    candidate: str
+    recommenders: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class AccountLookup:
+    """A Horizon account and whether it was served from a cache."""
+
+    account: AccountSnapshot | None
+    cached: bool
+
+
 @dataclass(frozen=True)
 class RecommendationEvidence:
     recommender: str
     account_exists: bool
     mtlap_balance: Decimal | None
     is_qualified: bool
+    # Taken from the account cache or the holder index, not read live.
+    cached: bool = False
 
 
 @dataclass(frozen=True)
@@ -105,6 +158,9 @@ class RecommendationResult:
     recommender_count: int
     evidence: tuple[RecommendationEvidence, ...]
     checked_at: datetime
+    # The status rests on a cached BSN list or cached evidence, so it may
+    # reject a candidate but must be confirmed live before accepting one.
+    cached: bool = False
 
     @property
     def has_any_recommendation(self) -> bool:
@@ -119,17 +175,19 @@ class RecommendationResult:
         return next((item for item in self.evidence if item.is_qualified), None)
 
 
-def parse_bsn_recommenders(
+def decode_bsn_recommendations(
     payload: object,
     candidate: str,
     *,
     max_recommenders: int = DEFAULT_MAX_RECOMMENDERS,
-) -> tuple[str, ...]:
-    """Extract incoming ``RecommendToMTLA`` source account IDs.
-
-    BSN currently serializes an empty ``links.income`` as ``[]`` and a
-    non-empty value as an object.  Both exact shapes are handled; malformed or
-    truncated-looking responses fail closed.
+) -> BsnRecommendations:
+    """Decode a BSN account page into :class:`BsnRecommendations` in one pass.
+
+    Only ``account.id``, ``links_count.income`` and the incoming
+    ``RecommendToMTLA`` links are read.  BSN currently serializes an empty
+    ``links.income`` as ``[]`` and a non-empty value as an object.  Both
+    exact shapes are handled; malformed or truncated-looking responses fail
+    closed.
     """
 
     if max_recommenders < 0:
@@ -172,7 +230,7 @@ def parse_bsn_recommenders(
                 ExternalService.BSN,
                 "BSN income links and links_count are inconsistent",
             )
-        return ()
+        return BsnRecommendations(candidate, ())
     income_map = _require_mapping(income, ExternalService.BSN, "links.income")
 
     if RECOMMENDATION_TAG not in income_map:
@@ -181,7 +239,7 @@ def parse_bsn_recommenders(
                 ExternalService.BSN,
                 "BSN income links and links_count are inconsistent",
             )
-        return ()
+        return BsnRecommendations(candidate, ())
     tagged = income_map[RECOMMENDATION_TAG]
     tagged_map = _require_mapping(
         tagged,
@@ -211,7 +269,7 @@ def parse_bsn_recommenders(
                 ExternalService.BSN,
                 "BSN recommendation links and links_count are inconsistent",
             )
-        return ()
+        return BsnRecommendations(candidate, ())
     recommender_map = _require_mapping(
         recommender_links,
         ExternalService.BSN,
@@ -246,25 +304,48 @@ def parse_bsn_recommenders(
                 "BSN recommendation key and embedded id differ",
             )
         recommenders.append(recommender)
-    return tuple(recommenders)
+    return BsnRecommendations(candidate, tuple(recommenders))
 
 
-def parse_horizon_mtlap_balance(
+def parse_bsn_recommenders(
     payload: object,
-    recommender: str,
+    candidate: str,
+    *,
+    max_recommenders: int = DEFAULT_MAX_RECOMMENDERS,
+) -> tuple[str, ...]:
+    """Return the incoming ``RecommendToMTLA`` source account IDs."""
+
+    return decode_bsn_recommendations(
+        payload,
+        candidate,
+        max_recommenders=max_recommenders,
+    ).recommenders
+
+
+def decode_horizon_account(
+    payload: object,
+    account_id: str,
     *,
     asset_code: str,
     asset_issuer: str,
-) -> Decimal:
-    """Return the exact configured asset balance from a Horizon account JSON."""
+) -> AccountSnapshot:
+    """Decode a Horizon account JSON into an :class:`AccountSnapshot` in one pass.
+
+    Only ``account_id`` and the code, issuer, type and balance of each entry
+    are read; other balance fields are never touched.
+    """
 
-    root = _require_mapping(payload, ExternalService.HORIZON, "Horizon response")
-    if root.get("account_id") != recommender:
+    if not isinstance(payload, dict):
+        raise _invalid_response(
+            ExternalService.HORIZON,
+            "Horizon response must be an object",
+        )
+    if payload.get("account_id") != account_id:
         raise _invalid_response(
             ExternalService.HORIZON,
-            "Horizon account_id does not match the requested recommender",
+            "Horizon account_id does not match the requested account",
         )
-    balances = root.get("balances")
+    balances = payload.get("balances")
     if not isinstance(balances, list):
         raise _invalid_response(
             ExternalService.HORIZON,
@@ -274,49 +355,66 @@ def parse_horizon_mtlap_balance(
     expected_asset_type = (
         "credit_alphanum4" if len(asset_code) <= 4 else "credit_alphanum12"
     )
-    matching_balances: list[Decimal] = []
+    has_trustline = False
+    asset_balance = Decimal("0")
     for item in balances:
-        item_map = _require_mapping(
-            item,
-            ExternalService.HORIZON,
-            "Horizon balance entry",
-        )
+        if not isinstance(item, dict):
+            raise _invalid_response(
+                ExternalService.HORIZON,
+                "Horizon balance entry must be an object",
+            )
         if (
-            item_map.get("asset_code") != asset_code
-            or item_map.get("asset_issuer") != asset_issuer
+            item.get("asset_code") != asset_code
+            or item.get("asset_issuer") != asset_issuer
         ):
             continue
-        if item_map.get("asset_type") != expected_asset_type:
+        if has_trustline:
+            raise _invalid_response(
+                ExternalService.HORIZON,
+                "Horizon returned duplicate entries for the configured asset",
+            )
+        if item.get("asset_type") != expected_asset_type:
             raise _invalid_response(
                 ExternalService.HORIZON,
                 "Horizon returned an inconsistent asset_type",
             )
-        raw_balance = item_map.get("balance")
+        raw_balance = item.get("balance")
         if not isinstance(raw_balance, str):
             raise _invalid_response(
                 ExternalService.HORIZON,
                 "Horizon asset balance must be a decimal string",
             )
         try:
-            balance = Decimal(raw_balance)
+            asset_balance = Decimal(raw_balance)
         except InvalidOperation as exc:
             raise _invalid_response(
                 ExternalService.HORIZON,
                 "Horizon returned an invalid decimal balance",
             ) from exc
-        if not balance.is_finite() or balance < 0:
+        if not asset_balance.is_finite() or asset_balance < 0:
             raise _invalid_response(
                 ExternalService.HORIZON,
                 "Horizon returned a non-finite or negative balance",
             )
-        matching_balances.append(balance)
+        has_trustline = True
+    return AccountSnapshot(account_id, has_trustline, asset_balance, len(balances))
 
-    if len(matching_balances) > 1:
-        raise _invalid_response(
-            ExternalService.HORIZON,
-            "Horizon returned duplicate entries for the configured asset",
-        )
-    return matching_balances[0] if matching_balances else Decimal("0")
+
+def parse_horizon_mtlap_balance(
+    payload: object,
+    recommender: str,
+    *,
+    asset_code: str,
+    asset_issuer: str,
+) -> Decimal:
+    """Return the exact configured asset balance from a Horizon account JSON."""
+
+    return decode_horizon_account(
+        payload,
+        recommender,
+        asset_code=asset_code,
+        asset_issuer=asset_issuer,
+    ).mtlap_balance
 
 
 @dataclass(frozen=True)
@@ -331,6 +429,22 @@ class _NotFound:
 _NOT_FOUND = _NotFound()
 
 
+class _NotModified:
+    pass
+
+
+_NOT_MODIFIED = _NotModified()
+
+
+@dataclass(frozen=True)
+class _Validated:
+    """A JSON body together with its cache validators."""
+
+    payload: object
+    etag: str | None
+    last_modified: str | None
+
+
 class _RetryableResponse(Exception):
     def __init__(self, status: int, retry_after: str | None) -> None:
         super().__init__(f"retryable HTTP status {status}")
@@ -338,17 +452,75 @@ class _RetryableResponse(Exception):
         self.retry_after = retry_after
 
 
+class _Flight(Generic[_T]):
+    def __init__(self, task: asyncio.Task[_T]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class _SingleFlight:
+    """Let concurrent callers for one key await a single shared fetch.
+
+    A caller that is cancelled only stops waiting.  The shared fetch is
+    cancelled once its last waiter is gone, so abandoned work does not keep
+    holding a Horizon slot.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def run(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[_T]],
+    ) -> _T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fetch()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(
+                lambda task, key=key, flight=flight: self._finished(key, flight)
+            )
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _finished(self, key: Hashable, flight: _Flight[Any]) -> None:
+        self._forget(key, flight)
+        if not flight.task.cancelled():
+            # Mark the outcome as observed even if every waiter left just as
+            # the fetch failed.
+            flight.task.exception()
+
+    def _forget(self, key: Hashable, flight: _Flight[Any]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
 class RecommendationGateway:
     """Verify per-account BSN recommendations against live Horizon balances.
 
-    The injected session is reusable and remains owned by the caller.  The
-    gateway never closes it.
+    The injected sessions are reusable and remain owned by the caller.  The
+    gateway never closes them.  ``horizon_session`` gives Horizon its own
+    connection pool; without it both upstreams share ``session``.
     """
 
     def __init__(
         self,
         session: aiohttp.ClientSession,
         *,
+        horizon_session: aiohttp.ClientSession | None = None,
         asset_code: str,
         asset_issuer: str,
         minimum_balance: Decimal = DEFAULT_MINIMUM_BALANCE,
@@ -361,12 +533,21 @@ class RecommendationGateway:
         retry_backoff: float = 0.2,
         max_redirects: int = 2,
         max_recommenders: int = DEFAULT_MAX_RECOMMENDERS,
-        horizon_concurrency: int = DEFAULT_HORIZON_CONCURRENCY,
+        horizon_limiter: AdaptiveLimiter | None = None,
+        breakers: Mapping[ExternalService, CircuitBreaker] | None = None,
+        horizon_hedging: HedgePolicy | None = None,
+        extra_horizon_urls: Sequence[str] = (),
         bsn_body_limit: int = DEFAULT_BSN_BODY_LIMIT,
         horizon_body_limit: int = DEFAULT_HORIZON_BODY_LIMIT,
+        account_cache: AccountCache | None = None,
+        recommender_hints: RecommenderHints | None = None,
+        holder_index: HolderIndex | None = None,
+        bsn_cache: BsnCache | None = None,
+        max_holder_pages: int = DEFAULT_MAX_HOLDER_PAGES,
         sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
     ) -> None:
         self._session = session
+        self._horizon_session = horizon_session or session
         self._asset_code, self._asset_issuer = _validated_asset(
             asset_code,
             asset_issuer,
@@ -391,12 +572,10 @@ class RecommendationGateway:
             raise _invalid_configuration(
                 f"max_recommenders must be between 1 and {DEFAULT_MAX_RECOMMENDERS}"
             )
-        if horizon_concurrency != DEFAULT_HORIZON_CONCURRENCY:
-            raise _invalid_configuration(
-                f"horizon_concurrency must be {DEFAULT_HORIZON_CONCURRENCY}"
-            )
         if bsn_body_limit <= 0 or horizon_body_limit <= 0:
             raise _invalid_configuration("body limits must be positive")
+        if max_holder_pages < 1:
+            raise _invalid_configuration("max_holder_pages must be positive")
 
         self._minimum_balance = minimum_balance
         self._bsn_origin = _validated_origin(
@@ -404,7 +583,18 @@ class RecommendationGateway:
             "bsn_url",
             internal_http_host="bsn_app",
         )
-        self._horizon_origin = _validated_origin(horizon_url, "horizon_url")
+        horizon_origins = [
+            _validated_origin(horizon_url, "horizon_url"),
+            *(
+                _validated_origin(extra_url, "extra_horizon_urls")
+                for extra_url in extra_horizon_urls
+            ),
+        ]
+        if len(set(horizon_origins)) != len(horizon_origins):
+            raise _invalid_configuration("Horizon origins must be unique")
+        # Every origin passes the same validation; requests fail over between
+        # them in _request_json and prefer the healthiest one.
+        self.horizon_origins = OriginPool(horizon_origins)
         self._bsn_request_timeout = bsn_request_timeout
         self._horizon_request_timeout = horizon_request_timeout
         self._total_deadline = total_deadline
@@ -414,12 +604,42 @@ class RecommendationGateway:
         self._max_recommenders = max_recommenders
         self._bsn_body_limit = bsn_body_limit
         self._horizon_body_limit = horizon_body_limit
+        self._account_cache = account_cache
+        self._recommender_hints = recommender_hints
+        self._holder_index = holder_index
+        self._bsn_cache = bsn_cache
+        self._breakers = dict(breakers or {})
+        self._horizon_hedging = horizon_hedging
+        self._bsn_revalidations: set[asyncio.Task[tuple[str, ...]]] = set()
+        self._max_holder_pages = max_holder_pages
         self._sleep = sleep
+        # Coalesces identical BSN and Horizon fetches started concurrently,
+        # e.g. by repeated "repeat check" taps or shared recommenders.
+        self._in_flight = _SingleFlight()
         # Shared by all simultaneous checks made through this gateway instance.
-        self._horizon_semaphore = asyncio.Semaphore(DEFAULT_HORIZON_CONCURRENCY)
+        self._horizon_limiter = horizon_limiter or AdaptiveLimiter(
+            initial=DEFAULT_HORIZON_CONCURRENCY,
+            sleep=sleep,
+        )
 
-    async def check(self, candidate: str) -> RecommendationResult:
-        """Return a business result or raise a typed technical failure."""
+    async def check(
+        self,
+        candidate: str,
+        *,
+        use_cache: bool = True,
+        allow_stale_bsn: bool = False,
+        progress: ProgressCallback | None = None,
+    ) -> RecommendationResult:
+        """Return a business result or raise a typed technical failure.
+
+        ``use_cache=False`` forces a fresh BSN list and fresh Horizon reads
+        for every recommender, which a final eligibility decision may
+        require.  With ``allow_stale_bsn`` a cached non-empty BSN list is
+        still served while it is revalidated, so a repeat check can reject
+        at once.  The result is marked ``cached`` when a cache decided it.
+        ``progress`` hears when the BSN list arrived and after each
+        recommender was checked.
+        """
 
         if not isinstance(candidate, str) or not _is_public_key(candidate):
             raise RecommendationGatewayError(
@@ -428,19 +648,18 @@ class RecommendationGateway:
                 "candidate is not a valid Stellar public key",
                 retryable=False,
             )
-        if getattr(self._session, "closed", False):
-            raise _invalid_configuration("the injected HTTP session is closed")
+        self._ensure_open(self._session, self._horizon_session)
 
         phase = ExternalService.BSN
 
         async def run_check() -> RecommendationResult:
             nonlocal phase
-            payload = await self._fetch_bsn_payload(candidate)
-            recommenders = parse_bsn_recommenders(
-                payload,
+            recommenders, bsn_cached = await self._fetch_bsn_recommenders(
                 candidate,
-                max_recommenders=self._max_recommenders,
+                use_cache=use_cache,
+                allow_stale=allow_stale_bsn,
             )
+            report_progress(progress, CheckStage.BSN_FETCHED, total=len(recommenders))
             if not recommenders:
                 return RecommendationResult(
                     candidate=candidate,
@@ -448,10 +667,19 @@ class RecommendationGateway:
                     recommender_count=0,
                     evidence=(),
                     checked_at=_utc_now(),
+                    cached=bsn_cached,
                 )
 
             phase = ExternalService.HORIZON
-            return await self._check_recommenders(candidate, recommenders)
+            result = await self._check_recommenders(
+                candidate,
+                recommenders,
+                use_cache=use_cache,
+                progress=progress,
+            )
+            if bsn_cached and not result.cached:
+                result = replace(result, cached=True)
+            return result
 
         try:
             return await asyncio.wait_for(run_check(), timeout=self._total_deadline)
@@ -463,8 +691,26 @@ class RecommendationGateway:
     async def load_horizon_account(
         self,
         address: str,
-    ) -> Mapping[str, Any] | None:
-        """Load one Horizon account asynchronously using the shared session."""
+        *,
+        use_cache: bool = True,
+    ) -> AccountSnapshot | None:
+        """Load and decode one Horizon account using the shared session."""
+
+        lookup = await self.lookup_horizon_account(address, use_cache=use_cache)
+        return lookup.account
+
+    async def lookup_horizon_account(
+        self,
+        address: str,
+        *,
+        use_cache: bool = True,
+    ) -> AccountLookup:
+        """Load one Horizon account and report whether a cache answered.
+
+        With an account cache configured, a fresh cached answer (including a
+        confirmed 404) is returned without a request unless ``use_cache`` is
+        false.  Technical failures are never cached.
+        """
 
         if not isinstance(address, str) or not _is_public_key(address):
             raise RecommendationGatewayError(
@@ -473,18 +719,39 @@ class RecommendationGateway:
                 "account is not a valid Stellar public key",
                 retryable=False,
             )
-        if getattr(self._session, "closed", False):
-            raise _invalid_configuration("the injected HTTP session is closed")
+        self._ensure_open(self._horizon_session)
+
+        def fetch() -> Awaitable[AccountSnapshot | None]:
+            return self._in_flight.run(
+                (ExternalService.HORIZON, address),
+                lambda: self._fetch_horizon_account(address),
+            )
 
-        async def load() -> Mapping[str, Any] | None:
-            async with self._horizon_semaphore:
-                url = self._horizon_origin.with_path(f"/accounts/{address}")
+        if self._account_cache is None:
+            return AccountLookup(await fetch(), cached=False)
+        account, cached = await self._account_cache.get_or_load(
+            address,
+            fetch,
+            use_cache=use_cache,
+        )
+        return AccountLookup(account, cached)
+
+    async def _fetch_horizon_account(
+        self,
+        address: str,
+    ) -> AccountSnapshot | None:
+        async def attempt(origin: URL) -> AccountSnapshot | None:
+            async with self._horizon_limiter:
+                url = origin.with_path(f"/accounts/{address}")
+                started = time.monotonic()
                 reply = await self._request_json(
                     url,
                     ExternalService.HORIZON,
                     body_limit=self._horizon_body_limit,
                     not_found_is_negative=True,
                 )
+                if self._horizon_hedging is not None:
+                    self._horizon_hedging.record(time.monotonic() - started)
                 if reply is _NOT_FOUND:
                     return None
                 if isinstance(reply, _Redirect):
@@ -492,25 +759,19 @@ class RecommendationGateway:
                         ExternalService.HORIZON,
                         "Horizon unexpectedly redirected an account request",
                     )
-                root = _require_mapping(
+                return decode_horizon_account(
                     reply,
-                    ExternalService.HORIZON,
-                    "Horizon response",
+                    address,
+                    asset_code=self._asset_code,
+                    asset_issuer=self._asset_issuer,
                 )
-                if root.get("account_id") != address:
-                    raise _invalid_response(
-                        ExternalService.HORIZON,
-                        "Horizon account_id does not match the requested account",
-                    )
-                if not isinstance(root.get("balances"), list):
-                    raise _invalid_response(
-                        ExternalService.HORIZON,
-                        "Horizon balances must be a list",
-                    )
-                return root
 
+        if self._horizon_hedging is None:
+            load = attempt(self.horizon_origins.ranked()[0])
+        else:
+            load = self._hedged(attempt, self._horizon_hedging)
         try:
-            return await asyncio.wait_for(load(), timeout=self._total_deadline)
+            return await asyncio.wait_for(load, timeout=self._total_deadline)
         except RecommendationGatewayError:
             raise
         except TimeoutError as exc:
@@ -519,7 +780,232 @@ class RecommendationGateway:
                 "Horizon account lookup exceeded its deadline",
             ) from exc
 
+    async def _hedged(
+        self,
+        attempt: Callable[[URL], Awaitable[AccountSnapshot | None]],
+        policy: HedgePolicy,
+    ) -> AccountSnapshot | None:
+        """Run ``attempt`` and, if it is slow, a second copy; first answer wins.
+
+        With several Horizon origins the hedge goes to the second best one.
+        A failed copy waits for the other; when both fail the primary's error
+        is raised.  The copy that loses is cancelled.
+        """
+
+        policy.start_request()
+        origins = self.horizon_origins.ranked()
+        primary = asyncio.ensure_future(attempt(origins[0]))
+        tasks = {primary}
+        try:
+            done, _pending = await asyncio.wait(tasks, timeout=policy.delay())
+            if done or not policy.try_hedge():
+                return await primary
+            hedge_origin = origins[1] if len(origins) > 1 else origins[0]
+            tasks.add(asyncio.ensure_future(attempt(hedge_origin)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _ensure_open(*sessions: aiohttp.ClientSession) -> None:
+        if any(getattr(session, "closed", False) for session in sessions):
+            raise _invalid_configuration("the injected HTTP session is closed")
+
+    async def close(self) -> None:
+        """Stop background work; the injected sessions stay open."""
+
+        if self._holder_index is not None:
+            await self._holder_index.close()
+        revalidations = list(self._bsn_revalidations)
+        for task in revalidations:
+            task.cancel()
+        await asyncio.gather(*revalidations, return_exceptions=True)
+
+    async def load_qualified_holders(self) -> set[str]:
+        """Page through the asset's holders and return the qualified ones.
+
+        Every page is validated like a single account response; a malformed
+        page or more than ``max_holder_pages`` pages fails the whole load, so
+        a partial list is never installed as an index.
+        """
+
+        self._ensure_open(self._horizon_session)
+
+        qualified: set[str] = set()
+        cursor = ""
+        for _page in range(self._max_holder_pages):
+            query = {
+                "asset": f"{self._asset_code}:{self._asset_issuer}",
+                "limit": str(DEFAULT_HOLDER_PAGE_SIZE),
+                "order": "asc",
+            }
+            if cursor:
+                query["cursor"] = cursor
+            async with self._horizon_limiter:
+                origin = self.horizon_origins.ranked()[0]
+                reply = await self._request_json(
+                    origin.with_path("/accounts").with_query(query),
+                    ExternalService.HORIZON,
+                    body_limit=DEFAULT_HOLDER_PAGE_BODY_LIMIT,
+                    not_found_is_negative=False,
+                )
+            if isinstance(reply, _Redirect):
+                raise _invalid_response(
+                    ExternalService.HORIZON,
+                    "Horizon unexpectedly redirected an asset holders request",
+                )
+            records = _holder_records(reply)
+            for record in records:
+                account_id = record.get("account_id")
+                if not isinstance(account_id, str) or not _is_public_key(account_id):
+                    raise _invalid_response(
+                        ExternalService.HORIZON,
+                        "Horizon returned an invalid holder account ID",
+                    )
+                balance = decode_horizon_account(
+                    record,
+                    account_id,
+                    asset_code=self._asset_code,
+                    asset_issuer=self._asset_issuer,
+                ).mtlap_balance
+                if balance >= self._minimum_balance:
+                    qualified.add(account_id)
+            if len(records) < DEFAULT_HOLDER_PAGE_SIZE:
+                return qualified
+            paging_token = records[-1].get("paging_token")
+            if not isinstance(paging_token, str) or not paging_token or paging_token == cursor:
+                raise _invalid_response(
+                    ExternalService.HORIZON,
+                    "Horizon holder page has no usable paging_token",
+                )
+            cursor = paging_token
+        raise _invalid_response(
+            ExternalService.HORIZON,
+            f"asset has more than {self._max_holder_pages} pages of holders",
+        )
+
+    async def _fetch_bsn_recommenders(
+        self,
+        candidate: str,
+        *,
+        use_cache: bool = True,
+        allow_stale: bool = False,
+    ) -> tuple[tuple[str, ...], bool]:
+        """Return the candidate's recommenders and whether the cache served them.
+
+        A stale non-empty list is served at once while it is revalidated in
+        the background.  An empty list is never served stale: a candidate
+        who was just recommended must not be told there is no
+        recommendation.  Without ``use_cache`` the list is revalidated
+        first, with a conditional request if one is cached, unless
+        ``allow_stale`` lets a non-empty one be served meanwhile.
+        """
+
+        cache = self._bsn_cache
+        if cache is None:
+            payload = await self._fetch_bsn_payload(candidate)
+            recommenders = decode_bsn_recommendations(
+                payload,
+                candidate,
+                max_recommenders=self._max_recommenders,
+            ).recommenders
+            return recommenders, False
+        entry = cache.get(candidate)
+        if use_cache and entry is not None and cache.is_fresh(entry):
+            return entry.recommenders, True
+        if (use_cache or allow_stale) and entry is not None and entry.recommenders:
+            self._revalidate_bsn_in_background(candidate, entry)
+            return entry.recommenders, True
+        return await self._revalidate_bsn(candidate, entry), False
+
+    def _revalidate_bsn_in_background(self, candidate: str, entry: BsnEntry) -> None:
+        if (ExternalService.BSN, candidate) in self._in_flight:
+            return
+        task = asyncio.create_task(
+            asyncio.wait_for(
+                self._revalidate_bsn(candidate, entry),
+                timeout=self._total_deadline,
+            )
+        )
+        self._bsn_revalidations.add(task)
+        task.add_done_callback(self._bsn_revalidation_done)
+
+    def _bsn_revalidation_done(self, task: asyncio.Task[tuple[str, ...]]) -> None:
+        self._bsn_revalidations.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # The stale entry simply expires; the next check fetches anew.
+            logger.warning(
+                "Background BSN revalidation failed: %r",
+                task.exception(),
+            )
+
+    async def _revalidate_bsn(
+        self,
+        candidate: str,
+        entry: BsnEntry | None,
+    ) -> tuple[str, ...]:
+        return await self._in_flight.run(
+            (ExternalService.BSN, candidate),
+            lambda: self._request_bsn_recommenders(candidate, entry),
+        )
+
+    async def _request_bsn_recommenders(
+        self,
+        candidate: str,
+        entry: BsnEntry | None,
+    ) -> tuple[str, ...]:
+        assert self._bsn_cache is not None
+        reply = await self._request_bsn_payload(
+            candidate,
+            conditional_headers={} if entry is None else entry.conditional_headers(),
+        )
+        if reply is _NOT_MODIFIED:
+            # Only sent in answer to validators, which come from ``entry``.
+            assert entry is not None
+            return self._bsn_cache.touch(candidate, entry).recommenders
+        assert isinstance(reply, _Validated)
+        recommenders = decode_bsn_recommendations(
+            reply.payload,
+            candidate,
+            max_recommenders=self._max_recommenders,
+        ).recommenders
+        self._bsn_cache.store(
+            candidate,
+            recommenders,
+            etag=reply.etag,
+            last_modified=reply.last_modified,
+        )
+        return recommenders
+
     async def _fetch_bsn_payload(self, candidate: str) -> object:
+        return await self._in_flight.run(
+            (ExternalService.BSN, candidate),
+            lambda: self._request_bsn_payload(candidate),
+        )
+
+    async def _request_bsn_payload(
+        self,
+        candidate: str,
+        *,
+        conditional_headers: Mapping[str, str] | None = None,
+    ) -> object:
+        """Fetch the BSN page, following validated same-origin redirects.
+
+        With ``conditional_headers`` (possibly empty) the reply is a
+        :class:`_Validated` body or ``_NOT_MODIFIED``.
+        """
+
         current_url = self._bsn_origin.with_path(f"/accounts/{candidate}").with_query(
             {"format": "json", "tag": RECOMMENDATION_TAG}
         )
@@ -530,6 +1016,7 @@ class RecommendationGateway:
                 ExternalService.BSN,
                 body_limit=self._bsn_body_limit,
                 not_found_is_negative=False,
+                conditional_headers=conditional_headers,
             )
             if not isinstance(reply, _Redirect):
                 assert reply is not _NOT_FOUND
@@ -560,30 +1047,118 @@ class RecommendationGateway:
         self,
         candidate: str,
         recommenders: tuple[str, ...],
+        *,
+        use_cache: bool = True,
+        progress: ProgressCallback | None = None,
     ) -> RecommendationResult:
-        tasks = [
-            asyncio.create_task(self._check_one_recommender(recommender))
-            for recommender in recommenders
-        ]
+        member = None
+        if self._holder_index is not None:
+            # Only HolderIndexJob refreshes the index: a full holders crawl on
+            # a candidate's check would compete with it for the Horizon
+            # window.  A stale index simply finds no member.
+            member = next(
+                (item for item in recommenders if self._holder_index.lookup(item)),
+                None,
+            )
+        if use_cache and member is not None:
+            report_progress(
+                progress,
+                CheckStage.RECOMMENDER_VERIFIED,
+                done=1,
+                total=len(recommenders),
+            )
+            # The index lists only holders whose balance qualified at the
+            # last refresh; the exact balance was not fetched.
+            return RecommendationResult(
+                candidate=candidate,
+                status=RecommendationStatus.QUALIFIED,
+                recommender_count=len(recommenders),
+                evidence=(
+                    RecommendationEvidence(
+                        recommender=member,
+                        account_exists=True,
+                        mtlap_balance=None,
+                        is_qualified=True,
+                        cached=True,
+                    ),
+                ),
+                checked_at=_utc_now(),
+                cached=True,
+            )
+
+        ordered = list(recommenders)
+        first_window = self._horizon_limiter.window
+        hints = self._recommender_hints
+        if hints is not None:
+            ordered = hints.order(ordered, self._minimum_balance)
+            # A recent qualifier is tried alone: it usually settles the check
+            # with one Horizon call, and a miss costs one round trip.
+            if hints.is_likely_qualified(ordered[0], self._minimum_balance):
+                first_window = 1
+        if member is not None:
+            # A final decision reads the live balance, but an index member
+            # is still the likeliest qualifier, so it is tried first and alone.
+            ordered.remove(member)
+            ordered.insert(0, member)
+            first_window = 1
+        pending = iter(ordered)
+        # Recommenders are started in order and only as slots free up.
+        tasks: list[asyncio.Task[RecommendationEvidence]] = []
+        running: set[asyncio.Task[RecommendationEvidence]] = set()
         evidence: list[RecommendationEvidence] = []
         errors: list[RecommendationGatewayError] = []
+
+        def start_next() -> None:
+            recommender = next(pending, None)
+            if recommender is not None:
+                task = asyncio.create_task(
+                    self._check_one_recommender(recommender, use_cache=use_cache)
+                )
+                tasks.append(task)
+                running.add(task)
+
+        def fill_window() -> None:
+            while (
+                len(running) < self._horizon_limiter.window
+                and len(tasks) < len(ordered)
+            ):
+                start_next()
+
         try:
-            for completed in asyncio.as_completed(tasks):
-                try:
-                    item = await completed
-                except RecommendationGatewayError as exc:
-                    errors.append(exc)
-                    continue
-                evidence.append(item)
-                if item.is_qualified:
-                    await _cancel_tasks(tasks)
-                    return RecommendationResult(
-                        candidate=candidate,
-                        status=RecommendationStatus.QUALIFIED,
-                        recommender_count=len(recommenders),
-                        evidence=tuple(sorted(evidence, key=lambda value: value.recommender)),
-                        checked_at=_utc_now(),
+            for _ in range(first_window):
+                start_next()
+            while running:
+                done, _ = await asyncio.wait(
+                    running,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for completed in done:
+                    running.discard(completed)
+                    try:
+                        item = completed.result()
+                    except RecommendationGatewayError as exc:
+                        errors.append(exc)
+                        fill_window()
+                        continue
+                    evidence.append(item)
+                    report_progress(
+                        progress,
+                        CheckStage.RECOMMENDER_VERIFIED,
+                        done=len(evidence),
+                        total=len(recommenders),
                     )
+                    if item.is_qualified:
+                        await _cancel_tasks(tasks)
+                        return RecommendationResult(
+                            candidate=candidate,
+                            status=RecommendationStatus.QUALIFIED,
+                            recommender_count=len(recommenders),
+                            evidence=tuple(sorted(evidence, key=lambda value: value.recommender)),
+                            checked_at=_utc_now(),
+                            # Only the qualifying account decides acceptance.
+                            cached=item.cached,
+                        )
+                    fill_window()
         finally:
             await _cancel_tasks(tasks)
 
@@ -597,31 +1172,46 @@ class RecommendationGateway:
             recommender_count=len(recommenders),
             evidence=tuple(sorted(evidence, key=lambda value: value.recommender)),
             checked_at=_utc_now(),
+            cached=any(item.cached for item in evidence),
         )
 
+    async def check_recommender(
+        self,
+        recommender: str,
+        *,
+        use_cache: bool = True,
+    ) -> RecommendationEvidence:
+        """Check one account against the recommender balance threshold."""
+
+        return await self._check_one_recommender(recommender, use_cache=use_cache)
+
     async def _check_one_recommender(
         self,
         recommender: str,
+        *,
+        use_cache: bool = True,
     ) -> RecommendationEvidence:
-        reply = await self.load_horizon_account(recommender)
-        if reply is None:
+        lookup = await self.lookup_horizon_account(recommender, use_cache=use_cache)
+        account = lookup.account
+        if account is None:
+            if self._recommender_hints is not None:
+                self._recommender_hints.record(recommender, None)
             return RecommendationEvidence(
                 recommender=recommender,
                 account_exists=False,
                 mtlap_balance=None,
                 is_qualified=False,
+                cached=lookup.cached,
             )
-        balance = parse_horizon_mtlap_balance(
-            reply,
-            recommender,
-            asset_code=self._asset_code,
-            asset_issuer=self._asset_issuer,
-        )
+        balance = account.mtlap_balance
+        if self._recommender_hints is not None:
+            self._recommender_hints.record(recommender, balance)
         return RecommendationEvidence(
             recommender=recommender,
             account_exists=True,
             mtlap_balance=balance,
             is_qualified=balance >= self._minimum_balance,
+            cached=lookup.cached,
         )
 
     async def _request_json(
@@ -631,17 +1221,127 @@ class RecommendationGateway:
         *,
         body_limit: int,
         not_found_is_negative: bool,
-    ) -> object | _Redirect | _NotFound:
-        for attempt in range(self._max_attempts):
+        conditional_headers: Mapping[str, str] | None = None,
+    ) -> object | _Redirect | _NotFound | _NotModified:
+        breaker = self._breakers.get(service)
+        if breaker is None:
+            return await self._request_json_routed(
+                url,
+                service,
+                body_limit=body_limit,
+                not_found_is_negative=not_found_is_negative,
+                conditional_headers=conditional_headers,
+            )
+        if not breaker.allow():
+            raise _circuit_open_error(service)
+        try:
+            reply = await self._request_json_routed(
+                url,
+                service,
+                body_limit=body_limit,
+                not_found_is_negative=not_found_is_negative,
+                conditional_headers=conditional_headers,
+            )
+        except RecommendationGatewayError as exc:
+            if exc.code in _OUTAGE_CODES:
+                breaker.record_failure()
+            else:
+                # The upstream answered; a malformed body is not an outage.
+                breaker.record_success()
+            raise
+        except BaseException:
+            breaker.record_abandoned()
+            raise
+        breaker.record_success()
+        return reply
+
+    async def _request_json_routed(
+        self,
+        url: URL,
+        service: ExternalService,
+        *,
+        body_limit: int,
+        not_found_is_negative: bool,
+        conditional_headers: Mapping[str, str] | None,
+    ) -> object | _Redirect | _NotFound | _NotModified:
+        """Send a Horizon request to ``url``'s origin, then fail over.
+
+        Only timeouts and outages move on to the next origin; each origin
+        but the last gets a single attempt so failover is not delayed by
+        retries against an origin that is already failing.
+        """
+
+        if service is not ExternalService.HORIZON:
+            return await self._request_json_retrying(
+                url,
+                service,
+                body_limit=body_limit,
+                not_found_is_negative=not_found_is_negative,
+                conditional_headers=conditional_headers,
+                max_attempts=self._max_attempts,
+            )
+        pool = self.horizon_origins
+        first = url.origin()
+        order = [first, *(origin for origin in pool.ranked() if origin != first)]
+        path = url.relative()
+        for index, origin in enumerate(order):
+            last = index + 1 == len(order)
+            pool.started(origin)
+            started = time.monotonic()
+            try:
+                reply = await self._request_json_retrying(
+                    origin.join(path),
+                    service,
+                    body_limit=body_limit,
+                    not_found_is_negative=not_found_is_negative,
+                    conditional_headers=conditional_headers,
+                    max_attempts=self._max_attempts if last else 1,
+                )
+            except RecommendationGatewayError as exc:
+                if exc.code not in _OUTAGE_CODES:
+                    raise
+                pool.record_failure(origin)
+                if last:
+                    raise
+                logger.warning(
+                    "Horizon origin %s failed with %s; trying the next origin",
+                    origin,
+                    exc.code.value,
+                )
+            else:
+                pool.record_success(origin, time.monotonic() - started)
+                return reply
+            finally:
+                pool.finished(origin)
+        raise AssertionError("origin failover loop terminated unexpectedly")
+
+    async def _request_json_retrying(
+        self,
+        url: URL,
+        service: ExternalService,
+        *,
+        body_limit: int,
+        not_found_is_negative: bool,
+        conditional_headers: Mapping[str, str] | None,
+        max_attempts: int,
+    ) -> object | _Redirect | _NotFound | _NotModified:
+        limiter = (
+            self._horizon_limiter if service is ExternalService.HORIZON else None
+        )
+        for attempt in range(max_attempts):
+            started = time.monotonic()
             try:
-                return await self._request_json_once(
+                reply = await self._request_json_once(
                     url,
                     service,
                     body_limit=body_limit,
                     not_found_is_negative=not_found_is_negative,
+                    conditional_headers=conditional_headers,
                 )
             except _RetryableResponse as exc:
-                if attempt + 1 >= self._max_attempts:
+                if limiter is not None and exc.status in _OVERLOAD_STATUSES:
+                    limiter.record_overload(_retry_after_seconds(exc.retry_after))
+                if attempt + 1 >= max_attempts:
                     raise _unavailable_error(
                         service,
                         f"upstream returned HTTP {exc.status}",
@@ -664,14 +1364,16 @@ class RecommendationGateway:
                     retryable=False,
                 ) from exc
             except (TimeoutError, aiohttp.ServerTimeoutError) as exc:
+                if limiter is not None:
+                    limiter.record_overload()
                 # A cold BSN account page can legitimately take tens of
                 # seconds. Give it one generous attempt instead of doubling
                 # upstream work with an immediate second long request.
-                if service is ExternalService.BSN or attempt + 1 >= self._max_attempts:
+                if service is ExternalService.BSN or attempt + 1 >= max_attempts:
                     raise _timeout_error(service, "upstream request timed out") from exc
                 await self._sleep(self._retry_backoff)
             except aiohttp.ClientConnectionError as exc:
-                if attempt + 1 >= self._max_attempts:
+                if attempt + 1 >= max_attempts:
                     raise _unavailable_error(
                         service,
                         "upstream connection failed",
@@ -684,6 +1386,10 @@ class RecommendationGateway:
                     "upstream HTTP client failed",
                     retryable=False,
                 ) from exc
+            else:
+                if limiter is not None:
+                    limiter.record_success(time.monotonic() - started)
+                return reply
         raise AssertionError("request retry loop terminated unexpectedly")
 
     async def _request_json_once(
@@ -693,24 +1399,41 @@ class RecommendationGateway:
         *,
         body_limit: int,
         not_found_is_negative: bool,
-    ) -> object | _Redirect | _NotFound:
+        conditional_headers: Mapping[str, str] | None = None,
+    ) -> object | _Redirect | _NotFound | _NotModified:
         headers = {
             "Accept": "application/json",
             "User-Agent": "MTLAJoinBot/1.0",
         }
+        if conditional_headers:
+            headers.update(conditional_headers)
         request_timeout = (
             self._bsn_request_timeout
             if service is ExternalService.BSN
             else self._horizon_request_timeout
         )
-        async with self._session.get(
+        session = (
+            self._session
+            if service is ExternalService.BSN
+            else self._horizon_session
+        )
+        async with session.get(
             url,
             headers=headers,
             timeout=request_timeout,
             allow_redirects=False,
         ) as response:
             if response.status == 200:
-                return await _read_json_body(response, service, body_limit)
+                payload = await _read_json_body(response, service, body_limit)
+                if conditional_headers is None:
+                    return payload
+                return _Validated(
+                    payload,
+                    _header(response.headers, "ETag"),
+                    _header(response.headers, "Last-Modified"),
+                )
+            if response.status == 304 and conditional_headers:
+                return _NOT_MODIFIED
             if response.status == 404 and not_found_is_negative:
                 return _NOT_FOUND
             if response.status in _REDIRECT_STATUSES:
@@ -743,19 +1466,23 @@ async def _read_json_body(
     if content_length is not None and content_length > limit:
         raise _invalid_response(service, "upstream response body is too large")
 
-    chunks: list[bytes] = []
+    # One buffer sized from Content-Length when it is declared; the parser
+    # reads it in place instead of a joined copy and a decoded str copy.
+    body = bytearray(content_length) if content_length else bytearray()
     received = 0
     while True:
-        chunk = await response.content.read(min(16 * 1024, limit + 1 - received))
+        chunk = await response.content.read(min(_READ_CHUNK_SIZE, limit + 1 - received))
         if not chunk:
             break
-        received += len(chunk)
-        if received > limit:
+        end = received + len(chunk)
+        if end > limit:
             raise _invalid_response(service, "upstream response body is too large")
-        chunks.append(chunk)
+        body[received:end] = chunk
+        received = end
+    del body[received:]
     try:
-        return json.loads(b"".join(chunks).decode("utf-8"))
-    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        return json_codec.loads(body)
+    except json_codec.JSON_DECODE_ERRORS as exc:
         raise _invalid_response(service, "upstream returned malformed JSON") from exc
 
 
@@ -767,12 +1494,33 @@ async def _cancel_tasks(tasks: list[asyncio.Task[RecommendationEvidence]]) -> No
         await asyncio.gather(*tasks, return_exceptions=True)
 
 
+def _holder_records(payload: object) -> list[Mapping[str, Any]]:
+    root = _require_mapping(payload, ExternalService.HORIZON, "Horizon holders page")
+    embedded = _require_mapping(
+        root.get("_embedded"),
+        ExternalService.HORIZON,
+        "Horizon holders page _embedded",
+    )
+    records = embedded.get("records")
+    if not isinstance(records, list) or len(records) > DEFAULT_HOLDER_PAGE_SIZE:
+        raise _invalid_response(
+            ExternalService.HORIZON,
+            "Horizon holders page records must be a bounded list",
+        )
+    return [
+        _require_mapping(record, ExternalService.HORIZON, "Horizon holder record")
+        for record in records
+    ]
+
+
 def _require_mapping(
     value: object,
     service: ExternalService,
     name: str,
-) -> Mapping[str, Any]:
-    if not isinstance(value, Mapping):
+) -> dict[str, Any]:
+    # Decoded JSON objects are always plain dicts; the exact check is
+    # cheaper than the abstract Mapping one on every nested object.
+    if not isinstance(value, dict):
         raise _invalid_response(service, f"{name} must be an object")
     return value
 
@@ -832,6 +1580,17 @@ def _header(headers: Mapping[str, str], name: str) -> str | None:
     return None
 
 
+def _retry_after_seconds(raw_retry_after: str | None) -> float | None:
+    if raw_retry_after is None:
+        return None
+    try:
+        seconds = float(raw_retry_after)
+    except ValueError:
+        # HTTP-date values are not worth a clock comparison here.
+        return None
+    return seconds if seconds > 0 and seconds != float("inf") else None
+
+
 def _bounded_retry_delay(raw_retry_after: str | None, default: float) -> float | None:
     if raw_retry_after is None:
         return default
@@ -900,5 +1659,19 @@ def _unavailable_error(
     return RecommendationGatewayError(code, service, message, retryable=retryable)
 
 
+def _circuit_open_error(service: ExternalService) -> RecommendationGatewayError:
+    code = (
+        GatewayErrorCode.BSN_CIRCUIT_OPEN
+        if service is ExternalService.BSN
+        else GatewayErrorCode.HORIZON_CIRCUIT_OPEN
+    )
+    return RecommendationGatewayError(
+        code,
+        service,
+        "upstream circuit is open after repeated failures",
+        retryable=True,
+    )
+
+
 def _utc_now() -> datetime:
     return datetime.now(timezone.utc)
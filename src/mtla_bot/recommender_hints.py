@@ -0,0 +1,82 @@
+"""Last-known recommender balances used to order recommendation checks.
+
+A candidate qualifies as soon as one recommender holds enough MTLAP, so the
+number of Horizon calls per check depends on how early a qualifying
+recommender is tried.  Active recommenders vouch for many candidates, and
+their last observed balance is a good predictor of the next one.  Hints only
+decide the order; every verdict still comes from a cached or live Horizon
+answer, so a stale hint can cost extra calls but never changes a result.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterable
+from decimal import Decimal
+
+
+DEFAULT_RECOMMENDER_HINTS_SIZE = 8192
+
+# Ranks, lowest first: recent qualifiers, never seen, seen below the
+# minimum, and accounts Horizon reported missing.
+_QUALIFIED = 0
+_UNKNOWN = 1
+_UNQUALIFIED = 2
+_MISSING = 3
+
+
+class RecommenderHints:
+    """Bounded LRU map of recommender -> last observed MTLAP balance."""
+
+    def __init__(self, *, max_size: int = DEFAULT_RECOMMENDER_HINTS_SIZE) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        self._max_size = max_size
+        self._sequence = 0
+        # recommender -> (balance, observation number); a ``None`` balance
+        # records a confirmed missing account.
+        self._balances: OrderedDict[str, tuple[Decimal | None, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._balances)
+
+    def record(self, recommender: str, balance: Decimal | None) -> None:
+        """Remember the balance just observed for ``recommender``."""
+
+        self._sequence += 1
+        self._balances[recommender] = (balance, self._sequence)
+        self._balances.move_to_end(recommender)
+        while len(self._balances) > self._max_size:
+            self._balances.popitem(last=False)
+
+    def is_likely_qualified(self, recommender: str, minimum_balance: Decimal) -> bool:
+        hint = self._balances.get(recommender)
+        return hint is not None and hint[0] is not None and hint[0] >= minimum_balance
+
+    def order(
+        self,
+        recommenders: Iterable[str],
+        minimum_balance: Decimal,
+    ) -> list[str]:
+        """Return ``recommenders`` most-likely-to-qualify first.
+
+        Recent qualifiers come first, most recently confirmed first; the
+        remaining groups keep the input order.
+        """
+
+        def key(item: tuple[int, str]) -> tuple[int, int]:
+            position, recommender = item
+            hint = self._balances.get(recommender)
+            if hint is None:
+                return _UNKNOWN, position
+            balance, observed = hint
+            if balance is None:
+                return _MISSING, position
+            if balance >= minimum_balance:
+                return _QUALIFIED, -observed
+            return _UNQUALIFIED, position
+
+        return [
+            recommender
+            for _position, recommender in sorted(enumerate(recommenders), key=key)
+        ]
@@ -47,6 +47,7 @@ REMINDER_SETTINGS = {{
 STATS_SETTINGS = {{
     'max_users_in_report': 20,  # Максимум пользователей в отчете
     'date_format': '%Y-%m-%d %H:%M:%S',  # Формат даты в отчетах
+    'cache_seconds': 60,  # Максимальный возраст снимка статистики для /stats
 }}
 
 # Настройки для логирования
@@ -0,0 +1,77 @@
+"""One Telegram message edited in place to show check progress.
+
+Telegram rejects frequent edits of one message, and a check can report
+several steps within a second.  Updates are coalesced: at most one edit is
+sent per ``min_interval`` and only the latest text is shown.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from telegram.error import TelegramError
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EDIT_INTERVAL = 1.5
+
+
+class ThrottledStatusMessage:
+    """Edit ``message`` with the latest text, throttled to ``min_interval``.
+
+    :meth:`update` never blocks, so it can be called from a progress
+    callback; :meth:`close` drops edits that were not sent yet.
+    """
+
+    def __init__(
+        self,
+        message: Any,
+        text: str,
+        *,
+        min_interval: float = DEFAULT_EDIT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[object]] = asyncio.sleep,
+    ) -> None:
+        self._message = message
+        self._shown = text
+        self._pending: str | None = None
+        self._min_interval = min_interval
+        self._clock = clock
+        self._sleep = sleep
+        # The message itself was just sent, which counts as the first edit.
+        self._last_edit = clock()
+        self._worker: asyncio.Task[None] | None = None
+
+    def update(self, text: str) -> None:
+        if text == (self._pending or self._shown):
+            return
+        self._pending = text
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        self._pending = None
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while self._pending is not None:
+            delay = self._last_edit + self._min_interval - self._clock()
+            if delay > 0:
+                await self._sleep(delay)
+            text, self._pending = self._pending, None
+            if text is None or text == self._shown:
+                continue
+            try:
+                await self._message.edit_text(text)
+            except TelegramError as exc:
+                logger.warning("Could not update the check status message: %s", exc)
+            self._shown = text
+            self._last_edit = self._clock()
@@ -2,14 +2,27 @@
 
 from __future__ import annotations
 
-from collections.abc import Callable, Mapping, Sequence
-from decimal import Decimal, InvalidOperation
+import asyncio
+from collections.abc import Callable
 import logging
 from typing import Any
 
 import aiohttp
 from . import config
+from .account_cache import AccountCache
+from .adaptive_limiter import AdaptiveLimiter
+from .bsn_cache import BsnCache
+from .check_progress import CheckStage, ProgressCallback, report_progress
+from .circuit_breaker import CircuitBreaker
+from .hedging import HedgePolicy
+from .holder_index import HolderIndex, HolderIndexJob
+from .holder_stream import HolderEffectStream
+from .http_pool import ConnectionStats, PoolSettings, create_session, warm_up
+from .recommender_hints import RecommenderHints
 from .recommendation_gateway import (
+    DEFAULT_HORIZON_CONCURRENCY,
+    DEFAULT_MINIMUM_BALANCE,
+    ExternalService,
     RecommendationGateway,
     RecommendationGatewayError,
 )
@@ -25,7 +38,10 @@ class StellarClient:
         self,
         recommendation_gateway: RecommendationGateway | None = None,
         *,
-        session_factory: Callable[[], aiohttp.ClientSession] = aiohttp.ClientSession,
+        session_factory: Callable[
+            [PoolSettings, ConnectionStats],
+            aiohttp.ClientSession,
+        ] = create_session,
     ) -> None:
         horizon_url = (
             "https://horizon-testnet.stellar.org"
@@ -37,41 +53,203 @@ class StellarClient:
         self.mtlap_issuer = mtlap_asset.issuer
         self._horizon_url = horizon_url
         self._session_factory = session_factory
-        self._http_session: aiohttp.ClientSession | None = None
+        self._pools: dict[str, PoolSettings] = {}
+        self._http_sessions: dict[str, aiohttp.ClientSession] = {}
+        # Connection reuse per upstream; ``created`` counts TLS handshakes.
+        self.connection_stats = {
+            "bsn": ConnectionStats(),
+            "horizon": ConnectionStats(),
+        }
+        self.horizon_limiter: AdaptiveLimiter | None = None
+        self.breakers: dict[ExternalService, CircuitBreaker] = {}
+        self.horizon_hedging: HedgePolicy | None = None
         self._recommendation_gateway = recommendation_gateway
         self._owns_recommendation_gateway = recommendation_gateway is None
+        # Shared with the owned gateway and kept fresh by holder_index_job().
+        self.holder_index = HolderIndex() if recommendation_gateway is None else None
 
     async def start(self) -> None:
-        """Create the reusable HTTP session inside the running event loop."""
+        """Create one reusable HTTP session per upstream in the running loop."""
 
         if self._recommendation_gateway is not None:
             return
 
-        session = self._session_factory()
+        pools = config.get_upstream_pools()
+        floor, ceiling = config.get_horizon_concurrency()
+        limiter = AdaptiveLimiter(
+            initial=min(max(DEFAULT_HORIZON_CONCURRENCY, floor), ceiling),
+            floor=floor,
+            ceiling=ceiling,
+        )
+        failure_rate, open_seconds = config.get_upstream_breaker()
+        breakers = {
+            service: CircuitBreaker(
+                failure_rate=failure_rate,
+                open_seconds=open_seconds,
+            )
+            for service in (ExternalService.BSN, ExternalService.HORIZON)
+        }
+        hedging = None
+        hedge_settings = config.get_horizon_hedging()
+        if hedge_settings is not None:
+            percentile, budget = hedge_settings
+            hedging = HedgePolicy(percentile=percentile, budget=budget)
+        sessions: dict[str, aiohttp.ClientSession] = {}
         try:
+            for name, settings in pools.items():
+                sessions[name] = self._session_factory(
+                    settings,
+                    self.connection_stats[name],
+                )
             gateway = RecommendationGateway(
-                session,
+                sessions["bsn"],
+                horizon_session=sessions["horizon"],
+                horizon_limiter=limiter,
+                breakers=breakers,
+                horizon_hedging=hedging,
+                extra_horizon_urls=config.get_extra_horizon_urls(),
                 asset_code=self.mtlap_code,
                 asset_issuer=self.mtlap_issuer,
                 bsn_url=config.BSN_URL,
                 horizon_url=self._horizon_url,
+                # Recommender accounts repeat across candidates; one cache
+                # serves every check made through this client.
+                account_cache=AccountCache(),
+                recommender_hints=RecommenderHints(),
+                # Most recommender checks are answered from the periodically
+                # paged holder list instead of one request per account.
+                holder_index=self.holder_index,
+                # Repeat checks reuse the candidate's BSN list and revalidate
+                # it with conditional requests.
+                bsn_cache=BsnCache(),
             )
         except Exception:
-            await session.close()
+            for session in sessions.values():
+                await session.close()
             raise
 
-        self._http_session = session
+        self._pools = pools
+        self._http_sessions = sessions
+        self.horizon_limiter = limiter
+        self.breakers = breakers
+        self.horizon_hedging = hedging
         self._recommendation_gateway = gateway
 
+    async def warm_up(self) -> None:
+        """Open keep-alive connections to BSN and Horizon before the first check."""
+
+        if not self._http_sessions:
+            return
+        origins = {"bsn": config.BSN_URL, "horizon": self._horizon_url}
+        names = list(self._http_sessions)
+        opened = await asyncio.gather(*(
+            warm_up(
+                self._http_sessions[name],
+                origins[name],
+                self._pools[name].warm_connections,
+            )
+            for name in names
+        ))
+        logger.info(
+            "Warmed up upstream connections: %s",
+            ", ".join(f"{name}={count}" for name, count in zip(names, opened)),
+        )
+
+    def upstream_status(self) -> dict[str, dict[str, Any]]:
+        """Report breaker state and connection reuse per upstream for admins.
+
+        Empty until :meth:`start` built the owned gateway.
+        """
+
+        report: dict[str, dict[str, Any]] = {}
+        for service, breaker in self.breakers.items():
+            name = service.value
+            status: dict[str, Any] = {
+                "breaker": breaker.snapshot(),
+                "connections": self.connection_stats[name],
+            }
+            if service is ExternalService.HORIZON and self.horizon_limiter is not None:
+                status["window"] = self.horizon_limiter.window
+            if service is ExternalService.HORIZON and self.horizon_hedging is not None:
+                status["hedging"] = self.horizon_hedging
+            if service is ExternalService.HORIZON and self._recommendation_gateway is not None:
+                origins = self._recommendation_gateway.horizon_origins
+                if len(origins) > 1:
+                    status["origins"] = origins.snapshot()
+            report[name] = status
+        return report
+
     async def close(self) -> None:
         """Close owned network resources; repeated calls are safe."""
 
-        session, self._http_session = self._http_session, None
-        if session is not None and not session.closed:
-            await session.close()
+        if self._owns_recommendation_gateway and self._recommendation_gateway is not None:
+            await self._recommendation_gateway.close()
+        sessions, self._http_sessions = self._http_sessions, {}
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+        if sessions:
+            for name, stats in self.connection_stats.items():
+                logger.info(
+                    "Upstream %s: requests=%d new_connections=%d reused=%d",
+                    name,
+                    stats.requests,
+                    stats.created,
+                    stats.reused,
+                )
         if self._owns_recommendation_gateway:
             self._recommendation_gateway = None
 
+    async def load_qualified_holders(self) -> set[str]:
+        gateway = await self._gateway()
+        return await gateway.load_qualified_holders()
+
+    async def recheck_holder(self, account_id: str) -> bool:
+        """Read one account's live balance for the holder index."""
+
+        gateway = await self._gateway()
+        evidence = await gateway.check_recommender(account_id, use_cache=False)
+        return evidence.is_qualified
+
+    def holder_index_job(self, storage_call) -> HolderIndexJob | None:
+        """Build the refresh job for the owned holder index.
+
+        Call after :meth:`start`.  ``storage_call`` is the bot's state
+        dispatcher; snapshots are keyed by asset and threshold so a
+        configuration change never reuses one.
+        """
+
+        if self.holder_index is None or not self._http_sessions:
+            return None
+        asset = f"{self.mtlap_code}:{self.mtlap_issuer}"
+        minimum_balance = str(DEFAULT_MINIMUM_BALANCE)
+        stream = HolderEffectStream(
+            self._http_sessions["horizon"],
+            self._horizon_url,
+            asset_code=self.mtlap_code,
+            asset_issuer=self.mtlap_issuer,
+            index=self.holder_index,
+            recheck=self.recheck_holder,
+        )
+        return HolderIndexJob(
+            self.holder_index,
+            self.load_qualified_holders,
+            load_snapshot=lambda: storage_call(
+                "get_holder_index",
+                asset,
+                minimum_balance,
+            ),
+            save_snapshot=lambda keys, count, cursor: storage_call(
+                "save_holder_index",
+                asset,
+                minimum_balance,
+                keys,
+                count,
+                cursor,
+            ),
+            stream=stream,
+        )
+
     async def _gateway(self) -> RecommendationGateway:
         if self._recommendation_gateway is None:
             await self.start()
@@ -89,17 +267,26 @@ class StellarClient:
 
         gateway = await self._gateway()
         account = await gateway.load_horizon_account(address)
-        if account is None:
-            return False
-        has_trustline, _balance = self._extract_mtlap(account)
-        return has_trustline
+        return account is not None and account.has_trustline
 
-    async def check_recommendation(self, address: str) -> dict[str, Any]:
+    async def check_recommendation(
+        self,
+        address: str,
+        *,
+        use_cache: bool = True,
+        allow_stale_bsn: bool = False,
+        progress: ProgressCallback | None = None,
+    ) -> dict[str, Any]:
         """Check only the candidate's incoming BSN links and live recommenders."""
 
         try:
             gateway = await self._gateway()
-            result = await gateway.check(address)
+            result = await gateway.check(
+                address,
+                use_cache=use_cache,
+                allow_stale_bsn=allow_stale_bsn,
+                progress=progress,
+            )
         except RecommendationGatewayError as error:
             logger.warning(
                 "Recommendation lookup failed: service=%s code=%s retryable=%s",
@@ -141,44 +328,70 @@ class StellarClient:
             "verified_recommendations": len(verified),
             "recommendations": recommendations,
             "verified_recommendations_list": verified,
+            "cached": result.cached,
         }
 
-    async def get_account_info(self, address: str) -> dict[str, Any]:
-        """Return one coherent candidate snapshot for the eligibility rules."""
+    async def get_account_info(
+        self,
+        address: str,
+        *,
+        use_cache: bool = True,
+        allow_stale_bsn: bool = False,
+        progress: ProgressCallback | None = None,
+    ) -> dict[str, Any]:
+        """Return one coherent candidate snapshot for the eligibility rules.
+
+        ``account`` is the gateway's :class:`AccountSnapshot`, passed through
+        unchanged, or ``None`` for a missing or unreadable account.  A
+        snapshot that a cache answered any part of is marked ``cached``;
+        callers must not accept a candidate on it without a fresh
+        confirmation.  ``allow_stale_bsn`` is passed to the gateway check.
+        ``progress`` hears about each finished step, the trustline before BSN
+        is asked.
+        """
 
         try:
             gateway = await self._gateway()
-            account = await gateway.load_horizon_account(address)
+            lookup = await gateway.lookup_horizon_account(
+                address,
+                use_cache=use_cache,
+            )
+            account = lookup.account
             if account is None:
                 return {
-                    "exists": False,
-                    "has_trustline": False,
-                    "mtlap_balance": "0",
-                    "balances": [],
+                    "account": None,
                     "recommendation": {
                         "has_recommendation": False,
                         "has_any_recommendation": False,
                     },
                 }
-            balances = self._balances(account)
-            has_trustline, mtlap_balance = self._extract_mtlap(account)
+            report_progress(progress, CheckStage.ACCOUNT_LOADED)
+            report_progress(
+                progress,
+                CheckStage.TRUSTLINE_FOUND
+                if account.has_trustline
+                else CheckStage.TRUSTLINE_MISSING,
+            )
 
             # A positive balance already decides the stronger ALREADY_MEMBER
             # branch, so BSN cannot add information and must not delay it.
-            if Decimal(mtlap_balance) > 0:
+            if account.mtlap_balance > 0:
                 recommendation_info = {
                     "has_recommendation": False,
                     "has_any_recommendation": False,
                 }
             else:
-                recommendation_info = await self.check_recommendation(address)
+                recommendation_info = await self.check_recommendation(
+                    address,
+                    use_cache=use_cache,
+                    allow_stale_bsn=allow_stale_bsn,
+                    progress=progress,
+                )
 
             return {
-                "exists": True,
-                "has_trustline": has_trustline,
-                "mtlap_balance": mtlap_balance,
-                "balances": balances,
+                "account": account,
                 "recommendation": recommendation_info,
+                "cached": lookup.cached or recommendation_info.get("cached", False),
             }
         except RecommendationGatewayError as error:
             logger.warning(
@@ -188,10 +401,7 @@ class StellarClient:
                 error.retryable,
             )
             return {
-                "exists": False,
-                "has_trustline": False,
-                "mtlap_balance": "0",
-                "balances": [],
+                "account": None,
                 "recommendation": {
                     "has_recommendation": False,
                     "has_any_recommendation": False,
@@ -201,71 +411,10 @@ class StellarClient:
         except Exception:
             logger.exception("Candidate Horizon lookup failed")
             return {
-                "exists": False,
-                "has_trustline": False,
-                "mtlap_balance": "0",
-                "balances": [],
+                "account": None,
                 "recommendation": {
                     "has_recommendation": False,
                     "has_any_recommendation": False,
                 },
                 "error": "horizon_unavailable",
             }
-
-    def _extract_mtlap(self, account: Any) -> tuple[bool, str]:
-        expected_asset_type = (
-            "credit_alphanum4"
-            if len(self.mtlap_code) <= 4
-            else "credit_alphanum12"
-        )
-        matches: list[str] = []
-        for balance in self._balances(account):
-            asset_code = self._field(balance, "asset_code")
-            asset_issuer = self._field(balance, "asset_issuer")
-            if (
-                asset_code != self.mtlap_code
-                or asset_issuer != self.mtlap_issuer
-            ):
-                continue
-            if self._field(balance, "asset_type") != expected_asset_type:
-                raise ValueError("invalid_mtlap_asset_type")
-            raw_balance = self._field(balance, "balance")
-            if not isinstance(raw_balance, str):
-                raise ValueError("invalid_mtlap_balance")
-            try:
-                parsed_balance = Decimal(raw_balance)
-            except InvalidOperation as exc:
-                raise ValueError("invalid_mtlap_balance") from exc
-            if not parsed_balance.is_finite() or parsed_balance < 0:
-                raise ValueError("invalid_mtlap_balance")
-            matches.append(raw_balance)
-
-        if len(matches) > 1:
-            raise ValueError("duplicate_mtlap_balance")
-        if matches:
-            return True, matches[0]
-        return False, "0"
-
-    @staticmethod
-    def _balances(account: Any) -> Sequence[Any]:
-        balances = (
-            account.get("balances")
-            if isinstance(account, Mapping)
-            else getattr(account, "balances", None)
-        )
-        if balances is None:
-            raw_data = getattr(account, "raw_data", None)
-            if isinstance(raw_data, Mapping):
-                balances = raw_data.get("balances")
-        if not isinstance(balances, Sequence) or isinstance(
-            balances,
-            (str, bytes, bytearray),
-        ):
-            raise ValueError("invalid_horizon_balances")
-        return balances
-
-    @staticmethod
-    def _field(balance: Any, name: str) -> Any:
-        if isinstance(balance, Mapping):
-            return balance.get(name)
-        return getattr(balance, name, None)
@@ -0,0 +1,121 @@
+"""PTB update processor with separate pools for slow and fast handlers.
+
+An address check may wait on Horizon and BSN for tens of seconds, while a
+button press or an admin command is one MongoDB round trip.  With one shared
+``concurrent_updates`` limit, a burst of address checks occupies every slot
+and cheap updates queue behind them.  This processor classifies each update
+before it runs and admits it through its own pool, so fast updates always
+have reserved capacity.
+
+Per-user ordering is still enforced by ``MTLAJoinBot._serialized``: every
+user holds at most one slot, and an update from a user whose previous update
+is still running is sent to the fast pool, where the busy rejection answers
+it immediately instead of letting it wait behind other users' checks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from . import messages
+
+
+DEFAULT_SLOW_UPDATE_LIMIT = 6
+DEFAULT_FAST_UPDATE_LIMIT = 8
+# Upper bound of updates admitted by PTB at once, whichever pool they wait
+# for. It only has to be large enough that waiting slow updates never hold
+# every admission slot; 256 matches PTB's own ``concurrent_updates(True)``.
+DEFAULT_MAX_PENDING_UPDATES = 256
+
+_ADDRESS_PATTERN = re.compile(r"G[A-Z0-9]{55}")
+
+
+def _default_slow_texts() -> frozenset[str]:
+    return frozenset(
+        messages.get_message(language, "repeat_check")
+        for language in messages.MESSAGES
+    )
+
+
+class FairUpdateProcessor(BaseUpdateProcessor):
+    """Run slow address checks and fast interactions in separate pools."""
+
+    def __init__(
+        self,
+        *,
+        slow_limit: int = DEFAULT_SLOW_UPDATE_LIMIT,
+        fast_limit: int = DEFAULT_FAST_UPDATE_LIMIT,
+        max_pending: int = DEFAULT_MAX_PENDING_UPDATES,
+        is_busy: Callable[[int], bool] | None = None,
+        slow_texts: Iterable[str] | None = None,
+    ) -> None:
+        if slow_limit < 1 or fast_limit < 1:
+            raise ValueError("update pool limits must be positive")
+        if max_pending < slow_limit + fast_limit:
+            raise ValueError("max_pending must cover both update pools")
+        super().__init__(max_pending)
+        self._slow_limit = slow_limit
+        self._fast_limit = fast_limit
+        self._slow = asyncio.BoundedSemaphore(slow_limit)
+        self._fast = asyncio.BoundedSemaphore(fast_limit)
+        self._is_busy = is_busy
+        self._slow_texts = frozenset(
+            _default_slow_texts() if slow_texts is None else slow_texts
+        )
+
+    @property
+    def slow_limit(self) -> int:
+        return self._slow_limit
+
+    @property
+    def fast_limit(self) -> int:
+        return self._fast_limit
+
+    def is_slow(self, update: object) -> bool:
+        """Return whether ``update`` may trigger an external address check."""
+
+        if not isinstance(update, Update):
+            return False
+        message = update.message
+        text = getattr(message, "text", None)
+        if not text or text.startswith("/"):
+            return False
+        text = text.strip()
+        if text not in self._slow_texts and _ADDRESS_PATTERN.fullmatch(text) is None:
+            return False
+        user = update.effective_user
+        if user is not None and self._is_busy is not None and self._is_busy(user.id):
+            return False
+        return True
+
+    async def do_process_update(
+        self,
+        update: object,
+        coroutine: Awaitable[Any],
+    ) -> None:
+        pool = self._slow if self.is_slow(update) else self._fast
+        try:
+            await pool.acquire()
+        except BaseException:
+            # The handler never started; close it to avoid a never-awaited
+            # coroutine warning when shutdown cancels waiting updates.
+            close = getattr(coroutine, "close", None)
+            if close is not None:
+                close()
+            raise
+        try:
+            await coroutine
+        finally:
+            pool.release()
+
+    async def initialize(self) -> None:
+        """Nothing to allocate; the pools are created with the processor."""
+
+    async def shutdown(self) -> None:
+        """Nothing to release; running handlers are awaited by PTB."""
@@ -0,0 +1,66 @@
+"""Per-user locks that exist only while a user has work in flight.
+
+The bot serializes each Telegram user's updates and lets ``/start`` cancel
+the user's running handler.  Keeping one ``asyncio.Lock`` per user forever
+made memory grow with every user ever seen.  Entries here are
+reference-counted by holders and waiters and are dropped as soon as the last
+one leaves, so memory tracks concurrent users instead of total users.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class _UserSlot:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    task: asyncio.Task | None = None
+    references: int = 0
+
+
+class UserLockRegistry:
+    """Serialize work per user and track the task currently holding it."""
+
+    def __init__(self) -> None:
+        self._slots: dict[int, _UserSlot] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def is_busy(self, user_id: int) -> bool:
+        slot = self._slots.get(user_id)
+        return slot is not None and slot.lock.locked()
+
+    def active_task(self, user_id: int) -> asyncio.Task | None:
+        slot = self._slots.get(user_id)
+        return None if slot is None else slot.task
+
+    @asynccontextmanager
+    async def hold(
+        self,
+        user_id: int,
+        task: asyncio.Task | None = None,
+    ) -> AsyncIterator[None]:
+        """Hold ``user_id``'s lock, recording ``task`` as its active work."""
+
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._slots[user_id] = _UserSlot()
+        slot.references += 1
+        try:
+            async with slot.lock:
+                if task is not None:
+                    slot.task = task
+                try:
+                    yield
+                finally:
+                    if slot.task is task:
+                        slot.task = None
+        finally:
+            slot.references -= 1
+            if slot.references == 0 and self._slots.get(user_id) is slot:
+                del self._slots[user_id]
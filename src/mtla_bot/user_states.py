@@ -2,6 +2,7 @@ from enum import Enum
 from dataclasses import dataclass, fields
 from typing import Optional
 from .database import DatabaseManager
+from .async_database import AsyncDatabaseManager
 
 class UserState(Enum):
     """Состояния пользователя в процессе проверки"""
@@ -39,6 +40,50 @@ class UserData:
     last_activity: Optional[str] = None
     progress: Optional[dict] = None
 
+def _from_document(user_doc: dict) -> UserData:
+    """Load current and legacy MongoDB documents into the stable model."""
+
+    allowed_fields = {field.name for field in fields(UserData)}
+    filtered_doc = {
+        key: value
+        for key, value in user_doc.items()
+        if key in allowed_fields
+    }
+    filtered_doc.setdefault("username", None)
+    return UserData(**filtered_doc)
+
+
+def _reset_progress_update(attempt_id: str) -> dict:
+    """Fields that start a new attempt but keep the basic user data."""
+
+    return {
+        "attempt_id": attempt_id,
+        "state": "checking_username",
+        "has_username": False,
+        "username_warning_acknowledged": False,
+        "agreed_to_terms": False,
+        "stellar_address": None,
+        "has_trustline": False,
+        "candidate_mtlap_balance": None,
+        "has_recommendation": False,
+        "recommender_username": None,
+        "final_delivery_attempts": 0,
+        "final_delivery_lease_id": None,
+        "final_delivery_lease_until": None,
+        "final_delivery_last_error": None,
+        "final_delivery_last_attempt_at": None,
+        "final_delivery_message_id": None,
+        "final_delivered_at": None,
+        "progress": {
+            "username_check": False,
+            "agreement": False,
+            "address_entered": False,
+            "trustline_check": False,
+            "recommendation": False
+        }
+    }
+
+
 class UserStateManager:
     """Менеджер состояний пользователей с MongoDB"""
     
@@ -49,22 +94,9 @@ class UserStateManager:
         """Получает пользователя из базы данных"""
         user_doc = self.db.get_user(user_id)
         if user_doc:
-            return self._from_document(user_doc)
+            return _from_document(user_doc)
         return None
 
-    @staticmethod
-    def _from_document(user_doc: dict) -> UserData:
-        """Load current and legacy MongoDB documents into the stable model."""
-
-        allowed_fields = {field.name for field in fields(UserData)}
-        filtered_doc = {
-            key: value
-            for key, value in user_doc.items()
-            if key in allowed_fields
-        }
-        filtered_doc.setdefault("username", None)
-        return UserData(**filtered_doc)
-    
     def create_user(
         self,
         user_id: int,
@@ -204,6 +236,41 @@ class UserStateManager:
             retry_seconds=retry_seconds,
             error_code=error_code,
         )
+
+    def claim_final_deliveries(
+        self,
+        candidates: list[tuple[int, str]],
+        delivery_lease_id: str,
+        *,
+        lease_seconds: int,
+        max_attempts: int,
+    ) -> list[UserData]:
+        """Claim automatic redeliveries in bulk under one batch lease."""
+
+        return [
+            _from_document(document)
+            for document in self.db.claim_final_deliveries(
+                candidates,
+                delivery_lease_id,
+                lease_seconds=lease_seconds,
+                max_attempts=max_attempts,
+            )
+        ]
+
+    def record_final_delivery_outcomes(
+        self,
+        delivery_lease_id: str,
+        delivered: list[tuple[int, str, Optional[int]]],
+        failed: list[tuple[int, str, str]],
+        *,
+        retry_seconds: int,
+    ) -> int:
+        return self.db.record_final_delivery_outcomes(
+            delivery_lease_id,
+            delivered,
+            failed,
+            retry_seconds=retry_seconds,
+        )
     
     def update_language(self, user_id: int, language: str):
         """Обновляет язык пользователя"""
@@ -246,32 +313,7 @@ class UserStateManager:
     
     def reset_user_progress(self, user_id: int, attempt_id: str):
         """Сбрасывает прогресс пользователя, но сохраняет базовую информацию"""
-        return self.db.update_user(user_id, {
-            "attempt_id": attempt_id,
-            "state": "checking_username",
-            "has_username": False,
-            "username_warning_acknowledged": False,
-            "agreed_to_terms": False,
-            "stellar_address": None,
-            "has_trustline": False,
-            "candidate_mtlap_balance": None,
-            "has_recommendation": False,
-            "recommender_username": None,
-            "final_delivery_attempts": 0,
-            "final_delivery_lease_id": None,
-            "final_delivery_lease_until": None,
-            "final_delivery_last_error": None,
-            "final_delivery_last_attempt_at": None,
-            "final_delivery_message_id": None,
-            "final_delivered_at": None,
-            "progress": {
-                "username_check": False,
-                "agreement": False,
-                "address_entered": False,
-                "trustline_check": False,
-                "recommendation": False
-            }
-        })
+        return self.db.update_user(user_id, _reset_progress_update(attempt_id))
     
     def get_user_progress(self, user_id: int) -> dict:
         """Получает прогресс пользователя"""
@@ -292,22 +334,342 @@ class UserStateManager:
         """Return a bounded batch for autonomous final-message redelivery."""
 
         return [
-            self._from_document(document)
+            _from_document(document)
             for document in self.db.get_finalizing_users(limit, max_attempts)
         ]
     
-    def get_incomplete_users(self) -> list:
-        """Получает пользователей, которые не завершили процесс"""
-        return self.db.get_incomplete_users()
+    def get_incomplete_users(self, limit: int = 20, after=None) -> list:
+        """Получает страницу пользователей, которые не завершили процесс"""
+        return self.db.get_incomplete_users(limit, after)
+
+    def count_incomplete_users(self) -> int:
+        """Считает пользователей, которые не завершили процесс"""
+        return self.db.count_incomplete_users()
     
-    def get_users_for_reminder(self, days_inactive: int = 7) -> list:
-        """Получает пользователей для напоминания"""
-        return self.db.get_users_for_reminder(days_inactive)
+    def get_users_for_reminder(
+        self,
+        days_inactive: int = 7,
+        limit: int = 15,
+        after=None,
+    ) -> list:
+        """Получает страницу пользователей для напоминания"""
+        return self.db.get_users_for_reminder(days_inactive, limit, after)
+
+    def count_users_for_reminder(self, days_inactive: int = 7) -> int:
+        """Считает пользователей для напоминания"""
+        return self.db.count_users_for_reminder(days_inactive)
     
     def get_user_statistics(self) -> dict:
         """Получает статистику по пользователям"""
         return self.db.get_user_statistics()
+
+    def get_holder_index(self, asset: str, minimum_balance: str):
+        """Stored snapshot of qualified MTLAP holders, if any."""
+        return self.db.get_holder_index(asset, minimum_balance)
+
+    def save_holder_index(
+        self,
+        asset: str,
+        minimum_balance: str,
+        keys: bytes,
+        count: int,
+        cursor: Optional[str] = None,
+    ):
+        """Replace the stored snapshot of qualified MTLAP holders."""
+        return self.db.save_holder_index(
+            asset,
+            minimum_balance,
+            keys,
+            count,
+            cursor,
+        )
     
     def close_connection(self):
         """Закрывает соединение с базой данных"""
         self.db.close()
+
+
+class AsyncUserStateManager:
+    """State manager over the native asyncio MongoDB backend.
+
+    It mirrors :class:`UserStateManager` method by method, but every public
+    method is a coroutine function, so a call that is not awaited is
+    reported by Python instead of silently returning the backend coroutine.
+    """
+
+    def __init__(self):
+        self.db = AsyncDatabaseManager()
+
+    async def start(self):
+        """Connect and ensure indexes inside the running event loop."""
+        await self.db.connect()
+
+    async def get_user(self, user_id: int) -> Optional[UserData]:
+        user_doc = await self.db.get_user(user_id)
+        if user_doc:
+            return _from_document(user_doc)
+        return None
+
+    async def create_user(
+        self,
+        user_id: int,
+        username: Optional[str],
+        language: str = 'ru',
+        attempt_id: Optional[str] = None,
+    ) -> bool:
+        return await self.db.create_user(user_id, username, language, attempt_id)
+
+    async def update_user(self, user_id: int, update_data: dict) -> bool:
+        return await self.db.update_user(user_id, update_data)
+
+    async def update_state(self, user_id: int, state: UserState):
+        return await self.db.update_user_state(user_id, state.value)
+
+    async def begin_new_attempt(
+        self,
+        user_id: int,
+        username: Optional[str],
+        language: str,
+        attempt_id: str,
+    ) -> bool:
+        return await self.db.begin_new_attempt(
+            user_id,
+            username,
+            language,
+            attempt_id,
+        )
+
+    async def record_eligibility_snapshot(
+        self,
+        user_id: int,
+        attempt_id: str,
+        expected_state: str,
+        address: str,
+        has_trustline: bool,
+        candidate_mtlap_balance: str,
+        has_recommendation: bool,
+        next_state: str,
+    ) -> bool:
+        return await self.db.record_eligibility_snapshot(
+            user_id,
+            attempt_id,
+            expected_state,
+            address,
+            has_trustline,
+            candidate_mtlap_balance,
+            has_recommendation,
+            next_state,
+        )
+
+    async def update_attempt_fields(
+        self,
+        user_id: int,
+        attempt_id: str,
+        expected_state: str,
+        update_data: dict,
+    ) -> bool:
+        return await self.db.update_attempt_fields(
+            user_id,
+            attempt_id,
+            expected_state,
+            update_data,
+        )
+
+    async def transition_attempt(
+        self,
+        user_id: int,
+        attempt_id: str,
+        expected_state: str,
+        next_state: str,
+        update_data: Optional[dict] = None,
+    ) -> bool:
+        return await self.db.transition_attempt(
+            user_id,
+            attempt_id,
+            expected_state,
+            next_state,
+            update_data,
+        )
+
+    async def complete_attempt(
+        self,
+        user_id: int,
+        attempt_id: str,
+        delivery_lease_id: str,
+        delivery_message_id: Optional[int] = None,
+    ) -> bool:
+        return await self.db.complete_attempt(
+            user_id,
+            attempt_id,
+            delivery_lease_id,
+            delivery_message_id,
+        )
+
+    async def claim_final_delivery(
+        self,
+        user_id: int,
+        attempt_id: str,
+        delivery_lease_id: str,
+        *,
+        lease_seconds: int,
+        automatic: bool,
+        max_attempts: int,
+    ) -> bool:
+        return await self.db.claim_final_delivery(
+            user_id,
+            attempt_id,
+            delivery_lease_id,
+            lease_seconds=lease_seconds,
+            automatic=automatic,
+            max_attempts=max_attempts,
+        )
+
+    async def defer_final_delivery(
+        self,
+        user_id: int,
+        attempt_id: str,
+        delivery_lease_id: str,
+        *,
+        retry_seconds: int,
+        error_code: str,
+    ) -> bool:
+        return await self.db.defer_final_delivery(
+            user_id,
+            attempt_id,
+            delivery_lease_id,
+            retry_seconds=retry_seconds,
+            error_code=error_code,
+        )
+
+    async def claim_final_deliveries(
+        self,
+        candidates: list[tuple[int, str]],
+        delivery_lease_id: str,
+        *,
+        lease_seconds: int,
+        max_attempts: int,
+    ) -> list[UserData]:
+        documents = await self.db.claim_final_deliveries(
+            candidates,
+            delivery_lease_id,
+            lease_seconds=lease_seconds,
+            max_attempts=max_attempts,
+        )
+        return [_from_document(document) for document in documents]
+
+    async def record_final_delivery_outcomes(
+        self,
+        delivery_lease_id: str,
+        delivered: list[tuple[int, str, Optional[int]]],
+        failed: list[tuple[int, str, str]],
+        *,
+        retry_seconds: int,
+    ) -> int:
+        return await self.db.record_final_delivery_outcomes(
+            delivery_lease_id,
+            delivered,
+            failed,
+            retry_seconds=retry_seconds,
+        )
+
+    async def update_language(self, user_id: int, language: str):
+        return await self.db.update_user(user_id, {"language": language})
+
+    async def set_stellar_address(self, user_id: int, address: str):
+        return await self.db.set_stellar_address(user_id, address)
+
+    async def set_username_status(self, user_id: int, has_username: bool):
+        return await self.db.set_username_status(user_id, has_username)
+
+    async def acknowledge_username_warning(self, user_id: int):
+        return await self.db.update_user(
+            user_id,
+            {"username_warning_acknowledged": True},
+        )
+
+    async def set_agreement_status(self, user_id: int, agreed: bool):
+        return await self.db.set_agreement_status(user_id, agreed)
+
+    async def set_trustline_status(self, user_id: int, has_trustline: bool):
+        return await self.db.set_trustline_status(user_id, has_trustline)
+
+    async def set_recommendation_status(self, user_id: int, has_recommendation: bool):
+        return await self.db.update_user(user_id, {
+            "has_recommendation": has_recommendation,
+            "progress.recommendation": has_recommendation,
+        })
+
+    async def set_recommender(self, user_id: int, recommender_username: str):
+        await self.db.set_recommendation(user_id, recommender_username)
+
+    async def reset_user(self, user_id: int):
+        await self.db.reset_user(user_id)
+
+    async def reset_user_progress(self, user_id: int, attempt_id: str):
+        return await self.db.update_user(user_id, _reset_progress_update(attempt_id))
+
+    async def get_user_progress(self, user_id: int) -> dict:
+        user = await self.get_user(user_id)
+        if user and user.progress:
+            return user.progress
+        return {}
+
+    async def get_users_by_state(self, state: str) -> list:
+        return await self.db.get_users_by_state(state)
+
+    async def get_finalizing_users(
+        self,
+        limit: int = 20,
+        max_attempts: int = 3,
+    ) -> list[UserData]:
+        documents = await self.db.get_finalizing_users(limit, max_attempts)
+        return [_from_document(document) for document in documents]
+
+    async def watch_finalizations(self):
+        """Open the change stream of finalization events."""
+
+        return await self.db.watch_finalizations()
+
+    async def get_incomplete_users(self, limit: int = 20, after=None) -> list:
+        return await self.db.get_incomplete_users(limit, after)
+
+    async def count_incomplete_users(self) -> int:
+        return await self.db.count_incomplete_users()
+
+    async def get_users_for_reminder(
+        self,
+        days_inactive: int = 7,
+        limit: int = 15,
+        after=None,
+    ) -> list:
+        return await self.db.get_users_for_reminder(days_inactive, limit, after)
+
+    async def count_users_for_reminder(self, days_inactive: int = 7) -> int:
+        return await self.db.count_users_for_reminder(days_inactive)
+
+    async def get_user_statistics(self) -> dict:
+        return await self.db.get_user_statistics()
+
+    async def get_holder_index(self, asset: str, minimum_balance: str):
+        """Stored snapshot of qualified MTLAP holders, if any."""
+        return await self.db.get_holder_index(asset, minimum_balance)
+
+    async def save_holder_index(
+        self,
+        asset: str,
+        minimum_balance: str,
+        keys: bytes,
+        count: int,
+        cursor: Optional[str] = None,
+    ):
+        """Replace the stored snapshot of qualified MTLAP holders."""
+        return await self.db.save_holder_index(
+            asset,
+            minimum_balance,
+            keys,
+            count,
+            cursor,
+        )
+
+    async def close_connection(self):
+        await self.db.close()
@@ -0,0 +1,125 @@
+"""Local aiohttp endpoint that feeds Telegram webhook updates to PTB.
+
+PTB's own ``run_webhook`` needs the optional tornado stack.  The bot already
+depends on aiohttp, so this server reuses it: each POST is authenticated with
+the ``X-Telegram-Bot-Api-Secret-Token`` header, decoded into an
+:class:`telegram.Update` and put on the same ``Application.update_queue`` that
+polling would fill.  Handlers, locks and error handling are unchanged.
+"""
+
+from __future__ import annotations
+
+import hmac
+import json
+import logging
+
+from aiohttp import web
+from telegram import Update
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# Telegram updates are small; a hard cap keeps a hostile client from making
+# the bot buffer arbitrary bodies before the secret is even checked.
+MAX_UPDATE_BYTES = 1024 * 1024
+DEFAULT_DRAIN_TIMEOUT = 10.0
+
+
+class WebhookServer:
+    """Accept Telegram updates over HTTP and enqueue them for ``application``."""
+
+    def __init__(
+        self,
+        application,
+        *,
+        secret_token: str,
+        path: str = "/telegram",
+        host: str = "0.0.0.0",
+        port: int = 8443,
+        drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+    ) -> None:
+        if not secret_token:
+            raise ValueError("secret_token is required")
+        if not path.startswith("/"):
+            raise ValueError("path must start with '/'")
+        if drain_timeout <= 0:
+            raise ValueError("drain_timeout must be positive")
+        self._application = application
+        self._secret_token = secret_token.encode()
+        self._path = path
+        self._host = host
+        self._port = port
+        self._drain_timeout = drain_timeout
+        self._runner: web.AppRunner | None = None
+        self._accepting = False
+
+    @property
+    def addresses(self) -> list:
+        """Bound socket addresses, useful when listening on port 0."""
+
+        return [] if self._runner is None else list(self._runner.addresses)
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+        app = web.Application(client_max_size=MAX_UPDATE_BYTES)
+        app.router.add_post(self._path, self._handle_update)
+        runner = web.AppRunner(
+            app,
+            handle_signals=False,
+            access_log=None,
+            shutdown_timeout=self._drain_timeout,
+        )
+        await runner.setup()
+        try:
+            site = web.TCPSite(runner, self._host, self._port)
+            await site.start()
+        except BaseException:
+            await runner.cleanup()
+            raise
+        self._runner = runner
+        self._accepting = True
+        logger.info("Webhook server listening on %s", self.addresses)
+
+    async def stop(self) -> None:
+        """Refuse new updates, then let in-flight requests finish enqueuing.
+
+        Updates already on the queue are processed by ``Application.stop``,
+        which the caller runs after this method returns.
+        """
+
+        runner = self._runner
+        if runner is None:
+            return
+        self._accepting = False
+        self._runner = None
+        await runner.cleanup()
+        logger.info("Webhook server stopped")
+
+    def _authorized(self, request: web.Request) -> bool:
+        supplied = request.headers.get(SECRET_TOKEN_HEADER, "").encode()
+        return hmac.compare_digest(supplied, self._secret_token)
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            logger.warning("Rejected webhook request with invalid secret token")
+            return web.Response(status=403)
+        if not self._accepting:
+            # Telegram retries non-2xx answers, so nothing is lost on restart.
+            return web.Response(status=503)
+        try:
+            data = await request.json(loads=json.loads)
+        except ValueError:
+            return web.Response(status=400)
+        if not isinstance(data, dict):
+            return web.Response(status=400)
+        try:
+            update = Update.de_json(data, self._application.bot)
+        except Exception:
+            logger.warning("Rejected malformed webhook update")
+            return web.Response(status=400)
+        if update is None:
+            return web.Response(status=400)
+        await self._application.update_queue.put(update)
+        return web.Response()
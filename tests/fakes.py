@@ -0,0 +1,19 @@
+"""Test doubles shared by several test modules."""
+
+import asyncio
+
+
+class FakeClock:
+    """Manual monotonic clock; ``sleep`` advances it instead of waiting."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+        await asyncio.sleep(0)
@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import AsyncMock
+
+from mtla_bot.account_cache import AccountCache
+
+from fakes import FakeClock
+
+
+RECOMMENDER = "GAQPZKOYGJDEWLYO6PBOJ4NG6HNBBNNZSOJNKUUCVJGLBQIQSO5AC26F"
+SECOND_RECOMMENDER = "GBJQKGNVJHCT3DQUZT6RQ5MSTVMTUY4VFCBAKMYA7BK74LHXAXVQJQDC"
+
+
+class AccountCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock(1000.0)
+
+    def make_cache(self, **kwargs) -> AccountCache:
+        return AccountCache(clock=self.clock, **kwargs)
+
+    async def test_fresh_entry_is_served_without_loading(self) -> None:
+        cache = self.make_cache(ttl=60)
+        account = {"account_id": RECOMMENDER, "balances": []}
+        load = AsyncMock(return_value=account)
+
+        first = await cache.get_or_load(RECOMMENDER, load)
+        second = await cache.get_or_load(RECOMMENDER, load)
+
+        self.assertEqual(first, (account, False))
+        self.assertEqual(second, (account, True))
+        load.assert_awaited_once_with()
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    async def test_expired_entry_is_reloaded(self) -> None:
+        cache = self.make_cache(ttl=60)
+        load = AsyncMock(return_value={"account_id": RECOMMENDER})
+
+        await cache.get_or_load(RECOMMENDER, load)
+        self.clock.now += 60
+        await cache.get_or_load(RECOMMENDER, load)
+
+        self.assertEqual(load.await_count, 2)
+
+    async def test_missing_account_uses_its_own_shorter_ttl(self) -> None:
+        cache = self.make_cache(ttl=60, missing_ttl=5)
+        load = AsyncMock(return_value=None)
+
+        self.assertEqual(await cache.get_or_load(RECOMMENDER, load), (None, False))
+        self.clock.now += 4
+        self.assertEqual(cache.lookup(RECOMMENDER), (True, None))
+        self.clock.now += 1
+        self.assertEqual(cache.lookup(RECOMMENDER), (False, None))
+
+    async def test_zero_missing_ttl_disables_negative_caching(self) -> None:
+        cache = self.make_cache(missing_ttl=0)
+
+        cache.store(RECOMMENDER, None)
+
+        self.assertEqual(len(cache), 0)
+
+    async def test_least_recently_used_entry_is_evicted(self) -> None:
+        cache = self.make_cache(max_size=2)
+        third = "GBACH65OTKJL5VZCYCI4F4FTTODPEORFQQZVNF4PUK7X4AMGFXNP2KZZ"
+        cache.store(RECOMMENDER, {"account_id": RECOMMENDER})
+        cache.store(SECOND_RECOMMENDER, {"account_id": SECOND_RECOMMENDER})
+        cache.lookup(RECOMMENDER)
+
+        cache.store(third, {"account_id": third})
+
+        self.assertTrue(cache.lookup(RECOMMENDER)[0])
+        self.assertFalse(cache.lookup(SECOND_RECOMMENDER)[0])
+        self.assertTrue(cache.lookup(third)[0])
+
+    async def test_bypass_reads_fresh_and_refreshes_entry(self) -> None:
+        cache = self.make_cache()
+        cache.store(RECOMMENDER, {"account_id": RECOMMENDER, "stale": True})
+        fresh = {"account_id": RECOMMENDER, "stale": False}
+        load = AsyncMock(return_value=fresh)
+
+        result = await cache.get_or_load(RECOMMENDER, load, use_cache=False)
+
+        self.assertEqual(result, (fresh, False))
+        self.assertEqual(cache.lookup(RECOMMENDER), (True, fresh))
+
+    async def test_failed_load_is_not_cached(self) -> None:
+        cache = self.make_cache()
+        load = AsyncMock(side_effect=RuntimeError("horizon down"))
+
+        with self.assertRaises(RuntimeError):
+            await cache.get_or_load(RECOMMENDER, load)
+
+        self.assertEqual(len(cache), 0)
+
+    def test_rejects_invalid_limits(self) -> None:
+        with self.assertRaises(ValueError):
+            AccountCache(max_size=0)
+        with self.assertRaises(ValueError):
+            AccountCache(ttl=0)
+        with self.assertRaises(ValueError):
+            AccountCache(missing_ttl=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import unittest
+
+from mtla_bot.adaptive_limiter import AdaptiveLimiter
+
+from fakes import FakeClock
+
+
+class AdaptiveLimiterTest(unittest.IsolatedAsyncioTestCase):
+    def make(self, clock: FakeClock, **kwargs) -> AdaptiveLimiter:
+        return AdaptiveLimiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+    def test_fast_answers_widen_the_window_up_to_the_ceiling(self) -> None:
+        limiter = self.make(FakeClock(100.0), initial=2, ceiling=4)
+
+        for _ in range(3):
+            limiter.record_success(0.1)
+        self.assertEqual(limiter.window, 3)
+        for _ in range(50):
+            limiter.record_success(0.1)
+        self.assertEqual(limiter.window, 4)
+
+    def test_overload_halves_once_per_interval_down_to_the_floor(self) -> None:
+        clock = FakeClock(100.0)
+        limiter = self.make(clock, initial=8, floor=3, latency_target=1.0)
+
+        limiter.record_overload()
+        limiter.record_overload()
+        self.assertEqual(limiter.window, 4)
+
+        clock.now += 1.0
+        limiter.record_success(2.5)
+        self.assertEqual(limiter.window, 3)
+
+    async def test_retry_after_holds_back_new_requests(self) -> None:
+        clock = FakeClock(100.0)
+        limiter = self.make(clock, max_pause=5.0)
+
+        limiter.record_overload(retry_after=30.0)
+        async with limiter:
+            pass
+
+        self.assertEqual(clock.sleeps, [5.0])
+
+    async def test_window_bounds_requests_in_flight(self) -> None:
+        limiter = self.make(FakeClock(100.0), initial=1)
+        release = asyncio.Event()
+        order: list[str] = []
+
+        async def first() -> None:
+            async with limiter:
+                order.append("first")
+                await release.wait()
+
+        async def second() -> None:
+            async with limiter:
+                order.append("second")
+
+        tasks = [asyncio.create_task(first()), asyncio.create_task(second())]
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        self.assertEqual((order, limiter.in_flight), (["first"], 1))
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        self.assertEqual((order, limiter.in_flight), (["first", "second"], 0))
+
+    def test_bounds_are_validated(self) -> None:
+        for kwargs in (
+            {"floor": 0},
+            {"floor": 5, "ceiling": 4},
+            {"initial": 20, "ceiling": 16},
+            {"decrease_factor": 1.0},
+        ):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                AdaptiveLimiter(**kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+
+from mtla_bot.address_precheck import AddressPrechecks
+
+from fakes import FakeClock
+
+
+ADDRESS = "GBACH65OTKJL5VZCYCI4F4FTTODPEORFQQZVNF4PUK7X4AMGFXNP2KZZ"
+OTHER = "GAQPZKOYGJDEWLYO6PBOJ4NG6HNBBNNZSOJNKUUCVJGLBQIQSO5AC26F"
+
+
+class AddressPrechecksTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock(100.0)
+        self.loads: list[str] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+        async def load(address: str) -> dict:
+            self.loads.append(address)
+            await self.release.wait()
+            return {"address": address}
+
+        self.prechecks = AddressPrechecks(load, max_age=60.0, clock=self.clock)
+
+    async def asyncTearDown(self) -> None:
+        await self.prechecks.close()
+
+    async def test_running_precheck_is_awaited_for_the_same_attempt(self) -> None:
+        self.release.clear()
+        self.prechecks.remember(1, ADDRESS)
+        self.assertTrue(self.prechecks.start(1, "attempt"))
+
+        take = asyncio.create_task(self.prechecks.take(1, "attempt", ADDRESS))
+        await asyncio.sleep(0)
+        self.assertFalse(take.done())
+        self.release.set()
+
+        # Just finished, so it decides without a second check.
+        self.assertEqual(await take, {"address": ADDRESS})
+        self.assertEqual(self.loads, [ADDRESS])
+        self.assertIsNone(await self.prechecks.take(1, "attempt", ADDRESS))
+
+    async def test_without_previous_address_nothing_starts(self) -> None:
+        self.prechecks.remember(1, None)
+
+        self.assertFalse(self.prechecks.start(1, "attempt"))
+        self.assertEqual(self.loads, [])
+
+    async def test_other_address_or_attempt_is_not_used(self) -> None:
+        for attempt_id, address in (("attempt", OTHER), ("newer", ADDRESS)):
+            with self.subTest(attempt_id=attempt_id, address=address):
+                self.prechecks.remember(1, ADDRESS)
+                self.prechecks.start(1, "attempt")
+
+                self.assertIsNone(await self.prechecks.take(1, attempt_id, address))
+
+    async def test_older_snapshot_is_served_as_cached(self) -> None:
+        self.prechecks.remember(1, ADDRESS)
+        self.prechecks.start(1, "attempt")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.clock.now += 31.0
+
+        self.assertEqual(
+            await self.prechecks.take(1, "attempt", ADDRESS),
+            {"address": ADDRESS, "cached": True},
+        )
+
+    async def test_old_snapshot_is_not_used(self) -> None:
+        self.prechecks.remember(1, ADDRESS)
+        self.prechecks.start(1, "attempt")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.clock.now += 61.0
+
+        self.assertIsNone(await self.prechecks.take(1, "attempt", ADDRESS))
+
+    async def test_failed_precheck_falls_back_to_a_normal_check(self) -> None:
+        async def fail(_address: str) -> dict:
+            raise RuntimeError("lookup failed")
+
+        prechecks = AddressPrechecks(fail)
+        prechecks.remember(1, ADDRESS)
+        prechecks.start(1, "attempt")
+
+        with self.assertLogs("mtla_bot.address_precheck", "WARNING"):
+            self.assertIsNone(await prechecks.take(1, "attempt", ADDRESS))
+
+    async def test_new_attempt_cancels_the_running_precheck(self) -> None:
+        self.release.clear()
+        self.prechecks.remember(1, ADDRESS)
+        self.prechecks.start(1, "attempt")
+        await asyncio.sleep(0)
+
+        self.prechecks.remember(1, OTHER)
+        self.prechecks.start(1, "newer")
+        self.release.set()
+
+        self.assertEqual(
+            await self.prechecks.take(1, "newer", OTHER),
+            {"address": OTHER},
+        )
+        self.assertIsNone(await self.prechecks.take(1, "attempt", ADDRESS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,28 @@
+from datetime import datetime
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
-from mtla_bot.admin_tools import AdminTools
+from bson import ObjectId
+
+from mtla_bot.admin_tools import (
+    AdminTools,
+    decode_page_cursor,
+    encode_page_cursor,
+)
 from mtla_bot.database import DatabaseOperationError
 
 
+def listed_user(index: int) -> dict:
+    return {
+        "_id": ObjectId(f"{index:024x}"),
+        "user_id": index,
+        "username": f"user{index}",
+        "state": "agreement",
+        "created_at": datetime(2026, 1, 1),
+        "last_activity": datetime(2026, 1, 2, 3, 4, 5, 678000),
+    }
+
+
 class AdminFailureSemanticsTest(unittest.TestCase):
     def setUp(self) -> None:
         self.admin = AdminTools.__new__(AdminTools)
@@ -17,8 +35,9 @@ class AdminFailureSemanticsTest(unittest.TestCase):
 
         result = self.admin.get_incomplete_users_report()
 
-        self.assertIn("временно недоступен", result)
-        self.assertNotIn("Все пользователи завершили", result)
+        self.assertIn("временно недоступен", result.text)
+        self.assertNotIn("Все пользователи завершили", result.text)
+        self.assertIsNone(result.next_cursor)
 
     def test_reminder_outage_is_not_reported_as_empty(self) -> None:
         self.admin.state_manager.get_users_for_reminder.side_effect = (
@@ -27,8 +46,109 @@ class AdminFailureSemanticsTest(unittest.TestCase):
 
         result = self.admin.get_reminder_candidates()
 
-        self.assertIn("временно недоступен", result)
-        self.assertNotIn("Нет пользователей", result)
+        self.assertIn("временно недоступен", result.text)
+        self.assertNotIn("Нет пользователей", result.text)
+
+
+class AdminReportPagingTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.admin = AdminTools.__new__(AdminTools)
+        self.admin.state_manager = Mock()
+
+    def test_full_page_links_to_the_next_key(self) -> None:
+        users = [listed_user(index) for index in range(1, 22)]
+        self.admin.state_manager.get_incomplete_users.return_value = users
+        self.admin.state_manager.count_incomplete_users.return_value = 5000
+
+        page = self.admin.get_incomplete_users_report()
+
+        self.admin.state_manager.get_incomplete_users.assert_called_once_with(21, None)
+        self.assertIn("(5000)", page.text)
+        self.assertIn("@user20", page.text)
+        self.assertNotIn("@user21", page.text)
+        self.assertEqual(
+            page.next_cursor,
+            (users[19]["last_activity"], users[19]["_id"]),
+        )
+
+    def test_last_page_has_no_next_key(self) -> None:
+        cursor = (datetime(2026, 1, 1), ObjectId())
+        self.admin.state_manager.get_users_for_reminder.return_value = [
+            listed_user(1)
+        ]
+        self.admin.state_manager.count_users_for_reminder.return_value = 16
+
+        page = self.admin.get_reminder_candidates(3, cursor)
+
+        self.admin.state_manager.get_users_for_reminder.assert_called_once_with(
+            3,
+            16,
+            cursor,
+        )
+        self.assertIn("@user1", page.text)
+        self.assertIsNone(page.next_cursor)
+
+    def test_page_cursor_round_trips_at_millisecond_precision(self) -> None:
+        user = listed_user(7)
+        cursor = (user["last_activity"], user["_id"])
+
+        token = encode_page_cursor(cursor)
+
+        self.assertEqual(decode_page_cursor(token), cursor)
+        self.assertIsNone(decode_page_cursor("123:not-an-object-id"))
+        self.assertIsNone(decode_page_cursor("soon:" + "0" * 24))
+
+
+STATS = {
+    "total_users": 500000,
+    "completed_users": 1200,
+    "active_users": 35,
+    "state_distribution": {"completed": 1200, "agreement": 498800},
+}
+
+
+class AdminStatisticsCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.admin = AdminTools.__new__(AdminTools)
+        self.admin.state_manager = Mock()
+        self.admin.state_manager.get_user_statistics.return_value = STATS
+
+    def test_repeated_stats_are_served_from_snapshot(self) -> None:
+        first = self.admin.get_user_statistics()
+        second = self.admin.get_user_statistics()
+
+        self.admin.state_manager.get_user_statistics.assert_called_once_with()
+        self.assertIn("Всего пользователей: 500000", second)
+        self.assertIn("🕒 Данные на", first)
+        self.assertIn("с назад", second)
+
+    def test_expired_snapshot_is_refreshed(self) -> None:
+        with patch.dict("mtla_bot.admin_tools.STATS_SETTINGS", cache_seconds=-1):
+            self.admin.get_user_statistics()
+            self.admin.get_user_statistics()
+
+        self.assertEqual(self.admin.state_manager.get_user_statistics.call_count, 2)
+
+    def test_outage_serves_last_snapshot_with_its_age(self) -> None:
+        self.admin.get_user_statistics()
+        self.admin.state_manager.get_user_statistics.side_effect = (
+            DatabaseOperationError("database_read_failed")
+        )
+
+        with patch.dict("mtla_bot.admin_tools.STATS_SETTINGS", cache_seconds=-1):
+            result = self.admin.get_user_statistics()
+
+        self.assertIn("Всего пользователей: 500000", result)
+        self.assertIn("🕒 Данные на", result)
+
+    def test_outage_without_snapshot_is_reported(self) -> None:
+        self.admin.state_manager.get_user_statistics.side_effect = (
+            DatabaseOperationError("database_read_failed")
+        )
+
+        result = self.admin.get_user_statistics()
+
+        self.assertIn("временно недоступна", result)
 
 
 if __name__ == "__main__":
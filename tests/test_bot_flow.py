@@ -1,12 +1,45 @@
 import asyncio
+from datetime import datetime
+from decimal import Decimal
 import threading
 from types import SimpleNamespace
 import unittest
-from unittest.mock import ANY, AsyncMock, Mock
-
-from mtla_bot.bot import MTLAJoinBot, encode_flow_callback
+from unittest.mock import ANY, AsyncMock, Mock, patch
+
+from bson import ObjectId
+
+from mtla_bot.account_cache import AccountCache
+from mtla_bot.address_precheck import AddressPrechecks
+from mtla_bot import bot as bot_module
+from mtla_bot.admin_tools import ReportPage
+from mtla_bot.check_progress import CheckProgress, CheckStage
+from mtla_bot.bsn_cache import BsnCache
+from mtla_bot.circuit_breaker import BreakerSnapshot, BreakerState
+from mtla_bot.bot import (
+    MTLAJoinBot,
+    decode_admin_page_callback,
+    encode_admin_page_callback,
+    encode_flow_callback,
+)
+from mtla_bot.eligibility import AccountSnapshot
+from mtla_bot.finalization import FinalizationRedelivery, RedeliveryReport
+from mtla_bot.hedging import HedgePolicy
+from mtla_bot.http_pool import ConnectionStats
 from mtla_bot.messages import get_message
-from mtla_bot.user_states import UserState
+from mtla_bot.origin_pool import OriginStatus
+from mtla_bot.user_locks import UserLockRegistry
+from mtla_bot.stellar_client import StellarClient
+from mtla_bot.user_states import AsyncUserStateManager, UserState
+from test_recommendation_gateway import (
+    RECOMMENDER,
+    FakeResponse,
+    FakeSession,
+    bsn_payload,
+    bsn_url,
+    horizon_payload,
+    horizon_url,
+    make_gateway,
+)
 
 
 ADDRESS = "GBACH65OTKJL5VZCYCI4F4FTTODPEORFQQZVNF4PUK7X4AMGFXNP2KZZ"
@@ -28,11 +61,19 @@ def user(**overrides):
     return SimpleNamespace(**values)
 
 
-def account_snapshot(**overrides):
+def account_snapshot(
+    *,
+    exists: bool = True,
+    has_trustline: bool = True,
+    mtlap_balance: str = "0",
+    **overrides,
+):
     values = {
-        "exists": True,
-        "has_trustline": True,
-        "mtlap_balance": "0",
+        "account": (
+            AccountSnapshot(ADDRESS, has_trustline, Decimal(mtlap_balance), 2)
+            if exists
+            else None
+        ),
         "recommendation": {
             "has_recommendation": True,
             "has_any_recommendation": True,
@@ -71,8 +112,17 @@ class BotFlowTest(unittest.IsolatedAsyncioTestCase):
         self.bot.state_manager.transition_attempt.return_value = True
         self.bot.state_manager.update_language.return_value = True
         self.bot.stellar_client = SimpleNamespace(get_account_info=AsyncMock())
-        self.bot._user_locks = {}
-        self.bot._active_user_tasks = {}
+        self.bot._address_prechecks = AddressPrechecks(
+            lambda address: self.bot.stellar_client.get_account_info(
+                address,
+                use_cache=False,
+            )
+        )
+        self.bot._user_locks = UserLockRegistry()
+        self.bot._finalization = FinalizationRedelivery(
+            self.bot._state_call,
+            self.bot._user_locks,
+        )
         self.context = SimpleNamespace()
 
     async def test_busy_user_is_rejected_without_blocking_another_user(self) -> None:
@@ -192,6 +242,39 @@ class BotFlowTest(unittest.IsolatedAsyncioTestCase):
         with self.assertRaises(asyncio.CancelledError):
             await call
 
+    async def test_cancelled_async_state_call_waits_for_write_to_finish(self) -> None:
+        started = asyncio.Event()
+        release = asyncio.Event()
+        finished = []
+
+        async def pending_update(*_args):
+            started.set()
+            await release.wait()
+            finished.append(True)
+            return True
+
+        self.bot.state_manager = Mock(spec=AsyncUserStateManager)
+        self.bot.state_manager.begin_new_attempt.side_effect = pending_update
+        call = asyncio.create_task(
+            self.bot._state_call(
+                "begin_new_attempt",
+                42,
+                None,
+                "ru",
+                "attempt-old",
+            )
+        )
+        await started.wait()
+
+        call.cancel()
+        await asyncio.sleep(0)
+        self.assertFalse(call.done())
+
+        release.set()
+        with self.assertRaises(asyncio.CancelledError):
+            await call
+        self.assertEqual(finished, [True])
+
     async def test_no_username_prompt_offers_explicit_continue(self) -> None:
         candidate = user(state=UserState.CHECKING_USERNAME.value)
         self.bot.state_manager.get_user.return_value = candidate
@@ -281,6 +364,13 @@ class BotFlowTest(unittest.IsolatedAsyncioTestCase):
                 self.bot.state_manager.begin_new_attempt.call_args.args[3]
             ),
         )
+        self.assertTrue(
+            self.bot._address_prechecks.start(
+                42,
+                self.bot.state_manager.begin_new_attempt.call_args.args[3],
+            )
+        )
+        await self.bot._address_prechecks.close()
 
     async def test_start_stops_if_new_attempt_cannot_be_persisted(self) -> None:
         telegram_user = SimpleNamespace(
@@ -477,6 +567,32 @@ class BotFlowTest(unittest.IsolatedAsyncioTestCase):
         )
         self.bot.show_issues.assert_not_awaited()
 
+    async def test_cached_eligible_snapshot_is_confirmed_fresh(self) -> None:
+        self.bot.state_manager.get_user.return_value = user()
+        self.bot.completion_step = AsyncMock()
+        self.bot.show_issues = AsyncMock()
+        self.bot.stellar_client.get_account_info.return_value = account_snapshot(
+            recommendation={
+                "has_recommendation": False,
+                "has_any_recommendation": True,
+            },
+        )
+        update = update_for()
+
+        await self.bot.check_address_step(
+            update,
+            self.context,
+            account_info=account_snapshot(cached=True),
+        )
+
+        self.bot.stellar_client.get_account_info.assert_awaited_once_with(
+            ADDRESS,
+            use_cache=False,
+            progress=ANY,
+        )
+        self.bot.completion_step.assert_not_awaited()
+        self.bot.show_issues.assert_awaited_once()
+
     async def test_repeat_check_cannot_bypass_already_member_guard(self) -> None:
         self.bot.state_manager.get_user.return_value = user()
         self.bot.completion_step = AsyncMock()
@@ -488,6 +604,12 @@ class BotFlowTest(unittest.IsolatedAsyncioTestCase):
 
         await self.bot.handle_address_input(update, self.context)
 
+        self.bot.stellar_client.get_account_info.assert_awaited_once_with(
+            ADDRESS,
+            use_cache=False,
+            allow_stale_bsn=True,
+            progress=ANY,
+        )
         self.bot.completion_step.assert_not_awaited()
         self.bot.show_issues.assert_not_awaited()
         sent_texts = [
@@ -551,7 +673,10 @@ class BotFlowTest(unittest.IsolatedAsyncioTestCase):
 
         await self.bot.handle_address_input(update, self.context)
 
-        self.bot.stellar_client.get_account_info.assert_awaited_once_with(ADDRESS)
+        self.bot.stellar_client.get_account_info.assert_awaited_once_with(
+            ADDRESS,
+            progress=ANY,
+        )
         self.bot.check_address_step.assert_awaited_once_with(
             update,
             self.context,
@@ -559,7 +684,150 @@ class BotFlowTest(unittest.IsolatedAsyncioTestCase):
             account_info=snapshot,
             attempt_id="attempt-current",
             expected_state=UserState.ENTERING_ADDRESS.value,
+            status_message=update.message.reply_text.return_value,
+        )
+
+    async def test_eligible_address_is_read_upstream_exactly_once(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(ADDRESS),
+            FakeResponse(200, bsn_payload(ADDRESS, [RECOMMENDER])),
+        )
+        session.add(
+            horizon_url(ADDRESS),
+            FakeResponse(200, horizon_payload(ADDRESS, "0.0000000")),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "5.0000000")),
+        )
+        gateway = make_gateway(
+            session,
+            account_cache=AccountCache(),
+            bsn_cache=BsnCache(),
+        )
+        self.bot.stellar_client = StellarClient(recommendation_gateway=gateway)
+        self.bot.state_manager.get_user.return_value = user(
+            state=UserState.ENTERING_ADDRESS.value,
+            stellar_address=None,
+        )
+        self.bot.completion_step = AsyncMock()
+        update = update_for(text=ADDRESS)
+        update.message.reply_text.return_value = SimpleNamespace(
+            edit_text=AsyncMock()
+        )
+
+        await self.bot.handle_address_input(update, self.context)
+
+        self.bot.completion_step.assert_awaited_once()
+        # Every answer came from upstream, so none is confirmed a second time.
+        self.assertEqual(
+            sorted(url for url, _ in session.calls),
+            sorted([bsn_url(ADDRESS), horizon_url(ADDRESS), horizon_url(RECOMMENDER)]),
+        )
+
+    async def test_returning_address_is_prechecked_during_agreement(self) -> None:
+        self.bot._address_prechecks.remember(42, ADDRESS)
+        self.bot.state_manager.get_user.return_value = user(
+            state=UserState.CHECKING_USERNAME.value,
+        )
+        snapshot = account_snapshot()
+        snapshot["cached"] = False
+        self.bot.stellar_client.get_account_info.return_value = snapshot
+        self.bot.check_address_step = AsyncMock()
+
+        await self.bot.agreement_step(update_for(), self.context)
+        self.bot.state_manager.get_user.return_value = user(
+            state=UserState.ENTERING_ADDRESS.value,
+            stellar_address=None,
         )
+        update = update_for(text=ADDRESS)
+        await self.bot.handle_address_input(update, self.context)
+
+        self.bot.stellar_client.get_account_info.assert_awaited_once_with(
+            ADDRESS,
+            use_cache=False,
+        )
+        # Finished moments ago, so it is used as a fresh snapshot.
+        self.assertEqual(
+            self.bot.check_address_step.await_args.kwargs["account_info"],
+            snapshot,
+        )
+
+    async def test_precheck_of_another_address_is_not_used(self) -> None:
+        other = "GAQPZKOYGJDEWLYO6PBOJ4NG6HNBBNNZSOJNKUUCVJGLBQIQSO5AC26F"
+        self.bot._address_prechecks.remember(42, other)
+        self.bot._address_prechecks.start(42, "attempt-current")
+        self.bot.state_manager.get_user.return_value = user(
+            state=UserState.ENTERING_ADDRESS.value,
+            stellar_address=None,
+        )
+        self.bot.check_address_step = AsyncMock()
+
+        await self.bot.handle_address_input(update_for(text=ADDRESS), self.context)
+
+        self.bot.stellar_client.get_account_info.assert_awaited_with(
+            ADDRESS,
+            progress=ANY,
+        )
+
+    async def test_address_check_progress_edits_the_status_message(self) -> None:
+        self.bot.state_manager.get_user.return_value = user(
+            state=UserState.ENTERING_ADDRESS.value,
+            stellar_address=None,
+        )
+        update = update_for(text=ADDRESS)
+        status_message = SimpleNamespace(edit_text=AsyncMock())
+        update.message.reply_text.return_value = status_message
+        self.bot.check_address_step = AsyncMock()
+
+        async def get_account_info(_address, *, progress):
+            progress(CheckProgress(CheckStage.ACCOUNT_LOADED))
+            progress(CheckProgress(CheckStage.TRUSTLINE_MISSING))
+            await asyncio.sleep(0)
+            progress(CheckProgress(CheckStage.BSN_FETCHED, total=3))
+            progress(CheckProgress(CheckStage.RECOMMENDER_VERIFIED, 1, 3))
+            progress(CheckProgress(CheckStage.RECOMMENDER_VERIFIED, 2, 3))
+            await asyncio.sleep(0)
+            return account_snapshot(has_trustline=False)
+
+        self.bot.stellar_client.get_account_info.side_effect = get_account_info
+        with patch.object(bot_module, "CHECK_STATUS_EDIT_INTERVAL", 0):
+            await self.bot.handle_address_input(update, self.context)
+
+        edits = [call.args[0] for call in status_message.edit_text.await_args_list]
+        self.assertEqual(len(edits), 2)
+        self.assertTrue(edits[0].endswith(get_message("ru", "progress_trustline_missing")))
+        self.assertIn(get_message("ru", "progress_account_loaded"), edits[1])
+        self.assertTrue(edits[1].endswith("Проверено рекомендателей: 2 из 3"))
+
+    async def test_repeat_check_and_confirmation_edit_the_status_message(self) -> None:
+        self.bot.state_manager.get_user.return_value = user()
+        self.bot.completion_step = AsyncMock()
+        update = update_for(text=get_message("ru", "repeat_check"))
+        status_message = SimpleNamespace(edit_text=AsyncMock())
+        update.message.reply_text.return_value = status_message
+        reads = []
+
+        async def get_account_info(_address, *, progress, **kwargs):
+            reads.append(kwargs)
+            progress(CheckProgress(CheckStage.BSN_FETCHED, total=len(reads)))
+            await asyncio.sleep(0)
+            return account_snapshot(cached=len(reads) == 1)
+
+        self.bot.stellar_client.get_account_info.side_effect = get_account_info
+        with patch.object(bot_module, "CHECK_STATUS_EDIT_INTERVAL", 0):
+            await self.bot.handle_address_input(update, self.context)
+
+        self.assertEqual(
+            reads,
+            [{"use_cache": False, "allow_stale_bsn": True}, {"use_cache": False}],
+        )
+        edits = [call.args[0] for call in status_message.edit_text.await_args_list]
+        self.assertEqual(len(edits), 2)
+        self.assertTrue(edits[0].endswith("1"))
+        self.assertTrue(edits[1].endswith("2"))
+        self.bot.completion_step.assert_awaited_once()
 
     async def test_checksum_invalid_address_is_rejected_before_horizon(self) -> None:
         self.bot.state_manager.get_user.return_value = user(
@@ -803,7 +1071,8 @@ class BotFlowTest(unittest.IsolatedAsyncioTestCase):
     async def test_background_worker_redelivers_finalizing_attempt(self) -> None:
         pending = user(state=UserState.FINALIZING.value)
         self.bot.state_manager.get_finalizing_users.return_value = [pending]
-        self.bot.state_manager.get_user.return_value = pending
+        self.bot.state_manager.claim_final_deliveries.return_value = [pending]
+        self.bot.state_manager.record_final_delivery_outcomes.return_value = 1
         application = SimpleNamespace(
             bot=SimpleNamespace(
                 send_message=AsyncMock(
@@ -812,22 +1081,208 @@ class BotFlowTest(unittest.IsolatedAsyncioTestCase):
             )
         )
 
-        await self.bot._redeliver_finalizations_once(application)
+        report = await self.bot._redeliver_finalizations_once(application)
 
         application.bot.send_message.assert_awaited_once()
-        self.bot.state_manager.claim_final_delivery.assert_called_once_with(
-            42,
-            "attempt-current",
+        self.bot.state_manager.claim_final_deliveries.assert_called_once_with(
+            [(42, "attempt-current")],
             ANY,
             lease_seconds=300,
-            automatic=True,
             max_attempts=3,
         )
-        self.bot.state_manager.complete_attempt.assert_called_once_with(
-            42,
-            "attempt-current",
-            ANY,
-            888,
+        lease_id = self.bot.state_manager.claim_final_deliveries.call_args.args[1]
+        self.bot.state_manager.record_final_delivery_outcomes.assert_called_once_with(
+            lease_id,
+            [(42, "attempt-current", 888)],
+            [],
+            retry_seconds=300,
+        )
+        self.assertEqual((report.claimed, report.delivered), (1, 1))
+
+    async def test_background_worker_skips_busy_user_before_claiming(self) -> None:
+        pending = user(state=UserState.FINALIZING.value)
+        self.bot.state_manager.get_finalizing_users.return_value = [pending]
+        application = SimpleNamespace(bot=SimpleNamespace(send_message=AsyncMock()))
+
+        async with self.bot._user_locks.hold(42):
+            report = await self.bot._redeliver_finalizations_once(application)
+
+        self.bot.state_manager.claim_final_deliveries.assert_not_called()
+        application.bot.send_message.assert_not_awaited()
+        self.assertEqual(report.claimed, 0)
+
+    async def test_change_event_wakes_finalization_loop_before_poll(self) -> None:
+        changes = asyncio.Queue()
+
+        class Stream:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *_exc_info):
+                return None
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                return await changes.get()
+
+        self.bot.state_manager = Mock(spec=AsyncUserStateManager)
+        self.bot.state_manager.watch_finalizations = AsyncMock(return_value=Stream())
+        passes = asyncio.Queue()
+
+        async def redeliver(_application):
+            passes.put_nowait(True)
+            return RedeliveryReport(0, 0, 0, 0, 100)
+
+        self.bot._redeliver_finalizations_once = redeliver
+        loop = asyncio.create_task(self.bot._finalization_loop(SimpleNamespace()))
+        try:
+            # Startup pass, then the catch-up pass once the stream opens.
+            for _ in range(2):
+                await asyncio.wait_for(passes.get(), 1)
+            changes.put_nowait({"fullDocument": {"user_id": 42}})
+            await asyncio.wait_for(passes.get(), 1)
+        finally:
+            loop.cancel()
+            await asyncio.gather(loop, return_exceptions=True)
+
+
+class AdminPagingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.bot = MTLAJoinBot.__new__(MTLAJoinBot)
+        self.bot.admin_tools = Mock()
+        self.bot.is_admin = lambda user_id: user_id == 1
+        self.cursor = (datetime(2026, 1, 2, 3, 4, 5, 678000), ObjectId())
+
+    def callback(self, user_id: int, data: str):
+        return SimpleNamespace(
+            callback_query=SimpleNamespace(
+                from_user=SimpleNamespace(id=user_id),
+                data=data,
+                answer=AsyncMock(),
+                edit_message_text=AsyncMock(),
+                message=SimpleNamespace(reply_text=AsyncMock()),
+            )
+        )
+
+    def test_page_callbacks_fit_telegram_limit_and_round_trip(self) -> None:
+        incomplete = encode_admin_page_callback("inc", self.cursor)
+        reminders = encode_admin_page_callback("rem", self.cursor, 9999)
+
+        self.assertLessEqual(len(reminders.encode()), 64)
+        self.assertEqual(
+            decode_admin_page_callback(incomplete),
+            ("inc", None, self.cursor),
+        )
+        self.assertEqual(
+            decode_admin_page_callback(reminders),
+            ("rem", 9999, self.cursor),
+        )
+        self.assertIsNone(decode_admin_page_callback("admin:rem:x:1:2"))
+        self.assertIsNone(decode_admin_page_callback(encode_flow_callback("a", "b")))
+
+    async def test_incomplete_command_offers_next_page(self) -> None:
+        self.bot.admin_tools.get_incomplete_users_report.return_value = ReportPage(
+            "page one",
+            self.cursor,
+        )
+        update = SimpleNamespace(
+            effective_user=SimpleNamespace(id=1),
+            message=SimpleNamespace(reply_text=AsyncMock()),
+        )
+
+        await self.bot.incomplete(update, SimpleNamespace())
+
+        markup = update.message.reply_text.await_args.kwargs["reply_markup"]
+        button = markup.inline_keyboard[0][0]
+        self.assertEqual(
+            decode_admin_page_callback(button.callback_data),
+            ("inc", None, self.cursor),
+        )
+
+    async def test_next_page_edits_report_in_place(self) -> None:
+        self.bot.admin_tools.get_reminder_candidates.return_value = ReportPage(
+            "last page",
+        )
+        update = self.callback(1, encode_admin_page_callback("rem", self.cursor, 3))
+
+        await self.bot.admin_page(update, SimpleNamespace())
+
+        self.bot.admin_tools.get_reminder_candidates.assert_called_once_with(
+            3,
+            self.cursor,
+        )
+        update.callback_query.edit_message_text.assert_awaited_once_with(
+            "last page",
+            reply_markup=None,
+        )
+
+    async def test_next_page_requires_admin(self) -> None:
+        update = self.callback(2, encode_admin_page_callback("inc", self.cursor))
+
+        await self.bot.admin_page(update, SimpleNamespace())
+
+        self.bot.admin_tools.get_incomplete_users_report.assert_not_called()
+        update.callback_query.edit_message_text.assert_not_awaited()
+
+
+class UpstreamStatusCommandTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.bot = MTLAJoinBot.__new__(MTLAJoinBot)
+        self.bot.is_admin = lambda user_id: user_id == 1
+        self.bot.stellar_client = Mock()
+        self.bot.stellar_client.upstream_status.return_value = {
+            "bsn": {
+                "breaker": BreakerSnapshot(BreakerState.OPEN, 6, 0.5, 12.4),
+                "connections": ConnectionStats(requests=6, created=2, reused=4),
+            },
+            "horizon": {
+                "breaker": BreakerSnapshot(BreakerState.CLOSED, 20, 0.0, 0.0),
+                "connections": ConnectionStats(requests=40, created=2, reused=38),
+                "window": 6,
+                "hedging": HedgePolicy(initial_delay=0.3),
+                "origins": [
+                    OriginStatus("https://horizon.stellar.org", 0.08, 1, 0, True),
+                    OriginStatus("https://horizon.example", None, 0, 2, False),
+                ],
+            },
+        }
+
+    def command(self, user_id: int):
+        return SimpleNamespace(
+            effective_user=SimpleNamespace(id=user_id),
+            message=SimpleNamespace(reply_text=AsyncMock()),
+        )
+
+    async def test_reports_breaker_state_and_connections(self) -> None:
+        update = self.command(1)
+
+        await self.bot.upstreams(update, SimpleNamespace())
+
+        text = update.message.reply_text.await_args.args[0]
+        self.assertIn("bsn: open, ошибок 50% из 6 запросов, проба через 12 с", text)
+        self.assertIn("horizon: closed, ошибок 0% из 20 запросов", text)
+        self.assertIn("повторно использовано 38", text)
+        self.assertIn("окно параллельных запросов: 6", text)
+        self.assertIn("хеджирование через 300 мс, повторов 0 из 0", text)
+        self.assertIn(
+            "https://horizon.stellar.org: доступен, 80 мс, ошибок подряд 0",
+            text,
+        )
+        self.assertIn(
+            "https://horizon.example: пропускается, нет замеров, ошибок подряд 2",
+            text,
+        )
+
+    async def test_requires_admin(self) -> None:
+        update = self.command(2)
+
+        await self.bot.upstreams(update, SimpleNamespace())
+
+        self.bot.stellar_client.upstream_status.assert_not_called()
+        update.message.reply_text.assert_awaited_once_with(
+            "❌ У вас нет доступа к этой команде"
         )
 
 
@@ -0,0 +1,65 @@
+import unittest
+
+from mtla_bot.bsn_cache import BsnCache
+
+from fakes import FakeClock
+
+
+CANDIDATE = "GBACH65OTKJL5VZCYCI4F4FTTODPEORFQQZVNF4PUK7X4AMGFXNP2KZZ"
+RECOMMENDER = "GAQPZKOYGJDEWLYO6PBOJ4NG6HNBBNNZSOJNKUUCVJGLBQIQSO5AC26F"
+SECOND_CANDIDATE = "GBJQKGNVJHCT3DQUZT6RQ5MSTVMTUY4VFCBAKMYA7BK74LHXAXVQJQDC"
+
+
+class BsnCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock(1000.0)
+        self.cache = BsnCache(ttl=60, stale_ttl=300, clock=self.clock)
+
+    def test_entry_is_fresh_then_stale_then_gone(self) -> None:
+        self.cache.store(CANDIDATE, (RECOMMENDER,), etag='"v1"', last_modified=None)
+
+        self.assertTrue(self.cache.is_fresh(self.cache.get(CANDIDATE)))
+        self.clock.now += 60
+        entry = self.cache.get(CANDIDATE)
+        self.assertEqual(entry.recommenders, (RECOMMENDER,))
+        self.assertFalse(self.cache.is_fresh(entry))
+        self.clock.now += 300
+        self.assertIsNone(self.cache.get(CANDIDATE))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_not_modified_restarts_the_lifetime(self) -> None:
+        entry = self.cache.store(CANDIDATE, (), etag=None, last_modified="Mon")
+        self.clock.now += 100
+
+        refreshed = self.cache.touch(CANDIDATE, entry)
+
+        self.assertTrue(self.cache.is_fresh(refreshed))
+        self.assertEqual(refreshed.last_modified, "Mon")
+
+    def test_conditional_headers_use_both_validators(self) -> None:
+        entry = self.cache.store(
+            CANDIDATE,
+            (),
+            etag='W/"abc"',
+            last_modified="Wed, 21 Oct 2026 07:28:00 GMT",
+        )
+
+        self.assertEqual(
+            entry.conditional_headers(),
+            {
+                "If-None-Match": 'W/"abc"',
+                "If-Modified-Since": "Wed, 21 Oct 2026 07:28:00 GMT",
+            },
+        )
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        cache = BsnCache(max_size=1, clock=self.clock)
+        cache.store(CANDIDATE, (), etag=None, last_modified=None)
+        cache.store(SECOND_CANDIDATE, (), etag=None, last_modified=None)
+
+        self.assertIsNone(cache.get(CANDIDATE))
+        self.assertIsNotNone(cache.get(SECOND_CANDIDATE))
+
+
+if __name__ == "__main__":
+    unittest.main()
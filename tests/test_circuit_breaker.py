@@ -0,0 +1,91 @@
+import unittest
+
+from mtla_bot.circuit_breaker import BreakerState, CircuitBreaker
+
+from fakes import FakeClock
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def make(self, clock: FakeClock, **kwargs) -> CircuitBreaker:
+        options = {
+            "window": 4,
+            "min_calls": 4,
+            "failure_rate": 0.5,
+            "open_seconds": 30.0,
+        }
+        options.update(kwargs)
+        return CircuitBreaker(clock=clock, **options)
+
+    def test_opens_only_after_enough_calls_reach_the_failure_rate(self) -> None:
+        breaker = self.make(FakeClock(100.0))
+
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        self.assertIs(breaker.state, BreakerState.CLOSED)
+
+        breaker.record_failure()
+        self.assertIs(breaker.state, BreakerState.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_successes_keep_the_circuit_closed(self) -> None:
+        breaker = self.make(FakeClock(100.0))
+
+        for _ in range(10):
+            breaker.record_success()
+            breaker.record_success()
+            breaker.record_failure()
+            breaker.record_success()
+
+        self.assertIs(breaker.state, BreakerState.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_half_open_admits_one_probe_that_decides_the_state(self) -> None:
+        clock = FakeClock(100.0)
+        breaker = self.make(clock, min_calls=1)
+        breaker.record_failure()
+
+        clock.now += 29.0
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.snapshot().retry_in, 1.0)
+
+        clock.now += 1.0
+        self.assertTrue(breaker.allow())
+        self.assertIs(breaker.state, BreakerState.HALF_OPEN)
+        self.assertFalse(breaker.allow())
+
+        breaker.record_failure()
+        self.assertIs(breaker.state, BreakerState.OPEN)
+
+        clock.now += 30.0
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertIs(breaker.state, BreakerState.CLOSED)
+        self.assertEqual(breaker.snapshot().calls, 0)
+
+    def test_abandoned_probe_frees_the_half_open_slot(self) -> None:
+        clock = FakeClock(100.0)
+        breaker = self.make(clock, min_calls=1)
+        breaker.record_failure()
+        clock.now += 30.0
+
+        self.assertTrue(breaker.allow())
+        breaker.record_abandoned()
+
+        self.assertIs(breaker.state, BreakerState.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+
+    def test_rejects_invalid_settings(self) -> None:
+        for kwargs in (
+            {"min_calls": 0},
+            {"min_calls": 5},
+            {"failure_rate": 0},
+            {"open_seconds": 0},
+        ):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    self.make(FakeClock(100.0), **kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -78,6 +78,163 @@ class ConfigurationValidationTest(unittest.TestCase):
         ):
             self.validate(network="mainnet")
 
+    def test_webhook_mode_requires_https_url_and_valid_secret(self) -> None:
+        valid = {
+            "TELEGRAM_MODE": "webhook",
+            "WEBHOOK_URL": "https://bot.example/telegram",
+            "WEBHOOK_SECRET_TOKEN": "webhook_secret-1",
+            "WEBHOOK_PORT": "8443",
+        }
+        with patch.multiple(config, **valid):
+            self.validate()
+
+        invalid = (
+            ("WEBHOOK_URL", None),
+            ("WEBHOOK_URL", "http://bot.example/telegram"),
+            ("WEBHOOK_SECRET_TOKEN", None),
+            ("WEBHOOK_SECRET_TOKEN", "has space"),
+            ("WEBHOOK_SECRET_TOKEN", "x" * 257),
+            ("WEBHOOK_PORT", "not-a-port"),
+            ("WEBHOOK_PORT", "70000"),
+        )
+        for key, value in invalid:
+            with self.subTest(key=key):
+                with patch.multiple(config, **{**valid, key: value}):
+                    with self.assertRaisesRegex(config.ConfigurationError, key):
+                        self.validate()
+
+    def test_unknown_telegram_mode_is_rejected(self) -> None:
+        with patch.object(config, "TELEGRAM_MODE", "push"):
+            with self.assertRaisesRegex(
+                config.ConfigurationError,
+                "TELEGRAM_MODE",
+            ):
+                self.validate()
+
+    def test_update_pool_sizes_are_validated(self) -> None:
+        with patch.multiple(
+            config,
+            UPDATE_SLOW_CONCURRENCY="4",
+            UPDATE_FAST_CONCURRENCY="12",
+        ):
+            self.validate()
+            self.assertEqual(config.get_update_concurrency(), (4, 12))
+
+        for key in ("UPDATE_SLOW_CONCURRENCY", "UPDATE_FAST_CONCURRENCY"):
+            for value in ("0", "65", "eight", None):
+                with self.subTest(key=key, value=value):
+                    with patch.object(config, key, value):
+                        with self.assertRaisesRegex(
+                            config.ConfigurationError,
+                            key,
+                        ):
+                            self.validate()
+
+    def test_upstream_pool_settings_are_validated(self) -> None:
+        with patch.multiple(config, HORIZON_POOL_SIZE="16", BSN_POOL_SIZE="2"):
+            self.validate()
+            pools = config.get_upstream_pools()
+        self.assertEqual(pools["horizon"].limit, 16)
+        self.assertEqual(pools["bsn"].limit, 2)
+        self.assertEqual(pools["horizon"].warm_connections, 2)
+
+        for key, value in (
+            ("HORIZON_POOL_SIZE", "0"),
+            ("BSN_POOL_SIZE", "many"),
+            ("HTTP_KEEPALIVE_SECONDS", "nan"),
+            ("HTTP_DNS_CACHE_SECONDS", "-1"),
+        ):
+            with self.subTest(key=key):
+                with patch.object(config, key, value):
+                    with self.assertRaisesRegex(config.ConfigurationError, key):
+                        self.validate()
+
+    def test_horizon_concurrency_bounds_are_validated(self) -> None:
+        with patch.multiple(
+            config,
+            HORIZON_POOL_SIZE="32",
+            HORIZON_CONCURRENCY_FLOOR="2",
+            HORIZON_CONCURRENCY_CEILING="32",
+        ):
+            self.validate()
+            self.assertEqual(config.get_horizon_concurrency(), (2, 32))
+
+        for key, overrides in (
+            ("HORIZON_CONCURRENCY_FLOOR", {"HORIZON_CONCURRENCY_FLOOR": "0"}),
+            ("HORIZON_CONCURRENCY_FLOOR", {"HORIZON_CONCURRENCY_FLOOR": "9"}),
+            ("HORIZON_CONCURRENCY_CEILING", {"HORIZON_CONCURRENCY_CEILING": "9"}),
+        ):
+            with self.subTest(**overrides):
+                with patch.multiple(config, **overrides):
+                    with self.assertRaisesRegex(config.ConfigurationError, key):
+                        self.validate()
+
+    def test_horizon_hedging_settings_are_validated(self) -> None:
+        with patch.multiple(
+            config,
+            HORIZON_HEDGE_PERCENTILE="0.9",
+            HORIZON_HEDGE_BUDGET="0.1",
+        ):
+            self.validate()
+            self.assertEqual(config.get_horizon_hedging(), (0.9, 0.1))
+        with patch.object(config, "HORIZON_HEDGE_BUDGET", "0"):
+            self.assertIsNone(config.get_horizon_hedging())
+
+        for key, value in (
+            ("HORIZON_HEDGE_PERCENTILE", "1"),
+            ("HORIZON_HEDGE_PERCENTILE", "p95"),
+            ("HORIZON_HEDGE_BUDGET", "0.9"),
+        ):
+            with self.subTest(key=key, value=value):
+                with patch.object(config, key, value):
+                    with self.assertRaisesRegex(config.ConfigurationError, key):
+                        self.validate()
+
+    def test_extra_horizon_urls_are_validated(self) -> None:
+        with patch.object(
+            config,
+            "HORIZON_EXTRA_URLS",
+            " https://horizon.example , https://horizon2.example,",
+        ):
+            self.validate()
+            self.assertEqual(
+                config.get_extra_horizon_urls(),
+                ("https://horizon.example", "https://horizon2.example"),
+            )
+
+        for value in (
+            "http://horizon.example",
+            "https://horizon.example,https://horizon.example",
+            None,
+        ):
+            with self.subTest(value=value):
+                with patch.object(config, "HORIZON_EXTRA_URLS", value):
+                    with self.assertRaisesRegex(
+                        config.ConfigurationError,
+                        "HORIZON_EXTRA_URLS",
+                    ):
+                        self.validate()
+
+    def test_upstream_breaker_settings_are_validated(self) -> None:
+        with patch.multiple(
+            config,
+            UPSTREAM_BREAKER_FAILURE_RATE="0.25",
+            UPSTREAM_BREAKER_OPEN_SECONDS="45",
+        ):
+            self.validate()
+            self.assertEqual(config.get_upstream_breaker(), (0.25, 45.0))
+
+        for key, value in (
+            ("UPSTREAM_BREAKER_FAILURE_RATE", "0"),
+            ("UPSTREAM_BREAKER_FAILURE_RATE", "1.5"),
+            ("UPSTREAM_BREAKER_OPEN_SECONDS", "nan"),
+            ("UPSTREAM_BREAKER_OPEN_SECONDS", "soon"),
+        ):
+            with self.subTest(key=key, value=value):
+                with patch.object(config, key, value):
+                    with self.assertRaisesRegex(config.ConfigurationError, key):
+                        self.validate()
+
     def test_default_agreement_links_follow_interface_language(self) -> None:
         self.assertEqual(
             config.DEFAULT_AGREEMENT_LINK_RU,
@@ -181,7 +338,10 @@ class TlsAndContainerGuardTest(unittest.TestCase):
         self.assertIn("drop_pending_updates=False", bot_source)
         self.assertIn(".post_init(self._post_init)", bot_source)
         self.assertIn(".post_shutdown(self._post_shutdown)", bot_source)
-        self.assertIn(".concurrent_updates(8)", bot_source)
+        self.assertIn(
+            ".concurrent_updates(self._build_update_processor())",
+            bot_source,
+        )
 
 
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
+from datetime import datetime
 from types import SimpleNamespace
 import unittest
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock, patch
 
+from bson import ObjectId
+
+from mtla_bot.async_database import AsyncDatabaseManager
 from mtla_bot.database import DatabaseManager, DatabaseOperationError
 
 
@@ -236,6 +240,357 @@ class DatabaseAtomicityTest(unittest.TestCase):
         cursor.sort.assert_called_once_with("last_activity", 1)
         cursor.limit.assert_called_once_with(20)
 
+    def test_incomplete_users_are_read_in_projected_keyset_pages(self) -> None:
+        cursor = Mock()
+        cursor.sort.return_value = cursor
+        cursor.limit.return_value = iter([{"user_id": 42}])
+        self.database.collection.find.return_value = cursor
+        after = (datetime(2026, 1, 1), ObjectId("0" * 23 + "1"))
+
+        result = self.database.get_incomplete_users(21, after)
+
+        self.assertEqual(result, [{"user_id": 42}])
+        query, projection = self.database.collection.find.call_args.args
+        self.assertEqual(query["$and"][0], {"state": {"$ne": "completed"}})
+        self.assertEqual(
+            query["$and"][1]["$or"],
+            [
+                {"last_activity": {"$gt": after[0]}},
+                {"last_activity": after[0], "_id": {"$gt": after[1]}},
+            ],
+        )
+        self.assertNotIn("progress", projection)
+        self.assertEqual(projection["last_activity"], 1)
+        cursor.sort.assert_called_once_with([("last_activity", 1), ("_id", 1)])
+        cursor.limit.assert_called_once_with(21)
+
+    def test_reminder_count_is_a_separate_server_side_count(self) -> None:
+        self.database.collection.count_documents.return_value = 12
+
+        self.assertEqual(self.database.count_users_for_reminder(3), 12)
+
+        query = self.database.collection.count_documents.call_args.args[0]
+        self.assertEqual(query["state"], {"$ne": "completed"})
+        self.assertIn("$lt", query["last_activity"])
+        self.database.collection.find.assert_not_called()
+
+    def test_admin_page_size_is_bounded(self) -> None:
+        with self.assertRaises(DatabaseOperationError):
+            self.database.get_incomplete_users(0)
+
+    def test_statistics_come_from_one_facet_aggregation(self) -> None:
+        self.database.collection.aggregate.return_value = iter([{
+            "states": [
+                {"_id": "completed", "count": 3},
+                {"_id": "agreement", "count": 5},
+            ],
+            "active": [{"count": 2}],
+        }])
+
+        stats = self.database.get_user_statistics()
+
+        self.assertEqual(
+            stats,
+            {
+                "total_users": 8,
+                "completed_users": 3,
+                "active_users": 2,
+                "state_distribution": {"completed": 3, "agreement": 5},
+            },
+        )
+        self.database.collection.count_documents.assert_not_called()
+        self.database.collection.aggregate.assert_called_once()
+        pipeline = self.database.collection.aggregate.call_args.args[0]
+        self.assertEqual(set(pipeline[-1]["$facet"]), {"states", "active"})
+
+    def test_statistics_of_empty_collection(self) -> None:
+        self.database.collection.aggregate.return_value = iter([
+            {"states": [], "active": []}
+        ])
+
+        stats = self.database.get_user_statistics()
+
+        self.assertEqual(stats["total_users"], 0)
+        self.assertEqual(stats["completed_users"], 0)
+        self.assertEqual(stats["active_users"], 0)
+
+    def test_batch_claim_is_one_conditional_update_many(self) -> None:
+        self.database.collection.find.return_value = [{"user_id": 42}]
+
+        claimed = self.database.claim_final_deliveries(
+            [(42, "attempt-a"), (43, "attempt-b")],
+            "lease-batch",
+            lease_seconds=300,
+            max_attempts=3,
+        )
+
+        self.assertEqual(claimed, [{"user_id": 42}])
+        self.database.collection.update_many.assert_called_once()
+        query, update = self.database.collection.update_many.call_args.args
+        self.assertEqual(
+            query["$or"],
+            [
+                {"user_id": 42, "attempt_id": "attempt-a"},
+                {"user_id": 43, "attempt_id": "attempt-b"},
+            ],
+        )
+        self.assertEqual(query["state"], "finalizing")
+        self.assertTrue(query["agreed_to_terms"])
+        self.assertEqual(query["candidate_mtlap_balance"], "0")
+        self.assertIn("final_delivery_attempts", str(query["$and"]))
+        self.assertIn("final_delivery_lease_until", str(query["$and"]))
+        self.assertEqual(update["$inc"], {"final_delivery_attempts": 1})
+        self.assertEqual(update["$set"]["final_delivery_lease_id"], "lease-batch")
+        self.assertEqual(
+            self.database.collection.find.call_args.args[0],
+            {
+                "user_id": {"$in": [42, 43]},
+                "final_delivery_lease_id": "lease-batch",
+            },
+        )
+
+    def test_empty_batch_claim_does_not_touch_storage(self) -> None:
+        self.assertEqual(
+            self.database.claim_final_deliveries(
+                [],
+                "lease-batch",
+                lease_seconds=300,
+                max_attempts=3,
+            ),
+            [],
+        )
+        self.database.collection.update_many.assert_not_called()
+
+    def test_batch_outcomes_are_one_unordered_bulk_write(self) -> None:
+        self.database.collection.bulk_write.return_value = SimpleNamespace(
+            matched_count=2,
+        )
+
+        matched = self.database.record_final_delivery_outcomes(
+            "lease-batch",
+            [(42, "attempt-a", 888)],
+            [(43, "attempt-b", "telegram_send_failed")],
+            retry_seconds=300,
+        )
+
+        self.assertEqual(matched, 2)
+        operations = self.database.collection.bulk_write.call_args.args[0]
+        self.assertEqual(
+            self.database.collection.bulk_write.call_args.kwargs,
+            {"ordered": False},
+        )
+        completion, deferral = (operation._doc for operation in operations)
+        completion_filter = operations[0]._filter
+        self.assertEqual(completion_filter["final_delivery_lease_id"], "lease-batch")
+        self.assertEqual(completion_filter["attempt_id"], "attempt-a")
+        self.assertTrue(completion_filter["has_recommendation"])
+        self.assertEqual(completion["$set"]["state"], "completed")
+        self.assertEqual(completion["$set"]["final_delivery_message_id"], 888)
+        self.assertEqual(operations[1]._filter["state"], "finalizing")
+        self.assertEqual(
+            deferral["$set"]["final_delivery_last_error"],
+            "telegram_send_failed",
+        )
+
+
+class AsyncDatabaseAtomicityTest(unittest.IsolatedAsyncioTestCase):
+    """The native async backend must send the same conditional writes."""
+
+    def setUp(self) -> None:
+        self.sync_database = DatabaseManager.__new__(DatabaseManager)
+        self.sync_database.collection = Mock()
+        self.sync_database.collection.update_one.return_value = SimpleNamespace(
+            matched_count=1,
+        )
+        self.database = AsyncDatabaseManager()
+        self.database.collection = Mock()
+        self.database.collection.update_one = AsyncMock(
+            return_value=SimpleNamespace(matched_count=1),
+        )
+
+    async def assert_same_update(self, method_name: str, *args, **kwargs) -> None:
+        with patch("mtla_bot.database.datetime") as clock:
+            clock.utcnow.return_value = datetime(2026, 1, 1)
+            self.assertTrue(
+                getattr(self.sync_database, method_name)(*args, **kwargs)
+            )
+            self.assertTrue(
+                await getattr(self.database, method_name)(*args, **kwargs)
+            )
+
+        self.assertEqual(
+            self.database.collection.update_one.await_args.args,
+            self.sync_database.collection.update_one.call_args.args,
+        )
+
+    async def test_conditional_writes_match_threaded_backend(self) -> None:
+        cases = (
+            ("begin_new_attempt", (42, None, "ru", "attempt-new"), {}),
+            (
+                "record_eligibility_snapshot",
+                (
+                    42,
+                    "attempt-current",
+                    "entering_address",
+                    "G" + "A" * 55,
+                    True,
+                    "0",
+                    True,
+                    "checking_address",
+                ),
+                {},
+            ),
+            ("complete_attempt", (42, "attempt-current", "lease-current"), {}),
+            (
+                "claim_final_delivery",
+                (42, "attempt-current", "lease-current"),
+                {"lease_seconds": 300, "automatic": True, "max_attempts": 3},
+            ),
+            (
+                "defer_final_delivery",
+                (42, "attempt-current", "lease-current"),
+                {"retry_seconds": 300, "error_code": "telegram_send_failed"},
+            ),
+        )
+
+        for method_name, args, kwargs in cases:
+            with self.subTest(method=method_name):
+                await self.assert_same_update(method_name, *args, **kwargs)
+
+    async def test_phase_transition_is_conditional_on_attempt_and_state(self) -> None:
+        result = await self.database.transition_attempt(
+            42,
+            "attempt-current",
+            "agreement",
+            "entering_address",
+            {"agreed_to_terms": True},
+        )
+
+        self.assertTrue(result)
+        query, update = self.database.collection.update_one.await_args.args
+        self.assertEqual(
+            query,
+            {
+                "user_id": 42,
+                "attempt_id": "attempt-current",
+                "state": "agreement",
+            },
+        )
+        self.assertEqual(update["$set"]["state"], "entering_address")
+
+    async def test_stale_snapshot_is_rejected(self) -> None:
+        self.database.collection.update_one.return_value = SimpleNamespace(
+            matched_count=0,
+        )
+
+        result = await self.database.complete_attempt(
+            42,
+            "attempt-old",
+            "lease-old",
+        )
+
+        self.assertFalse(result)
+
+    async def test_database_read_failure_is_not_reported_as_missing_user(self) -> None:
+        self.database.collection.find_one = AsyncMock(
+            side_effect=RuntimeError("mongo down"),
+        )
+
+        with self.assertRaisesRegex(
+            DatabaseOperationError,
+            "database_read_failed",
+        ):
+            await self.database.get_user(42)
+
+    async def test_finalization_redelivery_query_is_bounded_and_oldest_first(self) -> None:
+        cursor = Mock()
+        cursor.sort.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.to_list = AsyncMock(return_value=[{"user_id": 42}])
+        self.database.collection.find.return_value = cursor
+
+        result = await self.database.get_finalizing_users(20, 3)
+
+        self.assertEqual(result, [{"user_id": 42}])
+        query = self.database.collection.find.call_args.args[0]
+        self.assertEqual(query["state"], "finalizing")
+        self.assertIn("final_delivery_attempts", str(query["$and"]))
+        cursor.sort.assert_called_once_with("last_activity", 1)
+        cursor.limit.assert_called_once_with(20)
+
+    async def test_statistics_use_the_same_single_aggregation(self) -> None:
+        cursor = Mock()
+        cursor.to_list = AsyncMock(return_value=[{
+            "states": [{"_id": "completed", "count": 1}],
+            "active": [],
+        }])
+        self.database.collection.aggregate = AsyncMock(return_value=cursor)
+        self.database.collection.count_documents = AsyncMock()
+
+        stats = await self.database.get_user_statistics()
+
+        self.assertEqual(stats["total_users"], 1)
+        self.assertEqual(stats["active_users"], 0)
+        self.database.collection.count_documents.assert_not_awaited()
+        self.database.collection.aggregate.assert_awaited_once()
+
+    async def test_holder_index_snapshot_is_keyed_by_asset_and_threshold(self) -> None:
+        self.sync_database.holder_index_collection = Mock()
+        self.database.holder_index_collection = Mock()
+        self.database.holder_index_collection.find_one = AsyncMock(return_value=None)
+        self.database.holder_index_collection.replace_one = AsyncMock()
+
+        self.assertIsNone(await self.database.get_holder_index("MTLAP:G", "2"))
+        await self.database.save_holder_index("MTLAP:G", "2", b"\x01" * 32, 1)
+        self.sync_database.save_holder_index("MTLAP:G", "2", b"\x01" * 32, 1)
+
+        self.assertEqual(
+            self.database.holder_index_collection.find_one.await_args.args[0],
+            {"_id": "MTLAP:G", "minimum_balance": "2"},
+        )
+        for collection in (
+            self.database.holder_index_collection,
+            self.sync_database.holder_index_collection,
+        ):
+            query, document = collection.replace_one.call_args.args
+            self.assertEqual(query, {"_id": "MTLAP:G"})
+            self.assertEqual(document["keys"], b"\x01" * 32)
+            self.assertEqual(document["count"], 1)
+            self.assertEqual(collection.replace_one.call_args.kwargs, {"upsert": True})
+
+    async def test_holder_index_write_failure_is_typed(self) -> None:
+        self.database.holder_index_collection = Mock()
+        self.database.holder_index_collection.replace_one = AsyncMock(
+            side_effect=RuntimeError("down"),
+        )
+
+        with self.assertLogs("mtla_bot.async_database", level="ERROR"):
+            with self.assertRaises(DatabaseOperationError) as raised:
+                await self.database.save_holder_index("MTLAP:G", "2", b"", 0)
+
+        self.assertEqual(str(raised.exception), "database_write_failed")
+
+    async def test_finalization_watch_follows_finalizing_documents(self) -> None:
+        stream = object()
+        self.database.collection.watch = AsyncMock(return_value=stream)
+
+        self.assertIs(await self.database.watch_finalizations(), stream)
+
+        pipeline = self.database.collection.watch.await_args.args[0]
+        self.assertEqual(pipeline[0]["$match"]["fullDocument.state"], "finalizing")
+        self.assertEqual(
+            pipeline[0]["$match"]["operationType"],
+            {"$in": ["insert", "update", "replace"]},
+        )
+        self.assertIn(
+            "fullDocument.final_delivery_lease_until",
+            pipeline[1]["$project"],
+        )
+        self.assertEqual(
+            self.database.collection.watch.await_args.kwargs,
+            {"full_document": "updateLookup"},
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,8 @@
+from decimal import Decimal
 import unittest
 
 from mtla_bot.eligibility import (
+    AccountSnapshot,
     EligibilityBlocker,
     EligibilityStatus,
     evaluate_eligibility,
@@ -8,11 +10,22 @@ from mtla_bot.eligibility import (
 )
 
 
-def account_snapshot(**overrides):
+ADDRESS = "G" + "A" * 55
+
+
+def account_snapshot(
+    *,
+    exists: bool = True,
+    has_trustline: bool = True,
+    mtlap_balance: str = "0",
+    **overrides,
+):
     snapshot = {
-        "exists": True,
-        "has_trustline": True,
-        "mtlap_balance": "0",
+        "account": (
+            AccountSnapshot(ADDRESS, has_trustline, Decimal(mtlap_balance), 2)
+            if exists
+            else None
+        ),
         "recommendation": {
             "has_recommendation": True,
             "has_any_recommendation": True,
@@ -118,19 +131,18 @@ class EligibilityRulesTest(unittest.TestCase):
             EligibilityStatus.TEMPORARILY_UNAVAILABLE,
         )
 
-    def test_invalid_balance_is_a_temporary_data_error(self) -> None:
-        for balance in ("not-a-number", "NaN", "Infinity", "-0.0000001"):
-            with self.subTest(balance=balance):
-                decision = evaluate_eligibility(
-                    agreed_to_terms=True,
-                    stellar_address="G" + "A" * 55,
-                    account_info=account_snapshot(mtlap_balance=balance),
-                )
-
-                self.assertEqual(
-                    decision.status,
-                    EligibilityStatus.TEMPORARILY_UNAVAILABLE,
-                )
+    def test_malformed_account_is_a_temporary_data_error(self) -> None:
+        decision = evaluate_eligibility(
+            agreed_to_terms=True,
+            stellar_address="G" + "A" * 55,
+            account_info=account_snapshot(account={"mtlap_balance": "NaN"}),
+        )
+
+        self.assertEqual(
+            decision.status,
+            EligibilityStatus.TEMPORARILY_UNAVAILABLE,
+        )
+        self.assertEqual(decision.technical_error, "invalid_account_data")
 
     def test_all_missing_requirements_are_reported_together(self) -> None:
         decision = evaluate_eligibility(
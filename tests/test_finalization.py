@@ -0,0 +1,374 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import unittest
+
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from mtla_bot.finalization import (
+    FinalizationChangeFeed,
+    FinalizationRedelivery,
+    FinalizationWakeups,
+    TokenBucket,
+)
+from mtla_bot.user_locks import UserLockRegistry
+
+from fakes import FakeClock
+
+
+ADDRESS = "GBACH65OTKJL5VZCYCI4F4FTTODPEORFQQZVNF4PUK7X4AMGFXNP2KZZ"
+
+
+def pending(user_id: int):
+    return SimpleNamespace(
+        user_id=user_id,
+        attempt_id=f"attempt-{user_id}",
+        stellar_address=ADDRESS,
+    )
+
+
+class FakeState:
+    """Records the storage calls made by one redelivery pass."""
+
+    def __init__(self, users) -> None:
+        self.users = users
+        self.calls = []
+
+    async def __call__(self, method_name, *args, **kwargs):
+        self.calls.append((method_name, args, kwargs))
+        if method_name == "get_finalizing_users":
+            return self.users
+        if method_name == "claim_final_deliveries":
+            candidates = set(args[0])
+            return [
+                user
+                for user in self.users
+                if (user.user_id, user.attempt_id) in candidates
+            ]
+        if method_name == "record_final_delivery_outcomes":
+            return len(args[1]) + len(args[2])
+        raise AssertionError(method_name)
+
+    def methods(self):
+        return [name for name, _args, _kwargs in self.calls]
+
+
+class TokenBucketTest(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_then_steady_rate(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=3, clock=clock, sleep=clock.sleep)
+
+        for _ in range(5):
+            await bucket.acquire()
+
+        self.assertEqual(len(clock.sleeps), 2)
+        self.assertAlmostEqual(clock.now, 0.2)
+
+    def test_rejects_invalid_limits(self) -> None:
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+        with self.assertRaises(ValueError):
+            TokenBucket(capacity=0)
+
+
+class FinalizationRedeliveryTest(unittest.IsolatedAsyncioTestCase):
+    def make_engine(self, state, locks=None, **kwargs):
+        clock = FakeClock()
+        return FinalizationRedelivery(
+            state,
+            UserLockRegistry() if locks is None else locks,
+            rate_limiter=TokenBucket(
+                rate=1000,
+                capacity=1000,
+                clock=clock,
+                sleep=clock.sleep,
+            ),
+            **kwargs,
+        )
+
+    def recorded(self, state):
+        delivered = []
+        failed = []
+        for name, (_lease, batch_delivered, batch_failed), _kwargs in state.calls[2:]:
+            self.assertEqual(name, "record_final_delivery_outcomes")
+            delivered.extend(batch_delivered)
+            failed.extend(batch_failed)
+        return delivered, failed
+
+    async def test_batch_uses_one_claim_and_bulk_outcome_writes(self) -> None:
+        users = [pending(user_id) for user_id in range(1, 6)]
+        state = FakeState(users)
+        engine = self.make_engine(state)
+
+        async def send(user):
+            if user.user_id == 3:
+                raise RuntimeError("telegram down")
+            return user.user_id * 100
+
+        with self.assertLogs("mtla_bot.finalization", level="ERROR"):
+            report = await engine.run_once(send)
+
+        self.assertEqual(
+            state.methods()[:2],
+            ["get_finalizing_users", "claim_final_deliveries"],
+        )
+        delivered, failed = self.recorded(state)
+        _name, (lease_id, _delivered, _failed), kwargs = state.calls[-1]
+        self.assertEqual(lease_id, state.calls[1][1][1])
+        self.assertEqual(
+            sorted(delivered),
+            [(user_id, f"attempt-{user_id}", user_id * 100) for user_id in (1, 2, 4, 5)],
+        )
+        self.assertEqual(failed, [(3, "attempt-3", "telegram_send_failed")])
+        self.assertEqual(kwargs, {"retry_seconds": 300})
+        self.assertEqual((report.claimed, report.delivered, report.failed), (5, 4, 1))
+
+    async def test_sends_run_in_parallel_up_to_the_limit(self) -> None:
+        state = FakeState([pending(user_id) for user_id in range(1, 7)])
+        engine = self.make_engine(state, parallelism=3)
+        active = 0
+        peak = 0
+
+        async def send(user):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return user.user_id
+
+        await engine.run_once(send)
+
+        self.assertEqual(peak, 3)
+
+    async def test_busy_and_incomplete_users_are_not_claimed(self) -> None:
+        incomplete = pending(3)
+        incomplete.stellar_address = None
+        state = FakeState([pending(1), pending(2), incomplete])
+        locks = UserLockRegistry()
+        engine = self.make_engine(state, locks)
+
+        async def send(user):
+            return 1
+
+        async with locks.hold(2):
+            await engine.run_once(send)
+
+        self.assertEqual(state.calls[1][1][0], [(1, "attempt-1")])
+
+    async def test_start_cancelling_one_delivery_keeps_other_outcomes(self) -> None:
+        state = FakeState([pending(1), pending(2)])
+        locks = UserLockRegistry()
+        engine = self.make_engine(state, locks)
+        blocked = asyncio.Event()
+
+        async def send(user):
+            if user.user_id == 1:
+                blocked.set()
+                await asyncio.Event().wait()
+            return 7
+
+        run = asyncio.create_task(engine.run_once(send))
+        await blocked.wait()
+        locks.active_task(1).cancel()
+        report = await run
+
+        delivered, failed = self.recorded(state)
+        self.assertEqual(delivered, [(2, "attempt-2", 7)])
+        self.assertEqual(failed, [])
+        self.assertEqual(report.delivered, 1)
+
+    async def test_outcomes_are_written_while_other_sends_are_in_flight(self) -> None:
+        state = FakeState([pending(1), pending(2)])
+        engine = self.make_engine(state)
+        release = asyncio.Event()
+
+        async def send(user):
+            if user.user_id == 2:
+                await release.wait()
+            return user.user_id
+
+        run = asyncio.create_task(engine.run_once(send))
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        # A crash now would re-send only the message still in flight.
+        self.assertEqual(self.recorded(state), ([(1, "attempt-1", 1)], []))
+        release.set()
+        report = await run
+
+        self.assertEqual(
+            self.recorded(state),
+            ([(1, "attempt-1", 1), (2, "attempt-2", 2)], []),
+        )
+        self.assertEqual(report.delivered, 2)
+
+    async def test_failed_outcome_write_is_raised_after_the_batch(self) -> None:
+        state = FakeState([pending(1)])
+
+        async def failing_state(method_name, *args, **kwargs):
+            if method_name == "record_final_delivery_outcomes":
+                raise AutoReconnect("mongo down")
+            return await state(method_name, *args, **kwargs)
+
+        engine = self.make_engine(failing_state)
+
+        async def send(user):
+            return 1
+
+        with self.assertRaises(AutoReconnect):
+            await engine.run_once(send)
+
+    async def test_full_batch_with_progress_reports_backlog(self) -> None:
+        state = FakeState([pending(user_id) for user_id in range(1, 3)])
+        engine = self.make_engine(state, batch_size=2)
+
+        async def send(user):
+            return 1
+
+        self.assertTrue((await engine.run_once(send)).backlog)
+
+        empty = self.make_engine(FakeState([]), batch_size=2)
+        self.assertFalse((await empty.run_once(send)).backlog)
+
+
+class FakeChangeStream:
+    """In-memory stand-in for a PyMongo async change stream."""
+
+    def __init__(self) -> None:
+        self.changes = asyncio.Queue()
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc_info) -> None:
+        self.closed = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        change = await self.changes.get()
+        if isinstance(change, Exception):
+            raise change
+        return change
+
+    def push(self, due_at: datetime | None) -> None:
+        self.changes.put_nowait(
+            {"fullDocument": {"user_id": 42, "final_delivery_lease_until": due_at}}
+        )
+
+
+async def wait_for_wakeup(wakeups: FinalizationWakeups, timeout: float) -> bool:
+    try:
+        await asyncio.wait_for(wakeups.wait(60), timeout)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+class FinalizationWakeupsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_immediate_notification_wakes_a_waiting_loop(self) -> None:
+        wakeups = FinalizationWakeups()
+        waiter = asyncio.create_task(wakeups.wait(60))
+        await asyncio.sleep(0)
+
+        wakeups.notify()
+
+        await asyncio.wait_for(waiter, 1)
+
+    async def test_future_lease_wakes_when_it_expires(self) -> None:
+        wakeups = FinalizationWakeups()
+        wakeups.notify(datetime.utcnow() + timedelta(milliseconds=150))
+
+        self.assertFalse(await wait_for_wakeup(wakeups, 0.05))
+        self.assertTrue(await wait_for_wakeup(wakeups, 1))
+        self.assertEqual(len(wakeups), 0)
+
+    async def test_same_lease_expiry_is_scheduled_once(self) -> None:
+        wakeups = FinalizationWakeups(clock=lambda: 100.0)
+        due_at = datetime.utcnow() + timedelta(seconds=300)
+
+        for _ in range(100):
+            wakeups.notify(due_at)
+
+        self.assertEqual(len(wakeups), 1)
+
+    async def test_timeout_returns_without_notifications(self) -> None:
+        wakeups = FinalizationWakeups()
+
+        await asyncio.wait_for(wakeups.wait(0.01), 1)
+
+
+class FinalizationChangeFeedTest(unittest.IsolatedAsyncioTestCase):
+    async def test_events_wake_the_loop_while_streaming(self) -> None:
+        stream = FakeChangeStream()
+        wakeups = FinalizationWakeups()
+        opened = asyncio.Event()
+
+        async def open_stream():
+            opened.set()
+            return stream
+
+        feed = FinalizationChangeFeed(open_stream, wakeups)
+        task = asyncio.create_task(feed.run())
+        await opened.wait()
+        await asyncio.sleep(0)
+        self.assertTrue(feed.streaming)
+        # Opening triggers a catch-up pass for changes made before it.
+        self.assertTrue(await wait_for_wakeup(wakeups, 1))
+
+        stream.push(None)
+        self.assertTrue(await wait_for_wakeup(wakeups, 1))
+
+        stream.push(datetime.utcnow() + timedelta(seconds=300))
+        self.assertFalse(await wait_for_wakeup(wakeups, 0.05))
+        self.assertEqual(len(wakeups), 1)
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self.assertTrue(stream.closed)
+        self.assertFalse(feed.streaming)
+
+    async def test_unsupported_server_falls_back_to_polling(self) -> None:
+        async def open_stream():
+            raise OperationFailure(
+                "The $changeStream stage is only supported on replica sets",
+                code=40573,
+            )
+
+        feed = FinalizationChangeFeed(open_stream, FinalizationWakeups())
+
+        with self.assertLogs("mtla_bot.finalization", level="WARNING"):
+            await asyncio.wait_for(feed.run(), 1)
+
+        self.assertFalse(feed.streaming)
+
+    async def test_broken_stream_is_reopened_after_polling_pass(self) -> None:
+        streams = [FakeChangeStream(), FakeChangeStream()]
+        opened = []
+        wakeups = FinalizationWakeups()
+
+        async def open_stream():
+            stream = streams[len(opened)]
+            opened.append(stream)
+            return stream
+
+        feed = FinalizationChangeFeed(open_stream, wakeups, retry_seconds=0)
+        task = asyncio.create_task(feed.run())
+        await asyncio.sleep(0)
+        streams[0].changes.put_nowait(AutoReconnect("primary stepped down"))
+
+        with self.assertLogs("mtla_bot.finalization", level="ERROR"):
+            while len(opened) < 2:
+                await asyncio.sleep(0)
+
+        self.assertTrue(streams[0].closed)
+        self.assertTrue(await wait_for_wakeup(wakeups, 1))
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from mtla_bot.hedging import HedgePolicy, LatencyHistogram
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_quantile_returns_the_bucket_bound_of_the_rank(self) -> None:
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.quantile(0.5))
+
+        for _ in range(90):
+            histogram.record(0.02)
+        for _ in range(10):
+            histogram.record(1.5)
+
+        self.assertLess(histogram.quantile(0.5), 0.03)
+        self.assertGreaterEqual(histogram.quantile(0.95), 1.5)
+        self.assertLess(histogram.quantile(0.95), 1.9)
+
+    def test_old_samples_fade_once_the_histogram_is_full(self) -> None:
+        histogram = LatencyHistogram(max_samples=100)
+
+        for _ in range(99):
+            histogram.record(2.0)
+        for _ in range(400):
+            histogram.record(0.01)
+
+        self.assertLess(histogram.count, 100)
+        self.assertLess(histogram.quantile(0.95), 0.02)
+
+
+class HedgePolicyTest(unittest.TestCase):
+    def test_delay_follows_the_percentile_within_bounds(self) -> None:
+        policy = HedgePolicy(
+            initial_delay=0.5,
+            min_delay=0.05,
+            max_delay=1.0,
+            min_samples=10,
+        )
+        self.assertEqual(policy.delay(), 0.5)
+
+        for _ in range(10):
+            policy.record(0.2)
+        self.assertGreaterEqual(policy.delay(), 0.2)
+        self.assertLess(policy.delay(), 0.25)
+
+        for _ in range(100):
+            policy.record(30.0)
+        self.assertEqual(policy.delay(), 1.0)
+
+    def test_budget_limits_hedges_to_a_share_of_requests(self) -> None:
+        policy = HedgePolicy(budget=0.25, burst=1)
+
+        policy.start_request()
+        self.assertTrue(policy.try_hedge())
+        hedged = 0
+        for _ in range(8):
+            policy.start_request()
+            hedged += policy.try_hedge()
+
+        self.assertEqual(hedged, 2)
+        self.assertEqual((policy.requests, policy.hedges), (9, 3))
+
+    def test_rejects_invalid_settings(self) -> None:
+        for kwargs in (
+            {"percentile": 1},
+            {"budget": 0},
+            {"burst": 0.5},
+            {"min_delay": 0},
+            {"initial_delay": 5.0},
+        ):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    HedgePolicy(**kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
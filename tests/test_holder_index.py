@@ -0,0 +1,191 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from stellar_sdk import StrKey
+
+from mtla_bot.holder_index import (
+    HolderIndex,
+    HolderIndexJob,
+    decode_holder_keys,
+    encode_holder_keys,
+)
+
+from fakes import FakeClock
+
+
+HOLDER = "GAQPZKOYGJDEWLYO6PBOJ4NG6HNBBNNZSOJNKUUCVJGLBQIQSO5AC26F"
+OTHER = "GBJQKGNVJHCT3DQUZT6RQ5MSTVMTUY4VFCBAKMYA7BK74LHXAXVQJQDC"
+
+
+class HolderIndexTest(unittest.IsolatedAsyncioTestCase):
+    def test_lookup_needs_a_fresh_index(self) -> None:
+        clock = FakeClock()
+        index = HolderIndex(max_age=60, clock=clock)
+
+        self.assertFalse(index.lookup(HOLDER))
+        index.replace([HOLDER])
+        self.assertTrue(index.lookup(HOLDER))
+        self.assertFalse(index.lookup(OTHER))
+
+        clock.now = 60
+        self.assertFalse(index.lookup(HOLDER))
+
+    def test_rejects_non_positive_max_age(self) -> None:
+        with self.assertRaises(ValueError):
+            HolderIndex(max_age=0)
+
+    async def test_concurrent_refreshes_share_one_load(self) -> None:
+        index = HolderIndex()
+        release = asyncio.Event()
+        loads = 0
+
+        async def load():
+            nonlocal loads
+            loads += 1
+            await release.wait()
+            return [HOLDER]
+
+        refreshes = [asyncio.create_task(index.refresh(load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await asyncio.gather(*refreshes), [True] * 5)
+        self.assertEqual(loads, 1)
+        self.assertTrue(index.lookup(HOLDER))
+
+    async def test_failed_refresh_keeps_previous_holders(self) -> None:
+        clock = FakeClock()
+        index = HolderIndex(max_age=60, clock=clock)
+        index.replace([HOLDER])
+        clock.now = 61
+
+        async def load():
+            raise RuntimeError("horizon down")
+
+        with self.assertLogs("mtla_bot.holder_index", level="WARNING"):
+            self.assertFalse(await index.refresh(load))
+
+        self.assertEqual(len(index), 1)
+        self.assertFalse(index.is_fresh)
+
+    async def test_close_cancels_running_refresh(self) -> None:
+        index = HolderIndex()
+
+        async def load():
+            await asyncio.Event().wait()
+
+        refresh = asyncio.create_task(index.refresh(load))
+        await asyncio.sleep(0)
+        task = index._refresh_task
+        await index.close()
+        await asyncio.gather(refresh, return_exceptions=True)
+
+        self.assertTrue(task.cancelled())
+
+
+class FakeStore:
+    def __init__(self, document=None) -> None:
+        self.document = document
+        self.saved = []
+
+    async def load(self):
+        return self.document
+
+    async def save(self, keys: bytes, count: int, cursor) -> None:
+        self.saved.append((keys, count, cursor))
+
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def make_job(index: HolderIndex, store: FakeStore, load=None) -> HolderIndexJob:
+    async def default_load():
+        return [HOLDER, OTHER]
+
+    return HolderIndexJob(
+        index,
+        load or default_load,
+        load_snapshot=store.load,
+        save_snapshot=store.save,
+        utcnow=lambda: NOW,
+    )
+
+
+class HolderIndexJobTest(unittest.IsolatedAsyncioTestCase):
+    def test_keys_round_trip_as_sorted_raw_blob(self) -> None:
+        keys = {StrKey.decode_ed25519_public_key(HOLDER), StrKey.decode_ed25519_public_key(OTHER)}
+
+        blob = encode_holder_keys(keys)
+
+        self.assertEqual(len(blob), 64)
+        self.assertEqual(blob, b"".join(sorted(keys)))
+        self.assertEqual(decode_holder_keys(blob), keys)
+        with self.assertRaises(ValueError):
+            decode_holder_keys(blob[:-1])
+
+    async def test_recent_snapshot_answers_before_first_refresh(self) -> None:
+        stored = HolderIndex()
+        stored.replace([HOLDER])
+        store = FakeStore({
+            "keys": stored.snapshot(),
+            "refreshed_at": NOW - timedelta(minutes=2),
+        })
+        index = HolderIndex()
+
+        self.assertTrue(await make_job(index, store).restore())
+
+        self.assertTrue(index.lookup(HOLDER))
+        self.assertFalse(index.lookup(OTHER))
+
+    async def test_restored_snapshot_keeps_its_real_age(self) -> None:
+        stored = HolderIndex()
+        stored.replace([HOLDER])
+        store = FakeStore({
+            "keys": stored.snapshot(),
+            "refreshed_at": NOW - timedelta(minutes=20),
+        })
+        index = HolderIndex()
+
+        self.assertTrue(await make_job(index, store).restore())
+
+        self.assertFalse(index.is_fresh)
+        self.assertFalse(index.lookup(HOLDER))
+
+    async def test_old_or_malformed_snapshot_is_ignored(self) -> None:
+        index = HolderIndex()
+        old = FakeStore({"keys": b"", "refreshed_at": NOW - timedelta(hours=2)})
+        malformed = FakeStore({"keys": b"short", "refreshed_at": NOW})
+
+        self.assertFalse(await make_job(index, old).restore())
+        with self.assertLogs("mtla_bot.holder_index", level="WARNING"):
+            self.assertFalse(await make_job(index, malformed).restore())
+        self.assertFalse(await make_job(index, FakeStore()).restore())
+        self.assertFalse(index.is_fresh)
+
+    async def test_successful_refresh_is_persisted(self) -> None:
+        index = HolderIndex()
+        store = FakeStore()
+
+        self.assertTrue(await make_job(index, store).refresh_once())
+
+        (keys, count, cursor), = store.saved
+        self.assertEqual(count, 2)
+        self.assertIsNone(cursor)
+        self.assertEqual(keys, index.snapshot())
+        self.assertTrue(index.lookup(OTHER))
+
+    async def test_failed_refresh_is_not_persisted(self) -> None:
+        store = FakeStore()
+
+        async def load():
+            raise RuntimeError("horizon down")
+
+        with self.assertLogs("mtla_bot.holder_index", level="WARNING"):
+            self.assertFalse(await make_job(HolderIndex(), store, load).refresh_once())
+
+        self.assertEqual(store.saved, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import unittest
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from mtla_bot.holder_index import HolderIndex, HolderIndexJob
+from mtla_bot.holder_stream import (
+    HolderEffectStream,
+    effect_mentions_asset,
+    iter_sse_events,
+)
+
+
+ASSET_CODE = "MTLAP"
+ASSET_ISSUER = "GCNVDZIHGX473FEI7IXCUAEXUJ4BGCKEMHF36VYP5EMS7PX2QBLAMTLA"
+HOLDER = "GAQPZKOYGJDEWLYO6PBOJ4NG6HNBBNNZSOJNKUUCVJGLBQIQSO5AC26F"
+OTHER = "GBJQKGNVJHCT3DQUZT6RQ5MSTVMTUY4VFCBAKMYA7BK74LHXAXVQJQDC"
+
+
+def effect_event(paging_token: str, account: str, **fields) -> bytes:
+    effect = {
+        "id": paging_token,
+        "paging_token": paging_token,
+        "account": account,
+        "type": "account_credited",
+        **fields,
+    }
+    return f"id: {paging_token}\ndata: {json.dumps(effect)}\n\n".encode()
+
+
+def mtlap_credit(paging_token: str, account: str) -> bytes:
+    return effect_event(
+        paging_token,
+        account,
+        asset_type="credit_alphanum12",
+        asset_code=ASSET_CODE,
+        asset_issuer=ASSET_ISSUER,
+        amount="1.0000000",
+    )
+
+
+class FakeHorizon:
+    """Local SSE server standing in for Horizon's ``/effects`` stream."""
+
+    def __init__(self, *chunks: bytes, status: int = 200) -> None:
+        self.chunks = chunks
+        self.status = status
+        self.cursors: list[str] = []
+        self.server: TestServer | None = None
+
+    async def effects(self, request: web.Request) -> web.StreamResponse:
+        self.cursors.append(request.query.get("cursor", ""))
+        if self.status != 200:
+            return web.json_response({"status": self.status}, status=self.status)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(b'retry: 1000\ndata: "hello"\n\n')
+        for chunk in self.chunks:
+            await response.write(chunk)
+        return response
+
+    async def __aenter__(self) -> str:
+        app = web.Application()
+        app.router.add_get("/effects", self.effects)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        return str(self.server.make_url("/"))
+
+    async def __aexit__(self, *_exc_info) -> None:
+        assert self.server is not None
+        await self.server.close()
+
+
+class FakeContent:
+    def __init__(self, payload: bytes) -> None:
+        self._lines = payload.splitlines(keepends=True)
+
+    async def readline(self) -> bytes:
+        return self._lines.pop(0) if self._lines else b""
+
+
+class SseParserTest(unittest.IsolatedAsyncioTestCase):
+    async def test_joins_data_lines_and_skips_comments(self) -> None:
+        content = FakeContent(
+            b": keep-alive\n"
+            b"id: 7\nevent: message\ndata: {\"a\":\ndata: 1}\n\n"
+            b"retry: 10\n\n"
+        )
+
+        events = [event async for event in iter_sse_events(content)]
+
+        self.assertEqual(events, [{"id": "7", "event": "message", "data": '{"a":\n1}'}])
+
+    def test_matches_asset_in_trade_effects(self) -> None:
+        self.assertTrue(effect_mentions_asset(
+            {"sold_asset_code": ASSET_CODE, "sold_asset_issuer": ASSET_ISSUER},
+            ASSET_CODE,
+            ASSET_ISSUER,
+        ))
+        self.assertFalse(effect_mentions_asset(
+            {"asset_code": ASSET_CODE, "asset_issuer": HOLDER},
+            ASSET_CODE,
+            ASSET_ISSUER,
+        ))
+
+
+class HolderEffectStreamTest(unittest.IsolatedAsyncioTestCase):
+    async def follow(self, horizon: FakeHorizon, index: HolderIndex, verdicts, **kwargs):
+        rechecked = []
+        reconnecting = asyncio.Event()
+
+        async def recheck(account: str) -> bool:
+            rechecked.append(account)
+            return verdicts[account]
+
+        async def sleep(_seconds: float) -> None:
+            reconnecting.set()
+            await asyncio.Event().wait()
+
+        async with horizon as url, aiohttp.ClientSession() as session:
+            stream = HolderEffectStream(
+                session,
+                url,
+                asset_code=ASSET_CODE,
+                asset_issuer=ASSET_ISSUER,
+                index=index,
+                recheck=recheck,
+                sleep=sleep,
+            )
+            for name, value in kwargs.items():
+                getattr(stream, name)(value)
+            task = asyncio.create_task(stream.run())
+            await asyncio.wait_for(reconnecting.wait(), 5)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return stream, rechecked
+
+    async def test_asset_effects_recheck_accounts_and_advance_cursor(self) -> None:
+        index = HolderIndex()
+        index.replace([OTHER])
+        horizon = FakeHorizon(
+            mtlap_credit("100-1", HOLDER),
+            effect_event("100-2", HOLDER, asset_type="native", amount="5"),
+            mtlap_credit("101-1", OTHER),
+        )
+
+        stream, rechecked = await self.follow(
+            horizon,
+            index,
+            {HOLDER: True, OTHER: False},
+        )
+
+        self.assertEqual(horizon.cursors, ["now"])
+        self.assertEqual(rechecked, [HOLDER, OTHER])
+        self.assertEqual(stream.cursor, "101-1")
+        self.assertTrue(index.lookup(HOLDER))
+        self.assertFalse(index.lookup(OTHER))
+        self.assertFalse(stream.streaming)
+
+    async def test_restart_resumes_from_persisted_cursor(self) -> None:
+        horizon = FakeHorizon(mtlap_credit("205-3", HOLDER))
+
+        stream, _rechecked = await self.follow(
+            horizon,
+            HolderIndex(),
+            {HOLDER: True},
+            resume_from="200-1",
+        )
+
+        self.assertEqual(horizon.cursors, ["200-1"])
+        self.assertEqual(stream.cursor, "205-3")
+        self.assertFalse(stream.gap)
+
+    async def test_rejected_cursor_restarts_from_now_with_a_gap(self) -> None:
+        horizon = FakeHorizon(status=400)
+
+        with self.assertLogs("mtla_bot.holder_stream", level="WARNING"):
+            stream, _rechecked = await self.follow(
+                horizon,
+                HolderIndex(),
+                {},
+                resume_from="1-1",
+            )
+
+        self.assertEqual(stream.cursor, "now")
+        self.assertTrue(stream.gap)
+
+    async def test_failed_recheck_drops_the_account(self) -> None:
+        index = HolderIndex()
+        index.replace([HOLDER])
+        horizon = FakeHorizon(mtlap_credit("300-1", HOLDER))
+
+        async def failing(_account: str) -> bool:
+            raise RuntimeError("horizon down")
+
+        async with horizon as url, aiohttp.ClientSession() as session:
+            stream = HolderEffectStream(
+                session,
+                url,
+                asset_code=ASSET_CODE,
+                asset_issuer=ASSET_ISSUER,
+                index=index,
+                recheck=failing,
+            )
+            with self.assertLogs("mtla_bot.holder_stream", level="WARNING"):
+                await stream._follow()
+
+        self.assertFalse(index.lookup(HOLDER))
+        self.assertEqual(stream.cursor, "300-1")
+
+
+class StreamingJobTest(unittest.IsolatedAsyncioTestCase):
+    def make_job(self, stream, loads):
+        saved = []
+
+        async def load():
+            loads.append(1)
+            return [HOLDER]
+
+        async def load_snapshot():
+            return None
+
+        async def save(keys, count, cursor):
+            saved.append(cursor)
+
+        job = HolderIndexJob(
+            HolderIndex(),
+            load,
+            load_snapshot=load_snapshot,
+            save_snapshot=save,
+            stream=stream,
+        )
+        return job, saved
+
+    async def test_live_stream_replaces_paging(self) -> None:
+        stream = type("Stream", (), {"streaming": True, "gap": True, "cursor": "9-1"})()
+        loads = []
+        job, saved = self.make_job(stream, loads)
+
+        await job.refresh_once()
+        await job.refresh_once()
+
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(saved, ["9-1", "9-1"])
+
+    async def test_gap_or_disconnected_stream_pages_again(self) -> None:
+        stream = type("Stream", (), {"streaming": False, "gap": False, "cursor": "now"})()
+        loads = []
+        job, _saved = self.make_job(stream, loads)
+
+        await job.refresh_once()
+        stream.streaming = True
+        stream.gap = True
+        await job.refresh_once()
+
+        self.assertEqual(len(loads), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
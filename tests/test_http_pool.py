@@ -0,0 +1,101 @@
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from mtla_bot.http_pool import (
+    ConnectionStats,
+    PoolSettings,
+    create_session,
+    warm_up,
+)
+
+
+class UpstreamServer:
+    """Local HTTP server that records the client port of every request."""
+
+    def __init__(self) -> None:
+        self.peers: list[int] = []
+        self.server: TestServer | None = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        assert request.transport is not None
+        self.peers.append(request.transport.get_extra_info("peername")[1])
+        return web.json_response({})
+
+    async def __aenter__(self) -> str:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        return str(self.server.make_url("/"))
+
+    async def __aexit__(self, *_exc_info) -> None:
+        assert self.server is not None
+        await self.server.close()
+
+
+class HttpPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def test_sequential_requests_reuse_one_connection(self) -> None:
+        upstream = UpstreamServer()
+        stats = ConnectionStats()
+
+        async with upstream as url:
+            session = create_session(PoolSettings(2), stats)
+            try:
+                for _ in range(3):
+                    async with session.get(url) as response:
+                        await response.read()
+            finally:
+                await session.close()
+
+        self.assertEqual(stats.requests, 3)
+        self.assertEqual(stats.created, 1)
+        self.assertEqual(stats.reused, 2)
+        self.assertEqual(len(set(upstream.peers)), 1)
+
+    async def test_warm_up_opens_pooled_connections(self) -> None:
+        upstream = UpstreamServer()
+        stats = ConnectionStats()
+
+        async with upstream as url:
+            session = create_session(PoolSettings(4, warm_connections=2), stats)
+            try:
+                opened = await warm_up(session, url, 2)
+                async with session.get(url) as response:
+                    await response.read()
+            finally:
+                await session.close()
+
+        self.assertEqual(opened, 2)
+        self.assertEqual(stats.created, 2)
+        self.assertEqual(stats.reused, 1)
+        self.assertEqual(stats.handshakes_per_request, 2 / 3)
+
+    async def test_unreachable_origin_is_logged_not_raised(self) -> None:
+        upstream = UpstreamServer()
+        async with upstream as url:
+            pass
+
+        session = create_session(PoolSettings(1), ConnectionStats())
+        try:
+            with self.assertLogs("mtla_bot.http_pool", level="WARNING"):
+                opened = await warm_up(session, url, 1)
+        finally:
+            await session.close()
+
+        self.assertEqual(opened, 0)
+
+    def test_settings_are_validated(self) -> None:
+        for kwargs in (
+            {"limit": 0},
+            {"limit": 1, "keepalive_timeout": 0},
+            {"limit": 1, "dns_ttl": -1},
+            {"limit": 1, "warm_connections": 2},
+        ):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                PoolSettings(**kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
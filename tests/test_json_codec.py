@@ -0,0 +1,22 @@
+import json
+import unittest
+
+from mtla_bot import json_codec
+
+
+class JsonCodecTest(unittest.TestCase):
+    def test_selected_backend_parses_buffers(self) -> None:
+        for body in (b'{"a": [1, "\xc3\xa9"]}', bytearray(b'{"a": [1, "\xc3\xa9"]}')):
+            self.assertEqual(json_codec.loads(body), {"a": [1, "é"]})
+
+    def test_stdlib_fallback_rejects_what_the_fast_backend_rejects(self) -> None:
+        for body in (b'"\xff"', b'{"a": ', b'{} {}'):
+            with self.subTest(body=body):
+                with self.assertRaises(json_codec.JSON_DECODE_ERRORS):
+                    json_codec.loads(body)
+                with self.assertRaises((UnicodeDecodeError, json.JSONDecodeError)):
+                    json_codec._stdlib_loads(body)
+
+
+if __name__ == "__main__":
+    unittest.main()
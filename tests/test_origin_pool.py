@@ -0,0 +1,70 @@
+import unittest
+
+from yarl import URL
+
+from mtla_bot.origin_pool import OriginPool
+
+from fakes import FakeClock
+
+
+PUBLIC = URL("https://horizon.stellar.org")
+PRIVATE = URL("https://horizon.example")
+
+
+class OriginPoolTest(unittest.TestCase):
+    def test_unmeasured_origins_keep_configured_order(self) -> None:
+        pool = OriginPool([PUBLIC, PRIVATE])
+
+        self.assertEqual(pool.ranked(), [PUBLIC, PRIVATE])
+
+    def test_prefers_lower_latency_weighted_by_requests_in_flight(self) -> None:
+        pool = OriginPool([PUBLIC, PRIVATE])
+        pool.record_success(PUBLIC, 0.3)
+        pool.record_success(PRIVATE, 0.1)
+        self.assertEqual(pool.ranked(), [PRIVATE, PUBLIC])
+
+        for _ in range(3):
+            pool.started(PRIVATE)
+        self.assertEqual(pool.ranked(), [PUBLIC, PRIVATE])
+
+        for _ in range(3):
+            pool.finished(PRIVATE)
+        self.assertEqual(pool.ranked()[0], PRIVATE)
+
+    def test_failed_origin_cools_down_with_backoff(self) -> None:
+        clock = FakeClock(100.0)
+        pool = OriginPool([PUBLIC, PRIVATE], failure_cooldown=5.0, clock=clock)
+
+        pool.record_failure(PUBLIC)
+        self.assertEqual(pool.ranked(), [PRIVATE, PUBLIC])
+        clock.now += 5.0
+        self.assertEqual(pool.ranked(), [PUBLIC, PRIVATE])
+
+        pool.record_failure(PUBLIC)
+        clock.now += 5.0
+        self.assertEqual(pool.ranked(), [PRIVATE, PUBLIC])
+        self.assertEqual(pool.snapshot()[0].failures, 2)
+
+        pool.record_success(PUBLIC, 0.05)
+        self.assertTrue(pool.snapshot()[0].available)
+        self.assertEqual(pool.snapshot()[0].failures, 0)
+
+    def test_when_every_origin_failed_the_soonest_comes_first(self) -> None:
+        clock = FakeClock(100.0)
+        pool = OriginPool([PUBLIC, PRIVATE], clock=clock)
+
+        pool.record_failure(PRIVATE)
+        clock.now += 1.0
+        pool.record_failure(PUBLIC)
+
+        self.assertEqual(pool.ranked(), [PRIVATE, PUBLIC])
+
+    def test_rejects_invalid_origins(self) -> None:
+        for origins in ([], [PUBLIC, PUBLIC]):
+            with self.subTest(origins=origins):
+                with self.assertRaises(ValueError):
+                    OriginPool(origins)
+
+
+if __name__ == "__main__":
+    unittest.main()
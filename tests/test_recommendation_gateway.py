@@ -7,13 +7,28 @@ from typing import Any
 
 import aiohttp
 from stellar_sdk import Keypair
-
+from yarl import URL
+
+from mtla_bot.account_cache import AccountCache
+from mtla_bot.adaptive_limiter import AdaptiveLimiter
+from mtla_bot.bsn_cache import BsnCache
+from mtla_bot.check_progress import CheckProgress, CheckStage
+from mtla_bot.circuit_breaker import BreakerState, CircuitBreaker
+from mtla_bot.eligibility import AccountSnapshot
+from mtla_bot.hedging import HedgePolicy
+from mtla_bot.holder_index import HolderIndex
+from mtla_bot.recommender_hints import RecommenderHints
 from mtla_bot.recommendation_gateway import (
+    BsnRecommendations,
+    ExternalService,
     GatewayErrorCode,
     RecommendationGateway,
     RecommendationGatewayError,
+    DEFAULT_HOLDER_PAGE_SIZE,
     RecommendationStatus,
     parse_bsn_recommenders,
+    decode_bsn_recommendations,
+    decode_horizon_account,
     parse_horizon_mtlap_balance,
 )
 
@@ -185,6 +200,28 @@ def horizon_url(recommender: str) -> str:
     return f"https://horizon.stellar.org/accounts/{recommender}"
 
 
+def holders_url(cursor: str | None = None) -> str:
+    query = {
+        "asset": f"{ASSET_CODE}:{ASSET_ISSUER}",
+        "limit": str(DEFAULT_HOLDER_PAGE_SIZE),
+        "order": "asc",
+    }
+    if cursor is not None:
+        query["cursor"] = cursor
+    return str(URL("https://horizon.stellar.org/accounts").with_query(query))
+
+
+def holders_page(*holders: tuple[str, str]) -> dict[str, Any]:
+    return {
+        "_embedded": {
+            "records": [
+                dict(horizon_payload(account_id, balance), paging_token=account_id)
+                for account_id, balance in holders
+            ]
+        }
+    }
+
+
 class BsnParserTest(unittest.TestCase):
     def test_parses_positive_and_live_empty_shapes(self) -> None:
         self.assertEqual(
@@ -239,6 +276,41 @@ class BsnParserTest(unittest.TestCase):
         with self.assertRaises(RecommendationGatewayError):
             parse_bsn_recommenders(wrong_count, CANDIDATE)
 
+    def test_decodes_into_a_typed_struct_ignoring_unused_fields(self) -> None:
+        payload = bsn_payload(CANDIDATE, [RECOMMENDER, SECOND_RECOMMENDER])
+        payload["account"]["tags"] = {"unused": [1, 2, 3]}
+        payload["links"]["outcome"] = "not an object"
+
+        decoded = decode_bsn_recommendations(payload, CANDIDATE)
+
+        self.assertEqual(
+            decoded,
+            BsnRecommendations(CANDIDATE, (RECOMMENDER, SECOND_RECOMMENDER)),
+        )
+
+    def test_decoder_fails_closed_on_malformed_pages(self) -> None:
+        not_object = bsn_payload(CANDIDATE, [RECOMMENDER])
+        not_object["links"]["income"]["RecommendToMTLA"]["links"][RECOMMENDER] = []
+        bad_key = bsn_payload(CANDIDATE, [])
+        bad_key["links"]["income"] = {
+            "RecommendToMTLA": {
+                "name": "RecommendToMTLA",
+                "links": {"G123": {"id": "G123"}},
+            },
+        }
+        bad_key["links_count"]["income"] = 1
+        boolean_count = bsn_payload(CANDIDATE, [])
+        boolean_count["links_count"]["income"] = False
+
+        for payload in (None, [], {"account": []}, not_object, bad_key, boolean_count):
+            with self.subTest(payload=payload):
+                with self.assertRaises(RecommendationGatewayError) as raised:
+                    decode_bsn_recommendations(payload, CANDIDATE)
+                self.assertEqual(
+                    raised.exception.code,
+                    GatewayErrorCode.BSN_INVALID_RESPONSE,
+                )
+
 
 class HorizonParserTest(unittest.TestCase):
     def test_uses_exact_asset_and_decimal_boundary(self) -> None:
@@ -285,6 +357,50 @@ class HorizonParserTest(unittest.TestCase):
             GatewayErrorCode.HORIZON_INVALID_RESPONSE,
         )
 
+    def test_decodes_trustline_and_balance_count_in_one_pass(self) -> None:
+        with_trustline = decode_horizon_account(
+            horizon_payload(RECOMMENDER, "0.0000000"),
+            RECOMMENDER,
+            asset_code=ASSET_CODE,
+            asset_issuer=ASSET_ISSUER,
+        )
+        without_trustline = decode_horizon_account(
+            horizon_payload(RECOMMENDER, None),
+            RECOMMENDER,
+            asset_code=ASSET_CODE,
+            asset_issuer=ASSET_ISSUER,
+        )
+
+        self.assertEqual(
+            with_trustline,
+            AccountSnapshot(RECOMMENDER, True, Decimal("0"), 2),
+        )
+        self.assertEqual(
+            without_trustline,
+            AccountSnapshot(RECOMMENDER, False, Decimal("0"), 1),
+        )
+
+    def test_decoder_fails_closed_on_malformed_accounts(self) -> None:
+        duplicate = horizon_payload(RECOMMENDER, "2.0000000")
+        duplicate["balances"].append(dict(duplicate["balances"][-1]))
+        not_an_object = horizon_payload(RECOMMENDER, None)
+        not_an_object["balances"].append("MTLAP")
+        cases = {
+            "duplicate": (duplicate, RECOMMENDER),
+            "entry": (not_an_object, RECOMMENDER),
+            "account_id": (horizon_payload(RECOMMENDER, "2"), SECOND_RECOMMENDER),
+            "balances": ({"account_id": RECOMMENDER, "balances": {}}, RECOMMENDER),
+        }
+
+        for name, (payload, account_id) in cases.items():
+            with self.subTest(name), self.assertRaises(RecommendationGatewayError):
+                decode_horizon_account(
+                    payload,
+                    account_id,
+                    asset_code=ASSET_CODE,
+                    asset_issuer=ASSET_ISSUER,
+                )
+
 
 class RecommendationGatewayTest(unittest.IsolatedAsyncioTestCase):
     async def test_accepts_approved_internal_bsn_service_origin(self) -> None:
@@ -451,6 +567,190 @@ class RecommendationGatewayTest(unittest.IsolatedAsyncioTestCase):
         self.assertFalse(result.evidence[0].account_exists)
         self.assertIsNone(result.evidence[0].mtlap_balance)
 
+    async def test_horizon_requests_use_their_own_session(self) -> None:
+        bsn_session = FakeSession()
+        horizon_session = FakeSession()
+        bsn_session.add(
+            bsn_url(),
+            FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER])),
+        )
+        horizon_session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "2.0000000")),
+        )
+
+        result = await make_gateway(
+            bsn_session,
+            horizon_session=horizon_session,
+        ).check(CANDIDATE)
+
+        self.assertEqual(result.status, RecommendationStatus.QUALIFIED)
+        self.assertEqual([url for url, _ in bsn_session.calls], [bsn_url()])
+        self.assertEqual(
+            [url for url, _ in horizon_session.calls],
+            [horizon_url(RECOMMENDER)],
+        )
+
+    async def test_horizon_rate_limit_shrinks_the_adaptive_window(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER])),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(429, headers={"Retry-After": "0"}),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "2.0000000")),
+        )
+        limiter = AdaptiveLimiter(initial=8, ceiling=8)
+
+        result = await make_gateway(session, horizon_limiter=limiter).check(CANDIDATE)
+
+        self.assertEqual(result.status, RecommendationStatus.QUALIFIED)
+        self.assertEqual(limiter.window, 4)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_slow_horizon_account_is_hedged_to_the_next_origin(self) -> None:
+        session = FakeSession()
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "2.0000000"), delay=5),
+        )
+        session.add(
+            f"https://horizon-backup.example/accounts/{RECOMMENDER}",
+            FakeResponse(200, horizon_payload(RECOMMENDER, "3.0000000")),
+        )
+        hedging = HedgePolicy(initial_delay=0.05, min_delay=0.01)
+        gateway = make_gateway(
+            session,
+            horizon_hedging=hedging,
+            extra_horizon_urls=["https://horizon-backup.example"],
+        )
+
+        account = await asyncio.wait_for(gateway.load_horizon_account(RECOMMENDER), 1)
+
+        self.assertEqual(account.mtlap_balance, Decimal("3.0000000"))
+        self.assertEqual((hedging.requests, hedging.hedges), (1, 1))
+        self.assertEqual(hedging.histogram.count, 1)
+        self.assertEqual(len(session.calls), 2)
+
+    async def test_horizon_outage_fails_over_to_the_next_origin(self) -> None:
+        backup = f"https://horizon-backup.example/accounts/{RECOMMENDER}"
+        session = FakeSession()
+        session.add(horizon_url(RECOMMENDER), FakeResponse(503))
+        session.add(
+            backup,
+            FakeResponse(200, horizon_payload(RECOMMENDER, "2.0000000")),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "2.0000000")),
+        )
+        gateway = make_gateway(
+            session,
+            extra_horizon_urls=["https://horizon-backup.example"],
+        )
+
+        first = await gateway.load_horizon_account(RECOMMENDER)
+        second = await gateway.load_horizon_account(RECOMMENDER)
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            [url for url, _ in session.calls],
+            [horizon_url(RECOMMENDER), backup, backup],
+        )
+        health = {status.origin: status for status in gateway.horizon_origins.snapshot()}
+        self.assertFalse(health["https://horizon.stellar.org"].available)
+        self.assertEqual(health["https://horizon.stellar.org"].failures, 1)
+
+    async def test_last_horizon_origin_keeps_its_retries(self) -> None:
+        session = FakeSession()
+        session.add(horizon_url(RECOMMENDER), FakeResponse(503), FakeResponse(503))
+
+        with self.assertRaises(RecommendationGatewayError) as raised:
+            await make_gateway(session).load_horizon_account(RECOMMENDER)
+
+        self.assertEqual(raised.exception.code, GatewayErrorCode.HORIZON_UNAVAILABLE)
+        self.assertEqual(len(session.calls), 2)
+
+    def test_extra_horizon_origins_follow_origin_rules(self) -> None:
+        for urls in (
+            ["http://horizon-backup.example"],
+            ["https://horizon-backup.example/api"],
+            ["https://horizon.stellar.org"],
+        ):
+            with self.subTest(urls=urls):
+                with self.assertRaises(RecommendationGatewayError) as raised:
+                    make_gateway(FakeSession(), extra_horizon_urls=urls)
+                self.assertEqual(
+                    raised.exception.code,
+                    GatewayErrorCode.INVALID_CONFIGURATION,
+                )
+
+    async def test_hedge_waits_for_the_other_copy_when_one_fails(self) -> None:
+        session = FakeSession()
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "2.0000000"), delay=0.2),
+            FakeResponse(400),
+        )
+        hedging = HedgePolicy(initial_delay=0.05, min_delay=0.01)
+        gateway = make_gateway(session, horizon_hedging=hedging)
+
+        account = await gateway.load_horizon_account(RECOMMENDER)
+
+        self.assertEqual(account.mtlap_balance, Decimal("2.0000000"))
+        self.assertEqual(len(session.calls), 2)
+
+    async def test_fast_horizon_answer_is_not_hedged(self) -> None:
+        session = FakeSession()
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "2.0000000")),
+        )
+        hedging = HedgePolicy()
+
+        await make_gateway(session, horizon_hedging=hedging).load_horizon_account(
+            RECOMMENDER
+        )
+
+        self.assertEqual((hedging.requests, hedging.hedges), (1, 0))
+        self.assertEqual(len(session.calls), 1)
+
+    async def test_open_bsn_circuit_fails_fast_until_the_probe_succeeds(self) -> None:
+        now = [100.0]
+        breaker = CircuitBreaker(
+            window=2,
+            min_calls=2,
+            open_seconds=30.0,
+            clock=lambda: now[0],
+        )
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(503),
+            FakeResponse(503),
+            FakeResponse(503),
+            FakeResponse(503),
+            FakeResponse(200, bsn_payload(CANDIDATE, [])),
+        )
+        gateway = make_gateway(session, breakers={ExternalService.BSN: breaker})
+
+        for _ in range(2):
+            with self.assertRaises(RecommendationGatewayError) as raised:
+                await gateway.check(CANDIDATE, use_cache=False)
+            self.assertEqual(raised.exception.code, GatewayErrorCode.BSN_UNAVAILABLE)
+        self.assertIs(breaker.state, BreakerState.OPEN)
+
+        with self.assertRaises(RecommendationGatewayError) as raised:
+            await gateway.check(CANDIDATE, use_cache=False)
+        self.assertEqual(raised.exception.code, GatewayErrorCode.BSN_CIRCUIT_OPEN)
+        self.assertTrue(raised.exception.retryable)
+        self.assertEqual(len(session.calls), 4)
+
+        now[0] += 30.0
+        result = await gateway.check(CANDIDATE, use_cache=False)
+
+        self.assertEqual(result.status, RecommendationStatus.NONE)
+        self.assertIs(breaker.state, BreakerState.CLOSED)
+
     async def test_partial_horizon_failure_without_proof_is_not_unqualified(self) -> None:
         session = FakeSession()
         session.add(
@@ -502,6 +802,37 @@ class RecommendationGatewayTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result.status, RecommendationStatus.QUALIFIED)
         self.assertEqual(result.qualifying_evidence.recommender, SECOND_RECOMMENDER)  # type: ignore[union-attr]
 
+    async def test_check_reports_bsn_and_recommender_progress(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, [RECOMMENDER, SECOND_RECOMMENDER]),
+            ),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "1.0000000")),
+        )
+        session.add(
+            horizon_url(SECOND_RECOMMENDER),
+            FakeResponse(200, horizon_payload(SECOND_RECOMMENDER, "1.0000000")),
+        )
+        events: list[CheckProgress] = []
+
+        result = await make_gateway(session).check(CANDIDATE, progress=events.append)
+
+        self.assertEqual(result.status, RecommendationStatus.UNQUALIFIED)
+        self.assertEqual(
+            events,
+            [
+                CheckProgress(CheckStage.BSN_FETCHED, total=2),
+                CheckProgress(CheckStage.RECOMMENDER_VERIFIED, 1, 2),
+                CheckProgress(CheckStage.RECOMMENDER_VERIFIED, 2, 2),
+            ],
+        )
+
     async def test_horizon_requests_are_globally_limited_to_four(self) -> None:
         recommenders = [Keypair.random().public_key for _ in range(5)]
         session = FakeSession()
@@ -524,6 +855,606 @@ class RecommendationGatewayTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result.status, RecommendationStatus.UNQUALIFIED)
         self.assertEqual(session.max_active_requests, 4)
 
+    async def test_recommender_tasks_are_started_only_as_slots_free(self) -> None:
+        recommenders = [Keypair.random().public_key for _ in range(10)]
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(200, bsn_payload(CANDIDATE, recommenders)),
+        )
+        session.add(
+            horizon_url(recommenders[0]),
+            FakeResponse(200, horizon_payload(recommenders[0], "0.0000000")),
+        )
+        session.add(
+            horizon_url(recommenders[1]),
+            FakeResponse(200, horizon_payload(recommenders[1], "5.0000000")),
+        )
+        for recommender in recommenders[2:]:
+            session.add(
+                horizon_url(recommender),
+                FakeResponse(
+                    200,
+                    horizon_payload(recommender, "0.0000000"),
+                    delay=0.05,
+                ),
+            )
+
+        result = await make_gateway(session).check(CANDIDATE)
+
+        self.assertEqual(result.status, RecommendationStatus.QUALIFIED)
+        requested = [call[0] for call in session.calls if "horizon" in call[0]]
+        # Only the four initial slots ever reached Horizon; the qualifier
+        # answered before any later recommender was started.
+        self.assertEqual(requested, [horizon_url(item) for item in recommenders[:4]])
+
+    async def test_known_qualifier_is_checked_first(self) -> None:
+        recommenders = [Keypair.random().public_key for _ in range(8)]
+        qualifier = recommenders[-1]
+        hints = RecommenderHints()
+        hints.record(qualifier, Decimal("5"))
+        for recommender in recommenders[:-1]:
+            hints.record(recommender, Decimal("0"))
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(200, bsn_payload(CANDIDATE, recommenders)),
+        )
+        session.add(
+            horizon_url(qualifier),
+            FakeResponse(200, horizon_payload(qualifier, "5.0000000")),
+        )
+        for recommender in recommenders[:-1]:
+            session.add(
+                horizon_url(recommender),
+                FakeResponse(
+                    200,
+                    horizon_payload(recommender, "0.0000000"),
+                    delay=0.05,
+                ),
+            )
+
+        result = await make_gateway(session, recommender_hints=hints).check(CANDIDATE)
+
+        self.assertEqual(result.qualifying_evidence.recommender, qualifier)  # type: ignore[union-attr]
+        self.assertEqual(
+            [call[0] for call in session.calls if "horizon" in call[0]],
+            [horizon_url(qualifier)],
+        )
+
+    async def test_stale_qualifier_hint_falls_back_to_all_recommenders(self) -> None:
+        hints = RecommenderHints()
+        hints.record(RECOMMENDER, Decimal("5"))
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, [SECOND_RECOMMENDER, RECOMMENDER]),
+            ),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "0.0000000")),
+        )
+        session.add(
+            horizon_url(SECOND_RECOMMENDER),
+            FakeResponse(200, horizon_payload(SECOND_RECOMMENDER, "2.0000000")),
+        )
+
+        result = await make_gateway(session, recommender_hints=hints).check(CANDIDATE)
+
+        self.assertEqual(result.qualifying_evidence.recommender, SECOND_RECOMMENDER)  # type: ignore[union-attr]
+        self.assertFalse(hints.is_likely_qualified(RECOMMENDER, Decimal("2")))
+
+    async def test_observed_balances_update_hints(self) -> None:
+        hints = RecommenderHints()
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, [RECOMMENDER, SECOND_RECOMMENDER]),
+            ),
+        )
+        session.add(horizon_url(RECOMMENDER), FakeResponse(404))
+        session.add(
+            horizon_url(SECOND_RECOMMENDER),
+            FakeResponse(200, horizon_payload(SECOND_RECOMMENDER, "3.0000000")),
+        )
+
+        await make_gateway(session, recommender_hints=hints).check(CANDIDATE)
+
+        self.assertEqual(
+            hints.order([RECOMMENDER, SECOND_RECOMMENDER], Decimal("2")),
+            [SECOND_RECOMMENDER, RECOMMENDER],
+        )
+
+    async def test_cached_recommender_is_not_fetched_again(self) -> None:
+        session = FakeSession()
+        second_candidate = SECOND_RECOMMENDER
+        session.add(
+            bsn_url(),
+            FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER])),
+        )
+        session.add(
+            bsn_url(second_candidate),
+            FakeResponse(200, bsn_payload(second_candidate, [RECOMMENDER])),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "5.0000000")),
+        )
+        gateway = make_gateway(session, account_cache=AccountCache())
+
+        first = await gateway.check(CANDIDATE)
+        second = await gateway.check(second_candidate)
+
+        self.assertEqual(first.status, RecommendationStatus.QUALIFIED)
+        self.assertEqual(second.status, RecommendationStatus.QUALIFIED)
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertTrue(second.evidence[0].cached)
+        horizon_calls = [
+            call for call in session.calls if "horizon" in call[0]
+        ]
+        self.assertEqual(len(horizon_calls), 1)
+
+    async def test_cached_404_is_reused_but_errors_are_not_cached(self) -> None:
+        session = FakeSession()
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(404),
+        )
+        session.add(
+            horizon_url(SECOND_RECOMMENDER),
+            FakeResponse(503),
+            FakeResponse(503),
+            FakeResponse(200, horizon_payload(SECOND_RECOMMENDER, "1.0000000")),
+        )
+        gateway = make_gateway(session, account_cache=AccountCache())
+
+        self.assertIsNone(await gateway.load_horizon_account(RECOMMENDER))
+        self.assertIsNone(await gateway.load_horizon_account(RECOMMENDER))
+        with self.assertRaises(RecommendationGatewayError):
+            await gateway.load_horizon_account(SECOND_RECOMMENDER)
+        account = await gateway.load_horizon_account(SECOND_RECOMMENDER)
+
+        self.assertEqual(account.account_id, SECOND_RECOMMENDER)  # type: ignore[union-attr]
+        self.assertEqual(
+            [call[0] for call in session.calls].count(horizon_url(RECOMMENDER)),
+            1,
+        )
+
+    async def test_check_can_force_fresh_recommender_reads(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER])),
+            FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER])),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "5.0000000")),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "1.0000000")),
+        )
+        gateway = make_gateway(session, account_cache=AccountCache())
+
+        cached = await gateway.check(CANDIDATE)
+        fresh = await gateway.check(CANDIDATE, use_cache=False)
+
+        self.assertEqual(cached.status, RecommendationStatus.QUALIFIED)
+        self.assertEqual(fresh.status, RecommendationStatus.UNQUALIFIED)
+
+    async def test_concurrent_checks_share_one_bsn_and_horizon_fetch(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, [RECOMMENDER]),
+                delay=0.02,
+            ),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(
+                200,
+                horizon_payload(RECOMMENDER, "2.0000000"),
+                delay=0.02,
+            ),
+        )
+        gateway = make_gateway(session)
+
+        results = await asyncio.gather(
+            *(gateway.check(CANDIDATE) for _ in range(3))
+        )
+
+        self.assertTrue(
+            all(
+                result.status is RecommendationStatus.QUALIFIED
+                for result in results
+            )
+        )
+        self.assertEqual(
+            [call[0] for call in session.calls],
+            [bsn_url(), horizon_url(RECOMMENDER)],
+        )
+        self.assertEqual(len(gateway._in_flight), 0)
+
+    async def test_cancelled_caller_does_not_cancel_shared_fetch(self) -> None:
+        session = FakeSession()
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(
+                200,
+                horizon_payload(RECOMMENDER, "2.0000000"),
+                delay=0.05,
+            ),
+        )
+        gateway = make_gateway(session)
+
+        first = asyncio.create_task(gateway.load_horizon_account(RECOMMENDER))
+        second = asyncio.create_task(gateway.load_horizon_account(RECOMMENDER))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        account = await second
+
+        self.assertTrue(first.cancelled())
+        self.assertEqual(account.account_id, RECOMMENDER)  # type: ignore[union-attr]
+        self.assertEqual(len(session.calls), 1)
+
+    async def test_shared_fetch_stops_when_last_caller_is_cancelled(self) -> None:
+        session = FakeSession()
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(
+                200,
+                horizon_payload(RECOMMENDER, "2.0000000"),
+                delay=1.0,
+            ),
+        )
+        gateway = make_gateway(session)
+
+        caller = asyncio.create_task(gateway.load_horizon_account(RECOMMENDER))
+        await asyncio.sleep(0.01)
+        (flight,) = gateway._in_flight._flights.values()
+        caller.cancel()
+        await asyncio.gather(caller, flight.task, return_exceptions=True)
+
+        self.assertTrue(flight.task.cancelled())
+        self.assertEqual(len(gateway._in_flight), 0)
+
+    async def test_holder_pages_are_followed_by_paging_token(self) -> None:
+        filler = [
+            (Keypair.random().public_key, "0.5000000")
+            for _ in range(DEFAULT_HOLDER_PAGE_SIZE - 1)
+        ]
+        session = FakeSession()
+        session.add(
+            holders_url(),
+            FakeResponse(200, holders_page(*filler, (RECOMMENDER, "2.0000000"))),
+        )
+        session.add(
+            holders_url(RECOMMENDER),
+            FakeResponse(200, holders_page((SECOND_RECOMMENDER, "3.0000000"))),
+        )
+
+        qualified = await make_gateway(session).load_qualified_holders()
+
+        self.assertEqual(qualified, {RECOMMENDER, SECOND_RECOMMENDER})
+        self.assertEqual(len(session.calls), 2)
+
+    async def test_malformed_holder_page_fails_the_whole_load(self) -> None:
+        session = FakeSession()
+        session.add(
+            holders_url(),
+            FakeResponse(200, holders_page(("not-an-account", "5.0000000"))),
+        )
+
+        with self.assertRaises(RecommendationGatewayError) as raised:
+            await make_gateway(session).load_qualified_holders()
+
+        self.assertEqual(
+            raised.exception.code,
+            GatewayErrorCode.HORIZON_INVALID_RESPONSE,
+        )
+
+    async def test_fresh_holder_index_answers_without_account_lookups(self) -> None:
+        index = HolderIndex()
+        index.replace({SECOND_RECOMMENDER})
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER, SECOND_RECOMMENDER])),
+        )
+        gateway = make_gateway(session, holder_index=index)
+
+        result = await gateway.check(CANDIDATE)
+
+        self.assertIs(result.status, RecommendationStatus.QUALIFIED)
+        self.assertEqual(result.evidence[0].recommender, SECOND_RECOMMENDER)
+        self.assertTrue(result.cached)
+        self.assertEqual(session.calls[0][0], bsn_url())
+        self.assertEqual(len(session.calls), 1)
+
+    async def test_holder_index_miss_and_fresh_reads_use_account_lookups(self) -> None:
+        index = HolderIndex()
+        index.replace({SECOND_RECOMMENDER})
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER])),
+            FakeResponse(200, bsn_payload(CANDIDATE, [SECOND_RECOMMENDER])),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "2.0000000")),
+        )
+        session.add(
+            horizon_url(SECOND_RECOMMENDER),
+            FakeResponse(200, horizon_payload(SECOND_RECOMMENDER, "0.1000000")),
+        )
+        gateway = make_gateway(session, holder_index=index)
+
+        missed = await gateway.check(CANDIDATE)
+        forced = await gateway.check(CANDIDATE, use_cache=False)
+
+        self.assertIs(missed.status, RecommendationStatus.QUALIFIED)
+        self.assertEqual(missed.evidence[0].mtlap_balance, Decimal("2.0000000"))
+        self.assertFalse(missed.cached)
+        # A final decision never trusts the index over the live balance.
+        self.assertIs(forced.status, RecommendationStatus.UNQUALIFIED)
+
+    async def test_fresh_read_checks_the_holder_index_member_first(self) -> None:
+        index = HolderIndex()
+        index.replace({SECOND_RECOMMENDER})
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER, SECOND_RECOMMENDER])),
+        )
+        session.add(
+            horizon_url(SECOND_RECOMMENDER),
+            FakeResponse(200, horizon_payload(SECOND_RECOMMENDER, "3.0000000")),
+        )
+        gateway = make_gateway(session, holder_index=index)
+
+        result = await gateway.check(CANDIDATE, use_cache=False)
+
+        self.assertIs(result.status, RecommendationStatus.QUALIFIED)
+        self.assertFalse(result.cached)
+        self.assertEqual(result.evidence[0].mtlap_balance, Decimal("3.0000000"))
+        self.assertEqual(
+            [url for url, _ in session.calls],
+            [bsn_url(), horizon_url(SECOND_RECOMMENDER)],
+        )
+
+    async def test_stale_holder_index_is_not_refreshed_by_a_check(self) -> None:
+        clock = [0.0]
+        index = HolderIndex(max_age=60, clock=lambda: clock[0])
+        index.replace({RECOMMENDER})
+        clock[0] = 61
+        session = FakeSession()
+        session.add(bsn_url(), FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER])))
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "2.0000000")),
+        )
+        gateway = make_gateway(session, holder_index=index)
+
+        result = await gateway.check(CANDIDATE)
+
+        self.assertIs(result.status, RecommendationStatus.QUALIFIED)
+        self.assertEqual(
+            [url for url, _ in session.calls],
+            [bsn_url(), horizon_url(RECOMMENDER)],
+        )
+        self.assertIsNone(index._refresh_task)
+
+    def make_cached_gateway(self, session: FakeSession):
+        clock = [1000.0]
+        cache = BsnCache(ttl=60, stale_ttl=300, clock=lambda: clock[0])
+        return make_gateway(session, bsn_cache=cache), clock
+
+    async def test_fresh_bsn_list_is_reused(self) -> None:
+        session = FakeSession()
+        session.add(bsn_url(), FakeResponse(200, bsn_payload(CANDIDATE, [RECOMMENDER])))
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "1.0000000")),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "1.0000000")),
+        )
+        gateway, _clock = self.make_cached_gateway(session)
+
+        first = await gateway.check(CANDIDATE)
+        second = await gateway.check(CANDIDATE)
+
+        self.assertEqual([url for url, _ in session.calls].count(bsn_url()), 1)
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+
+    async def test_forced_fresh_check_revalidates_a_fresh_bsn_list(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, []),
+                headers={"Content-Type": "application/json", "ETag": '"v1"'},
+            ),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, [RECOMMENDER]),
+                headers={"Content-Type": "application/json", "ETag": '"v2"'},
+            ),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "3.0000000")),
+        )
+        gateway, _clock = self.make_cached_gateway(session)
+
+        first = await gateway.check(CANDIDATE)
+        second = await gateway.check(CANDIDATE, use_cache=False)
+
+        self.assertIs(first.status, RecommendationStatus.NONE)
+        self.assertIs(second.status, RecommendationStatus.QUALIFIED)
+        bsn_calls = [call for call in session.calls if call[0] == bsn_url()]
+        self.assertEqual(len(bsn_calls), 2)
+        self.assertEqual(bsn_calls[1][1]["headers"]["If-None-Match"], '"v1"')
+
+    async def test_stale_bsn_list_is_served_while_revalidating(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, [RECOMMENDER]),
+                headers={"Content-Type": "application/json", "ETag": '"v1"'},
+            ),
+            FakeResponse(304, headers={"ETag": '"v1"'}, delay=0.05),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "3.0000000")),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "3.0000000")),
+        )
+        gateway, clock = self.make_cached_gateway(session)
+        await gateway.check(CANDIDATE)
+        clock[0] += 120
+
+        result = await gateway.check(CANDIDATE)
+        # The repeat check did not wait for the slow revalidation.
+        self.assertEqual(len(gateway._bsn_revalidations), 1)
+        self.assertIs(result.status, RecommendationStatus.QUALIFIED)
+        await asyncio.gather(*gateway._bsn_revalidations)
+
+        _url, kwargs = [call for call in session.calls if call[0] == bsn_url()][1]
+        self.assertEqual(kwargs["headers"]["If-None-Match"], '"v1"')
+        self.assertTrue(gateway._bsn_cache.is_fresh(gateway._bsn_cache.get(CANDIDATE)))
+
+    async def test_repeat_check_may_reject_on_a_stale_bsn_list(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, [RECOMMENDER]),
+                headers={"Content-Type": "application/json", "ETag": '"v1"'},
+            ),
+            FakeResponse(304, headers={"ETag": '"v1"'}, delay=0.05),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "0.5000000")),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "0.5000000")),
+        )
+        gateway, clock = self.make_cached_gateway(session)
+        await gateway.check(CANDIDATE)
+        clock[0] += 120
+
+        result = await gateway.check(
+            CANDIDATE,
+            use_cache=False,
+            allow_stale_bsn=True,
+        )
+        # The recommender was read live, but the list was not waited for.
+        self.assertEqual(len(gateway._bsn_revalidations), 1)
+        self.assertIs(result.status, RecommendationStatus.UNQUALIFIED)
+        self.assertTrue(result.cached)
+        await asyncio.gather(*gateway._bsn_revalidations)
+
+        self.assertEqual(
+            [url for url, _ in session.calls].count(horizon_url(RECOMMENDER)),
+            2,
+        )
+
+    async def test_stale_empty_bsn_list_is_revalidated_before_answering(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, []),
+                headers={"Content-Type": "application/json", "ETag": '"v1"'},
+            ),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, [RECOMMENDER]),
+                headers={"Content-Type": "application/json", "ETag": '"v2"'},
+            ),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "3.0000000")),
+        )
+        gateway, clock = self.make_cached_gateway(session)
+
+        first = await gateway.check(CANDIDATE)
+        clock[0] += 120
+        second = await gateway.check(CANDIDATE)
+
+        self.assertIs(first.status, RecommendationStatus.NONE)
+        self.assertIs(second.status, RecommendationStatus.QUALIFIED)
+        self.assertEqual(gateway._bsn_cache.get(CANDIDATE).etag, '"v2"')
+
+    async def test_failed_background_revalidation_keeps_serving_stale_list(self) -> None:
+        session = FakeSession()
+        session.add(
+            bsn_url(),
+            FakeResponse(
+                200,
+                bsn_payload(CANDIDATE, [RECOMMENDER]),
+                headers={"Content-Type": "application/json", "ETag": '"v1"'},
+            ),
+            FakeResponse(403),
+        )
+        session.add(
+            horizon_url(RECOMMENDER),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "3.0000000")),
+            FakeResponse(200, horizon_payload(RECOMMENDER, "3.0000000")),
+        )
+        gateway, clock = self.make_cached_gateway(session)
+        await gateway.check(CANDIDATE)
+        clock[0] += 120
+
+        with self.assertLogs("mtla_bot.recommendation_gateway", level="WARNING"):
+            result = await gateway.check(CANDIDATE)
+            await asyncio.gather(*gateway._bsn_revalidations, return_exceptions=True)
+            await asyncio.sleep(0)
+
+        self.assertIs(result.status, RecommendationStatus.QUALIFIED)
+        self.assertEqual(gateway._bsn_cache.get(CANDIDATE).recommenders, (RECOMMENDER,))
+
+    async def test_body_is_parsed_whatever_the_declared_length(self) -> None:
+        raw = json.dumps(horizon_payload(RECOMMENDER, "2.0000000")).encode()
+        for declared in (None, len(raw), len(raw) // 2, len(raw) * 2):
+            with self.subTest(content_length=declared):
+                session = FakeSession()
+                session.add(
+                    horizon_url(RECOMMENDER),
+                    FakeResponse(200, raw, content_length=declared),
+                )
+
+                account = await make_gateway(session).load_horizon_account(RECOMMENDER)
+
+                self.assertEqual(account.account_id, RECOMMENDER)  # type: ignore[union-attr]
+
+    async def test_invalid_utf8_and_truncated_json_fail_closed(self) -> None:
+        for body in (b'{"account_id": "\xff"}', b'{"account_id": '):
+            with self.subTest(body=body):
+                session = FakeSession()
+                session.add(horizon_url(RECOMMENDER), FakeResponse(200, body))
+
+                with self.assertRaises(RecommendationGatewayError) as raised:
+                    await make_gateway(session).load_horizon_account(RECOMMENDER)
+
+                self.assertEqual(
+                    raised.exception.code,
+                    GatewayErrorCode.HORIZON_INVALID_RESPONSE,
+                )
+
     async def test_bsn_body_limit_fails_closed(self) -> None:
         session = FakeSession()
         session.add(bsn_url(), FakeResponse(200, bsn_payload(CANDIDATE, [])))
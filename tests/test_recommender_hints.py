@@ -0,0 +1,69 @@
+from decimal import Decimal
+import unittest
+
+from mtla_bot.recommender_hints import RecommenderHints
+
+
+MINIMUM = Decimal("2")
+
+
+class RecommenderHintsTest(unittest.TestCase):
+    def test_unknown_recommenders_keep_their_order(self) -> None:
+        hints = RecommenderHints()
+
+        self.assertEqual(hints.order(["a", "b", "c"], MINIMUM), ["a", "b", "c"])
+
+    def test_qualifiers_first_then_unknown_then_poor_then_missing(self) -> None:
+        hints = RecommenderHints()
+        hints.record("missing", None)
+        hints.record("poor", Decimal("1"))
+        hints.record("rich", Decimal("5"))
+
+        self.assertEqual(
+            hints.order(["missing", "poor", "new", "rich"], MINIMUM),
+            ["rich", "new", "poor", "missing"],
+        )
+
+    def test_most_recently_confirmed_qualifier_comes_first(self) -> None:
+        hints = RecommenderHints()
+        hints.record("older", Decimal("3"))
+        hints.record("newer", Decimal("2"))
+
+        self.assertEqual(hints.order(["older", "newer"], MINIMUM), ["newer", "older"])
+
+        hints.record("older", Decimal("3"))
+
+        self.assertEqual(hints.order(["older", "newer"], MINIMUM), ["older", "newer"])
+
+    def test_a_lost_balance_demotes_a_former_qualifier(self) -> None:
+        hints = RecommenderHints()
+        hints.record("a", Decimal("5"))
+        hints.record("a", Decimal("0"))
+
+        self.assertEqual(hints.order(["a", "b"], MINIMUM), ["b", "a"])
+
+    def test_likely_qualified_needs_a_known_sufficient_balance(self) -> None:
+        hints = RecommenderHints()
+        hints.record("rich", Decimal("2"))
+        hints.record("missing", None)
+
+        self.assertTrue(hints.is_likely_qualified("rich", MINIMUM))
+        self.assertFalse(hints.is_likely_qualified("missing", MINIMUM))
+        self.assertFalse(hints.is_likely_qualified("new", MINIMUM))
+
+    def test_least_recently_observed_hint_is_evicted(self) -> None:
+        hints = RecommenderHints(max_size=2)
+        hints.record("a", Decimal("5"))
+        hints.record("b", Decimal("5"))
+        hints.record("c", Decimal("5"))
+
+        self.assertEqual(len(hints), 2)
+        self.assertEqual(hints.order(["a", "b", "c"], MINIMUM), ["c", "b", "a"])
+
+    def test_rejects_invalid_size(self) -> None:
+        with self.assertRaises(ValueError):
+            RecommenderHints(max_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from telegram.error import BadRequest
+
+from mtla_bot.status_message import ThrottledStatusMessage
+
+from fakes import FakeClock
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class ThrottledStatusMessageTest(unittest.IsolatedAsyncioTestCase):
+    async def test_updates_within_the_interval_are_coalesced(self) -> None:
+        clock = FakeClock(100.0)
+        message = Mock(edit_text=AsyncMock())
+        status = ThrottledStatusMessage(
+            message,
+            "checking",
+            min_interval=1.5,
+            clock=clock,
+            sleep=clock.sleep,
+        )
+
+        status.update("step 1")
+        status.update("step 2")
+        await settle()
+
+        message.edit_text.assert_awaited_once_with("step 2")
+        self.assertEqual(clock.sleeps, [1.5])
+
+    async def test_next_edit_waits_for_the_interval(self) -> None:
+        clock = FakeClock(100.0)
+        message = Mock(edit_text=AsyncMock())
+        status = ThrottledStatusMessage(
+            message,
+            "checking",
+            min_interval=1.5,
+            clock=clock,
+            sleep=clock.sleep,
+        )
+        clock.now += 2
+
+        status.update("step 1")
+        await settle()
+        clock.now += 0.5
+        status.update("step 2")
+        await settle()
+
+        self.assertEqual(
+            [call.args[0] for call in message.edit_text.await_args_list],
+            ["step 1", "step 2"],
+        )
+        self.assertEqual(clock.sleeps, [1.0])
+
+    async def test_unchanged_text_is_not_sent(self) -> None:
+        message = Mock(edit_text=AsyncMock())
+        status = ThrottledStatusMessage(message, "checking", min_interval=0)
+
+        status.update("checking")
+        await settle()
+
+        message.edit_text.assert_not_awaited()
+
+    async def test_close_drops_pending_edit(self) -> None:
+        clock = FakeClock(100.0)
+        message = Mock(edit_text=AsyncMock())
+        status = ThrottledStatusMessage(
+            message,
+            "checking",
+            min_interval=1.5,
+            clock=clock,
+            sleep=AsyncMock(side_effect=asyncio.Event().wait),
+        )
+
+        status.update("step 1")
+        await settle()
+        await status.close()
+
+        message.edit_text.assert_not_awaited()
+
+    async def test_telegram_error_is_logged_and_later_updates_continue(self) -> None:
+        message = Mock(edit_text=AsyncMock(side_effect=[BadRequest("gone"), None]))
+        status = ThrottledStatusMessage(message, "checking", min_interval=0)
+
+        with self.assertLogs("mtla_bot.status_message", logging.WARNING):
+            status.update("step 1")
+            await settle()
+        status.update("step 2")
+        await settle()
+
+        message.edit_text.assert_awaited_with("step 2")
+
+
+if __name__ == "__main__":
+    unittest.main()
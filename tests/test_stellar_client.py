@@ -1,11 +1,17 @@
+import asyncio
+from dataclasses import replace
 from datetime import datetime, timezone
 from decimal import Decimal
 from types import SimpleNamespace
 import unittest
 from unittest.mock import AsyncMock, Mock
 
+from mtla_bot.address_precheck import AddressPrechecks
 from mtla_bot.bot import MTLAJoinBot
+from mtla_bot.check_progress import CheckProgress, CheckStage
+from mtla_bot.eligibility import AccountSnapshot
 from mtla_bot.recommendation_gateway import (
+    AccountLookup,
     ExternalService,
     GatewayErrorCode,
     RecommendationEvidence,
@@ -14,26 +20,20 @@ from mtla_bot.recommendation_gateway import (
     RecommendationStatus,
 )
 from mtla_bot.stellar_client import StellarClient
+from mtla_bot.user_states import AsyncUserStateManager
 
 
 ADDRESS = "G" + "A" * 55
 RECOMMENDER = "G" + "B" * 55
 
 
-def account(balance: str | None = "0"):
-    balances = [{"asset_type": "native", "balance": "10.0000000"}]
-    if balance is not None:
-        balances.append(
-            {
-                "asset_type": "credit_alphanum12",
-                "asset_code": "MTLAP",
-                "asset_issuer": (
-                    "GCNVDZIHGX473FEI7IXCUAEXUJ4BGCKEMHF36VYP5EMS7PX2QBLAMTLA"
-                ),
-                "balance": balance,
-            }
-        )
-    return SimpleNamespace(balances=balances)
+def account(balance: str | None = "0") -> AccountSnapshot:
+    return AccountSnapshot(
+        ADDRESS,
+        balance is not None,
+        Decimal(balance or "0"),
+        1 if balance is None else 2,
+    )
 
 
 def qualified_result() -> RecommendationResult:
@@ -54,42 +54,149 @@ def qualified_result() -> RecommendationResult:
 
 class StellarClientTest(unittest.IsolatedAsyncioTestCase):
     async def test_reusable_session_lifecycle_is_idempotent(self) -> None:
-        fake_session = SimpleNamespace(closed=False, close=AsyncMock())
-        factory = Mock(return_value=fake_session)
+        sessions = []
+
+        def factory(settings, stats):
+            session = SimpleNamespace(closed=False, close=AsyncMock(), settings=settings)
+            sessions.append(session)
+            return session
+
         client = StellarClient(session_factory=factory)
 
-        factory.assert_not_called()
         await client.start()
         first_gateway = client._recommendation_gateway
         await client.start()
 
-        factory.assert_called_once_with()
+        self.assertEqual(len(sessions), 2)
         self.assertIs(client._recommendation_gateway, first_gateway)
+        self.assertIs(first_gateway._horizon_session, client._http_sessions["horizon"])
+        self.assertGreater(
+            client._http_sessions["horizon"].settings.limit,
+            client._http_sessions["bsn"].settings.limit,
+        )
+        self.assertEqual(first_gateway._breakers, client.breakers)
+        self.assertEqual(
+            set(client.upstream_status()),
+            {"bsn", "horizon"},
+        )
 
         await client.close()
         await client.close()
 
-        fake_session.close.assert_awaited_once_with()
+        for session in sessions:
+            session.close.assert_awaited_once_with()
+
+    async def test_holder_index_job_stores_snapshots_per_asset(self) -> None:
+        client = StellarClient(
+            session_factory=lambda _settings, _stats: SimpleNamespace(
+                closed=False,
+                close=AsyncMock(),
+            )
+        )
+        storage_call = AsyncMock(return_value=None)
+
+        self.assertIsNone(client.holder_index_job(storage_call))
+        await client.start()
+        job = client.holder_index_job(storage_call)
+        await job.restore()
+        await job._save_snapshot(b"", 0, "123-1")
+        await client.close()
+
+        self.assertIsNone(
+            StellarClient(recommendation_gateway=SimpleNamespace()).holder_index_job(
+                storage_call
+            )
+        )
+        asset = f"{client.mtlap_code}:{client.mtlap_issuer}"
+        self.assertEqual(
+            storage_call.await_args_list[0].args,
+            ("get_holder_index", asset, "2"),
+        )
+        self.assertEqual(
+            storage_call.await_args_list[1].args,
+            ("save_holder_index", asset, "2", b"", 0, "123-1"),
+        )
 
     async def test_candidate_and_recommendation_share_async_gateway(self) -> None:
         gateway = SimpleNamespace(
-            load_horizon_account=AsyncMock(return_value=account("0")),
+            lookup_horizon_account=AsyncMock(
+                return_value=AccountLookup(account("0"), cached=False)
+            ),
             check=AsyncMock(return_value=qualified_result()),
         )
         client = StellarClient(recommendation_gateway=gateway)
 
         snapshot = await client.get_account_info(ADDRESS)
 
-        gateway.load_horizon_account.assert_awaited_once_with(ADDRESS)
-        gateway.check.assert_awaited_once_with(ADDRESS)
-        self.assertTrue(snapshot["has_trustline"])
-        self.assertEqual(snapshot["mtlap_balance"], "0")
+        gateway.lookup_horizon_account.assert_awaited_once_with(
+            ADDRESS,
+            use_cache=True,
+        )
+        gateway.check.assert_awaited_once_with(
+            ADDRESS,
+            use_cache=True,
+            allow_stale_bsn=False,
+            progress=None,
+        )
+        self.assertFalse(snapshot["cached"])
+        self.assertIs(
+            snapshot["account"],
+            gateway.lookup_horizon_account.return_value.account,
+        )
         self.assertTrue(snapshot["recommendation"]["has_recommendation"])
 
+    async def test_fresh_snapshot_bypasses_cache_for_every_lookup(self) -> None:
+        gateway = SimpleNamespace(
+            lookup_horizon_account=AsyncMock(
+                return_value=AccountLookup(account("0"), cached=False)
+            ),
+            check=AsyncMock(return_value=qualified_result()),
+        )
+        client = StellarClient(recommendation_gateway=gateway)
+
+        snapshot = await client.get_account_info(ADDRESS, use_cache=False)
+
+        gateway.lookup_horizon_account.assert_awaited_once_with(
+            ADDRESS,
+            use_cache=False,
+        )
+        gateway.check.assert_awaited_once_with(
+            ADDRESS,
+            use_cache=False,
+            allow_stale_bsn=False,
+            progress=None,
+        )
+        self.assertFalse(snapshot["cached"])
+
+    async def test_snapshot_is_cached_only_when_a_cache_answered(self) -> None:
+        cached_result = replace(qualified_result(), cached=True)
+        gateway = SimpleNamespace(
+            lookup_horizon_account=AsyncMock(
+                side_effect=[
+                    AccountLookup(account("0"), cached=False),
+                    AccountLookup(account("0"), cached=True),
+                    AccountLookup(account("0"), cached=False),
+                ]
+            ),
+            check=AsyncMock(
+                side_effect=[qualified_result(), qualified_result(), cached_result]
+            ),
+        )
+        client = StellarClient(recommendation_gateway=gateway)
+
+        live = await client.get_account_info(ADDRESS)
+        cached_account = await client.get_account_info(ADDRESS)
+        cached_recommendation = await client.get_account_info(ADDRESS)
+
+        self.assertFalse(live["cached"])
+        self.assertTrue(cached_account["cached"])
+        self.assertTrue(cached_recommendation["cached"])
+        self.assertTrue(cached_recommendation["recommendation"]["cached"])
+
     async def test_positive_candidate_balance_skips_bsn(self) -> None:
         gateway = SimpleNamespace(
-            load_horizon_account=AsyncMock(
-                return_value=account("0.0000001")
+            lookup_horizon_account=AsyncMock(
+                return_value=AccountLookup(account("0.0000001"), cached=False)
             ),
             check=AsyncMock(),
         )
@@ -97,9 +204,36 @@ class StellarClientTest(unittest.IsolatedAsyncioTestCase):
 
         snapshot = await client.get_account_info(ADDRESS)
 
-        self.assertEqual(snapshot["mtlap_balance"], "0.0000001")
+        self.assertEqual(snapshot["account"].mtlap_balance, Decimal("0.0000001"))
         gateway.check.assert_not_awaited()
 
+    async def test_trustline_is_reported_before_bsn_is_asked(self) -> None:
+        events: list[CheckProgress] = []
+
+        async def check(*_args, **_kwargs):
+            self.assertEqual(
+                [event.stage for event in events],
+                [CheckStage.ACCOUNT_LOADED, CheckStage.TRUSTLINE_MISSING],
+            )
+            return qualified_result()
+
+        gateway = SimpleNamespace(
+            lookup_horizon_account=AsyncMock(
+                return_value=AccountLookup(account(None), cached=False)
+            ),
+            check=AsyncMock(side_effect=check),
+        )
+        client = StellarClient(recommendation_gateway=gateway)
+
+        await client.get_account_info(ADDRESS, progress=events.append)
+
+        gateway.check.assert_awaited_once_with(
+            ADDRESS,
+            use_cache=True,
+            allow_stale_bsn=False,
+            progress=events.append,
+        )
+
     async def test_recommendation_failure_stays_technical(self) -> None:
         error = RecommendationGatewayError(
             GatewayErrorCode.BSN_TIMEOUT,
@@ -108,7 +242,9 @@ class StellarClientTest(unittest.IsolatedAsyncioTestCase):
             retryable=True,
         )
         gateway = SimpleNamespace(check=AsyncMock(side_effect=error))
-        gateway.load_horizon_account = AsyncMock(return_value=account("0"))
+        gateway.lookup_horizon_account = AsyncMock(
+            return_value=AccountLookup(account("0"), cached=False)
+        )
         client = StellarClient(
             recommendation_gateway=gateway,
         )
@@ -120,7 +256,9 @@ class StellarClientTest(unittest.IsolatedAsyncioTestCase):
 
     async def test_missing_candidate_and_horizon_failure_are_distinct(self) -> None:
         missing_gateway = SimpleNamespace(
-            load_horizon_account=AsyncMock(return_value=None),
+            lookup_horizon_account=AsyncMock(
+                return_value=AccountLookup(None, cached=False)
+            ),
             check=AsyncMock(),
         )
         missing_client = StellarClient(
@@ -133,7 +271,7 @@ class StellarClientTest(unittest.IsolatedAsyncioTestCase):
             retryable=True,
         )
         failed_gateway = SimpleNamespace(
-            load_horizon_account=AsyncMock(side_effect=failure),
+            lookup_horizon_account=AsyncMock(side_effect=failure),
             check=AsyncMock(),
         )
         failed_client = StellarClient(
@@ -143,7 +281,7 @@ class StellarClientTest(unittest.IsolatedAsyncioTestCase):
         missing = await missing_client.get_account_info(ADDRESS)
         failed = await failed_client.get_account_info(ADDRESS)
 
-        self.assertFalse(missing["exists"])
+        self.assertIsNone(missing["account"])
         self.assertNotIn("error", missing)
         self.assertEqual(failed["error"], "horizon_unavailable")
 
@@ -151,11 +289,16 @@ class StellarClientTest(unittest.IsolatedAsyncioTestCase):
 class BotLifecycleTest(unittest.IsolatedAsyncioTestCase):
     async def test_ptb_hooks_start_and_close_stellar_client(self) -> None:
         bot = MTLAJoinBot.__new__(MTLAJoinBot)
+        bot.state_manager = SimpleNamespace()
         bot.stellar_client = SimpleNamespace(
             start=AsyncMock(),
+            warm_up=AsyncMock(),
             close=AsyncMock(),
+            holder_index_job=Mock(return_value=None),
         )
         bot._finalization_task = None
+        bot._holder_index_task = None
+        bot._address_prechecks = AddressPrechecks(AsyncMock())
         bot._finalization_loop = AsyncMock()
 
         await bot._post_init(SimpleNamespace())
@@ -164,6 +307,56 @@ class BotLifecycleTest(unittest.IsolatedAsyncioTestCase):
         bot.stellar_client.start.assert_awaited_once_with()
         bot.stellar_client.close.assert_awaited_once_with()
 
+    async def test_ptb_hooks_open_and_close_async_storage(self) -> None:
+        bot = MTLAJoinBot.__new__(MTLAJoinBot)
+        bot.state_manager = Mock(spec=AsyncUserStateManager)
+        bot.stellar_client = SimpleNamespace(
+            start=AsyncMock(),
+            warm_up=AsyncMock(),
+            close=AsyncMock(),
+            holder_index_job=Mock(return_value=None),
+        )
+        bot._finalization_task = None
+        bot._holder_index_task = None
+        bot._address_prechecks = AddressPrechecks(AsyncMock())
+        bot._finalization_loop = AsyncMock()
+
+        await bot._post_init(SimpleNamespace())
+        await bot._post_shutdown(SimpleNamespace())
+
+        bot.state_manager.start.assert_awaited_once_with()
+        bot.state_manager.close_connection.assert_awaited_once_with()
+
+    async def test_holder_index_job_runs_until_shutdown(self) -> None:
+        bot = MTLAJoinBot.__new__(MTLAJoinBot)
+        bot.state_manager = SimpleNamespace()
+        started = asyncio.Event()
+
+        async def run() -> None:
+            started.set()
+            await asyncio.Event().wait()
+
+        job = SimpleNamespace(run=run)
+        bot.stellar_client = SimpleNamespace(
+            start=AsyncMock(),
+            warm_up=AsyncMock(),
+            close=AsyncMock(),
+            holder_index_job=Mock(return_value=job),
+        )
+        bot._finalization_task = None
+        bot._holder_index_task = None
+        bot._address_prechecks = AddressPrechecks(AsyncMock())
+        bot._finalization_loop = AsyncMock()
+
+        await bot._post_init(SimpleNamespace())
+        await started.wait()
+        task = bot._holder_index_task
+        await bot._post_shutdown(SimpleNamespace())
+
+        bot.stellar_client.holder_index_job.assert_called_once_with(bot._state_call)
+        self.assertTrue(task.cancelled())
+        self.assertIsNone(bot._holder_index_task)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,146 @@
+import asyncio
+import inspect
+import unittest
+
+from telegram import Update
+
+from mtla_bot.messages import get_message
+from mtla_bot.update_processor import FairUpdateProcessor
+
+
+ADDRESS = "GBACH65OTKJL5VZCYCI4F4FTTODPEORFQQZVNF4PUK7X4AMGFXNP2KZZ"
+
+
+def message_update(text: str, *, user_id: int = 42, update_id: int = 1) -> Update:
+    return Update.de_json(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 1700000000,
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+                "text": text,
+            },
+        },
+        None,
+    )
+
+
+def callback_update(*, user_id: int = 42) -> Update:
+    return Update.de_json(
+        {
+            "update_id": 2,
+            "callback_query": {
+                "id": "cb",
+                "chat_instance": "ci",
+                "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+                "data": "lang_en",
+            },
+        },
+        None,
+    )
+
+
+class FairUpdateProcessorTest(unittest.IsolatedAsyncioTestCase):
+    def test_address_checks_are_classified_as_slow(self) -> None:
+        busy_users = {7}
+        processor = FairUpdateProcessor(
+            slow_limit=1,
+            fast_limit=1,
+            is_busy=busy_users.__contains__,
+        )
+
+        self.assertTrue(processor.is_slow(message_update(ADDRESS)))
+        self.assertTrue(processor.is_slow(message_update(f" {ADDRESS} ")))
+        for language in ("ru", "en"):
+            self.assertTrue(
+                processor.is_slow(
+                    message_update(get_message(language, "repeat_check"))
+                )
+            )
+        self.assertFalse(processor.is_slow(message_update("/start")))
+        self.assertFalse(processor.is_slow(message_update("hello")))
+        self.assertFalse(processor.is_slow(callback_update()))
+        self.assertFalse(processor.is_slow(object()))
+        # A busy user's update is rejected by _serialized, so it must not
+        # wait for a slow slot first.
+        self.assertFalse(processor.is_slow(message_update(ADDRESS, user_id=7)))
+
+    async def test_fast_updates_run_while_slow_pool_is_saturated(self) -> None:
+        processor = FairUpdateProcessor(slow_limit=1, fast_limit=1)
+        release = asyncio.Event()
+        events = []
+
+        async def slow_handler(marker):
+            events.append(f"start:{marker}")
+            await release.wait()
+            events.append(f"end:{marker}")
+
+        async def fast_handler():
+            events.append("fast")
+
+        first = asyncio.create_task(
+            processor.process_update(
+                message_update(ADDRESS, user_id=1),
+                slow_handler("first"),
+            )
+        )
+        second = asyncio.create_task(
+            processor.process_update(
+                message_update(ADDRESS, user_id=2),
+                slow_handler("second"),
+            )
+        )
+        await asyncio.sleep(0)
+        await processor.process_update(callback_update(user_id=3), fast_handler())
+
+        self.assertEqual(events, ["start:first", "fast"])
+        release.set()
+        await asyncio.gather(first, second)
+        self.assertEqual(
+            events,
+            ["start:first", "fast", "end:first", "start:second", "end:second"],
+        )
+
+    async def test_cancelled_waiting_update_closes_its_handler(self) -> None:
+        processor = FairUpdateProcessor(slow_limit=1, fast_limit=1)
+        release = asyncio.Event()
+
+        async def handler():
+            await release.wait()
+
+        running = asyncio.create_task(
+            processor.process_update(message_update(ADDRESS), handler())
+        )
+        await asyncio.sleep(0)
+        waiting_handler = handler()
+        waiting = asyncio.create_task(
+            processor.process_update(
+                message_update(ADDRESS, user_id=43),
+                waiting_handler,
+            )
+        )
+        await asyncio.sleep(0)
+
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(
+            inspect.getcoroutinestate(waiting_handler),
+            inspect.CORO_CLOSED,
+        )
+        release.set()
+        await running
+
+    def test_rejects_invalid_limits(self) -> None:
+        with self.assertRaises(ValueError):
+            FairUpdateProcessor(slow_limit=0)
+        with self.assertRaises(ValueError):
+            FairUpdateProcessor(fast_limit=0)
+        with self.assertRaises(ValueError):
+            FairUpdateProcessor(slow_limit=4, fast_limit=4, max_pending=7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+
+from mtla_bot.user_locks import UserLockRegistry
+
+
+class UserLockRegistryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_idle_lock_is_dropped_after_last_holder(self) -> None:
+        registry = UserLockRegistry()
+
+        async with registry.hold(42):
+            self.assertTrue(registry.is_busy(42))
+            self.assertEqual(len(registry), 1)
+
+        self.assertFalse(registry.is_busy(42))
+        self.assertEqual(len(registry), 0)
+
+    async def test_waiter_keeps_lock_alive_and_runs_after_holder(self) -> None:
+        registry = UserLockRegistry()
+        release = asyncio.Event()
+        events = []
+
+        async def first():
+            async with registry.hold(42):
+                events.append("first")
+                await release.wait()
+
+        async def second():
+            async with registry.hold(42):
+                events.append("second")
+
+        first_task = asyncio.create_task(first())
+        await asyncio.sleep(0)
+        second_task = asyncio.create_task(second())
+        await asyncio.sleep(0)
+
+        self.assertEqual(events, ["first"])
+        release.set()
+        await asyncio.gather(first_task, second_task)
+
+        self.assertEqual(events, ["first", "second"])
+        self.assertEqual(len(registry), 0)
+
+    async def test_active_task_is_tracked_only_while_held(self) -> None:
+        registry = UserLockRegistry()
+        task = asyncio.current_task()
+
+        async with registry.hold(42, task):
+            self.assertIs(registry.active_task(42), task)
+
+        self.assertIsNone(registry.active_task(42))
+
+    async def test_cancelled_waiter_releases_its_reference(self) -> None:
+        registry = UserLockRegistry()
+        release = asyncio.Event()
+
+        async def holder():
+            async with registry.hold(42):
+                await release.wait()
+
+        async def waiter():
+            async with registry.hold(42):
+                pass
+
+        holder_task = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiter_task = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        waiter_task.cancel()
+        await asyncio.gather(waiter_task, return_exceptions=True)
+        release.set()
+        await holder_task
+
+        self.assertEqual(len(registry), 0)
+
+    async def test_many_sequential_users_leave_no_entries(self) -> None:
+        registry = UserLockRegistry()
+
+        for user_id in range(1000):
+            async with registry.hold(user_id):
+                pass
+
+        self.assertEqual(len(registry), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
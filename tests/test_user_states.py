@@ -1,7 +1,8 @@
+import inspect
 import unittest
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
-from mtla_bot.user_states import UserStateManager
+from mtla_bot.user_states import AsyncUserStateManager, UserStateManager
 
 
 class UserStateCompatibilityTest(unittest.TestCase):
@@ -53,5 +54,60 @@ class UserStateCompatibilityTest(unittest.TestCase):
         manager.db.get_finalizing_users.assert_called_once_with(20, 3)
 
 
+class AsyncUserStateManagerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_documents_use_same_legacy_safe_loader(self) -> None:
+        manager = AsyncUserStateManager.__new__(AsyncUserStateManager)
+        manager.db = Mock()
+        manager.db.get_user = AsyncMock(
+            return_value={"user_id": 42, "future_field": "ignored"},
+        )
+        manager.db.get_finalizing_users = AsyncMock(
+            return_value=[{"user_id": 43, "state": "finalizing"}],
+        )
+
+        loaded = await manager.get_user(42)
+        batch = await manager.get_finalizing_users(20, 3)
+
+        self.assertEqual(loaded.user_id, 42)
+        self.assertIsNone(loaded.username)
+        self.assertEqual(batch[0].state, "finalizing")
+        manager.db.get_finalizing_users.assert_awaited_once_with(20, 3)
+
+    async def test_delegated_writes_are_awaitable(self) -> None:
+        manager = AsyncUserStateManager.__new__(AsyncUserStateManager)
+        manager.db = Mock()
+        manager.db.transition_attempt = AsyncMock(return_value=True)
+
+        result = await manager.transition_attempt(
+            42,
+            "attempt-current",
+            "agreement",
+            "entering_address",
+        )
+
+        self.assertTrue(result)
+        manager.db.transition_attempt.assert_awaited_once_with(
+            42,
+            "attempt-current",
+            "agreement",
+            "entering_address",
+            None,
+        )
+
+    def test_mirrors_every_sync_method_as_a_coroutine_function(self) -> None:
+        public = [
+            name
+            for name in vars(UserStateManager)
+            if not name.startswith("_")
+        ]
+
+        self.assertFalse(issubclass(AsyncUserStateManager, UserStateManager))
+        for name in public:
+            with self.subTest(method=name):
+                self.assertTrue(
+                    inspect.iscoroutinefunction(getattr(AsyncUserStateManager, name)),
+                )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,182 @@
+import asyncio
+from types import SimpleNamespace
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+import aiohttp
+from telegram import Bot, Update
+
+from mtla_bot.bot import MTLAJoinBot
+from mtla_bot.webhook import SECRET_TOKEN_HEADER, WebhookServer
+
+
+SECRET = "local-webhook-secret_1"
+UPDATE = {
+    "update_id": 1001,
+    "message": {
+        "message_id": 7,
+        "date": 1700000000,
+        "chat": {"id": 42, "type": "private"},
+        "from": {"id": 42, "is_bot": False, "first_name": "Candidate"},
+        "text": "/start",
+    },
+}
+
+
+class SlowQueue(asyncio.Queue):
+    """Update queue whose put blocks until the test releases it."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.entered = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def put(self, item) -> None:
+        self.entered.set()
+        await self.release.wait()
+        await super().put(item)
+
+
+class FakeTelegram:
+    """Minimal stand-in for Telegram's servers POSTing to the webhook."""
+
+    def __init__(self, server: WebhookServer) -> None:
+        host, port = server.addresses[0][:2]
+        self.url = f"http://{host}:{port}/telegram"
+
+    async def post(self, payload, *, secret: str | None = SECRET, **kwargs):
+        headers = {} if secret is None else {SECRET_TOKEN_HEADER: secret}
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                self.url,
+                json=payload,
+                headers=headers,
+                **kwargs,
+            ) as response:
+                return response.status
+
+
+class WebhookServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.application = SimpleNamespace(
+            bot=Bot("123456:ABC_def-123"),
+            update_queue=asyncio.Queue(),
+        )
+        self.server = WebhookServer(
+            self.application,
+            secret_token=SECRET,
+            host="127.0.0.1",
+            port=0,
+            drain_timeout=2,
+        )
+        await self.server.start()
+        self.telegram = FakeTelegram(self.server)
+
+    async def asyncTearDown(self) -> None:
+        await self.server.stop()
+
+    async def test_authenticated_update_reaches_application_queue(self) -> None:
+        status = await self.telegram.post(UPDATE)
+
+        self.assertEqual(status, 200)
+        update = self.application.update_queue.get_nowait()
+        self.assertIsInstance(update, Update)
+        self.assertEqual(update.update_id, 1001)
+        self.assertEqual(update.effective_user.id, 42)
+        self.assertEqual(update.effective_message.text, "/start")
+
+    async def test_missing_or_wrong_secret_is_rejected(self) -> None:
+        for secret in (None, "", "wrong-secret", SECRET + "x"):
+            with self.subTest(secret_present=bool(secret)):
+                status = await self.telegram.post(UPDATE, secret=secret)
+
+                self.assertEqual(status, 403)
+        self.assertTrue(self.application.update_queue.empty())
+
+    async def test_malformed_updates_are_rejected(self) -> None:
+        for payload in ([], {"message": {}}, "not-an-update"):
+            with self.subTest(payload=type(payload).__name__):
+                status = await self.telegram.post(payload)
+
+                self.assertEqual(status, 400)
+        self.assertTrue(self.application.update_queue.empty())
+
+    async def test_in_flight_update_is_drained_on_stop(self) -> None:
+        queue = SlowQueue()
+        self.application.update_queue = queue
+        delivery = asyncio.create_task(self.telegram.post(UPDATE))
+        await queue.entered.wait()
+
+        stopping = asyncio.create_task(self.server.stop())
+        await asyncio.sleep(0.05)
+        self.assertFalse(stopping.done())
+        queue.release.set()
+
+        self.assertEqual(await delivery, 200)
+        await stopping
+        self.assertEqual(queue.get_nowait().update_id, 1001)
+
+    def test_rejects_invalid_settings(self) -> None:
+        with self.assertRaises(ValueError):
+            WebhookServer(self.application, secret_token="")
+        with self.assertRaises(ValueError):
+            WebhookServer(self.application, secret_token=SECRET, path="hook")
+
+
+class WebhookRunTest(unittest.IsolatedAsyncioTestCase):
+    async def test_webhook_run_mirrors_polling_lifecycle(self) -> None:
+        events = []
+        stop_signal = asyncio.Event()
+
+        def record(name):
+            async def recorder(*_args, **_kwargs):
+                events.append(name)
+            return recorder
+
+        async def set_webhook(**kwargs):
+            events.append("set_webhook")
+            self.assertEqual(kwargs["secret_token"], SECRET)
+            self.assertFalse(kwargs["drop_pending_updates"])
+            stop_signal.set()
+
+        application = SimpleNamespace(
+            bot=SimpleNamespace(set_webhook=set_webhook),
+            update_queue=asyncio.Queue(),
+            initialize=record("initialize"),
+            start=record("start"),
+            stop=record("stop"),
+            shutdown=record("shutdown"),
+        )
+        bot = MTLAJoinBot.__new__(MTLAJoinBot)
+        bot._post_init = AsyncMock(side_effect=record("post_init"))
+        bot._post_shutdown = AsyncMock(side_effect=record("post_shutdown"))
+        server = Mock(
+            start=AsyncMock(side_effect=record("server_start")),
+            stop=AsyncMock(side_effect=record("server_stop")),
+        )
+
+        with (
+            patch("mtla_bot.bot.WebhookServer", return_value=server),
+            patch("mtla_bot.bot.config.WEBHOOK_SECRET_TOKEN", SECRET),
+            patch("mtla_bot.bot.config.WEBHOOK_URL", "https://bot.example/telegram"),
+        ):
+            await bot._run_webhook(application, stop_signal)
+
+        self.assertEqual(
+            events,
+            [
+                "initialize",
+                "post_init",
+                "start",
+                "server_start",
+                "set_webhook",
+                "server_stop",
+                "stop",
+                "post_shutdown",
+                "shutdown",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()